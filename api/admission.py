@@ -0,0 +1,136 @@
+"""
+Admission Control
+Decide up front whether an enrichment can finish within its deadline
+
+Provider rate limits are low (a few calls a minute), so under a burst most
+of an enrichment's time is spent queued for rate-limit tokens. Before any
+work starts, the controller estimates that wait for each provider the
+request needs:
+
+    (callers ahead + 1 - tokens available) / refill rate
+
+where callers ahead is the larger of the threads already blocked on the
+limiter (from any caller, e.g. job workers) and the admitted, unfinished
+API requests drawing on it. The slowest provider's wait plus its median
+latency is the estimate. Requests that would miss their deadline are
+rejected with 429 and a Retry-After of the time the backlog needs to drain
+far enough. Once `max_inflight` requests are running, requests are
+rejected with 503 and a Retry-After of the earliest in-flight deadline.
+"""
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from src.agents.base import EnrichmentAgent
+from src.clients.adaptive_timeout import AdaptiveTimeouts
+from src.clients.rate_limiter import RateLimiter
+from src.telemetry.metrics import API_ADMISSION
+
+
+class Rejected(Exception):
+    """A request turned away before any work started"""
+
+    def __init__(self, status_code: int, retry_after: float, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        # Retry-After is whole seconds; round up so retrying then should succeed
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.detail = detail
+
+
+def limiter_name(agent: EnrichmentAgent) -> Optional[str]:
+    """Rate limiter an agent's enrich() waits on (set by @rate_limit)"""
+    return getattr(agent.enrich, "limiter_name", None)
+
+
+class Admission:
+    """One admitted request; release() when its work has finished"""
+
+    def __init__(self, controller: "AdmissionController", limiters: List[str], deadline: float):
+        self.controller = controller
+        self.limiters = limiters
+        self.deadline = deadline
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.controller._release(self)
+
+
+class AdmissionController:
+    """Bounds in-flight API enrichments and rejects those that cannot meet their deadline"""
+
+    def __init__(self, max_inflight: int = 32, clock=time.monotonic):
+        self.max_inflight = max_inflight
+        self.clock = clock
+        self._inflight: List[Admission] = []
+        self._needs: Dict[str, int] = {}  # Admitted, unfinished requests per limiter
+        self._lock = threading.Lock()
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def _limiter_wait(self, name: str) -> float:
+        """Estimated seconds until a new caller gets a token from limiter `name`"""
+        try:
+            limiter = RateLimiter.get_limiter(name)
+        except ValueError:
+            return 0.0
+        fill_rate = getattr(limiter, "fill_rate", None)
+        if not fill_rate:
+            return 0.0  # E.g. leased from a coordinator; no local state to go on
+        ahead = max(limiter.waiting, self._needs.get(name, 0))
+        return max(0.0, ahead + 1 - limiter.available) / fill_rate
+
+    def estimate(self, agents: List[EnrichmentAgent]) -> Tuple[float, float]:
+        """(queue wait, queue wait plus provider latency) in seconds for an enrichment by `agents`"""
+        with self._lock:
+            return self._estimate(agents)
+
+    def _estimate(self, agents: List[EnrichmentAgent]) -> Tuple[float, float]:
+        wait = total = 0.0
+        for agent in agents:
+            name = limiter_name(agent)
+            agent_wait = self._limiter_wait(name) if name else 0.0
+            provider = getattr(getattr(agent, "client", None), "provider", agent.name)
+            latency = AdaptiveTimeouts.get(provider).median_first_byte() or 0.0
+            wait = max(wait, agent_wait)
+            total = max(total, agent_wait + latency)
+        return wait, total
+
+    def admit(self, agents: List[EnrichmentAgent], deadline: float) -> Admission:
+        """Admit an enrichment by `agents` that must finish within `deadline` seconds, or raise Rejected"""
+        with self._lock:
+            now = self.clock()
+            if len(self._inflight) >= self.max_inflight:
+                API_ADMISSION.labels("busy").inc()
+                soonest = min(admission.deadline for admission in self._inflight)
+                raise Rejected(
+                    503, soonest - now,
+                    f"Server busy: {len(self._inflight)} enrichments in progress"
+                )
+
+            wait, total = self._estimate(agents)
+            if total > deadline:
+                API_ADMISSION.labels("rate_limited").inc()
+                # Without new arrivals the backlog drains in real time
+                raise Rejected(
+                    429, total - deadline,
+                    f"Provider rate limits would delay this request about {wait:.0f}s, past its {deadline:g}s deadline"
+                )
+
+            limiters = [name for name in map(limiter_name, agents) if name]
+            for name in limiters:
+                self._needs[name] = self._needs.get(name, 0) + 1
+            admission = Admission(self, limiters, now + deadline)
+            self._inflight.append(admission)
+        API_ADMISSION.labels("admitted").inc()
+        return admission
+
+    def _release(self, admission: Admission):
+        with self._lock:
+            self._inflight.remove(admission)
+            for name in admission.limiters:
+                self._needs[name] -= 1
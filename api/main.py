@@ -2,16 +2,22 @@
 ThreatFusion API Server
 FastAPI backend for the web dashboard
 """
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import asyncio
+import contextvars
 import json
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from src.config import config
 from src.validators import IndicatorValidator
-from src.models import IndicatorType
+from src.models import IndicatorType, FAILED_STATUSES, RESULT_TYPES, serialize_results
 from src.agents.virustotal import VirusTotalAgent
 from src.agents.shodan import ShodanAgent
 from src.agents.censys import CensysAgent
@@ -19,6 +25,24 @@ from src.agents.otx import OTXAgent
 from src.agents.abuseipdb import AbuseIPDBAgent
 from src.fusion.orchestrator import EnrichmentOrchestrator
 from src.fusion.scorer import RiskScorer
+from src.storage.archive import ResponseArchive
+from src.clients.adaptive_timeout import AdaptiveTimeouts
+from src.clients.cancellation import cancel_scope
+from src.clients.cassette import Cassette, REPLAY, active_cassette, use_cassette
+from src.clients.circuit_breaker import CircuitBreakers
+from src.clients.dns_cache import DNSCache
+from src.clients.warmup import ConnectionWarmer, provider_origins
+from src.reporting.generator import ReportGenerator
+from src.reporting.pdf import PDFRenderer
+from src.sinks import SinkError, create_sinks
+from src.jobs import JobStore, JobWorkerPool
+from src.watchlist import parse_ttls
+from src.telemetry import REGISTRY, CONTENT_TYPE
+from src.telemetry.metrics import API_ADMISSION
+from api.admission import AdmissionController, Rejected
+from api.result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="ThreatFusion API",
@@ -41,6 +65,12 @@ class EnrichRequest(BaseModel):
     timeout: int = 30
 
 
+class JobRequest(BaseModel):
+    indicators: List[str] = []
+    indicator: Optional[str] = None
+    timeout: int = 30
+
+
 class EnrichResponse(BaseModel):
     indicator: str
     indicator_type: str
@@ -59,7 +89,7 @@ def initialize_agents():
         agents.append(VirusTotalAgent(api_config.vt_api_key))
     
     if api_config.shodan_api_key:
-        agents.append(ShodanAgent(api_config.shodan_api_key))
+        agents.append(ShodanAgent(api_config.shodan_api_key, minify=config.app_config.shodan_minify))
     
     if api_config.censys_api_id and api_config.censys_api_secret:
         agents.append(CensysAgent(api_config.censys_api_id, api_config.censys_api_secret))
@@ -70,6 +100,12 @@ def initialize_agents():
     if api_config.abuseipdb_api_key:
         agents.append(AbuseIPDBAgent(api_config.abuseipdb_api_key))
     
+    # Keep raw provider responses for offline re-parsing and re-scoring
+    if config.app_config.archive_dir:
+        archive = ResponseArchive.open(config.app_config.archive_dir)
+        for agent in agents:
+            agent.archive = archive
+    
     return agents
 
 
@@ -88,28 +124,176 @@ async def get_config():
     return {
         "services": validation,
         "configured_count": configured_count,
-        "total_services": len(validation)
+        "total_services": len(validation),
+        "circuit_breakers": CircuitBreakers.states(),
+        "provider_latency": AdaptiveTimeouts.states(),
+        "connection_warmup": connection_warmer.states() if connection_warmer else {},
+        "dns_cache": DNSCache.states()
     }
 
 
-@app.post("/api/enrich", response_model=EnrichResponse)
-async def enrich_indicator(request: EnrichRequest):
-    """Enrich a threat indicator with intelligence from multiple sources"""
-    import time
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics for this process"""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/api/scoring/rules")
+async def get_scoring_rules():
+    """Get the active scoring rules"""
+    rules = RiskScorer.get_rules()
+    
+    return {
+        "path": rules.path,
+        "max_score": rules.max_score,
+        "sources": [
+            {"source": rule.source, "kind": rule.kind, "max": rule.max}
+            for rule in rules.sources
+        ],
+        "severity": [
+            {"min_score": min_score, "label": label}
+            for min_score, label, _ in rules.severity_levels
+        ]
+    }
+
+
+@app.post("/api/scoring/reload")
+async def reload_scoring_rules():
+    """Recompile the scoring rules file and swap it in without a restart"""
+    try:
+        RiskScorer.load_rules(config.app_config.scoring_rules_path)
+    except (ValueError, KeyError, OSError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid scoring rules: {e}")
+    
+    return await get_scoring_rules()
+
+
+# SIEM sinks, created on first use and flushed on shutdown
+_sinks = None
+
+
+def get_sinks():
+    global _sinks
+    if _sinks is None:
+        _sinks = create_sinks()
+    return _sinks
+
+
+def forward_to_sinks(indicator: str, results: Dict[str, Any], risk_score):
+    """Queue a result on every sink without blocking the caller"""
+    for sink in get_sinks():
+        try:
+            sink.send_result(indicator, results, risk_score, block=False)
+        except queue.Full:
+            logger.warning("%s sink queue full, dropping result for %s", sink.name, indicator)
+        except SinkError as e:
+            logger.error("%s sink unavailable, dropping result for %s: %s", sink.name, indicator, e)
+
+
+@app.on_event("startup")
+def configure_provider_clients():
+    CircuitBreakers.configure(**config.breaker_settings())
+    AdaptiveTimeouts.configure(**config.adaptive_timeout_settings())
+    DNSCache.configure(**config.dns_cache_settings())
+
+
+@app.on_event("startup")
+def start_cassette():
+    """Record provider traffic to, or replay it from, HTTP_CASSETTE"""
+    app_config = config.app_config
+    if not app_config.http_cassette:
+        return
+    use_cassette(Cassette.open(app_config.http_cassette, app_config.http_cassette_mode, app_config.http_cassette_latency_scale))
+    if app_config.http_cassette_mode == REPLAY:
+        config.use_placeholder_keys()
+
+
+# Keeps provider connections open between lookups
+connection_warmer: Optional[ConnectionWarmer] = None
+
+
+@app.on_event("startup")
+def start_connection_warmer():
+    """Pre-connect to every configured provider, then keep the connections alive"""
+    global connection_warmer
+    # Nothing to warm when replaying a cassette, and probes don't belong in a recording
+    if not config.app_config.provider_prewarm or active_cassette():
+        return
+    connection_warmer = ConnectionWarmer(
+        provider_origins(initialize_agents()),
+        interval=config.app_config.provider_keepalive_seconds
+    )
+    connection_warmer.start()
+
+
+# Durable job queue and its workers, started with the app
+job_store: Optional[JobStore] = None
+job_pool: Optional[JobWorkerPool] = None
+
+
+@app.on_event("startup")
+def start_job_workers():
+    global job_store, job_pool
+    job_store = JobStore(config.app_config.jobs_db_path)
+    job_pool = JobWorkerPool(
+        job_store,
+        initialize_agents,
+        workers=config.app_config.job_workers,
+        max_agent_workers=config.app_config.max_workers,
+        retention_seconds=config.app_config.job_retention_hours * 3600,
+        on_result=forward_to_sinks
+    )
+    job_pool.start()
     
-    # Validate indicator
+    REGISTRY.gauge(
+        "threatfusion_job_queue_depth",
+        "Durable enrichment jobs by status",
+        ("status",)
+    ).set_function(lambda: {(status,): count for status, count in job_store.counts().items()})
+
+
+@app.on_event("shutdown")
+def stop_background_work():
+    if connection_warmer:
+        connection_warmer.stop()
+    if job_pool:
+        job_pool.stop()
+    for sink in _sinks or []:
+        sink.close()
+
+
+# Enrichments run on their own threads, never on the event loop; admission
+# control keeps at most API_MAX_INFLIGHT of them running
+admission_control = AdmissionController(max_inflight=config.app_config.api_max_inflight)
+_enrich_pool = ThreadPoolExecutor(max_workers=config.app_config.api_max_inflight, thread_name_prefix="api-enrich")
+REGISTRY.gauge(
+    "threatfusion_api_inflight_enrichments",
+    "API enrichments admitted and still running"
+).set_function(lambda: {(): admission_control.inflight})
+
+# How often a running enrichment checks whether its client has gone
+DISCONNECT_POLL_SECONDS = 0.25
+
+
+def prepare_enrichment(request: EnrichRequest):
+    """Validate the indicator and build agents; returns (validated, agents)"""
     try:
         validated = IndicatorValidator.validate(request.indicator)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
-    # Initialize agents
     agents = initialize_agents()
     if not agents:
         raise HTTPException(
             status_code=503,
             detail="No API keys configured. Please set up .env file."
         )
+    return validated, agents
+
+
+def run_enrichment(request: EnrichRequest, validated, agents):
+    """Enrich and score a validated indicator; returns (results, risk_score, execution_time)"""
+    import time
     
     # Create orchestrator and run enrichment
     orchestrator = EnrichmentOrchestrator(agents, max_workers=config.app_config.max_workers)
@@ -121,16 +305,208 @@ async def enrich_indicator(request: EnrichRequest):
     # Calculate risk score
     risk_score = RiskScorer.calculate_risk(results)
     
+    # Never hold an API response on a backed-up SIEM
+    forward_to_sinks(request.indicator, results, risk_score)
+    
+    return results, risk_score, execution_time
+
+
+async def enrich_admitted(http_request: Request, request: EnrichRequest):
+    """
+    Validate, admit and enrich an indicator; returns (validated, results, risk_score, execution_time)
+    
+    Rejected requests get 429 or 503 with Retry-After before any provider is
+    called. If the client disconnects, or once the orchestrator returns at
+    its deadline, provider calls still queued or retrying are cancelled and
+    no more quota is spent on the answer.
+    """
+    validated, agents = prepare_enrichment(request)
+    applicable = [agent for agent in agents if agent.is_supported(validated.type)]
+    try:
+        admission = admission_control.admit(applicable, request.timeout)
+    except Rejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+    
+    cancel = threading.Event()
+    
+    def work():
+        try:
+            with cancel_scope(cancel):
+                return run_enrichment(request, validated, agents)
+        finally:
+            # Agents past the deadline are reported as timed out; stop their calls too
+            cancel.set()
+            # Held until the work really stops, so estimates count it
+            admission.release()
+    
+    future = asyncio.get_running_loop().run_in_executor(_enrich_pool, contextvars.copy_context().run, work)
+    while not future.done():
+        await asyncio.wait({future}, timeout=DISCONNECT_POLL_SECONDS)
+        if not future.done() and await http_request.is_disconnected():
+            cancel.set()
+            API_ADMISSION.labels("cancelled").inc()
+            # Nobody will read this; 499 is the conventional "client closed request"
+            raise HTTPException(status_code=499, detail="Client closed request")
+    
+    results, risk_score, execution_time = future.result()
+    return validated, results, risk_score, execution_time
+
+
+def enrich_response(request: EnrichRequest, validated, results, risk_score, execution_time) -> EnrichResponse:
     return EnrichResponse(
         indicator=request.indicator,
         indicator_type=validated.type.value,
         is_private=validated.is_private,
         risk_score=risk_score.model_dump(),
-        results=results,
+        results=serialize_results(results),
         execution_time=round(execution_time, 2)
     )
 
 
+@app.post("/api/enrich", response_model=EnrichResponse)
+async def enrich_indicator(http_request: Request, request: EnrichRequest):
+    """Enrich a threat indicator with intelligence from multiple sources"""
+    validated, results, risk_score, execution_time = await enrich_admitted(http_request, request)
+    
+    return enrich_response(request, validated, results, risk_score, execution_time)
+
+
+# Serialized GET responses, keyed by canonical indicator
+result_cache = ResultCache(
+    ttl=config.app_config.cache_ttl_hours * 3600,
+    max_entries=config.app_config.api_result_cache_size
+)
+
+
+def result_ttl(results: Dict[str, Any]) -> float:
+    """
+    Seconds an enrichment stays fresh: its sources' shortest re-check TTL
+    
+    Zero if any source failed, so a transient outage is never cached, or if
+    no source answered at all (e.g. no agent supports the indicator type).
+    """
+    ttls = parse_ttls(config.app_config.watchlist_ttls)
+    ttl = result_cache.ttl
+    answered = False
+    for source, result in results.items():
+        if source == '_metadata' or not isinstance(result, RESULT_TYPES):
+            continue
+        if result.get('status') in FAILED_STATUSES:
+            return 0
+        answered = True
+        ttl = min(ttl, ttls.get(source, ttl))
+    return ttl if answered else 0
+
+
+@app.get("/api/enrich/{indicator:path}", response_model=EnrichResponse)
+async def get_enrichment(indicator: str, http_request: Request, timeout: int = 30):
+    """
+    Cacheable enrichment of an indicator
+    
+    Responses carry a strong ETag and a Cache-Control max-age of the result's
+    remaining TTL. Repeat requests are answered from the cache, and a matching
+    If-None-Match gets 304 without any work.
+    """
+    key = IndicatorValidator.canonicalize(indicator)
+    entry = result_cache.get(key)
+    if entry is None:
+        request = EnrichRequest(indicator=indicator, timeout=timeout)
+        validated, results, risk_score, execution_time = await enrich_admitted(http_request, request)
+        body = enrich_response(request, validated, results, risk_score, execution_time).model_dump_json().encode()
+        ttl = result_ttl(results)
+        entry = result_cache.build(body, ttl)
+        if ttl:
+            result_cache.put(key, entry)
+    
+    return result_cache.respond(entry, http_request.headers)
+
+
+@app.post("/api/report")
+async def enrich_report(http_request: Request, request: EnrichRequest):
+    """Enrich an indicator and stream back the HTML report"""
+    _, results, risk_score, execution_time = await enrich_admitted(http_request, request)
+    
+    return StreamingResponse(
+        ReportGenerator.stream_html(request.indicator, results, risk_score, execution_time),
+        media_type="text/html; charset=utf-8"
+    )
+
+
+@app.post("/api/report/pdf")
+async def export_pdf_report(http_request: Request, request: EnrichRequest):
+    """Enrich an indicator and export the report as PDF"""
+    _, results, risk_score, _ = await enrich_admitted(http_request, request)
+    
+    # Layout runs in worker processes; repeat exports of unchanged findings hit the cache
+    key = ReportGenerator.content_hash(request.indicator, results, risk_score)
+    try:
+        pdf = await PDFRenderer.get_shared().render_async(
+            key,
+            lambda: ReportGenerator.generate_html(request.indicator, results, risk_score)
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    filename = f"threatfusion_report_{request.indicator.replace(':', '_').replace('/', '_')}.pdf"
+    return Response(
+        content=pdf,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@app.post("/api/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    """Queue an enrichment job and return its ID immediately"""
+    indicators = list(request.indicators)
+    if request.indicator:
+        indicators.insert(0, request.indicator)
+    if not indicators:
+        raise HTTPException(status_code=400, detail="Provide 'indicator' or 'indicators'")
+    if len(indicators) > config.app_config.job_max_indicators:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {config.app_config.job_max_indicators} indicators per job"
+        )
+    if not config.get_configured_apis():
+        raise HTTPException(
+            status_code=503,
+            detail="No API keys configured. Please set up .env file."
+        )
+    
+    job = job_store.submit(indicators, timeout=request.timeout)
+    job_pool.wake()
+    return job.to_dict(include_results=False)
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, results: bool = True):
+    """Get a job's status, progress and the results stored so far"""
+    job = job_store.get(job_id, include_results=results)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict(include_results=results)
+
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued job, or stop a running one after its current indicator"""
+    job = job_store.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict(include_results=False)
+
+
+@app.post("/api/jobs/{job_id}/resume", status_code=202)
+async def resume_job(job_id: str):
+    """Re-queue a finished job, retrying only its failed or timed-out agent calls"""
+    job = job_store.resume(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job_pool.wake()
+    return job.to_dict(include_results=False)
+
+
 # WebSocket for real-time progress updates
 class ConnectionManager:
     def __init__(self):
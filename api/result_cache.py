@@ -0,0 +1,150 @@
+"""
+Result Cache
+Serialized enrichment responses for GET /api/enrich/{indicator}
+
+Entries hold the response exactly as sent: the JSON body, its gzip
+encoding (for bodies of at least COMPRESS_MIN_BYTES) and a strong ETag over
+the body bytes. A poll that hits the cache serializes and compresses
+nothing, and a conditional poll whose If-None-Match still matches gets a
+304 with no body at all.
+
+Each encoding is a separate representation, so the gzip body carries its
+own strong tag ("<hash>-gzip"). If-None-Match uses weak comparison, so
+either tag (or W/ forms of them) matches the same content.
+"""
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Mapping, Optional
+from fastapi.responses import Response
+from src.telemetry.metrics import record_cache
+
+# Bodies smaller than this aren't worth a Content-Encoding round trip
+COMPRESS_MIN_BYTES = 1024
+GZIP_SUFFIX = "-gzip"
+
+
+def _qvalue(params: str) -> float:
+    for param in params.split(";"):
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "q":
+            try:
+                return min(max(float(value), 0.0), 1.0)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    Whether an Accept-Encoding header prefers gzip to the unencoded body
+    
+    Codings are matched by token with their q-values, so "gzip;q=0" refuses
+    gzip, and "*" covers codings not listed. Without the header the body is
+    sent unencoded.
+    """
+    if not accept_encoding:
+        return False
+    qvalues = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if coding:
+            qvalues[coding] = _qvalue(params)
+    wildcard = qvalues.get("*")
+    gzip_q = qvalues.get("gzip", qvalues.get("x-gzip", wildcard or 0.0))
+    # Unencoded is always acceptable, but only preferred when the client ranks it
+    identity_q = qvalues.get("identity", wildcard or 0.0)
+    return gzip_q > 0 and gzip_q >= identity_q
+
+
+@dataclass
+class CachedResult:
+    """One serialized response and its validators"""
+    body: bytes
+    gzip_body: Optional[bytes]
+    etag: str
+    expires_at: float
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header names this content"""
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip().removeprefix("W/")
+            if tag == "*" or tag == self.etag or tag == self.etag[:-1] + GZIP_SUFFIX + '"':
+                return True
+        return False
+
+
+class ResultCache:
+    """LRU of serialized enrichment responses, each kept for `ttl` seconds"""
+
+    def __init__(self, ttl: float, max_entries: int = 1024, clock=time.time):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, CachedResult]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        """Unexpired entry for `key`, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= self.clock():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        record_cache("api_result", entry is not None)
+        return entry
+
+    def build(self, body: bytes, ttl: Optional[float] = None) -> CachedResult:
+        """Serialize-once entry for `body`, expiring after `ttl` (default: the cache's)"""
+        return CachedResult(
+            body=body,
+            gzip_body=gzip.compress(body, compresslevel=6) if len(body) >= COMPRESS_MIN_BYTES else None,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            expires_at=self.clock() + (self.ttl if ttl is None else ttl)
+        )
+
+    def put(self, key: str, entry: CachedResult):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def respond(self, entry: CachedResult, headers: Mapping[str, str]) -> Response:
+        """
+        200 with the best encoding the client accepts, or 304 if it already has the content
+
+        `headers` are the request headers. Cache-Control counts down to the
+        entry's expiry, so downstream caches never keep it longer than we do.
+        """
+        max_age = max(0, int(entry.expires_at - self.clock()))
+        use_gzip = entry.gzip_body is not None and accepts_gzip(headers.get("accept-encoding"))
+        response_headers = {
+            "ETag": entry.etag[:-1] + GZIP_SUFFIX + '"' if use_gzip else entry.etag,
+            "Cache-Control": f"public, max-age={max_age}" if max_age else "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if entry.matches(headers.get("if-none-match")):
+            return Response(status_code=304, headers=response_headers)
+        if use_gzip:
+            response_headers["Content-Encoding"] = "gzip"
+        return Response(
+            content=entry.gzip_body if use_gzip else entry.body,
+            media_type="application/json",
+            headers=response_headers
+        )
@@ -0,0 +1,97 @@
+"""
+Distributed Batch Benchmark
+Throughput of one coordinator with 1..N local worker processes
+
+Stand-in agents spend --cpu-ms of Python CPU time (parsing and scoring a
+provider-sized payload) and --latency-ms waiting on the "network" per call,
+and take each call's rate-limit token from the coordinator's global budget.
+
+Usage:
+    python -m benchmarks.bench_distributed [--indicators N] [--workers 1,2,4] [--cpu-ms MS] [--latency-ms MS]
+"""
+import argparse
+import json
+import os
+import time
+from src.agents.base import EnrichmentAgent
+from src.clients.rate_limiter import RateLimiter, rate_limit
+from src.distributed import Coordinator, run_local_workers
+
+
+RateLimiter.register_limiter('bench', requests_per_minute=6_000_000)
+
+PAYLOAD = json.dumps({"data": [{"port": p, "banner": "x" * 200, "tags": ["a", "b"]} for p in range(40)]})
+
+
+class StandInAgent(EnrichmentAgent):
+    """Burns CPU and sleeps like a provider call, behind the shared 'bench' budget"""
+
+    def __init__(self, name: str, cpu_ms: float, latency_ms: float):
+        super().__init__("key", name)
+        self.cpu_ms = cpu_ms
+        self.latency_ms = latency_ms
+
+    @rate_limit('bench')
+    def enrich(self, indicator, itype):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        deadline = time.process_time() + self.cpu_ms / 1000
+        ports = 0
+        while time.process_time() < deadline:
+            ports = len(json.loads(PAYLOAD)["data"])
+        return self.create_result(indicator, {"pulse_count": 2, "ports": ports})
+
+
+class AgentFactory:
+    """Picklable agent factory for spawned workers"""
+
+    def __init__(self, cpu_ms: float, latency_ms: float):
+        self.cpu_ms = cpu_ms
+        self.latency_ms = latency_ms
+
+    def __call__(self):
+        return [StandInAgent(name, self.cpu_ms, self.latency_ms) for name in ("VirusTotal", "OTX", "AbuseIPDB")]
+
+
+def run(count: int, workers: int, factory: AgentFactory, concurrency: int) -> dict:
+    indicators = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(count)]
+    coordinator = Coordinator(indicators)
+    url = coordinator.serve()
+    processes = run_local_workers(url, workers, factory, concurrency=concurrency)
+
+    start = first = None
+    for received, _ in enumerate(coordinator.iter_results(), 1):
+        if first is None:
+            first = start = time.perf_counter()
+    elapsed = time.perf_counter() - start
+
+    for process in processes:
+        process.join(10)
+    coordinator.close()
+    return {
+        "workers": workers,
+        "indicators_per_s": round((count - 1) / elapsed, 1),
+        "stolen": coordinator.stats["stolen"],
+        "leased_calls": coordinator.budget.leased.get("bench", 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--indicators", type=int, default=2000)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--cpu-ms", type=float, default=2.0)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    factory = AgentFactory(args.cpu_ms, args.latency_ms)
+
+    results = [run(args.indicators, int(n), factory, args.concurrency) for n in args.workers.split(",")]
+    base = results[0]["indicators_per_s"]
+    for result in results:
+        result["speedup"] = round(result["indicators_per_s"] / base, 2)
+    print(json.dumps({"cpus": os.cpu_count(), "indicators": args.indicators, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Columnar Export Benchmark
+Compares per-indicator JSON documents against streamed Parquet/CSV/STIX export
+
+Usage:
+    python -m benchmarks.bench_export [--indicators N]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from src.fusion.scorer import RiskScorer
+from src.reporting.columnar import open_writer
+from src.reporting.generator import ReportGenerator
+from src.reporting.stix import StixBundleWriter
+from benchmarks.bench_scoring import iter_synthetic_results
+
+
+def entries(count: int):
+    for i, results in enumerate(iter_synthetic_results(count, seed=3)):
+        yield f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", results, RiskScorer.calculate_risk(results)
+
+
+def measure(label: str, export, path: str) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    export(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = os.path.getsize(path)
+    os.remove(path)
+    return {"format": label, "seconds": round(elapsed, 2), "file_mb": round(size / 1e6, 1), "peak_traced_mb": round(peak / 1e6, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--indicators", type=int, default=200_000)
+    args = parser.parse_args()
+    count = args.indicators
+    workdir = tempfile.mkdtemp()
+
+    def json_array(path):
+        # Previous approach: one generate_json document per indicator, collected into an array
+        documents = [json.loads(ReportGenerator.generate_json(*entry, 0.0)) for entry in entries(count)]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(documents, f)
+
+    def columnar(path):
+        with open_writer(path) as writer:
+            writer.write_many(entries(count))
+
+    def stix(path):
+        with open(path, "w", encoding="utf-8") as f, StixBundleWriter(f) as writer:
+            writer.write_many(entries(count))
+
+    report = [measure("json array", json_array, os.path.join(workdir, "out.json"))]
+    report.append(measure("stix bundle", stix, os.path.join(workdir, "bundle.json")))
+    for ext in ("csv", "parquet"):
+        try:
+            report.append(measure(ext, columnar, os.path.join(workdir, f"out.{ext}")))
+        except RuntimeError as e:
+            report.append({"format": ext, "error": str(e)})
+
+    print(json.dumps({"indicators": count, "results": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Fault Scenario Benchmark
+Enrichment throughput, tail latency and agent threads under scripted provider faults
+
+Runs real agents against the mock provider server while a scenario from
+benchmarks.faults (or a JSON file) injects latency spikes, 429s, 5xx
+bursts, connection resets and slow bodies. Reports enrichments/s,
+p50/p95/p99, per-source error counts (and lookups answered source_unavailable
+by an open circuit breaker), the peak number of agent threads and how long
+straggling agent threads outlive the run.
+
+Usage:
+    python -m benchmarks.bench_faults [--scenario NAME|FILE.json ...] [--indicators N] [--concurrency C]
+        [--timeout S] [--client-timeout S] [--max-retry-wait S] [--hedge]
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from benchmarks.bench_suite import percentile
+from benchmarks.faults import SCENARIOS, Scenario
+from benchmarks.mock_providers import Latency, MockConfig, MockProviderServer, mock_agents, unlimit_providers
+from src.clients.adaptive_timeout import AdaptiveTimeouts
+from src.clients.circuit_breaker import CircuitBreakers
+from src.clients.http_client import HTTPClient
+from src.fusion.orchestrator import EnrichmentOrchestrator
+from src.models import SOURCE_UNAVAILABLE, IndicatorType
+
+# Orchestrator pools use the executor's default thread names
+AGENT_THREAD_PREFIX = "ThreadPoolExecutor"
+
+
+def agent_threads() -> int:
+    return sum(1 for thread in threading.enumerate() if thread.name.startswith(AGENT_THREAD_PREFIX))
+
+
+class ThreadSampler:
+    """Peak agent thread count while running, over those alive at the start"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.baseline = agent_threads()
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="thread-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, agent_threads() - self.baseline)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_scenario(
+    scenario: Scenario,
+    indicators: int = 40,
+    concurrency: int = 4,
+    timeout: float = 30,
+    client_timeout: float = 30,
+    max_retry_wait: float = 10.0,
+    backoff_factor: float = 0.5,
+    latency: Latency = Latency(20, 0.3),
+    drain_limit: float = 120.0,
+    breakers: Optional[Dict[str, Any]] = None,
+    timeouts: Optional[Dict[str, Any]] = None
+) -> Dict:
+    """
+    Enrich `indicators` IPs through a server running `scenario` and summarize
+
+    Every run starts with fresh circuit breakers and adaptive timeouts, built
+    from `breakers` (CircuitBreaker options) and `timeouts` (AdaptiveTimeout
+    options) or the defaults.
+    """
+    CircuitBreakers.configure(**(breakers or {}))
+    AdaptiveTimeouts.configure(**(timeouts or {}))
+    server = MockProviderServer(MockConfig(latency=latency, scenario=scenario))
+    url = server.start()
+    agents = mock_agents(url)
+    for agent in agents:
+        agent.client = HTTPClient(
+            timeout=client_timeout, provider=agent.name, backoff_factor=backoff_factor, max_retry_wait=max_retry_wait
+        )
+    orchestrator = EnrichmentOrchestrator(agents)
+    values = [f"198.51.{i >> 8 & 255}.{i & 255}" for i in range(indicators)]
+    errors: Dict[str, int] = {}
+    unavailable: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    def one(value):
+        started = time.perf_counter()
+        results = orchestrator.enrich_parallel(value, IndicatorType.IP_V4, timeout=timeout)
+        elapsed = time.perf_counter() - started
+        with lock:
+            for name, record in results.items():
+                if name == "_metadata":
+                    continue
+                counts = {"error": errors, SOURCE_UNAVAILABLE: unavailable}.get(record.status)
+                if counts is not None:
+                    counts[name] = counts.get(name, 0) + 1
+        return started, elapsed
+
+    try:
+        with ThreadSampler() as sampler:
+            wall = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="scenario-driver") as pool:
+                samples = list(pool.map(one, values))
+            wall = time.perf_counter() - wall
+
+            # Agent threads abandoned at the deadline finish on their own
+            drained = time.perf_counter()
+            while agent_threads() > sampler.baseline and time.perf_counter() - drained < drain_limit:
+                time.sleep(0.01)
+            drain = time.perf_counter() - drained
+    finally:
+        server.stop()
+
+    latencies = sorted(elapsed for _, elapsed in samples)
+    return {
+        "scenario": scenario.name,
+        "enrichments": len(samples),
+        "throughput_per_s": round(len(samples) / wall, 2),
+        "latency_s": {
+            name: round(percentile(latencies, q), 3)
+            for name, q in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+        },
+        "errors": errors,
+        "unavailable": unavailable,
+        "provider_requests": server.requests,
+        "peak_agent_threads": sampler.peak,
+        "straggler_drain_s": round(drain, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenario", action="append", help=f"One of {', '.join(SCENARIOS)} or a JSON file (repeatable; default all)")
+    parser.add_argument("--indicators", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=30, help="Overall enrichment timeout")
+    parser.add_argument("--client-timeout", type=float, default=30, help="HTTPClient timeout")
+    parser.add_argument("--max-retry-wait", type=float, default=10.0)
+    parser.add_argument("--hedge", action="store_true", help="Hedge GETs unanswered past the provider's p95")
+    args = parser.parse_args()
+    unlimit_providers()
+
+    scenarios = [
+        SCENARIOS[name] if name in SCENARIOS else Scenario.load(name)
+        for name in (args.scenario or list(SCENARIOS))
+    ]
+    results = [
+        run_scenario(
+            scenario, args.indicators, args.concurrency, args.timeout, args.client_timeout, args.max_retry_wait,
+            timeouts={"hedge_quantile": 0.95} if args.hedge else None
+        )
+        for scenario in scenarios
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
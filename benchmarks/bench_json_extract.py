@@ -0,0 +1,95 @@
+"""
+JSON Extraction Benchmark
+Compares full-document parsing with streaming field selection for large Shodan hosts
+
+Usage:
+    python -m benchmarks.bench_json_extract [--banners N] [--banner-bytes N]
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from src.agents.shodan import ShodanAgent
+from src.clients.json_stream import select_fields
+
+
+def busy_host(banners: int, banner_bytes: int) -> bytes:
+    """Build a Shodan host document with many large banners"""
+    document = {
+        "ip_str": "203.0.113.10",
+        "hostnames": [f"h{i}.example.com" for i in range(20)],
+        "country_name": "United States",
+        "country_code": "US",
+        "org": "Example Hosting",
+        "isp": "Example Hosting",
+        "asn": "AS64500",
+        "ports": list(range(banners)),
+        "vulns": {f"CVE-2023-{i:05d}": {"summary": "s" * 400, "cvss": 7.5, "references": ["https://example.com"] * 5} for i in range(50)},
+        "tags": ["cloud"],
+        "data": [
+            {
+                "port": port,
+                "transport": "tcp",
+                "product": "nginx",
+                "version": "1.25",
+                "data": "HTTP/1.1 200 OK\r\nServer: nginx\r\n" * (banner_bytes // 34),
+                "http": {"html": "<div>" * (banner_bytes // 5), "headers_hash": port},
+                "ssl": {"cert": {"raw": "A" * (banner_bytes // 2)}},
+            }
+            for port in range(banners)
+        ],
+        "last_update": "2024-01-01T00:00:00",
+    }
+    return json.dumps(document).encode()
+
+
+def measure(fn, rounds: int):
+    """Return (peak bytes, best seconds) for fn"""
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return peak, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--banners", type=int, default=200)
+    parser.add_argument("--banner-bytes", type=int, default=8192)
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    body = busy_host(args.banners, args.banner_bytes)
+    chunks = [body[i:i + args.chunk_size] for i in range(0, len(body), args.chunk_size)]
+
+    def full_parse():
+        # response.json() decodes the complete body that requests buffered
+        return ShodanAgent._parse_host(json.loads(bytes(body)))
+
+    def streamed():
+        return ShodanAgent._parse_host(select_fields(iter(chunks), ShodanAgent.FIELDS["host"]))
+
+    assert full_parse() == streamed()
+
+    # The buffered body itself counts against the full parse
+    full_peak, full_time = measure(full_parse, args.rounds)
+    full_peak += len(body)
+    stream_peak, stream_time = measure(streamed, args.rounds)
+
+    print(json.dumps({
+        "body_bytes": len(body),
+        "chunk_size": args.chunk_size,
+        "full_parse": {"peak_bytes": full_peak, "seconds": round(full_time, 4)},
+        "streamed": {"peak_bytes": stream_peak, "seconds": round(stream_time, 4)},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
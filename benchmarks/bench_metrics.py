@@ -0,0 +1,97 @@
+"""
+Metrics Benchmark
+Hot-path cost of recording metrics, per enrichment and under thread contention
+
+Times what one agent call records (limiter wait, provider latency and status
+class, agent result, in-flight gauge) plus the per-indicator end-to-end
+histogram, single-threaded and from --threads threads at once, and compares
+it to an orchestrator enrichment against stand-in agents with --latency-ms
+of simulated provider latency.
+
+Usage:
+    python -m benchmarks.bench_metrics [--iterations N] [--threads T] [--latency-ms L]
+"""
+import argparse
+import json
+import threading
+import time
+from src.agents.base import EnrichmentAgent
+from src.fusion.orchestrator import EnrichmentOrchestrator
+from src.models import IndicatorType
+from src.telemetry.metrics import (
+    AGENT_RESULTS, ENRICHMENT_LATENCY, INFLIGHT_AGENTS, LIMITER_WAIT, PROVIDER_LATENCY, PROVIDER_RESPONSES
+)
+
+SOURCES = ("VirusTotal", "Shodan", "Censys", "OTX", "AbuseIPDB")
+
+
+def record_agent_call(provider: str):
+    """Everything recorded for one agent call"""
+    INFLIGHT_AGENTS.inc()
+    LIMITER_WAIT.labels(provider.lower()).observe(0.0004)
+    PROVIDER_LATENCY.labels(provider).observe(0.180)
+    PROVIDER_RESPONSES.labels(provider, "2xx").inc()
+    AGENT_RESULTS.labels(provider, "success").inc()
+    INFLIGHT_AGENTS.dec()
+
+
+def record_enrichment():
+    for provider in SOURCES:
+        record_agent_call(provider)
+    ENRICHMENT_LATENCY.observe(0.45)
+
+
+def per_call_us(iterations: int, threads: int) -> float:
+    """Wall time per recorded enrichment, in microseconds"""
+    per_thread = iterations // threads
+
+    def run():
+        for _ in range(per_thread):
+            record_enrichment()
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - start) / (per_thread * threads) * 1e6
+
+
+class SleepAgent(EnrichmentAgent):
+    def __init__(self, name: str, latency: float):
+        super().__init__("key", name)
+        self.latency = latency
+
+    def enrich(self, indicator, itype):
+        time.sleep(self.latency)
+        return self.create_result(indicator, {"pulse_count": 1})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    single = per_call_us(args.iterations, 1)
+    contended = per_call_us(args.iterations, args.threads)
+
+    orchestrator = EnrichmentOrchestrator([SleepAgent(name, args.latency_ms / 1000) for name in SOURCES])
+    rounds = 50
+    start = time.perf_counter()
+    for i in range(rounds):
+        orchestrator.enrich_parallel(f"10.0.0.{i}", IndicatorType.IP_V4)
+    enrichment_us = (time.perf_counter() - start) / rounds * 1e6
+
+    print(json.dumps({
+        "recording_per_enrichment_us": round(single, 2),
+        f"recording_per_enrichment_us_{args.threads}_threads": round(contended, 2),
+        "enrichment_us": round(enrichment_us, 1),
+        "overhead_percent": round(contended / enrichment_us * 100, 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Report Rendering Benchmark
+Measures per-report template cost and peak memory of the streamed batch HTML report
+
+Usage:
+    python -m benchmarks.bench_reports [--reports N] [--indicators N]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from src.reporting.generator import ReportGenerator, TEMPLATE_DIR, REPORT_TEMPLATE
+from src.fusion.scorer import RiskScorer
+from benchmarks.bench_scoring import iter_synthetic_results, synthetic_results
+
+
+def per_report(reports: int) -> dict:
+    """Compare compiling the template per call against the shared environment"""
+    results = synthetic_results(1, seed=7)[0]
+    risk_score = RiskScorer.calculate_risk(results)
+    source = (TEMPLATE_DIR / REPORT_TEMPLATE).read_text(encoding="utf-8")
+    environment = ReportGenerator.get_environment()
+
+    start = time.perf_counter()
+    for _ in range(reports):
+        # Previous behaviour: parse and compile the template string on every report
+        environment.from_string(source)
+    compile_ms = (time.perf_counter() - start) / reports * 1000
+
+    start = time.perf_counter()
+    for _ in range(reports):
+        ReportGenerator.generate_html("10.0.0.1", results, risk_score, 1.0)
+    render_ms = (time.perf_counter() - start) / reports * 1000
+
+    return {"compile_per_call_ms": round(compile_ms, 3), "render_cached_ms": round(render_ms, 3)}
+
+
+def batch_report(indicators: int) -> dict:
+    """Render a batch report to disk from a generator and track peak memory"""
+    def entries():
+        for i, results in enumerate(iter_synthetic_results(indicators, seed=11)):
+            yield f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", results, RiskScorer.calculate_risk(results)
+
+    path = os.path.join(tempfile.mkdtemp(), "batch.html")
+    tracemalloc.start()
+    start = time.perf_counter()
+    ReportGenerator.write_report(ReportGenerator.stream_batch_html(entries()), path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    size = os.path.getsize(path)
+    os.remove(path)
+    return {
+        "indicators": indicators,
+        "seconds": round(elapsed, 2),
+        "report_mb": round(size / 1e6, 1),
+        "peak_traced_mb": round(peak / 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reports", type=int, default=200)
+    parser.add_argument("--indicators", type=int, default=50000)
+    args = parser.parse_args()
+
+    print(json.dumps({"single": per_report(args.reports), "batch": batch_report(args.indicators)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
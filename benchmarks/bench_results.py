@@ -0,0 +1,92 @@
+"""
+Result Record Benchmark
+Compares allocations and time per enrichment for pydantic results vs slotted records
+
+Usage:
+    python -m benchmarks.bench_results [--enrichments N]
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import datetime
+from src.models import EnrichmentResult, EnrichmentRecord
+from src.fusion.scorer import RiskScorer
+
+SOURCES = ["VirusTotal", "Shodan", "Censys", "OTX", "AbuseIPDB"]
+DATA = {
+    "VirusTotal": {"detections": 12, "total": 70},
+    "Shodan": {"vulns": ["CVE-2023-1", "CVE-2023-2"], "services": []},
+    "Censys": {"services": [{"port": 22}]},
+    "OTX": {"pulse_count": 4, "pulses": []},
+    "AbuseIPDB": {"abuse_confidence_score": 55},
+}
+
+
+def pydantic_enrichment(indicator: str):
+    """Previous hot path: pydantic model per agent, dumped straight to a dict"""
+    results = {
+        source: EnrichmentResult(
+            indicator=indicator, source=source, data=DATA[source], timestamp=datetime.utcnow()
+        ).dict()
+        for source in SOURCES
+    }
+    return RiskScorer.calculate_risk(results)
+
+
+def record_enrichment(indicator: str):
+    """Current hot path: slotted records end to end"""
+    results = {source: EnrichmentRecord(indicator, source, data=DATA[source]) for source in SOURCES}
+    return RiskScorer.calculate_risk(results)
+
+
+def measure(fn, count: int):
+    """Return (allocated blocks per call, bytes per call, microseconds per call)"""
+    fn("warmup")
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [fn(f"10.0.0.{i % 255}") for i in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(s.count_diff for s in stats)
+    size = sum(s.size_diff for s in stats)
+    del kept
+
+    start = time.perf_counter()
+    for i in range(count):
+        fn(f"10.0.0.{i % 255}")
+    elapsed = time.perf_counter() - start
+    return blocks / count, size / count, elapsed / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--enrichments", type=int, default=5000)
+    args = parser.parse_args()
+
+    report = {}
+    for name, fn in [("pydantic", pydantic_enrichment), ("records", record_enrichment)]:
+        blocks, size, micros = measure(fn, args.enrichments)
+        report[name] = {
+            "retained_blocks_per_enrichment": round(blocks, 1),
+            "retained_bytes_per_enrichment": round(size),
+            "microseconds_per_enrichment": round(micros, 1),
+        }
+
+    # Allocation count during construction only (not retained)
+    for name, build in [
+        ("pydantic", lambda: [EnrichmentResult(indicator="x", source=s, data=DATA[s]).dict() for s in SOURCES]),
+        ("records", lambda: [EnrichmentRecord("x", s, data=DATA[s]) for s in SOURCES]),
+    ]:
+        tracemalloc.start()
+        build()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report[name]["peak_bytes_building_results"] = peak
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
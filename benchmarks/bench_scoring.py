@@ -0,0 +1,88 @@
+"""
+Scoring Benchmark
+Measures per-indicator rule evaluation cost for the scalar and batch scorers
+
+Usage:
+    python -m benchmarks.bench_scoring [--rules PATH] [--indicators N]
+"""
+import argparse
+import json
+import random
+import time
+from typing import Iterator
+from src.fusion.rules import load_rules, benchmark_rules
+from src.fusion.scorer import RiskScorer
+from src.fusion.batch import BatchRiskScorer, ScoringFeatures
+
+
+def iter_synthetic_results(count: int, seed: int = 0) -> Iterator[dict]:
+    """Generate orchestrator-shaped results with a realistic mix of hits and errors"""
+    rng = random.Random(seed)
+
+    for _ in range(count):
+        results = {}
+        if rng.random() < 0.9:
+            results["VirusTotal"] = {"status": "success", "data": {
+                "detections": rng.randint(0, 70), "total": rng.choice([0, 70, 92])
+            }}
+        if rng.random() < 0.9:
+            results["OTX"] = {"status": "success", "data": {"pulse_count": rng.randint(0, 40)}}
+        if rng.random() < 0.6:
+            results["Shodan"] = {"status": "success", "data": {
+                "vulns": [f"CVE-2024-{i}" for i in range(rng.randint(0, 8))]
+            }}
+        if rng.random() < 0.6:
+            results["AbuseIPDB"] = {"status": "success", "data": {
+                "abuse_confidence_score": rng.randint(0, 100)
+            }}
+        if rng.random() < 0.5:
+            results["Censys"] = {"status": "success", "data": {
+                "services": [{"port": rng.choice([22, 80, 443, 445, 8080])} for _ in range(rng.randint(0, 10))]
+            }}
+        if rng.random() < 0.1:
+            results["Shodan"] = {"status": "error", "error": "HTTP request failed"}
+        results["_metadata"] = {"execution_time": 0.0}
+        yield results
+
+
+def synthetic_results(count: int, seed: int = 0) -> list[dict]:
+    """Materialize iter_synthetic_results into a list"""
+    return list(iter_synthetic_results(count, seed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rules", help="Scoring rules file (defaults to bundled rules)")
+    parser.add_argument("--indicators", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rules = load_rules(args.rules)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    samples = synthetic_results(args.indicators)
+    indicators = [f"indicator-{i}" for i in range(len(samples))]
+
+    scalar = benchmark_rules(lambda r: RiskScorer.calculate_risk(r, rules), samples, args.rounds)
+
+    features = ScoringFeatures.from_results(indicators, samples, rules)
+    batch = benchmark_rules(
+        lambda f: BatchRiskScorer.calculate_risk_batch(f, rules),
+        [features],
+        args.rounds
+    )
+    batch["best_ns"] = round(batch["best_ns"] / len(samples), 1)
+    batch["median_ns"] = round(batch["median_ns"] / len(samples), 1)
+    batch["indicators"] = len(samples)
+
+    print(json.dumps({
+        "rules": rules.path,
+        "compile_ms": round(compile_ms, 2),
+        "scalar_per_indicator": scalar,
+        "batch_per_indicator": batch
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Offline Benchmark Suite
+End-to-end throughput, tail latency, CPU and memory against mock providers
+
+Runs the real agents against benchmarks.mock_providers (in its own process)
+in three modes, each at fixed concurrency levels:
+
+    enrich  C threads calling EnrichmentOrchestrator.enrich_parallel
+    api     C HTTP clients calling POST /api/enrich on an in-process uvicorn
+    batch   C durable jobs drained by a JobWorkerPool with C workers
+
+Provider rate limits are lifted, so the numbers are ThreatFusion's own
+overhead plus the configured mock latency. Results are saved as JSON
+(default benchmarks/results/suite-<commit>.json) so two commits can be
+compared with --compare.
+
+Usage:
+    python -m benchmarks.bench_suite [--modes enrich,api,batch] [--concurrency 1,4,16] [--requests N]
+        [--latency-ms MS[:SIGMA]] [--provider-latency Shodan=300:0.8 ...] [--error-rate F]
+        [--save PATH] [--compare BASE.json]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+from benchmarks.mock_providers import (
+    MockConfig, mock_agents, parse_latency, parse_provider_latencies, spawn_server, unlimit_providers
+)
+from src.fusion.orchestrator import EnrichmentOrchestrator
+from src.validators import IndicatorValidator
+
+RESULTS_DIR = Path(__file__).parent / "results"
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def indicators(count: int, offset: int = 0) -> List[str]:
+    """Distinct IPs, domains and hashes in equal parts"""
+    values = []
+    for i in range(offset, offset + count):
+        kind = i % 3
+        if kind == 0:
+            values.append(f"198.51.{i >> 8 & 255}.{i & 255}")
+        elif kind == 1:
+            values.append(f"host{i}.bench.example")
+        else:
+            values.append(f"{i:032x}")
+    return values
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(q / 100 * len(values) + 0.5)) - 1))]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE / 2 ** 20
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def has_errors(results: Dict) -> bool:
+    return any(
+        (value.get("status") if isinstance(value, dict) else value.status) == "error"
+        for name, value in results.items() if name != "_metadata"
+    )
+
+
+def measure(mode: str, concurrency: int, work: Callable[[], List[tuple]]) -> dict:
+    """Run `work` (returning (latency_s, ok) per request) and summarize it"""
+    cpu, wall = time.process_time(), time.perf_counter()
+    samples = work()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    latencies = sorted(latency for latency, _ in samples)
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "errors": sum(1 for _, ok in samples if not ok),
+        "throughput_per_s": round(len(samples) / wall, 1),
+        "latency_ms": {
+            name: round(percentile(latencies, q) * 1000, 1)
+            for name, q in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+        },
+        "cpu_s": round(cpu, 2),
+        "cpu_pct": round(100 * cpu / wall, 1),
+        "rss_mb": round(rss_mb(), 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def run_enrich(url: str, values: List[str], concurrency: int) -> List[tuple]:
+    orchestrator = EnrichmentOrchestrator(mock_agents(url))
+    types = {value: IndicatorValidator.validate(value).type for value in values}
+
+    def one(value):
+        started = time.perf_counter()
+        results = orchestrator.enrich_parallel(value, types[value])
+        return time.perf_counter() - started, not has_errors(results)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, values))
+
+
+class APIServer:
+    """The FastAPI app on uvicorn in a background thread, with agents pointed at the mock"""
+
+    def __init__(self, mock_url: str, workdir: str):
+        import uvicorn
+        from api import main as api
+        from src.config import config
+
+        config.app_config.jobs_db_path = os.path.join(workdir, "jobs.db")
+        api.initialize_agents = lambda: mock_agents(mock_url)
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        self.server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, name="bench-api", daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(10)
+
+
+def run_api(api_url: str, values: List[str], concurrency: int) -> List[tuple]:
+    import httpx
+
+    local = threading.local()
+
+    def one(value):
+        if not hasattr(local, "client"):
+            local.client = httpx.Client(base_url=api_url, timeout=60)
+        started = time.perf_counter()
+        response = local.client.post("/api/enrich", json={"indicator": value})
+        latency = time.perf_counter() - started
+        return latency, response.status_code == 200 and not has_errors(response.json()["results"])
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, values))
+
+
+def run_batch(url: str, values: List[str], concurrency: int, workdir: str) -> List[tuple]:
+    from src.jobs import JobStore, JobWorkerPool
+
+    store = JobStore(os.path.join(workdir, f"batch-{concurrency}.db"))
+    samples, lock = [], threading.Lock()
+    last: Dict[int, float] = {}
+
+    def on_result(indicator, results, risk_score):
+        # Workers run indicators back to back, so each one's latency is the
+        # time since its worker's previous result
+        now = time.perf_counter()
+        thread = threading.get_ident()
+        with lock:
+            samples.append((now - last.get(thread, started), not has_errors(results)))
+            last[thread] = now
+
+    size = -(-len(values) // concurrency)
+    jobs = [store.submit(values[start:start + size], timeout=60) for start in range(0, len(values), size)]
+    pool = JobWorkerPool(store, lambda: mock_agents(url), workers=concurrency, poll_interval=0.01, on_result=on_result)
+    started = time.perf_counter()
+    pool.start()
+    while store.counts().get("completed", 0) < len(jobs):
+        time.sleep(0.01)
+    pool.stop()
+    return samples
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(base: dict, current: dict) -> List[dict]:
+    """Throughput and tail latency change per (mode, concurrency) against a saved run"""
+    previous = {(r["mode"], r["concurrency"]): r for r in base["results"]}
+    rows = []
+    for result in current["results"]:
+        old = previous.get((result["mode"], result["concurrency"]))
+        if not old:
+            continue
+        rows.append({
+            "mode": result["mode"],
+            "concurrency": result["concurrency"],
+            "throughput_pct": round(100 * (result["throughput_per_s"] / old["throughput_per_s"] - 1), 1),
+            "p95_pct": round(100 * (result["latency_ms"]["p95"] / max(old["latency_ms"]["p95"], 0.1) - 1), 1),
+            "p99_pct": round(100 * (result["latency_ms"]["p99"] / max(old["latency_ms"]["p99"], 0.1) - 1), 1),
+            "cpu_s_pct": round(100 * (result["cpu_s"] / max(old["cpu_s"], 0.01) - 1), 1),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modes", default="enrich,api,batch")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--requests", type=int, default=300, help="Indicators per mode and concurrency level")
+    parser.add_argument("--latency-ms", default="50:0.5", help="Mock latency: median ms[:log-normal sigma]")
+    parser.add_argument("--provider-latency", action="append", default=[], help="Per provider, e.g. Shodan=300:0.8")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="Results JSON path (default benchmarks/results/suite-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results JSON to diff against")
+    args = parser.parse_args()
+
+    mock = MockConfig(
+        latency=parse_latency(args.latency_ms),
+        providers=parse_provider_latencies(args.provider_latency),
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    mock_url, mock_process = spawn_server(mock)
+    unlimit_providers()
+    levels = [int(level) for level in args.concurrency.split(",")]
+    modes = args.modes.split(",")
+    results = []
+
+    with tempfile.TemporaryDirectory() as workdir:
+        api = APIServer(mock_url, workdir) if "api" in modes else None
+        if api:
+            api.__enter__()
+        try:
+            for mode in modes:
+                for offset, level in enumerate(levels):
+                    values = indicators(args.requests, offset * args.requests)
+                    if mode == "enrich":
+                        work = lambda: run_enrich(mock_url, values, level)
+                    elif mode == "api":
+                        work = lambda: run_api(api.url, values, level)
+                    elif mode == "batch":
+                        work = lambda: run_batch(mock_url, values, level, workdir)
+                    else:
+                        parser.error(f"unknown mode {mode}")
+                    results.append(measure(mode, level, work))
+        finally:
+            if api:
+                api.__exit__(None, None, None)
+            mock_process.terminate()
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            report["compare"] = {"base": args.compare, "changes": compare(json.load(f), report)}
+
+    path = Path(args.save) if args.save else RESULTS_DIR / f"suite-{commit}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+    print(f"Saved {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
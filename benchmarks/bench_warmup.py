@@ -0,0 +1,99 @@
+"""
+Connection Warm-up Benchmark
+First-lookup and steady-state latency with and without provider pre-warming
+
+Each lookup builds new agents, as an API request does, and enriches one IP
+against the mock provider server. The mock adds `--handshake-ms` to every
+new connection's first response, standing in for DNS, TCP and TLS set-up to
+a distant provider. It closes connections idle for `--idle-timeout` seconds,
+like a provider's keep-alive timeout. Reported:
+
+- cold start: the first lookup, with every connection still to be opened
+- pre-warmed start: the first lookup after ConnectionWarmer.warm()
+- steady state: median of the next `--lookups` lookups
+- after idle: a lookup following an idle spell longer than the server's
+  keep-alive timeout, without and with keep-alive probes
+
+Usage:
+    python -m benchmarks.bench_warmup [--handshake-ms MS] [--latency-ms MS] [--lookups N]
+        [--idle-timeout S] [--keepalive S]
+"""
+import argparse
+import json
+import statistics
+import time
+from benchmarks.mock_providers import Latency, MockConfig, MockProviderServer, mock_agents, unlimit_providers
+from src.clients.dns_cache import DNSCache
+from src.clients.http_client import ConnectionPools
+from src.clients.warmup import ConnectionWarmer, provider_origins
+from src.fusion.orchestrator import EnrichmentOrchestrator
+from src.models import IndicatorType
+
+_counter = iter(range(1, 10 ** 6))
+
+
+def lookup(url: str) -> float:
+    """Seconds to enrich a new IP with freshly built agents"""
+    agents = mock_agents(url)
+    ip = f"198.51.100.{next(_counter) % 250 + 1}"
+    started = time.perf_counter()
+    EnrichmentOrchestrator(agents, max_workers=len(agents)).enrich_parallel(ip, IndicatorType.IP_V4, timeout=30)
+    return time.perf_counter() - started
+
+
+def fresh_process():
+    """Forget pooled connections and cached addresses, as after a deploy"""
+    ConnectionPools.clear()
+    DNSCache.configure()
+
+
+def run(handshake_ms: float, latency_ms: float, lookups: int, idle_timeout: float, keepalive: float) -> dict:
+    unlimit_providers()
+    server = MockProviderServer(MockConfig(
+        latency=Latency(latency_ms, 0), handshake_ms=handshake_ms, idle_timeout=idle_timeout
+    ))
+    url = server.start()
+    try:
+        fresh_process()
+        cold = lookup(url)
+        steady = statistics.median(lookup(url) for _ in range(lookups))
+
+        fresh_process()
+        ConnectionWarmer(provider_origins(mock_agents(url)), interval=0).warm()
+        warmed = lookup(url)
+
+        time.sleep(idle_timeout * 1.5)
+        idle = lookup(url)
+
+        warmer = ConnectionWarmer(provider_origins(mock_agents(url)), interval=keepalive)
+        warmer.start()
+        time.sleep(idle_timeout * 1.5)
+        idle_probed = lookup(url)
+        warmer.stop()
+    finally:
+        server.stop()
+
+    return {
+        "handshake_ms": handshake_ms,
+        "latency_ms": latency_ms,
+        "cold_start_ms": round(cold * 1000, 1),
+        "prewarmed_start_ms": round(warmed * 1000, 1),
+        "steady_state_p50_ms": round(steady * 1000, 1),
+        "after_idle_ms": round(idle * 1000, 1),
+        "after_idle_with_keepalive_ms": round(idle_probed * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--handshake-ms", type=float, default=150.0)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--lookups", type=int, default=20)
+    parser.add_argument("--idle-timeout", type=float, default=2.0, help="Server keep-alive timeout in seconds")
+    parser.add_argument("--keepalive", type=float, default=1.0, help="Probe interval in seconds")
+    args = parser.parse_args()
+    print(json.dumps(run(args.handshake_ms, args.latency_ms, args.lookups, args.idle_timeout, args.keepalive), indent=2))
+
+
+if __name__ == "__main__":
+    main()
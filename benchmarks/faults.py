@@ -0,0 +1,111 @@
+"""
+Fault Scenarios
+Scripted provider failures for the mock provider server
+
+A scenario is a list of faults, each applying to one provider (or "*")
+with a probability `rate`, optionally only inside a time window measured
+from when the server started:
+
+    latency      delay the response by `delay_ms`
+    status       answer `status` (429, 5xx), with Retry-After if `retry_after`
+    reset        drop the connection with a TCP reset, without a response
+    slow_body    send the headers, then drip the body over `body_seconds`
+
+Scenarios are plain data, so they can be kept as JSON files:
+
+    {"name": "shodan_storm", "faults": [
+        {"kind": "status", "provider": "Shodan", "status": 503, "start": 2, "end": 8}
+    ]}
+"""
+import json
+import random
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+KINDS = ("latency", "status", "reset", "slow_body")
+
+
+@dataclass
+class Fault:
+    """One kind of failure injected into matching requests"""
+    kind: str
+    provider: str = "*"
+    rate: float = 1.0
+    start: float = 0.0
+    end: Optional[float] = None
+    delay_ms: float = 0.0
+    status: int = 503
+    retry_after: Optional[int] = None
+    body_seconds: float = 0.0
+
+    def __post_init__(self):
+        if self.kind not in KINDS:
+            raise ValueError(f"Unknown fault kind {self.kind!r}; expected one of {', '.join(KINDS)}")
+
+    def applies(self, provider: str, elapsed: float) -> bool:
+        return (
+            self.provider in ("*", provider)
+            and elapsed >= self.start
+            and (self.end is None or elapsed < self.end)
+        )
+
+
+@dataclass
+class Scenario:
+    """A named, scripted set of faults"""
+    name: str
+    faults: List[Fault] = field(default_factory=list)
+    description: str = ""
+
+    def draw(self, provider: str, elapsed: float, rng: random.Random) -> List[Fault]:
+        """Faults firing for one request"""
+        return [
+            fault for fault in self.faults
+            if fault.applies(provider, elapsed) and rng.random() < fault.rate
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Scenario':
+        return cls(
+            name=data["name"],
+            faults=[Fault(**fault) for fault in data.get("faults", [])],
+            description=data.get("description", "")
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'Scenario':
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+# Failures seen in production, at full scale
+SCENARIOS = {
+    "baseline": Scenario("baseline", [], "No faults"),
+    "shodan_outage": Scenario("shodan_outage", [
+        Fault("status", "Shodan", status=503),
+    ], "Every Shodan request answers 503"),
+    "rate_limited": Scenario("rate_limited", [
+        Fault("status", "VirusTotal", rate=0.5, status=429, retry_after=60),
+    ], "Half of VirusTotal requests answer 429 with Retry-After: 60"),
+    "latency_spikes": Scenario("latency_spikes", [
+        Fault("latency", rate=0.05, delay_ms=8000),
+    ], "5% of all requests stall for 8 s"),
+    "5xx_burst": Scenario("5xx_burst", [
+        Fault("status", "*", status=502, start=5, end=15),
+    ], "Every provider answers 502 between 5 s and 15 s"),
+    "connection_resets": Scenario("connection_resets", [
+        Fault("reset", "Censys", rate=0.3),
+    ], "30% of Censys connections are reset"),
+    "slow_bodies": Scenario("slow_bodies", [
+        Fault("slow_body", "OTX", rate=0.2, body_seconds=60),
+    ], "20% of OTX bodies trickle in over a minute"),
+    "cascade": Scenario("cascade", [
+        Fault("status", "Shodan", status=503),
+        Fault("status", "VirusTotal", rate=0.3, status=429, retry_after=30),
+        Fault("latency", rate=0.1, delay_ms=5000),
+        Fault("reset", "Censys", rate=0.1),
+    ], "Shodan down, VirusTotal throttling, latency spikes and resets at once"),
+}
@@ -0,0 +1,370 @@
+"""
+Mock Provider Server
+Local stand-in for the VirusTotal, Shodan, Censys, OTX and AbuseIPDB APIs
+
+Serves provider-shaped payloads (the fields each agent's parser reads, plus
+realistic bulk such as Shodan banners) under one prefix per provider:
+
+    /virustotal/api/v3/{files,ip_addresses,domains,urls}/<id>
+    /shodan/shodan/host/<ip>
+    /censys/api/v2/hosts/<ip>, /censys/api/v2/certificates/search
+    /otx/api/v1/indicators/<section>/<indicator>/general
+    /abuseipdb/api/v2/check?ipAddress=<ip>
+
+Payloads are deterministic per indicator. Each response is delayed by a
+log-normal latency (median and spread per provider) and fails with
+`error_status` at `error_rate`; a fault scenario (benchmarks.faults) adds
+scripted latency spikes, 429s, 5xx bursts, resets and slow bodies.
+mock_agents() points real agents at a running server, so benchmarks exercise
+the full HTTP, parsing and scoring path with no network access or API keys.
+"""
+import hashlib
+import io
+import json
+import math
+import multiprocessing
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+from benchmarks.faults import Fault, Scenario
+from src.agents.abuseipdb import AbuseIPDBAgent
+from src.agents.censys import CensysAgent
+from src.agents.otx import OTXAgent
+from src.agents.shodan import ShodanAgent
+from src.agents.virustotal import VirusTotalAgent
+from src.clients.rate_limiter import RateLimiter, TokenBucket
+
+# Path prefix per agent, mirroring each BASE_URL's path
+PREFIXES = {
+    "VirusTotal": "/virustotal/api/v3",
+    "Shodan": "/shodan",
+    "Censys": "/censys/api/v2",
+    "OTX": "/otx/api/v1",
+    "AbuseIPDB": "/abuseipdb/api/v2",
+}
+
+LIMITERS = ("virustotal", "shodan", "censys", "otx", "abuseipdb")
+
+
+@dataclass
+class Latency:
+    """Log-normal response delay: median in ms and sigma (0 = constant)"""
+    median_ms: float = 50.0
+    sigma: float = 0.5
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        return self.median_ms / 1000 * math.exp(rng.gauss(0.0, self.sigma))
+
+
+@dataclass
+class MockConfig:
+    """Latency and error behaviour, with optional per-provider latency overrides"""
+    latency: Latency = field(default_factory=Latency)
+    providers: Dict[str, Latency] = field(default_factory=dict)
+    error_rate: float = 0.0
+    error_status: int = 503
+    seed: int = 1
+    scenario: Optional[Scenario] = None
+    # Added to each new connection's first response, standing in for the DNS,
+    # TCP and TLS set-up of a distant provider
+    handshake_ms: float = 0.0
+    # Close connections idle this long, like a provider's keep-alive timeout (0 = never)
+    idle_timeout: float = 0.0
+
+    def latency_for(self, provider: str) -> Latency:
+        return self.providers.get(provider, self.latency)
+
+
+def parse_latency(spec: str) -> Latency:
+    """'80' or '80:0.6' (median ms, sigma)"""
+    median, _, sigma = spec.partition(":")
+    return Latency(float(median), float(sigma) if sigma else Latency.sigma)
+
+
+def parse_provider_latencies(specs: List[str]) -> Dict[str, Latency]:
+    """['Shodan=300:0.8', ...] -> {provider: Latency}"""
+    latencies = {}
+    for spec in specs:
+        provider, _, value = spec.partition("=")
+        latencies[provider.strip()] = parse_latency(value)
+    return latencies
+
+
+def _seed(*parts: str) -> int:
+    return int.from_bytes(hashlib.blake2b("|".join(parts).encode(), digest_size=8).digest(), "big")
+
+
+def _stats(rng: random.Random) -> Dict[str, int]:
+    malicious = rng.choice([0, 0, 0, 1, 3, 12, 40])
+    return {"malicious": malicious, "suspicious": rng.randint(0, 3), "undetected": 20, "harmless": 70 - malicious}
+
+
+def virustotal_payload(kind: str, indicator: str) -> Dict[str, Any]:
+    rng = random.Random(_seed("vt", indicator))
+    attrs: Dict[str, Any] = {"last_analysis_stats": _stats(rng)}
+    if kind == "files":
+        digest = hashlib.sha256(indicator.encode()).hexdigest()
+        attrs.update(
+            names=[f"sample_{i}.exe" for i in range(8)], first_submission_date=1700000000,
+            last_analysis_date=1710000000, type_description="Win32 EXE", size=rng.randint(10_000, 5_000_000),
+            md5=digest[:32], sha1=digest[:40], sha256=digest
+        )
+    elif kind == "ip_addresses":
+        attrs.update(country="US", asn=rng.randint(1000, 65000), as_owner="Example Hosting", network="203.0.113.0/24")
+    elif kind == "domains":
+        attrs.update(
+            categories={"Forcepoint ThreatSeeker": "malicious web sites"}, creation_date=1600000000,
+            registrar="Example Registrar",
+            last_dns_records=[{"type": "A", "value": f"203.0.113.{rng.randint(1, 254)}"}, {"type": "MX", "value": "mx.example"}]
+        )
+    return {"data": {"id": indicator, "type": kind, "attributes": attrs}}
+
+
+def shodan_payload(ip: str) -> Dict[str, Any]:
+    rng = random.Random(_seed("shodan", ip))
+    ports = sorted(rng.sample([21, 22, 25, 53, 80, 110, 143, 443, 3306, 3389, 8080, 8443], 6))
+    return {
+        "ip_str": ip, "hostnames": [f"host{rng.randint(1, 99)}.example"], "country_name": "United States",
+        "country_code": "US", "city": "Ashburn", "org": "Example Hosting", "isp": "Example ISP",
+        "asn": f"AS{rng.randint(1000, 65000)}", "ports": ports,
+        "vulns": {f"CVE-2023-{rng.randint(1000, 9999)}": {"cvss": 7.5} for _ in range(rng.choice([0, 0, 2, 5]))},
+        "tags": ["cloud"], "last_update": "2024-03-01T00:00:00",
+        "data": [
+            {"port": port, "transport": "tcp", "product": "nginx", "version": "1.24",
+             "data": "HTTP/1.1 200 OK\r\nServer: nginx\r\n" + "X-Pad: " + "x" * 800}
+            for port in ports
+        ],
+    }
+
+
+def censys_host_payload(ip: str) -> Dict[str, Any]:
+    rng = random.Random(_seed("censys", ip))
+    return {"result": {
+        "ip": ip,
+        "services": [
+            {"port": port, "service_name": name, "transport_protocol": "TCP"}
+            for port, name in rng.sample([(22, "SSH"), (80, "HTTP"), (443, "HTTP"), (3389, "RDP"), (5900, "VNC")], 3)
+        ],
+        "location": {"country": "United States", "city": "Ashburn", "coordinates": {"latitude": 39.0, "longitude": -77.5}},
+        "autonomous_system": {"asn": rng.randint(1000, 65000), "name": "EXAMPLE"},
+        "last_updated_at": "2024-03-01T00:00:00Z",
+    }}
+
+
+def censys_certificates_payload(query: str) -> Dict[str, Any]:
+    domain = query.replace("names:", "").strip()
+    return {"result": {"total": 3, "hits": [
+        {
+            "fingerprint_sha256": hashlib.sha256(f"{domain}{i}".encode()).hexdigest(),
+            "parsed": {
+                "issuer": {"common_name": ["Example CA"]}, "subject": {"common_name": [domain]},
+                "validity": {"start": "2024-01-01T00:00:00Z", "end": "2025-01-01T00:00:00Z"},
+                "names": [domain, f"*.{domain}", f"cdn{i}.{domain}"],
+            },
+        }
+        for i in range(3)
+    ]}}
+
+
+def otx_payload(section: str, indicator: str) -> Dict[str, Any]:
+    rng = random.Random(_seed("otx", indicator))
+    count = rng.choice([0, 0, 1, 4, 12])
+    return {
+        "indicator": indicator, "type": section,
+        "pulse_info": {"count": count, "pulses": [
+            {"name": f"Campaign {i}", "created": "2024-01-01", "modified": "2024-02-01", "author_name": "analyst",
+             "tags": ["c2", "botnet"], "adversary": "", "targeted_countries": ["US"], "malware_families": ["Emotet"],
+             "attack_ids": ["T1071"], "description": "d" * 400}
+            for i in range(count)
+        ]},
+        "validation": [],
+    }
+
+
+def abuseipdb_payload(ip: str) -> Dict[str, Any]:
+    rng = random.Random(_seed("abuseipdb", ip))
+    return {"data": {
+        "ipAddress": ip, "abuseConfidenceScore": rng.choice([0, 0, 5, 35, 100]), "countryCode": "US",
+        "countryName": "United States", "usageType": "Data Center/Web Hosting/Transit", "isp": "Example ISP",
+        "domain": "example.net", "totalReports": rng.randint(0, 50), "numDistinctUsers": rng.randint(0, 20),
+        "lastReportedAt": "2024-03-01T00:00:00+00:00",
+    }}
+
+
+def route(path: str, query: Dict[str, List[str]]) -> Optional[tuple]:
+    """Map a request to (provider, payload), or None for unknown paths"""
+    parts = [part for part in path.split("/") if part]
+    if not parts:
+        return None
+    provider = parts[0]
+    if provider == "virustotal" and len(parts) == 5:
+        return "VirusTotal", virustotal_payload(parts[3], parts[4])
+    if provider == "shodan" and len(parts) == 4:
+        return "Shodan", shodan_payload(parts[3])
+    if provider == "censys" and parts[3:4] == ["hosts"]:
+        return "Censys", censys_host_payload(parts[4])
+    if provider == "censys" and parts[3:5] == ["certificates", "search"]:
+        return "Censys", censys_certificates_payload(query.get("q", [""])[0])
+    if provider == "otx" and len(parts) == 7:
+        return "OTX", otx_payload(parts[4], parts[5])
+    if provider == "abuseipdb":
+        return "AbuseIPDB", abuseipdb_payload(query.get("ipAddress", [""])[0])
+    return None
+
+
+class _QuietServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections when many agents connect at once
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up on slow or faulty responses is expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class MockProviderServer:
+    """Threaded HTTP/1.1 server answering like the five providers"""
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockConfig()
+        self.requests = 0
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            timeout = server.config.idle_timeout or None
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out as separate writes; don't hold the body for the headers' ACK
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                if server.config.handshake_ms:
+                    time.sleep(server.config.handshake_ms / 1000)
+
+            def do_HEAD(self):
+                # Keep-alive probes: answered at once, connection left open
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                routed = route(url.path, parse_qs(url.query))
+                if routed is None:
+                    return self._reply(404, {"error": "not found"})
+                provider, payload = routed
+                delay, fail, faults = server._draw(provider)
+                delay += sum(fault.delay_ms for fault in faults if fault.kind == "latency") / 1000
+                if delay:
+                    time.sleep(delay)
+                kinds = {fault.kind: fault for fault in faults}
+                if "reset" in kinds:
+                    return self._reset()
+                if "status" in kinds:
+                    fault = kinds["status"]
+                    return self._reply(fault.status, {"error": "injected"}, retry_after=fault.retry_after)
+                if fail:
+                    return self._reply(server.config.error_status, {"error": "injected"})
+                self._reply(200, payload, slow=kinds.get("slow_body"))
+
+            def _reply(self, status: int, payload: Dict[str, Any], retry_after: Optional[int] = None, slow: Optional[Fault] = None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if status == 429 or retry_after is not None:
+                    self.send_header("Retry-After", str(1 if retry_after is None else retry_after))
+                self.end_headers()
+                if slow is None:
+                    self.wfile.write(body)
+                    return
+                # Ten pieces spread over body_seconds
+                piece = -(-len(body) // 10)
+                try:
+                    for start in range(0, len(body), piece):
+                        self.wfile.write(body[start:start + piece])
+                        self.wfile.flush()
+                        time.sleep(slow.body_seconds / 10)
+                except OSError:
+                    self.close_connection = True  # Client gave up
+
+            def _reset(self):
+                # SO_LINGER with a zero timeout makes close() send a RST
+                self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+                self.connection.close()
+                self.close_connection = True
+                self.wfile = io.BytesIO()  # Absorbs the handler's final flush
+
+            def log_message(self, *args):
+                pass
+
+        self.started = time.monotonic()
+        self.httpd = _QuietServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_port}"
+
+    def _draw(self, provider: str):
+        with self._lock:
+            self.requests += 1
+            delay = self.config.latency_for(provider).sample(self._rng)
+            fail = self._rng.random() < self.config.error_rate
+            faults = []
+            if self.config.scenario:
+                faults = self.config.scenario.draw(provider, time.monotonic() - self.started, self._rng)
+        return delay, fail, faults
+
+    def start(self) -> str:
+        threading.Thread(target=self.httpd.serve_forever, name="mock-providers", daemon=True).start()
+        return self.url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _serve_process(config: MockConfig, ready):
+    server = MockProviderServer(config)
+    ready.put(server.url)
+    server.httpd.serve_forever()
+
+
+def spawn_server(config: MockConfig) -> tuple:
+    """
+    Run the mock server in its own process, so its CPU and memory stay out
+    of the measurements; returns (url, process)
+    """
+    context = multiprocessing.get_context("spawn")
+    ready = context.Queue()
+    process = context.Process(target=_serve_process, args=(config, ready), name="mock-providers", daemon=True)
+    process.start()
+    return ready.get(timeout=30), process
+
+
+def mock_agents(url: str) -> list:
+    """Real agents with their BASE_URL pointed at a mock server"""
+    agents = [
+        VirusTotalAgent("bench"),
+        ShodanAgent("bench"),
+        CensysAgent("bench", "bench"),
+        OTXAgent("bench"),
+        AbuseIPDBAgent("bench"),
+    ]
+    for agent in agents:
+        agent.BASE_URL = url + PREFIXES[agent.name]
+    return agents
+
+
+def unlimit_providers() -> Dict[str, Any]:
+    """Lift the provider rate limits so the benchmark measures ThreatFusion itself; returns the previous limiters"""
+    return {name: RateLimiter.install(name, TokenBucket(10 ** 9)) for name in LIMITERS}
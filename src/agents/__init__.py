@@ -1,4 +1,23 @@
 """Agent Package Initialization"""
 from src.agents.base import EnrichmentAgent
+from src.agents.virustotal import VirusTotalAgent
+from src.agents.shodan import ShodanAgent
+from src.agents.censys import CensysAgent
+from src.agents.otx import OTXAgent
+from src.agents.abuseipdb import AbuseIPDBAgent
 
-__all__ = ['EnrichmentAgent']
+# Agent classes by source name, for parsing archived payloads offline
+AGENT_CLASSES = {
+    agent_cls.SOURCE: agent_cls
+    for agent_cls in [VirusTotalAgent, ShodanAgent, CensysAgent, OTXAgent, AbuseIPDBAgent]
+}
+
+__all__ = [
+    'EnrichmentAgent',
+    'VirusTotalAgent',
+    'ShodanAgent',
+    'CensysAgent',
+    'OTXAgent',
+    'AbuseIPDBAgent',
+    'AGENT_CLASSES'
+]
@@ -4,23 +4,27 @@ Enriches IP addresses with abuse reports and reputation scores
 """
 from typing import Dict, Any
 from src.agents.base import EnrichmentAgent
-from src.models import IndicatorType
+from src.models import IndicatorType, EnrichmentRecord
 from src.clients.http_client import HTTPClient
+from src.clients.circuit_breaker import circuit_breaker
 from src.clients.rate_limiter import rate_limit
 
 
 class AbuseIPDBAgent(EnrichmentAgent):
     """AbuseIPDB IP reputation agent"""
     
+    SOURCE = "AbuseIPDB"
     BASE_URL = "https://api.abuseipdb.com/api/v2"
+    PARSERS = {"check": "_parse_check"}
     
     def __init__(self, api_key: str):
-        super().__init__(api_key, "AbuseIPDB")
-        self.client = HTTPClient(timeout=30)
+        super().__init__(api_key, self.SOURCE)
+        self.client = HTTPClient(timeout=30, provider=self.SOURCE)
         self.supported_types = [IndicatorType.IP_V4, IndicatorType.IP_V6]
     
+    @circuit_breaker
     @rate_limit('abuseipdb')
-    def enrich(self, indicator: str, itype: IndicatorType) -> Dict[str, Any]:
+    def enrich(self, indicator: str, itype: IndicatorType) -> EnrichmentRecord:
         """Enrich IP address using AbuseIPDB"""
         try:
             if itype not in [IndicatorType.IP_V4, IndicatorType.IP_V6]:
@@ -29,13 +33,13 @@ class AbuseIPDBAgent(EnrichmentAgent):
                     {},
                     status="error",
                     error=f"AbuseIPDB only supports IP addresses"
-                ).dict()
+                )
             
             data = self._check_ip(indicator)
-            return self.create_result(indicator, data).dict()
+            return self.create_result(indicator, data)
         
         except Exception as e:
-            return self.handle_error(indicator, e).dict()
+            return self.handle_error(indicator, e)
     
     def _check_ip(self, ip: str) -> Dict[str, Any]:
         """Check IP address in AbuseIPDB"""
@@ -51,25 +55,8 @@ class AbuseIPDBAgent(EnrichmentAgent):
         }
         
         try:
-            response = self.client.get(url, headers=headers, params=params)
-            data = response.json()
-            
-            result = data.get('data', {})
-            
-            return {
-                "abuse_confidence_score": result.get('abuseConfidenceScore', 0),
-                "country_code": result.get('countryCode'),
-                "country_name": result.get('countryName'),
-                "usage_type": result.get('usageType'),
-                "isp": result.get('isp'),
-                "domain": result.get('domain'),
-                "total_reports": result.get('totalReports', 0),
-                "num_distinct_users": result.get('numDistinctUsers', 0),
-                "last_reported_at": result.get('lastReportedAt'),
-                "is_public": result.get('isPublic', True),
-                "is_whitelisted": result.get('isWhitelisted', False),
-                "is_tor": result.get('isTor', False)
-            }
+            data = self.fetch_json("check", ip, url, headers=headers, params=params)
+            return self._parse_check(data)
         
         except Exception as e:
             if "429" in str(e):
@@ -78,3 +65,23 @@ class AbuseIPDBAgent(EnrichmentAgent):
                     "message": "AbuseIPDB rate limit exceeded"
                 }
             raise
+    
+    @staticmethod
+    def _parse_check(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract reputation fields from a raw AbuseIPDB payload"""
+        result = data.get('data', {})
+        
+        return {
+            "abuse_confidence_score": result.get('abuseConfidenceScore', 0),
+            "country_code": result.get('countryCode'),
+            "country_name": result.get('countryName'),
+            "usage_type": result.get('usageType'),
+            "isp": result.get('isp'),
+            "domain": result.get('domain'),
+            "total_reports": result.get('totalReports', 0),
+            "num_distinct_users": result.get('numDistinctUsers', 0),
+            "last_reported_at": result.get('lastReportedAt'),
+            "is_public": result.get('isPublic', True),
+            "is_whitelisted": result.get('isWhitelisted', False),
+            "is_tor": result.get('isTor', False)
+        }
@@ -2,24 +2,40 @@
 Base Enrichment Agent
 Abstract base class for all threat intelligence agents
 """
+import threading
 from abc import ABC, abstractmethod
-from datetime import datetime
-from typing import Dict, List, Any
-from src.models import IndicatorType, EnrichmentResult
+from typing import Dict, List, Any, Optional
+import requests
+from src.models import IndicatorType, EnrichmentRecord
+from src.telemetry.metrics import AGENT_RESULTS
+from src.telemetry.spans import span
 
 
 class EnrichmentAgent(ABC):
     """Abstract base class for threat intelligence enrichment agents"""
     
+    # Source name shared by every instance, e.g. "VirusTotal"
+    SOURCE: str = ""
+    
+    # Maps a response kind (e.g. "host") to the method that extracts fields
+    # from its raw payload, so archived responses can be re-parsed offline
+    PARSERS: Dict[str, str] = {}
+    
+    # Maps a response kind to a json_stream field spec; kinds listed here are
+    # streamed and only the fields their parser reads are decoded
+    FIELDS: Dict[str, Any] = {}
+    
     def __init__(self, api_key: str, name: str):
         self.api_key = api_key
         self.name = name
         self.request_count = 0
         self.error_count = 0
+        self._stats_lock = threading.Lock()  # Results are created from pool threads
         self.supported_types: List[IndicatorType] = []
+        self.archive = None  # Optional ResponseArchive for raw payloads
     
     @abstractmethod
-    def enrich(self, indicator: str, itype: IndicatorType) -> Dict[str, Any]:
+    def enrich(self, indicator: str, itype: IndicatorType) -> EnrichmentRecord:
         """
         Enrich an indicator with threat intelligence
         
@@ -28,7 +44,7 @@ class EnrichmentAgent(ABC):
             itype: The indicator type
         
         Returns:
-            Dictionary containing enrichment data
+            EnrichmentRecord containing enrichment data
         """
         pass
     
@@ -44,22 +60,17 @@ class EnrichmentAgent(ABC):
         data: Dict[str, Any],
         status: str = "success",
         error: str = None
-    ) -> EnrichmentResult:
+    ) -> EnrichmentRecord:
         """Create standardized enrichment result"""
-        self.request_count += 1
-        if error:
-            self.error_count += 1
+        with self._stats_lock:
+            self.request_count += 1
+            if error:
+                self.error_count += 1
+        AGENT_RESULTS.labels(self.name, status).inc()
         
-        return EnrichmentResult(
-            indicator=indicator,
-            source=self.name,
-            status=status,
-            data=data,
-            error=error,
-            timestamp=datetime.utcnow()
-        )
+        return EnrichmentRecord(indicator, self.name, status, data, error)
     
-    def handle_error(self, indicator: str, error: Exception) -> EnrichmentResult:
+    def handle_error(self, indicator: str, error: Exception) -> EnrichmentRecord:
         """Standardized error handling"""
         return self.create_result(
             indicator=indicator,
@@ -68,10 +79,50 @@ class EnrichmentAgent(ABC):
             error=str(error)
         )
     
+    def fetch_json(self, kind: str, indicator: str, url: str, **kwargs) -> Any:
+        """
+        GET a provider endpoint and decode its JSON payload
+        
+        When an archive is attached the full body is kept for re-parsing, so
+        field selection is skipped; otherwise kinds with a FIELDS spec are
+        parsed incrementally from the response stream.
+        """
+        if self.archive is not None:
+            response = self.client.get(url, **kwargs)
+            self.archive_response(kind, indicator, response)
+            with span("parse"):
+                return response.json()
+        
+        return self.client.get_json(url, fields=self.FIELDS.get(kind), **kwargs)
+    
+    def archive_response(self, kind: str, indicator: str, response: requests.Response):
+        """Append the raw response body to the archive, if one is attached"""
+        if self.archive is not None:
+            self.archive.append(
+                self.name,
+                kind,
+                indicator,
+                response.content,
+                status_code=response.status_code
+            )
+    
+    @classmethod
+    def parse_payload(cls, kind: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Re-run field extraction over a raw payload without any network access
+        
+        Returns None if this agent has no parser for the response kind.
+        """
+        parser = cls.PARSERS.get(kind)
+        if parser is None:
+            return None
+        return getattr(cls, parser)(payload)
+    
     def get_stats(self) -> Dict[str, int]:
         """Get agent statistics"""
-        return {
-            "total_requests": self.request_count,
-            "errors": self.error_count,
-            "success_rate": 1 - (self.error_count / max(self.request_count, 1))
-        }
+        with self._stats_lock:
+            return {
+                "total_requests": self.request_count,
+                "errors": self.error_count,
+                "success_rate": 1 - (self.error_count / max(self.request_count, 1))
+            }
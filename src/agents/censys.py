@@ -4,24 +4,63 @@ Enriches indicators using Censys Search API v2
 """
 from typing import Dict, Any
 from src.agents.base import EnrichmentAgent
-from src.models import IndicatorType
+from src.models import IndicatorType, EnrichmentRecord
 from src.clients.http_client import HTTPClient
+from src.clients.json_stream import ArrayOf
+from src.clients.circuit_breaker import circuit_breaker
 from src.clients.rate_limiter import rate_limit
 
 
 class CensysAgent(EnrichmentAgent):
     """Censys certificate and infrastructure intelligence agent"""
     
+    SOURCE = "Censys"
     BASE_URL = "https://search.censys.io/api/v2"
+    PARSERS = {
+        "host": "_parse_host",
+        "certificates": "_parse_certificates"
+    }
+    
+    # Only what the parsers read; full service records and certificates are skipped
+    FIELDS = {
+        "host": {
+            "result": {
+                "ip": True,
+                "services": ArrayOf({
+                    "port": True,
+                    "service_name": True,
+                    "transport_protocol": True
+                }, limit=10),
+                "location": {"country": True, "city": True, "coordinates": True},
+                "autonomous_system": True,
+                "last_updated_at": True
+            }
+        },
+        "certificates": {
+            "result": {
+                "total": True,
+                "hits": ArrayOf({
+                    "fingerprint_sha256": True,
+                    "parsed": {
+                        "issuer": {"common_name": True},
+                        "subject": {"common_name": True},
+                        "validity": True,
+                        "names": ArrayOf(True, limit=10)
+                    }
+                }, limit=5)
+            }
+        }
+    }
     
     def __init__(self, api_id: str, api_secret: str):
-        super().__init__(api_id, "Censys")
+        super().__init__(api_id, self.SOURCE)
         self.api_secret = api_secret
-        self.client = HTTPClient(timeout=30)
+        self.client = HTTPClient(timeout=30, provider=self.SOURCE)
         self.supported_types = [IndicatorType.IP_V4, IndicatorType.DOMAIN]
     
+    @circuit_breaker
     @rate_limit('censys')
-    def enrich(self, indicator: str, itype: IndicatorType) -> Dict[str, Any]:
+    def enrich(self, indicator: str, itype: IndicatorType) -> EnrichmentRecord:
         """Enrich indicator using Censys"""
         try:
             if itype == IndicatorType.IP_V4:
@@ -34,12 +73,12 @@ class CensysAgent(EnrichmentAgent):
                     {},
                     status="error",
                     error=f"Unsupported indicator type: {itype.value}"
-                ).dict()
+                )
             
-            return self.create_result(indicator, data).dict()
+            return self.create_result(indicator, data)
         
         except Exception as e:
-            return self.handle_error(indicator, e).dict()
+            return self.handle_error(indicator, e)
     
     def _check_host(self, ip: str) -> Dict[str, Any]:
         """Check host information in Censys"""
@@ -47,32 +86,7 @@ class CensysAgent(EnrichmentAgent):
         auth = (self.api_key, self.api_secret)
         
         try:
-            response = self.client.get(url, auth=auth)
-            data = response.json()
-            
-            result = data.get('result', {})
-            services = []
-            
-            for service in result.get('services', [])[:10]:
-                services.append({
-                    "port": service.get('port'),
-                    "service_name": service.get('service_name'),
-                    "transport_protocol": service.get('transport_protocol')
-                })
-            
-            location = result.get('location', {})
-            
-            return {
-                "ip": result.get('ip'),
-                "services": services,
-                "location": {
-                    "country": location.get('country'),
-                    "city": location.get('city'),
-                    "coordinates": location.get('coordinates', {})
-                },
-                "autonomous_system": result.get('autonomous_system', {}),
-                "last_updated": result.get('last_updated_at')
-            }
+            return self._parse_host(self.fetch_json("host", ip, url, auth=auth))
         
         except Exception as e:
             if "404" in str(e):
@@ -82,6 +96,33 @@ class CensysAgent(EnrichmentAgent):
                 }
             raise
     
+    @staticmethod
+    def _parse_host(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract host fields from a raw Censys payload"""
+        result = data.get('result', {})
+        services = []
+        
+        for service in result.get('services', [])[:10]:
+            services.append({
+                "port": service.get('port'),
+                "service_name": service.get('service_name'),
+                "transport_protocol": service.get('transport_protocol')
+            })
+        
+        location = result.get('location', {})
+        
+        return {
+            "ip": result.get('ip'),
+            "services": services,
+            "location": {
+                "country": location.get('country'),
+                "city": location.get('city'),
+                "coordinates": location.get('coordinates', {})
+            },
+            "autonomous_system": result.get('autonomous_system', {}),
+            "last_updated": result.get('last_updated_at')
+        }
+    
     def _check_certificate(self, domain: str) -> Dict[str, Any]:
         """Check certificate information for domain"""
         url = f"{self.BASE_URL}/certificates/search"
@@ -92,26 +133,8 @@ class CensysAgent(EnrichmentAgent):
         }
         
         try:
-            response = self.client.get(url, params=params, auth=auth)
-            data = response.json()
-            
-            hits = data.get('result', {}).get('hits', [])
-            certificates = []
-            
-            for hit in hits[:5]:
-                parsed = hit.get('parsed', {})
-                certificates.append({
-                    "fingerprint": hit.get('fingerprint_sha256'),
-                    "issuer": parsed.get('issuer', {}).get('common_name', []),
-                    "subject": parsed.get('subject', {}).get('common_name', []),
-                    "validity": parsed.get('validity', {}),
-                    "names": parsed.get('names', [])[:10]
-                })
-            
-            return {
-                "total_certificates": data.get('result', {}).get('total', 0),
-                "certificates": certificates
-            }
+            data = self.fetch_json("certificates", domain, url, params=params, auth=auth)
+            return self._parse_certificates(data)
         
         except Exception as e:
             if "404" in str(e):
@@ -120,3 +143,24 @@ class CensysAgent(EnrichmentAgent):
                     "message": "No certificates found for domain"
                 }
             raise
+    
+    @staticmethod
+    def _parse_certificates(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract certificate fields from a raw Censys search payload"""
+        hits = data.get('result', {}).get('hits', [])
+        certificates = []
+        
+        for hit in hits[:5]:
+            parsed = hit.get('parsed', {})
+            certificates.append({
+                "fingerprint": hit.get('fingerprint_sha256'),
+                "issuer": parsed.get('issuer', {}).get('common_name', []),
+                "subject": parsed.get('subject', {}).get('common_name', []),
+                "validity": parsed.get('validity', {}),
+                "names": parsed.get('names', [])[:10]
+            })
+        
+        return {
+            "total_certificates": data.get('result', {}).get('total', 0),
+            "certificates": certificates
+        }
@@ -2,26 +2,54 @@
 AlienVault OTX Agent
 Enriches indicators using threat intelligence pulses
 """
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from src.agents.base import EnrichmentAgent
-from src.models import IndicatorType
+from src.models import IndicatorType, EnrichmentRecord
 from src.clients.http_client import HTTPClient
+from src.clients.json_stream import ArrayOf
+from src.clients.circuit_breaker import circuit_breaker
 from src.clients.rate_limiter import rate_limit
 
 
 class OTXAgent(EnrichmentAgent):
     """AlienVault OTX community threat intelligence agent"""
     
+    SOURCE = "OTX"
     BASE_URL = "https://otx.alienvault.com/api/v1"
     
+    # Archived responses are keyed by OTX section type
+    SECTION_TYPES = ["file", "IPv4", "IPv6", "domain", "url", "email"]
+    PARSERS = {section_type: "_parse_general" for section_type in SECTION_TYPES}
+    
+    # Only what _parse_general reads; pulse descriptions and references are skipped
+    _GENERAL_FIELDS = {
+        "pulse_info": {
+            "count": True,
+            "pulses": ArrayOf({
+                "name": True,
+                "created": True,
+                "modified": True,
+                "author_name": True,
+                "tags": ArrayOf(True, limit=5),
+                "adversary": True,
+                "targeted_countries": ArrayOf(True, limit=5),
+                "malware_families": ArrayOf(True, limit=5),
+                "attack_ids": ArrayOf(True, limit=5)
+            }, limit=10)
+        },
+        "validation": ArrayOf(True, limit=5)
+    }
+    FIELDS = dict.fromkeys(SECTION_TYPES, _GENERAL_FIELDS)
+    
     def __init__(self, api_key: str):
-        super().__init__(api_key, "OTX")
-        self.client = HTTPClient(timeout=30)
+        super().__init__(api_key, self.SOURCE)
+        self.client = HTTPClient(timeout=30, provider=self.SOURCE)
         # OTX supports all indicator types
         self.supported_types = []  # Empty = supports all
     
+    @circuit_breaker
     @rate_limit('otx')
-    def enrich(self, indicator: str, itype: IndicatorType) -> Dict[str, Any]:
+    def enrich(self, indicator: str, itype: IndicatorType) -> EnrichmentRecord:
         """Enrich indicator using AlienVault OTX"""
         try:
             # Map IndicatorType to OTX section type
@@ -39,10 +67,10 @@ class OTXAgent(EnrichmentAgent):
             section_type = type_mapping.get(itype, "file")
             data = self._get_general_info(indicator, section_type)
             
-            return self.create_result(indicator, data).dict()
+            return self.create_result(indicator, data)
         
         except Exception as e:
-            return self.handle_error(indicator, e).dict()
+            return self.handle_error(indicator, e)
     
     def _get_general_info(self, indicator: str, section_type: str) -> Dict[str, Any]:
         """Get general information about indicator"""
@@ -50,36 +78,8 @@ class OTXAgent(EnrichmentAgent):
         headers = {"X-OTX-API-KEY": self.api_key}
         
         try:
-            response = self.client.get(url, headers=headers)
-            data = response.json()
-            
-            pulse_info = data.get('pulse_info', {})
-            pulses = pulse_info.get('pulses', [])
-            
-            # Extract pulse details
-            pulse_details = []
-            for pulse in pulses[:10]:  # Top 10 pulses
-                pulse_details.append({
-                    "name": pulse.get('name'),
-                    "created": pulse.get('created'),
-                    "modified": pulse.get('modified'),
-                    "author": pulse.get('author_name'),
-                    "tags": pulse.get('tags', [])[:5],
-                    "adversary": pulse.get('adversary'),
-                    "targeted_countries": pulse.get('targeted_countries', [])[:5],
-                    "malware_families": pulse.get('malware_families', [])[:5],
-                    "attack_ids": pulse.get('attack_ids', [])[:5]
-                })
-            
-            validation = data.get('validation', [])
-            
-            return {
-                "pulse_count": pulse_info.get('count', 0),
-                "pulses": pulse_details,
-                "validation": validation[:5],
-                "indicator_type": section_type,
-                "has_threat_intel": pulse_info.get('count', 0) > 0
-            }
+            data = self.fetch_json(section_type, indicator, url, headers=headers)
+            return self._parse_general(data, section_type)
         
         except Exception as e:
             if "404" in str(e):
@@ -90,3 +90,41 @@ class OTXAgent(EnrichmentAgent):
                     "message": "No threat intelligence found for indicator"
                 }
             raise
+    
+    @staticmethod
+    def _parse_general(data: Dict[str, Any], section_type: str) -> Dict[str, Any]:
+        """Extract pulse fields from a raw OTX general payload"""
+        pulse_info = data.get('pulse_info', {})
+        pulses = pulse_info.get('pulses', [])
+        
+        # Extract pulse details
+        pulse_details = []
+        for pulse in pulses[:10]:  # Top 10 pulses
+            pulse_details.append({
+                "name": pulse.get('name'),
+                "created": pulse.get('created'),
+                "modified": pulse.get('modified'),
+                "author": pulse.get('author_name'),
+                "tags": pulse.get('tags', [])[:5],
+                "adversary": pulse.get('adversary'),
+                "targeted_countries": pulse.get('targeted_countries', [])[:5],
+                "malware_families": pulse.get('malware_families', [])[:5],
+                "attack_ids": pulse.get('attack_ids', [])[:5]
+            })
+        
+        validation = data.get('validation', [])
+        
+        return {
+            "pulse_count": pulse_info.get('count', 0),
+            "pulses": pulse_details,
+            "validation": validation[:5],
+            "indicator_type": section_type,
+            "has_threat_intel": pulse_info.get('count', 0) > 0
+        }
+    
+    @classmethod
+    def parse_payload(cls, kind: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Re-run field extraction over an archived general payload"""
+        if kind not in cls.PARSERS:
+            return None
+        return cls._parse_general(payload, kind)
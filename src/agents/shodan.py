@@ -4,23 +4,54 @@ Enriches IP addresses using Shodan API
 """
 from typing import Dict, Any
 from src.agents.base import EnrichmentAgent
-from src.models import IndicatorType
+from src.models import IndicatorType, EnrichmentRecord
 from src.clients.http_client import HTTPClient
+from src.clients.json_stream import ArrayOf, KEYS
+from src.clients.circuit_breaker import circuit_breaker
 from src.clients.rate_limiter import rate_limit
 
 
 class ShodanAgent(EnrichmentAgent):
     """Shodan infrastructure intelligence agent"""
     
+    SOURCE = "Shodan"
     BASE_URL = "https://api.shodan.io"
+    PARSERS = {"host": "_parse_host"}
     
-    def __init__(self, api_key: str):
-        super().__init__(api_key, "Shodan")
-        self.client = HTTPClient(timeout=30)
+    # Only what _parse_host reads; banners for every port are skipped
+    FIELDS = {
+        "host": {
+            "hostnames": True,
+            "country_name": True,
+            "country_code": True,
+            "city": True,
+            "org": True,
+            "isp": True,
+            "asn": True,
+            "ports": True,
+            "vulns": KEYS,
+            "tags": True,
+            "last_update": True,
+            "data": ArrayOf({
+                "port": True,
+                "transport": True,
+                "product": True,
+                "version": True,
+                "data": True
+            }, limit=10)
+        }
+    }
+    
+    def __init__(self, api_key: str, minify: bool = False):
+        super().__init__(api_key, self.SOURCE)
+        self.client = HTTPClient(timeout=30, provider=self.SOURCE)
+        # Server-side trimming: Shodan omits banners, so no services are reported
+        self.minify = minify
         self.supported_types = [IndicatorType.IP_V4]  # Shodan only supports IPv4
     
+    @circuit_breaker
     @rate_limit('shodan')
-    def enrich(self, indicator: str, itype: IndicatorType) -> Dict[str, Any]:
+    def enrich(self, indicator: str, itype: IndicatorType) -> EnrichmentRecord:
         """Enrich IP address using Shodan"""
         try:
             if itype != IndicatorType.IP_V4:
@@ -29,48 +60,23 @@ class ShodanAgent(EnrichmentAgent):
                     {},
                     status="error",
                     error=f"Shodan only supports IPv4 addresses"
-                ).dict()
+                )
             
             data = self._check_host(indicator)
-            return self.create_result(indicator, data).dict()
+            return self.create_result(indicator, data)
         
         except Exception as e:
-            return self.handle_error(indicator, e).dict()
+            return self.handle_error(indicator, e)
     
     def _check_host(self, ip: str) -> Dict[str, Any]:
         """Check host information in Shodan"""
         url = f"{self.BASE_URL}/shodan/host/{ip}"
         params = {"key": self.api_key}
+        if self.minify:
+            params["minify"] = "true"
         
         try:
-            response = self.client.get(url, params=params)
-            data = response.json()
-            
-            # Extract services
-            services = []
-            for item in data.get('data', [])[:10]:  # Top 10 services
-                services.append({
-                    "port": item.get('port'),
-                    "transport": item.get('transport'),
-                    "product": item.get('product'),
-                    "version": item.get('version'),
-                    "banner": item.get('data', '')[:200]  # First 200 chars
-                })
-            
-            return {
-                "hostnames": data.get('hostnames', []),
-                "country": data.get('country_name'),
-                "country_code": data.get('country_code'),
-                "city": data.get('city'),
-                "org": data.get('org'),
-                "isp": data.get('isp'),
-                "asn": data.get('asn'),
-                "ports": data.get('ports', []),
-                "vulns": list(data.get('vulns', {}).keys())[:10],  # Top 10 vulnerabilities
-                "tags": data.get('tags', []),
-                "services": services,
-                "last_update": data.get('last_update')
-            }
+            return self._parse_host(self.fetch_json("host", ip, url, params=params))
         
         except Exception as e:
             if "404" in str(e) or "No information" in str(e):
@@ -79,3 +85,32 @@ class ShodanAgent(EnrichmentAgent):
                     "message": "IP not found in Shodan database"
                 }
             raise
+    
+    @staticmethod
+    def _parse_host(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract host fields from a raw Shodan payload"""
+        # Extract services
+        services = []
+        for item in data.get('data', [])[:10]:  # Top 10 services
+            services.append({
+                "port": item.get('port'),
+                "transport": item.get('transport'),
+                "product": item.get('product'),
+                "version": item.get('version'),
+                "banner": item.get('data', '')[:200]  # First 200 chars
+            })
+        
+        return {
+            "hostnames": data.get('hostnames', []),
+            "country": data.get('country_name'),
+            "country_code": data.get('country_code'),
+            "city": data.get('city'),
+            "org": data.get('org'),
+            "isp": data.get('isp'),
+            "asn": data.get('asn'),
+            "ports": data.get('ports', []),
+            "vulns": list(data.get('vulns', {}).keys())[:10],  # Top 10 vulnerabilities
+            "tags": data.get('tags', []),
+            "services": services,
+            "last_update": data.get('last_update')
+        }
@@ -4,19 +4,27 @@ Enriches indicators using VirusTotal API v3
 """
 from typing import Dict, Any
 from src.agents.base import EnrichmentAgent
-from src.models import IndicatorType
+from src.models import IndicatorType, EnrichmentRecord
 from src.clients.http_client import HTTPClient
+from src.clients.circuit_breaker import circuit_breaker
 from src.clients.rate_limiter import rate_limit
 
 
 class VirusTotalAgent(EnrichmentAgent):
     """VirusTotal threat intelligence agent"""
     
+    SOURCE = "VirusTotal"
     BASE_URL = "https://www.virustotal.com/api/v3"
+    PARSERS = {
+        "file": "_parse_file",
+        "ip": "_parse_ip",
+        "domain": "_parse_domain",
+        "url": "_parse_url"
+    }
     
     def __init__(self, api_key: str):
-        super().__init__(api_key, "VirusTotal")
-        self.client = HTTPClient(timeout=30)
+        super().__init__(api_key, self.SOURCE)
+        self.client = HTTPClient(timeout=30, provider=self.SOURCE)
         self.supported_types = [
             IndicatorType.HASH_MD5,
             IndicatorType.HASH_SHA1,
@@ -26,8 +34,9 @@ class VirusTotalAgent(EnrichmentAgent):
             IndicatorType.URL
         ]
     
+    @circuit_breaker
     @rate_limit('virustotal')
-    def enrich(self, indicator: str, itype: IndicatorType) -> Dict[str, Any]:
+    def enrich(self, indicator: str, itype: IndicatorType) -> EnrichmentRecord:
         """Enrich indicator using VirusTotal API"""
         try:
             if itype in [IndicatorType.HASH_MD5, IndicatorType.HASH_SHA1, IndicatorType.HASH_SHA256]:
@@ -44,12 +53,12 @@ class VirusTotalAgent(EnrichmentAgent):
                     {},
                     status="error",
                     error=f"Unsupported indicator type: {itype.value}"
-                ).dict()
+                )
             
-            return self.create_result(indicator, data).dict()
+            return self.create_result(indicator, data)
         
         except Exception as e:
-            return self.handle_error(indicator, e).dict()
+            return self.handle_error(indicator, e)
     
     def _check_file(self, file_hash: str) -> Dict[str, Any]:
         """Check file hash in VirusTotal"""
@@ -57,27 +66,7 @@ class VirusTotalAgent(EnrichmentAgent):
         headers = {"x-apikey": self.api_key}
         
         try:
-            response = self.client.get(url, headers=headers)
-            data = response.json()
-            
-            attrs = data['data']['attributes']
-            stats = attrs.get('last_analysis_stats', {})
-            
-            return {
-                "detections": stats.get('malicious', 0),
-                "suspicious": stats.get('suspicious', 0),
-                "undetected": stats.get('undetected', 0),
-                "total": sum(stats.values()),
-                "names": attrs.get('names', [])[:5],  # Top 5 names
-                "first_seen": attrs.get('first_submission_date'),
-                "last_analyzed": attrs.get('last_analysis_date'),
-                "file_type": attrs.get('type_description'),
-                "size": attrs.get('size'),
-                "md5": attrs.get('md5'),
-                "sha1": attrs.get('sha1'),
-                "sha256": attrs.get('sha256'),
-                "detection_ratio": f"{stats.get('malicious', 0)}/{sum(stats.values())}"
-            }
+            return self._parse_file(self.fetch_json("file", file_hash, url, headers=headers))
         
         except Exception as e:
             if "404" in str(e):
@@ -89,14 +78,38 @@ class VirusTotalAgent(EnrichmentAgent):
                 }
             raise
     
+    @staticmethod
+    def _parse_file(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract file report fields from a raw VirusTotal payload"""
+        attrs = data['data']['attributes']
+        stats = attrs.get('last_analysis_stats', {})
+        
+        return {
+            "detections": stats.get('malicious', 0),
+            "suspicious": stats.get('suspicious', 0),
+            "undetected": stats.get('undetected', 0),
+            "total": sum(stats.values()),
+            "names": attrs.get('names', [])[:5],  # Top 5 names
+            "first_seen": attrs.get('first_submission_date'),
+            "last_analyzed": attrs.get('last_analysis_date'),
+            "file_type": attrs.get('type_description'),
+            "size": attrs.get('size'),
+            "md5": attrs.get('md5'),
+            "sha1": attrs.get('sha1'),
+            "sha256": attrs.get('sha256'),
+            "detection_ratio": f"{stats.get('malicious', 0)}/{sum(stats.values())}"
+        }
+    
     def _check_ip(self, ip: str) -> Dict[str, Any]:
         """Check IP address in VirusTotal"""
         url = f"{self.BASE_URL}/ip_addresses/{ip}"
         headers = {"x-apikey": self.api_key}
         
-        response = self.client.get(url, headers=headers)
-        data = response.json()
-        
+        return self._parse_ip(self.fetch_json("ip", ip, url, headers=headers))
+    
+    @staticmethod
+    def _parse_ip(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract IP report fields from a raw VirusTotal payload"""
         attrs = data['data']['attributes']
         stats = attrs.get('last_analysis_stats', {})
         
@@ -116,9 +129,11 @@ class VirusTotalAgent(EnrichmentAgent):
         url = f"{self.BASE_URL}/domains/{domain}"
         headers = {"x-apikey": self.api_key}
         
-        response = self.client.get(url, headers=headers)
-        data = response.json()
-        
+        return self._parse_domain(self.fetch_json("domain", domain, url, headers=headers))
+    
+    @staticmethod
+    def _parse_domain(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract domain report fields from a raw VirusTotal payload"""
         attrs = data['data']['attributes']
         stats = attrs.get('last_analysis_stats', {})
         
@@ -129,6 +144,10 @@ class VirusTotalAgent(EnrichmentAgent):
             "categories": attrs.get('categories', {}),
             "creation_date": attrs.get('creation_date'),
             "registrar": attrs.get('registrar'),
+            "resolutions": list(dict.fromkeys(
+                record.get('value') for record in attrs.get('last_dns_records', [])
+                if record.get('type') == 'A' and record.get('value')
+            ))[:10],
             "detection_ratio": f"{stats.get('malicious', 0)}/{sum(stats.values())}"
         }
     
@@ -140,9 +159,11 @@ class VirusTotalAgent(EnrichmentAgent):
         check_url = f"{self.BASE_URL}/urls/{url_id}"
         headers = {"x-apikey": self.api_key}
         
-        response = self.client.get(check_url, headers=headers)
-        data = response.json()
-        
+        return self._parse_url(self.fetch_json("url", url, check_url, headers=headers))
+    
+    @staticmethod
+    def _parse_url(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract URL report fields from a raw VirusTotal payload"""
         attrs = data['data']['attributes']
         stats = attrs.get('last_analysis_stats', {})
         
@@ -1,5 +1,6 @@
 """Clients Package Initialization"""
 from src.clients.http_client import HTTPClient
 from src.clients.rate_limiter import RateLimiter, rate_limit
+from src.clients.json_stream import ArrayOf, KEYS, select_fields
 
-__all__ = ['HTTPClient', 'RateLimiter', 'rate_limit']
+__all__ = ['HTTPClient', 'RateLimiter', 'rate_limit', 'ArrayOf', 'KEYS', 'select_fields']
@@ -0,0 +1,179 @@
+"""
+Adaptive Timeouts
+Per-provider connect/read timeouts learned from observed latency
+
+Each provider keeps two streaming quantile sketches: one of connection
+set-up times (DNS, TCP and TLS, seen only for new connections) and one of
+time to first byte. Once a sketch has `min_samples` observations, the
+matching timeout becomes its `quantile` (p99 by default) times
+`multiplier`, kept between `min_timeout` and the client's configured
+timeout. Until then the configured timeout applies unchanged.
+
+Timed-out attempts are recorded as taking the timeout they hit, so a
+provider that gets slower pushes its quantiles, and its timeout, back up
+instead of failing every call at the old limit.
+
+With `hedge_quantile` set, HTTPClient sends a second copy of a GET that
+has gone unanswered past that quantile (p95) and uses whichever answer
+arrives first.
+"""
+import math
+import threading
+from typing import Any, Dict, Optional, Tuple
+from src.telemetry.metrics import REGISTRY
+
+
+class LatencySketch:
+    """
+    Streaming quantiles with bounded relative error
+
+    Values fall into logarithmic buckets, so any quantile is within
+    `relative_accuracy` of the true value, using a few dozen buckets for
+    latencies from microseconds to minutes. Once more than `max_count`
+    values have been added, every count is halved so that recent latency
+    outweighs old.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.02, max_count: int = 2000, min_value: float = 1e-4):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_count = max_count
+        self.min_value = min_value
+        self.buckets: Dict[int, float] = {}
+        self.count = 0.0
+
+    def add(self, value: float):
+        key = math.ceil(math.log(max(value, self.min_value)) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0.0) + 1
+        self.count += 1
+        if self.count > self.max_count:
+            self.buckets = {key: count / 2 for key, count in self.buckets.items() if count >= 0.2}
+            self.count = sum(self.buckets.values())
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value below which `q` of observations fall, or None when empty"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen >= rank:
+                break
+        # Midpoint of the bucket (gamma^(key-1), gamma^key]
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+
+class AdaptiveTimeout:
+    """Latency sketches and derived timeouts for one provider"""
+
+    def __init__(
+        self,
+        name: str,
+        min_timeout: float = 1.0,
+        multiplier: float = 3.0,
+        quantile: float = 0.99,
+        min_samples: int = 20,
+        hedge_quantile: Optional[float] = None,
+        adaptive: bool = True
+    ):
+        self.name = name
+        self.min_timeout = min_timeout
+        self.multiplier = multiplier
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.hedge_quantile = hedge_quantile
+        self.adaptive = adaptive
+        self.connect = LatencySketch()
+        self.first_byte = LatencySketch()
+        self.current: Optional[Tuple[float, float]] = None  # Last (connect, read) handed out
+        self._lock = threading.Lock()
+
+    def observe_connect(self, seconds: float):
+        with self._lock:
+            self.connect.add(seconds)
+
+    def observe_first_byte(self, seconds: float):
+        with self._lock:
+            self.first_byte.add(seconds)
+
+    def _bound(self, sketch: LatencySketch, max_timeout: float) -> float:
+        if not self.adaptive or sketch.count < self.min_samples:
+            return max_timeout
+        return min(max_timeout, max(self.min_timeout, sketch.quantile(self.quantile) * self.multiplier))
+
+    def timeouts(self, max_timeout: float) -> Tuple[float, float]:
+        """(connect, read) timeouts for the next request, never above `max_timeout`"""
+        with self._lock:
+            self.current = (self._bound(self.connect, max_timeout), self._bound(self.first_byte, max_timeout))
+        return self.current
+
+    def hedge_after(self) -> Optional[float]:
+        """Seconds without an answer after which to hedge, or None to not hedge"""
+        if not self.adaptive or self.hedge_quantile is None:
+            return None
+        with self._lock:
+            if self.first_byte.count < self.min_samples:
+                return None
+            return self.first_byte.quantile(self.hedge_quantile)
+
+    def median_first_byte(self) -> Optional[float]:
+        """Median seconds to the first response byte, or None before any sample"""
+        with self._lock:
+            return self.first_byte.quantile(0.5)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "samples": round(self.first_byte.count),
+                "first_byte": {
+                    name: self.first_byte.quantile(q)
+                    for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+                },
+                "connect_p99": self.connect.quantile(0.99),
+                "timeouts": self.current,
+            }
+
+
+class AdaptiveTimeouts:
+    """AdaptiveTimeout per provider, created on first use with the configured settings"""
+
+    _trackers: Dict[str, AdaptiveTimeout] = {}
+    _settings: Dict[str, Any] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, name: str) -> AdaptiveTimeout:
+        tracker = cls._trackers.get(name)
+        if tracker is None:
+            with cls._lock:
+                tracker = cls._trackers.get(name)
+                if tracker is None:
+                    tracker = cls._trackers[name] = AdaptiveTimeout(name, **cls._settings)
+        return tracker
+
+    @classmethod
+    def configure(cls, **settings):
+        """Set AdaptiveTimeout options for every provider, discarding what was learned"""
+        with cls._lock:
+            cls._settings = settings
+            cls._trackers = {}
+
+    @classmethod
+    def states(cls) -> Dict[str, Dict[str, Any]]:
+        return {name: tracker.snapshot() for name, tracker in sorted(cls._trackers.items())}
+
+
+def _current_timeouts() -> Dict[Tuple[str, ...], float]:
+    values = {}
+    for name, tracker in list(AdaptiveTimeouts._trackers.items()):
+        if tracker.current:
+            values[(name, "connect")], values[(name, "read")] = tracker.current
+    return values
+
+
+REGISTRY.gauge(
+    "threatfusion_provider_timeout_seconds",
+    "Current adaptive connect and read timeout per provider",
+    ("provider", "kind")
+).set_function(_current_timeouts)
@@ -0,0 +1,36 @@
+"""
+Cancellation
+Stop queued provider calls once nobody is waiting for their answer
+
+A caller (e.g. an API request whose client disconnected, or whose
+enrichment passed its deadline) runs work inside cancel_scope(event); the
+orchestrator copies the context into agent threads, so once the event is
+set the rate limiter gives up its wait without spending a token, and
+HTTPClient sends no new request or retry. Calls already sent to a provider
+finish within their own timeouts.
+"""
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+_cancel: ContextVar[Optional[threading.Event]] = ContextVar("threatfusion_cancel", default=None)
+
+
+class Cancelled(Exception):
+    """Work abandoned because its cancel event was set"""
+
+
+@contextmanager
+def cancel_scope(event: threading.Event) -> Iterator[threading.Event]:
+    """Run the enclosed work (and agent threads it starts) under `event`"""
+    token = _cancel.set(event)
+    try:
+        yield event
+    finally:
+        _cancel.reset(token)
+
+
+def current_cancel() -> Optional[threading.Event]:
+    """The enclosing cancel_scope's event, if any"""
+    return _cancel.get()
@@ -0,0 +1,323 @@
+"""
+HTTP Cassettes
+Record provider traffic to disk and replay it with no network access
+
+Layout of a cassette directory (same scheme as the response archive):
+
+    segment-000001.gz   concatenated gzip members, one per response body
+    index.jsonl         one JSON line per request: key, method, url,
+                        provider, status_code, headers, latency, error,
+                        segment, offset, length, recorded_at
+
+Requests are matched on method, URL and body. Credentials passed as query
+parameters are left out of the key and the stored URL, and request headers
+(where the other API keys travel) are never stored. A request recorded
+several times is replayed in recorded order, then from the start again.
+
+Replay sleeps for each response's recorded latency times `latency_scale`
+(0 replays as fast as possible), so a production traffic shape can be re-run
+against new orchestrator or cache code on a laptop.
+"""
+import gzip
+import hashlib
+import http.client
+import io
+import json
+import logging
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.response import HTTPResponse
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+MODES = (RECORD, REPLAY)
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".gz"
+INDEX_FILE = "index.jsonl"
+
+# Query parameters carrying credentials (Shodan passes its key as `key`)
+SECRET_PARAMS = {"key", "apikey", "api_key", "token"}
+
+# Bodies are stored decoded, so framing headers no longer apply
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """Replay found no recorded response for a request"""
+
+
+@dataclass
+class Interaction:
+    """Index entry for one recorded request"""
+    key: str
+    method: str
+    url: str
+    provider: str
+    status_code: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    latency: float = 0.0
+    error: Optional[str] = None
+    segment: int = 1
+    offset: int = 0
+    length: int = 0
+    recorded_at: Optional[str] = None
+
+
+def redact_url(url: str) -> str:
+    """URL with credential parameters removed and the rest sorted"""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in SECRET_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+def request_key(method: str, url: str, body: Optional[Any] = None) -> str:
+    """Match key of a request"""
+    key = f"{method.upper()} {redact_url(url)}"
+    if body:
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        key += " " + hashlib.sha1(body).hexdigest()
+    return key
+
+
+class Cassette:
+    """A directory of recorded request/response pairs"""
+
+    _instances: Dict[str, 'Cassette'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = REPLAY,
+        latency_scale: float = 1.0,
+        max_segment_bytes: int = 64 * 1024 * 1024,
+        compresslevel: int = 6
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Cassette mode must be one of {', '.join(MODES)}, got {mode!r}")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.max_segment_bytes = max_segment_bytes
+        self.compresslevel = compresslevel
+        self.lock = threading.Lock()
+        self.stats = {"recorded": 0, "replayed": 0, "missed": 0}
+
+        if mode == RECORD:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._segment = self._last_segment()
+        else:
+            if not (self.path / INDEX_FILE).exists():
+                raise FileNotFoundError(f"No cassette index at {self.path / INDEX_FILE}")
+            self._interactions: Dict[str, List[Interaction]] = {}
+            for interaction in self.interactions():
+                self._interactions.setdefault(interaction.key, []).append(interaction)
+            self._next: Dict[str, int] = {}
+            self._handles: Dict[int, Any] = {}
+
+    @classmethod
+    def open(cls, path: str, mode: str = REPLAY, latency_scale: float = 1.0) -> 'Cassette':
+        """
+        Get the shared cassette for a directory
+
+        Recording appends are serialized per instance, so every client in the
+        process must go through the same instance.
+        """
+        key = str(Path(path).resolve())
+        with cls._instances_lock:
+            cassette = cls._instances.get(key)
+            if cassette is None or cassette.mode != mode:
+                cassette = cls._instances[key] = cls(path, mode)
+            cassette.latency_scale = latency_scale
+            return cassette
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.path / f"{SEGMENT_PREFIX}{segment:06d}{SEGMENT_SUFFIX}"
+
+    def _last_segment(self) -> int:
+        segments = [
+            int(p.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            for p in self.path.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")
+        ]
+        return max(segments, default=1)
+
+    def interactions(self):
+        """Iterate index entries in recorded order"""
+        index_path = self.path / INDEX_FILE
+        if not index_path.exists():
+            return
+        with open(index_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield Interaction(**json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # Torn final line from an interrupted write
+
+    def record(
+        self,
+        request: requests.PreparedRequest,
+        provider: str,
+        response: Optional[requests.Response],
+        latency: float,
+        error: Optional[str] = None
+    ) -> Interaction:
+        """Append one request's outcome; the body is written before its index line"""
+        body = response.content if response is not None else b""
+        member = gzip.compress(body or b"", compresslevel=self.compresslevel)
+        headers = {}
+        if response is not None:
+            headers = {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS}
+
+        with self.lock:
+            segment_path = self._segment_path(self._segment)
+            if segment_path.exists() and segment_path.stat().st_size >= self.max_segment_bytes:
+                self._segment += 1
+                segment_path = self._segment_path(self._segment)
+
+            with open(segment_path, "ab") as f:
+                offset = f.tell()
+                f.write(member)
+
+            interaction = Interaction(
+                key=request_key(request.method, request.url, request.body),
+                method=request.method,
+                url=redact_url(request.url),
+                provider=provider,
+                status_code=response.status_code if response is not None else 0,
+                headers=headers,
+                latency=round(latency, 6),
+                error=error,
+                segment=self._segment,
+                offset=offset,
+                length=len(member),
+                recorded_at=datetime.utcnow().isoformat()
+            )
+            with open(self.path / INDEX_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(interaction)) + "\n")
+            self.stats["recorded"] += 1
+        return interaction
+
+    def lookup(self, request: requests.PreparedRequest) -> Optional[Interaction]:
+        """Next recorded outcome for a request, cycling through repeats"""
+        key = request_key(request.method, request.url, request.body)
+        with self.lock:
+            recorded = self._interactions.get(key)
+            if not recorded:
+                self.stats["missed"] += 1
+                return None
+            position = self._next.get(key, 0)
+            self._next[key] = position + 1
+            self.stats["replayed"] += 1
+        return recorded[position % len(recorded)]
+
+    def read(self, interaction: Interaction) -> bytes:
+        """Read one recorded body"""
+        with self.lock:
+            handle = self._handles.get(interaction.segment)
+            if handle is None:
+                handle = self._handles[interaction.segment] = open(self._segment_path(interaction.segment), "rb")
+            handle.seek(interaction.offset)
+            member = handle.read(interaction.length)
+        return zlib.decompress(member, wbits=31)
+
+    def close(self):
+        if self.mode == REPLAY:
+            with self.lock:
+                for handle in self._handles.values():
+                    handle.close()
+                self._handles.clear()
+
+
+_active: Optional[Cassette] = None
+
+
+def use_cassette(cassette: Optional[Cassette]) -> Optional[Cassette]:
+    """Make `cassette` the one new HTTPClients use (None to stop); returns the previous one"""
+    global _active
+    previous, _active = _active, cassette
+    return previous
+
+
+def active_cassette() -> Optional[Cassette]:
+    return _active
+
+
+def _read_timeout(timeout) -> Optional[float]:
+    if isinstance(timeout, tuple):
+        return timeout[1]
+    return timeout
+
+
+class CassetteAdapter(HTTPAdapter):
+    """
+    Transport adapter that records through `adapter`, or replays from the cassette
+
+    Replay never opens a connection: a request with no recording fails with
+    CassetteMiss.
+    """
+
+    def __init__(self, cassette: Cassette, adapter: HTTPAdapter, provider: str = "other"):
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = adapter
+        self.provider = provider
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if self.cassette.mode == RECORD:
+            return self._record(request, stream, timeout, verify, cert, proxies)
+        return self._replay(request, timeout)
+
+    def _record(self, request, stream, timeout, verify, cert, proxies):
+        started = time.perf_counter()
+        try:
+            response = self.adapter.send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+            response.content  # Recorded latency covers the whole body
+        except requests.exceptions.RequestException as e:
+            self.cassette.record(request, self.provider, None, time.perf_counter() - started, error=f"{type(e).__name__}: {e}")
+            raise
+        self.cassette.record(request, self.provider, response, time.perf_counter() - started)
+        return response
+
+    def _replay(self, request, timeout):
+        interaction = self.cassette.lookup(request)
+        if interaction is None:
+            logger.warning("No recorded response for %s %s", request.method, redact_url(request.url))
+            raise CassetteMiss(f"No recorded response for {request.method} {redact_url(request.url)}", request=request)
+
+        delay = interaction.latency * self.cassette.latency_scale
+        limit = _read_timeout(timeout)
+        if limit is not None and delay > limit:
+            time.sleep(limit)
+            raise requests.exceptions.ReadTimeout(f"Replayed response took {delay:.2f}s (timeout {limit}s)", request=request)
+        if delay > 0:
+            time.sleep(delay)
+        if interaction.error:
+            raise requests.exceptions.ConnectionError(f"Replayed: {interaction.error}", request=request)
+
+        body = self.cassette.read(interaction)
+        raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers={**interaction.headers, "Content-Length": str(len(body))},
+            status=interaction.status_code,
+            reason=http.client.responses.get(interaction.status_code, ""),
+            preload_content=False,
+            decode_content=False
+        )
+        return self.build_response(request, raw)
+
+    def close(self):
+        self.adapter.close()
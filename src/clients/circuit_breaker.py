@@ -0,0 +1,212 @@
+"""
+Circuit Breakers
+Per-provider breakers that fail fast while a provider is down
+
+    closed      calls go through; outcomes over the last `window` calls are
+                tracked, and once at least `min_calls` have been seen a
+                failure rate of `failure_rate` (or `slow_rate` of calls
+                slower than `slow_call_seconds`) opens the breaker
+    open        calls are rejected immediately with a source_unavailable
+                result; after `open_seconds` the breaker goes half-open
+    half_open   a single probe call goes through; success closes the
+                breaker, a failed or slow probe opens it again
+
+Outcomes come from HTTPClient, so they measure the provider itself: rate
+limiter waits are not counted as latency, and 4xx answers other than 429
+count as successes (the provider is up). Agents check their breaker before
+taking a rate-limit token (@circuit_breaker above @rate_limit).
+"""
+import threading
+import time
+from collections import deque
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+from src.models import SOURCE_UNAVAILABLE
+from src.telemetry.metrics import BREAKER_REJECTED, BREAKER_TRANSITIONS, REGISTRY
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Gauge values per state
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for one provider"""
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 10.0,
+        slow_rate: float = 0.8,
+        open_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.clock = clock
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self.rejected = 0
+        self._outcomes: deque = deque()  # (failed, slow) per call, oldest first
+        self._failures = 0
+        self._slow = 0
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str):
+        """Change state (caller holds the lock)"""
+        self.state = state
+        BREAKER_TRANSITIONS.labels(self.name, state).inc()
+        if state == OPEN:
+            self.opened_at = self.clock()
+        self._probe_started = None
+        if state != HALF_OPEN:
+            self._outcomes.clear()
+            self._failures = self._slow = 0
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+
+            now = self.clock()
+            if self.state == OPEN and now - self.opened_at >= self.open_seconds:
+                self._transition(HALF_OPEN)
+
+            # One probe at a time; a probe that never reports back (e.g. it made
+            # no HTTP request) is given up on after open_seconds
+            if self.state == HALF_OPEN and (self._probe_started is None or now - self._probe_started >= self.open_seconds):
+                self._probe_started = now
+                return True
+
+            self.rejected += 1
+        BREAKER_REJECTED.labels(self.name).inc()
+        return False
+
+    def record(self, failed: bool, latency: float):
+        """Record the outcome of one provider call"""
+        slow = latency >= self.slow_call_seconds
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._transition(OPEN if failed or slow else CLOSED)
+                return
+            if self.state == OPEN:
+                return  # Call started before the breaker opened
+
+            if len(self._outcomes) >= self.window:
+                old_failed, old_slow = self._outcomes.popleft()
+                self._failures -= old_failed
+                self._slow -= old_slow
+            self._outcomes.append((failed, slow))
+            self._failures += failed
+            self._slow += slow
+
+            calls = len(self._outcomes)
+            if calls >= self.min_calls and (
+                self._failures / calls >= self.failure_rate or self._slow / calls >= self.slow_rate
+            ):
+                self._transition(OPEN)
+
+    def retry_in(self) -> float:
+        """Seconds until the next probe may go out (0 unless open)"""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (self.clock() - self.opened_at))
+
+    def snapshot(self) -> Dict[str, Any]:
+        retry_in = self.retry_in()
+        with self._lock:
+            calls = len(self._outcomes)
+            return {
+                "state": self.state,
+                "calls": calls,
+                "failure_rate": round(self._failures / calls, 3) if calls else 0.0,
+                "slow_rate": round(self._slow / calls, 3) if calls else 0.0,
+                "rejected": self.rejected,
+                "retry_in": round(retry_in, 1),
+            }
+
+
+class CircuitBreakers:
+    """Breaker per provider, created on first use with the configured settings"""
+
+    _breakers: Dict[str, CircuitBreaker] = {}
+    _settings: Dict[str, Any] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, name: str) -> CircuitBreaker:
+        breaker = cls._breakers.get(name)
+        if breaker is None:
+            with cls._lock:
+                breaker = cls._breakers.get(name)
+                if breaker is None:
+                    breaker = cls._breakers[name] = CircuitBreaker(name, **cls._settings)
+        return breaker
+
+    @classmethod
+    def configure(cls, **settings):
+        """Set CircuitBreaker options for every provider, resetting existing breakers"""
+        with cls._lock:
+            cls._settings = settings
+            cls._breakers = {}
+
+    @classmethod
+    def install(cls, name: str, breaker: Optional[CircuitBreaker]) -> Optional[CircuitBreaker]:
+        """
+        Replace a provider's breaker (None removes it)
+
+        Returns the breaker it replaced
+        """
+        with cls._lock:
+            previous = cls._breakers.pop(name, None)
+            if breaker is not None:
+                cls._breakers[name] = breaker
+            return previous
+
+    @classmethod
+    def states(cls) -> Dict[str, Dict[str, Any]]:
+        """Snapshot of every breaker that has seen a call"""
+        return {name: breaker.snapshot() for name, breaker in sorted(cls._breakers.items())}
+
+
+def circuit_breaker(func: Callable) -> Callable:
+    """
+    Decorator for agent enrich methods: fail fast while the agent's provider breaker is open
+
+    Usage: @circuit_breaker above @rate_limit(...)
+    """
+    @wraps(func)
+    def wrapper(self, indicator, itype, *args, **kwargs):
+        breaker = CircuitBreakers.get(self.client.provider)
+        if not breaker.allow():
+            return self.create_result(
+                indicator,
+                {},
+                status=SOURCE_UNAVAILABLE,
+                error=f"{self.name} unavailable (circuit open, next probe in {breaker.retry_in():.0f}s)"
+            )
+        return func(self, indicator, itype, *args, **kwargs)
+    return wrapper
+
+
+REGISTRY.gauge(
+    "threatfusion_circuit_breaker_state",
+    "Provider circuit breaker state (0 closed, 1 half-open, 2 open)",
+    ("provider",)
+).set_function(lambda: {
+    (name,): STATE_VALUES[breaker.state]
+    for name, breaker in list(CircuitBreakers._breakers.items())
+})
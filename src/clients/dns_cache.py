@@ -0,0 +1,109 @@
+"""
+DNS Cache
+Provider host addresses, resolved once per DNS TTL instead of on every connect
+
+New connections to a provider (after an idle pool was closed, or above the
+pool's size) would otherwise each wait on getaddrinfo. Addresses are kept
+for the record's TTL when dnspython is installed (`poetry install -E dns`);
+the system resolver does not expose TTLs, so without it entries are kept
+for `default_ttl` seconds.
+"""
+import ipaddress
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib3.util.connection import allowed_gai_family
+
+# (addresses, seconds they may be cached)
+Lookup = Callable[[str], Tuple[List[str], float]]
+
+
+def system_lookup(host: str, default_ttl: float) -> Tuple[List[str], float]:
+    """Addresses from getaddrinfo (honours /etc/hosts), cached for `default_ttl`"""
+    infos = socket.getaddrinfo(host, None, allowed_gai_family(), socket.SOCK_STREAM)
+    return list(dict.fromkeys(info[4][0] for info in infos)), default_ttl
+
+
+def dnspython_lookup(host: str, default_ttl: float) -> Tuple[List[str], float]:
+    """A/AAAA records and their TTL, falling back to the system resolver"""
+    import dns.exception
+    import dns.resolver
+
+    addresses, ttls = [], []
+    rdtypes = ["A"] if allowed_gai_family() == socket.AF_INET else ["A", "AAAA"]
+    for rdtype in rdtypes:
+        try:
+            answer = dns.resolver.resolve(host, rdtype)
+        except dns.exception.DNSException:
+            continue
+        addresses.extend(record.address for record in answer)
+        ttls.append(answer.rrset.ttl)
+    if not addresses:
+        # E.g. names only in /etc/hosts
+        return system_lookup(host, default_ttl)
+    return addresses, min(ttls)
+
+
+def default_lookup() -> Callable[[str, float], Tuple[List[str], float]]:
+    try:
+        import dns.resolver  # noqa: F401
+    except ImportError:
+        return system_lookup
+    return dnspython_lookup
+
+
+class DNSCache:
+    """Process-wide host -> addresses cache, refreshed when an entry's TTL runs out"""
+
+    enabled = True
+    default_ttl = 60.0
+    _entries: Dict[str, Tuple[List[str], float]] = {}
+    _lookup: Optional[Lookup] = None
+    _clock = time.monotonic
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, enabled: bool = True, default_ttl: float = 60.0, lookup: Optional[Lookup] = None, clock=time.monotonic):
+        """Replace the settings and drop every cached entry"""
+        with cls._lock:
+            cls.enabled = enabled
+            cls.default_ttl = default_ttl
+            cls._lookup = lookup
+            cls._clock = clock
+            cls._entries = {}
+
+    @classmethod
+    def resolve(cls, host: str) -> List[str]:
+        """
+        Addresses for `host`, from the cache while its TTL lasts
+
+        IP literals are returned as they are. Lookup failures raise
+        socket.gaierror and are not cached.
+        """
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+
+        now = cls._clock()
+        entry = cls._entries.get(host)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        lookup = cls._lookup or (lambda name: default_lookup()(name, cls.default_ttl))
+        addresses, ttl = lookup(host)
+        if not addresses:
+            raise socket.gaierror(socket.EAI_NONAME, f"No addresses for {host}")
+        with cls._lock:
+            cls._entries[host] = (addresses, now + ttl)
+        return addresses
+
+    @classmethod
+    def states(cls) -> Dict[str, Dict[str, object]]:
+        now = cls._clock()
+        return {
+            host: {"addresses": addresses, "expires_in": round(max(0.0, expires - now), 1)}
+            for host, (addresses, expires) in cls._entries.items()
+        }
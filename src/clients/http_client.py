@@ -1,42 +1,517 @@
 """
 HTTP Client with retry logic and rate limiting
 """
+import contextvars
+import socket
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 import requests
-from typing import Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any, List, Tuple
 from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import (
+    ConnectTimeoutError, DecodeError, MaxRetryError, NameResolutionError, NewConnectionError,
+    ProtocolError, ReadTimeoutError, ResponseError
+)
+from urllib3.util import connection
 from urllib3.util.retry import Retry
+from src.clients.adaptive_timeout import AdaptiveTimeout, AdaptiveTimeouts
+from src.clients.cancellation import Cancelled, current_cancel
+from src.clients.cassette import Cassette, CassetteAdapter, active_cassette
+from src.clients.circuit_breaker import CircuitBreakers
+from src.clients.dns_cache import DNSCache
+from src.clients.json_stream import select_fields
+from src.telemetry.metrics import PROVIDER_HEDGES, PROVIDER_LATENCY, PROVIDER_QUOTA, PROVIDER_RESPONSES
+from src.telemetry.spans import span
+
+
+class _Abandoned(Exception):
+    """Raised in a request that a winning hedge has abandoned"""
+
+
+class _InFlight:
+    """
+    The connection one request is using, so another thread can abandon it
+    
+    Shutting its socket down wakes the thread waiting for the response, and
+    the request then fails with _Abandoned instead of being retried.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connection: Optional[HTTPConnection] = None
+        self.finished = False
+        self.abandoned = False
+    
+    def add(self, conn: HTTPConnection):
+        """Track the connection of the current attempt (earlier ones are back in the pool)"""
+        with self.lock:
+            if self.abandoned:
+                raise _Abandoned()
+            self.connection = conn
+    
+    def check(self):
+        if self.abandoned:
+            raise _Abandoned()
+    
+    def finish(self) -> bool:
+        """Stop tracking once the request returned or failed; False if it was abandoned first"""
+        with self.lock:
+            self.finished = True
+            return not self.abandoned
+    
+    def abandon(self):
+        """Abandon the request unless it has already finished"""
+        with self.lock:
+            if self.finished:
+                return
+            self.abandoned = True
+            sock = self.connection.sock if self.connection is not None else None
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+
+# The request this thread is sending, while a hedge may abandon it (see HTTPClient._first_byte)
+_IN_FLIGHT: contextvars.ContextVar[Optional[_InFlight]] = contextvars.ContextVar("http_in_flight", default=None)
+
+
+class _CachedDNSConnection:
+    """Connects to addresses from the DNS cache rather than resolving the host every time"""
+    
+    def _new_conn(self) -> socket.socket:
+        if not DNSCache.enabled:
+            return super()._new_conn()
+        try:
+            addresses = DNSCache.resolve(self._dns_host)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        
+        error = None
+        for address in addresses:
+            try:
+                return connection.create_connection(
+                    (address, self.port),
+                    self.timeout,
+                    source_address=self.source_address,
+                    socket_options=self.socket_options
+                )
+            except socket.timeout as e:
+                raise ConnectTimeoutError(
+                    self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})"
+                ) from e
+            except OSError as e:
+                error = e
+        raise NewConnectionError(self, f"Failed to establish a new connection: {error}") from error
+
+
+class _TimedHTTPConnection(_CachedDNSConnection, HTTPConnection):
+    on_connect: Optional[Callable[[float], None]] = None
+    
+    def connect(self):
+        started = time.perf_counter()
+        with span("connect", host=self.host):
+            super().connect()
+        if self.on_connect:
+            self.on_connect(time.perf_counter() - started)
+
+
+class _TimedHTTPSConnection(_CachedDNSConnection, HTTPSConnection):
+    on_connect: Optional[Callable[[float], None]] = None
+    
+    def connect(self):
+        started = time.perf_counter()
+        # DNS, TCP and the TLS handshake
+        with span("connect", host=self.host, tls=True):
+            super().connect()
+        if self.on_connect:
+            self.on_connect(time.perf_counter() - started)
+
+
+class _AbandonablePool:
+    """Registers each connection it hands out with the thread's in-flight request"""
+    
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        in_flight = _IN_FLIGHT.get()
+        if in_flight is not None:
+            try:
+                in_flight.add(conn)
+            except _Abandoned:
+                self._put_conn(conn)
+                raise
+        return conn
+
+
+class _TimedHTTPConnectionPool(_AbandonablePool, HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(_AbandonablePool, HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+def _timed_pool_classes(on_connect: Optional[Callable[[float], None]] = None) -> Dict[str, type]:
+    """Pool classes whose new connections record a 'connect' span and report to `on_connect`"""
+    pool_classes = {"http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool}
+    if on_connect:
+        # Per-callback subclasses, so each pool's connections report to their own callback
+        hook = {"on_connect": staticmethod(on_connect)}
+        pool_classes = {
+            scheme: type(pool.__name__, (pool,), {"ConnectionCls": type(pool.ConnectionCls.__name__, (pool.ConnectionCls,), hook)})
+            for scheme, pool in pool_classes.items()
+        }
+    return pool_classes
+
+
+class ConnectionPools:
+    """
+    Connection pools shared by every client of a provider
+    
+    Agents, and so their clients, are created per API request and per CLI
+    run. Sharing the pools means a lookup reuses connections earlier lookups
+    (or the warmer, see warmup.py) opened, instead of paying DNS, TCP and TLS
+    set-up to every provider each time.
+    """
+    
+    maxsize = 32
+    _managers: Dict[str, PoolManager] = {}
+    _lock = threading.Lock()
+    
+    @classmethod
+    def get(cls, provider: str) -> PoolManager:
+        with cls._lock:
+            manager = cls._managers.get(provider)
+            if manager is None:
+                manager = PoolManager(num_pools=10, maxsize=cls.maxsize)
+                # Looked up per connection: AdaptiveTimeouts.configure() replaces the trackers
+                manager.pool_classes_by_scheme = _timed_pool_classes(
+                    lambda seconds: AdaptiveTimeouts.get(provider).observe_connect(seconds)
+                )
+                cls._managers[provider] = manager
+            return manager
+    
+    @classmethod
+    def clear(cls):
+        """Close every shared connection"""
+        with cls._lock:
+            for manager in cls._managers.values():
+                manager.clear()
+            cls._managers = {}
+
+
+# Hedge copies run here while the original request waits on the caller's thread
+_HEDGE_POOL = ThreadPoolExecutor(max_workers=ConnectionPools.maxsize, thread_name_prefix="http-hedge")
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose new connections record a 'connect' span
+    
+    `on_connect`, if given, is called with each new connection's set-up time.
+    With a `pool_manager` (see ConnectionPools) the adapter sends through
+    those shared pools and leaves them open when it is closed.
+    """
+    
+    def __init__(
+        self,
+        *args,
+        on_connect: Optional[Callable[[float], None]] = None,
+        pool_manager: Optional[PoolManager] = None,
+        **kwargs
+    ):
+        self.on_connect = on_connect
+        self.shared_pool_manager = pool_manager
+        super().__init__(*args, **kwargs)
+    
+    def init_poolmanager(self, *args, **kwargs):
+        if self.shared_pool_manager is not None:
+            self.poolmanager = self.shared_pool_manager
+            return
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _timed_pool_classes(self.on_connect)
+    
+    def close(self):
+        if self.shared_pool_manager is None:
+            return super().close()
+        for proxy in self.proxy_manager.values():
+            proxy.clear()
+
+
+class BoundedRetry(Retry):
+    """
+    Retry that gives up instead of sleeping past a per-request budget
+    
+    urllib3 sleeps for whatever Retry-After a provider sends (up to hours), so
+    a 429 asking for a minute would hold an agent thread for that minute. Once
+    the next wait, backoff or Retry-After, would take the total over
+    `max_wait`, increment() raises MaxRetryError carrying the last error (or
+    a ResponseError naming the wait) instead, which requests raises as a
+    RetryError or ConnectionError.
+    """
+    
+    def __init__(self, *args, max_wait: Optional[float] = None, waited: float = 0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_wait = max_wait
+        self.waited = waited
+    
+    def new(self, **kw):
+        kw.setdefault("max_wait", self.max_wait)
+        kw.setdefault("waited", self.waited)
+        return super().new(**kw)
+    
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        in_flight = _IN_FLIGHT.get()
+        if in_flight is not None:
+            in_flight.check()  # Don't retry a request a hedge has answered
+        retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        wait = retry.get_retry_after(response) if response is not None and retry.respect_retry_after_header else None
+        if not wait:
+            wait = retry.get_backoff_time()
+        if self.max_wait is not None and self.waited + wait > self.max_wait:
+            reason = error or ResponseError(f"retry would wait {wait:.1f}s, over the {self.max_wait:.1f}s budget")
+            raise MaxRetryError(_pool, url, reason)
+        retry.waited = self.waited + wait
+        return retry
+    
+    def sleep(self, response=None):
+        """Back off before the next attempt, giving up with Cancelled if the cancel scope is set"""
+        cancel = current_cancel()
+        if cancel is None:
+            return super().sleep(response)
+        wait = self.get_retry_after(response) if response is not None and self.respect_retry_after_header else None
+        if cancel.wait(wait or self.get_backoff_time()):
+            raise Cancelled("Cancelled while backing off before a retry")
+
+
+def _timeout_kind(error: Exception) -> Optional[str]:
+    """'connect' or 'read' if a request failed by timing out"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return "connect"
+    if isinstance(error, requests.exceptions.ReadTimeout):
+        return "read"
+    # Retries exhausted on read timeouts surface as a ConnectionError
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    if isinstance(reason, ConnectTimeoutError):
+        return "connect"
+    if isinstance(reason, ReadTimeoutError):
+        return "read"
+    return None
+
+
+def _close_response(future: Future):
+    """Release the connection of a hedged copy that lost"""
+    if not future.exception():
+        future.result().close()
 
 
 class HTTPClient:
-    """Robust HTTP client with retry and timeout handling"""
+    """
+    Robust HTTP client with retry and timeout handling
+    
+    `timeout` is an upper bound: once enough requests to the provider have
+    been seen, connect and read timeouts adapt to its observed latency (see
+    adaptive_timeout.py). Unless `shared_pools` is False, connections are
+    pooled per provider across clients (see ConnectionPools).
+    """
     
     def __init__(
         self,
         timeout: int = 30,
         max_retries: int = 3,
-        backoff_factor: float = 0.5
+        backoff_factor: float = 0.5,
+        provider: str = "other",
+        cassette: Optional[Cassette] = None,
+        max_retry_wait: float = 10.0,
+        shared_pools: bool = True
     ):
         self.timeout = timeout
+        self.max_retry_wait = max_retry_wait
+        self.provider = provider
+        self.shared_pools = shared_pools
+        # Record to or replay from a cassette (see cassette.py) instead of plain network access
+        self.cassette = cassette or active_cassette()
         self.session = self._create_session(max_retries, backoff_factor)
     
     def _create_session(self, max_retries: int, backoff_factor: float) -> requests.Session:
         """Create session with retry strategy"""
         session = requests.Session()
         
-        retry_strategy = Retry(
+        retry_strategy = BoundedRetry(
             total=max_retries,
             backoff_factor=backoff_factor,
             status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["GET", "POST"]
+            allowed_methods=["GET", "POST"],
+            max_wait=self.max_retry_wait
         )
         
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        adapter = TimedHTTPAdapter(
+            max_retries=retry_strategy,
+            on_connect=self._observe_connect,
+            pool_manager=ConnectionPools.get(self.provider) if self.shared_pools else None
+        )
+        if self.cassette:
+            adapter = CassetteAdapter(self.cassette, adapter, provider=self.provider)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         
         return session
     
+    def _observe_connect(self, seconds: float):
+        AdaptiveTimeouts.get(self.provider).observe_connect(seconds)
+    
+    def _send(self, tracker: AdaptiveTimeout, method: str, url: str, **kwargs) -> requests.Response:
+        """Send one request with the provider's current timeouts, feeding its latency sketches"""
+        cancel = current_cancel()
+        if cancel is not None and cancel.is_set():
+            raise Cancelled(f"Cancelled before sending to {self.provider}")
+        connect_timeout, read_timeout = tracker.timeouts(self.timeout)
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, timeout=(connect_timeout, read_timeout), **kwargs)
+        except requests.exceptions.RequestException as e:
+            kind = _timeout_kind(e)
+            if kind == "connect":
+                tracker.observe_connect(connect_timeout)
+            elif kind == "read":
+                tracker.observe_first_byte(read_timeout)
+            raise
+        
+        retries = getattr(response.raw, "retries", None)
+        history = retries.history if retries else ()
+        for attempt in history:
+            if isinstance(attempt.error, ReadTimeoutError):
+                tracker.observe_first_byte(read_timeout)
+            elif isinstance(attempt.error, ConnectTimeoutError):
+                tracker.observe_connect(connect_timeout)
+        # Only clean single attempts: error answers are often instant, and retries include backoff
+        if not history and response.status_code < 500 and response.status_code != 429:
+            tracker.observe_first_byte(time.perf_counter() - started)
+        return response
+    
+    def _first_byte(self, url: str, **kwargs) -> requests.Response:
+        """
+        GET up to the response headers, hedging if enabled
+        
+        The GET is sent on the caller's thread. If it is unanswered past the
+        provider's hedge quantile, a copy is sent from the hedge pool and the
+        first successful answer is returned: a winning hedge abandons the
+        original (its sockets are shut down), and a losing hedge is closed
+        when it finishes. Hedges are extra provider requests outside the
+        rate limiter, which is why hedging is off unless configured.
+        """
+        tracker = AdaptiveTimeouts.get(self.provider)
+        hedge_after = tracker.hedge_after()
+        if hedge_after is None:
+            return self._send(tracker, "GET", url, stream=True, **kwargs)
+        
+        # Copied before _IN_FLIGHT is set, so the hedge's own connections aren't abandoned with it
+        context = contextvars.copy_context()
+        primary = _InFlight()
+        hedges: List[Future] = []
+        
+        def abandon_primary(hedge: Future):
+            if not hedge.exception():
+                primary.abandon()
+        
+        def send_hedge():
+            hedge = _HEDGE_POOL.submit(context.run, self._send, tracker, "GET", url, stream=True, **kwargs)
+            hedges.append(hedge)
+            hedge.add_done_callback(abandon_primary)
+        
+        timer = threading.Timer(hedge_after, send_hedge)
+        timer.daemon = True
+        token = _IN_FLIGHT.set(primary)
+        timer.start()
+        try:
+            response, error = self._send(tracker, "GET", url, stream=True, **kwargs), None
+        except (_Abandoned, requests.exceptions.RequestException) as e:
+            response, error = None, e
+        finally:
+            answered = primary.finish()
+            _IN_FLIGHT.reset(token)
+            timer.cancel()
+            timer.join()
+        
+        if not hedges:
+            if error is not None:
+                raise error
+            return response
+        
+        hedge = hedges[0]
+        if response is not None and answered:
+            hedge.add_done_callback(_close_response)
+            PROVIDER_HEDGES.labels(self.provider, "primary").inc()
+            return response
+        if response is not None:
+            response.close()  # Abandoned just as it was answered
+        
+        try:
+            hedged = hedge.result()
+        except requests.exceptions.RequestException:
+            if isinstance(error, requests.exceptions.RequestException):
+                raise error  # If both fail, report the original request's error
+            raise
+        PROVIDER_HEDGES.labels(self.provider, "hedge").inc()
+        return hedged
+    
+    def _record(
+        self,
+        started: float,
+        response: Optional[requests.Response],
+        error: Optional[requests.exceptions.RequestException] = None
+    ):
+        """Record latency, status class and any quota header for one request, and feed the provider's breaker"""
+        latency = time.perf_counter() - started
+        PROVIDER_LATENCY.labels(self.provider).observe(latency)
+        # 4xx other than 429 means the provider is up and answering
+        failed = (
+            response is None
+            or response.status_code >= 500
+            or response.status_code == 429
+            or (error is not None and not isinstance(error, requests.exceptions.HTTPError))
+        )
+        CircuitBreakers.get(self.provider).record(failed, latency)
+        if response is None:
+            PROVIDER_RESPONSES.labels(self.provider, "error").inc()
+            return
+        PROVIDER_RESPONSES.labels(self.provider, f"{response.status_code // 100}xx").inc()
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is not None and remaining.isdigit():
+            PROVIDER_QUOTA.labels(self.provider).set(int(remaining))
+    
+    def _body_chunks(self, response: requests.Response, chunk_size: int):
+        """
+        Iterate the body as it arrives, failing once reading it takes longer than the timeout
+        
+        The timeout otherwise bounds each socket read, so a body dripped a few
+        bytes at a time could hold the thread indefinitely.
+        """
+        if response._content_consumed:
+            # Already read, e.g. while recording to a cassette
+            yield response.content
+            return
+        
+        deadline = time.monotonic() + self.timeout
+        try:
+            while True:
+                chunk = response.raw.read1(chunk_size, decode_content=True)
+                if not chunk:
+                    return
+                if time.monotonic() > deadline:
+                    response.close()
+                    raise requests.exceptions.ReadTimeout(f"Response body not received within {self.timeout}s")
+                yield chunk
+        except ReadTimeoutError as e:
+            raise requests.exceptions.ReadTimeout(e)
+        except (ProtocolError, DecodeError) as e:
+            raise requests.exceptions.ConnectionError(e)
+    
     def get(
         self,
         url: str,
@@ -45,18 +520,74 @@ class HTTPClient:
         auth: Optional[tuple] = None
     ) -> requests.Response:
         """Execute GET request with retry logic"""
+        started = time.perf_counter()
+        response = None
+        error = None
+        cancelled = False
         try:
-            response = self.session.get(
-                url,
-                headers=headers,
-                params=params,
-                auth=auth,
-                timeout=self.timeout
-            )
-            response.raise_for_status()
+            # Headers and body are read separately so each gets its own span
+            with span("first_byte"):
+                response = self._first_byte(url, headers=headers, params=params, auth=auth)
+            if not response.ok:
+                response.close()
+                response.raise_for_status()
+            with span("body"):
+                # Reads the body (releasing the connection) where .content will find it
+                response._content = b"".join(self._body_chunks(response, 64 * 1024))
+                response._content_consumed = True
             return response
         except requests.exceptions.RequestException as e:
+            error = e
             raise Exception(f"HTTP request failed: {str(e)}")
+        except Cancelled:
+            cancelled = True  # Nobody is waiting for the answer; not the provider's failure
+            raise
+        finally:
+            if not cancelled:
+                self._record(started, response, error)
+    
+    def get_json(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        auth: Optional[tuple] = None,
+        fields: Optional[Any] = None,
+        chunk_size: int = 64 * 1024
+    ) -> Any:
+        """
+        Execute GET request and decode the JSON body
+        
+        With a `fields` spec (see json_stream) the body is streamed and only
+        the selected fields are parsed, so large documents are never held in
+        memory in full.
+        """
+        if fields is None:
+            response = self.get(url, headers=headers, params=params, auth=auth)
+            with span("parse"):
+                return response.json()
+        
+        started = time.perf_counter()
+        response = None
+        error = None
+        cancelled = False
+        try:
+            with span("first_byte"):
+                response = self._first_byte(url, headers=headers, params=params, auth=auth)
+            with response:
+                response.raise_for_status()
+                # Body is parsed as it is read
+                with span("body", streamed=True):
+                    return select_fields(self._body_chunks(response, chunk_size), fields)
+        except requests.exceptions.RequestException as e:
+            error = e
+            raise Exception(f"HTTP request failed: {str(e)}")
+        except Cancelled:
+            cancelled = True  # Nobody is waiting for the answer; not the provider's failure
+            raise
+        finally:
+            if not cancelled:
+                self._record(started, response, error)
     
     def post(
         self,
@@ -66,18 +597,36 @@ class HTTPClient:
         json: Optional[Dict[str, Any]] = None
     ) -> requests.Response:
         """Execute POST request with retry logic"""
+        started = time.perf_counter()
+        response = None
+        error = None
+        cancelled = False
         try:
-            response = self.session.post(
-                url,
-                headers=headers,
-                data=data,
-                json=json,
-                timeout=self.timeout
-            )
+            # Never hedged: POSTs may not be idempotent
+            response = self._send(AdaptiveTimeouts.get(self.provider), "POST", url, headers=headers, data=data, json=json)
             response.raise_for_status()
             return response
         except requests.exceptions.RequestException as e:
+            error = e
             raise Exception(f"HTTP request failed: {str(e)}")
+        except Cancelled:
+            cancelled = True  # Nobody is waiting for the answer; not the provider's failure
+            raise
+        finally:
+            if not cancelled:
+                self._record(started, response, error)
+    
+    def probe(self, url: str) -> float:
+        """
+        HEAD `url` and return the seconds it took, leaving the connection pooled
+        
+        For keeping connections warm: probes are outside rate limiting, the
+        circuit breaker and provider metrics, and their status is ignored.
+        """
+        started = time.perf_counter()
+        response = self.session.head(url, timeout=self.timeout, allow_redirects=False)
+        response.close()
+        return time.perf_counter() - started
     
     def close(self):
         """Close session"""
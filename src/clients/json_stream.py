@@ -0,0 +1,228 @@
+"""
+Streaming JSON Field Selection
+Parses only the declared fields of a JSON document from a byte stream
+
+Field specs describe the part of the document to keep:
+
+    True              keep the value as-is
+    {"key": spec}     object: keep only the listed keys
+    ArrayOf(spec, n)  array: keep the first n elements, each selected by spec
+    KEYS              object: keep the keys, drop every value (values become None)
+
+Values that are not selected are scanned and discarded without being decoded
+(only their object keys and scalars are), so peak memory is bounded by the
+largest selected value or object key rather than the whole document.
+"""
+import codecs
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, Optional
+
+
+class _Keys:
+    """Marker spec: keep an object's keys only"""
+
+    def __repr__(self):
+        return "KEYS"
+
+
+KEYS = _Keys()
+
+
+@dataclass(frozen=True)
+class ArrayOf:
+    """Spec for an array: keep up to `limit` elements selected by `item`"""
+    item: Any = True
+    limit: Optional[int] = None
+
+
+_WHITESPACE = " \t\n\r"
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+# Spec that keeps nothing of an array, so every element is skipped
+_SKIP_ARRAY = ArrayOf(limit=0)
+
+
+class StreamingJSONSelector:
+    """Incremental, field-selective JSON parser over an iterable of byte chunks"""
+
+    def __init__(self, chunks: Iterable[bytes], min_read: int = 64 * 1024):
+        self.chunks: Iterator[bytes] = iter(chunks)
+        self.min_read = min_read
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.exhausted = False
+
+    def select(self, spec: Any) -> Any:
+        """Parse the document, keeping only what `spec` selects"""
+        value = self._value(spec)
+        if self._peek() is not None:
+            raise ValueError("Extra data after JSON document")
+        return value
+
+    def _fill(self, at_least: int = 0) -> bool:
+        """Read more input; returns False once the stream is exhausted"""
+        if self.exhausted:
+            return False
+
+        # Drop consumed text so the buffer only holds the value being parsed
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+
+        # Grow geometrically so re-decoding a large value stays linear overall
+        wanted = max(self.min_read, at_least)
+        parts = []
+        read = 0
+        while read < wanted:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                parts.append(self.text_decoder.decode(b"", final=True))
+                self.exhausted = True
+                break
+            if chunk:
+                parts.append(self.text_decoder.decode(chunk))
+                read += len(chunk)
+
+        self.buf += "".join(parts)
+        return True
+
+    def _peek(self) -> Optional[str]:
+        """Skip whitespace and return the next character without consuming it"""
+        while True:
+            buf, pos = self.buf, self.pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return None
+
+    def _expect(self, char: str):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' at offset {self.pos}, found {found!r}")
+        self.pos += 1
+
+    def _decode(self) -> Any:
+        """Decode one complete value at the current position"""
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill(len(self.buf) - self.pos):
+                    raise
+                continue
+
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(self.buf) and not self.exhausted:
+                self._fill(len(self.buf) - self.pos)
+                continue
+
+            self.pos = end
+            return value
+
+    def _skip_string(self):
+        """Consume a string without building it, reading only as far as its end"""
+        self._expect('"')
+        while True:
+            match = _STRING_SPECIAL.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)  # Lets _fill drop what was scanned
+            elif match.group() == '"':
+                self.pos = match.end()
+                return
+            elif match.end() < len(self.buf):
+                self.pos = match.end() + 1  # Escaped character; \uXXXX digits are plain text
+                continue
+            else:
+                self.pos = match.start()  # Backslash at the end of the buffer; keep it
+            if not self._fill():
+                raise ValueError("Unterminated string in JSON document")
+
+    def _skip(self):
+        """Consume one value without keeping it"""
+        char = self._peek()
+        if char is None:
+            raise ValueError("Unexpected end of JSON document")
+
+        if char == "{":
+            self._object({})
+        elif char == "[":
+            self._array(_SKIP_ARRAY)
+        elif char == '"':
+            self._skip_string()
+        else:
+            self._decode()  # Numbers and literals are short
+
+    def _value(self, spec: Any) -> Any:
+        char = self._peek()
+        if char is None:
+            raise ValueError("Unexpected end of JSON document")
+
+        if isinstance(spec, dict) and char == "{":
+            return self._object(spec)
+        if isinstance(spec, ArrayOf) and char == "[":
+            return self._array(spec)
+        if spec is KEYS and char == "{":
+            return self._object(KEYS)
+        return self._decode()
+
+    def _object(self, spec: Any) -> dict:
+        self._expect("{")
+        result = {}
+
+        if self._peek() == "}":
+            self.pos += 1
+            return result
+
+        while True:
+            key = self._decode()
+            self._expect(":")
+
+            if spec is KEYS:
+                self._skip()
+                result[key] = None
+            elif key in spec:
+                result[key] = self._value(spec[key])
+            else:
+                self._skip()
+
+            char = self._peek()
+            self.pos += 1
+            if char == "}":
+                return result
+            if char != ",":
+                raise ValueError(f"Expected ',' or '}}' at offset {self.pos - 1}, found {char!r}")
+
+    def _array(self, spec: ArrayOf) -> list:
+        self._expect("[")
+        items = []
+
+        if self._peek() == "]":
+            self.pos += 1
+            return items
+
+        while True:
+            if spec.limit is None or len(items) < spec.limit:
+                items.append(self._value(spec.item))
+            else:
+                self._skip()
+
+            char = self._peek()
+            self.pos += 1
+            if char == "]":
+                return items
+            if char != ",":
+                raise ValueError(f"Expected ',' or ']' at offset {self.pos - 1}, found {char!r}")
+
+
+def select_fields(chunks: Iterable[bytes], spec: Any) -> Any:
+    """Parse only the fields selected by `spec` from a stream of JSON bytes"""
+    return StreamingJSONSelector(chunks).select(spec)
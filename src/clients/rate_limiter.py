@@ -2,14 +2,28 @@
 Rate Limiting Decorators
 Implements token bucket and fixed window rate limiting
 """
+import itertools
 import time
 import threading
+from collections import deque
 from functools import wraps
-from typing import Callable
+from typing import Callable, Dict, Optional, Tuple
+from src.clients.cancellation import Cancelled, current_cancel
+from src.telemetry.metrics import LIMITER_WAIT, REGISTRY
+from src.telemetry.spans import span
+
+
+# How often limiter waits check for cancellation
+CANCEL_POLL_SECONDS = 0.1
 
 
 class TokenBucket:
-    """Token bucket rate limiter"""
+    """
+    Token bucket rate limiter
+    
+    Waiters are served first-come, first-served, so concurrent jobs sharing a
+    provider take turns instead of racing for each refilled token.
+    """
     
     def __init__(self, tokens_per_minute: int):
         self.capacity = tokens_per_minute
@@ -17,6 +31,19 @@ class TokenBucket:
         self.fill_rate = tokens_per_minute / 60.0  # tokens per second
         self.last_update = time.time()
         self.lock = threading.Lock()
+        self.condition = threading.Condition(self.lock)
+        self._waiters: deque = deque()
+        self._tickets = itertools.count()
+    
+    def _refill(self):
+        """Add tokens based on elapsed time (caller holds the lock)"""
+        now = time.time()
+        elapsed = now - self.last_update
+        self.tokens = min(
+            self.capacity,
+            self.tokens + elapsed * self.fill_rate
+        )
+        self.last_update = now
     
     def consume(self, tokens: int = 1) -> bool:
         """
@@ -24,25 +51,73 @@ class TokenBucket:
         Returns True if successful, False if insufficient tokens
         """
         with self.lock:
-            now = time.time()
-            elapsed = now - self.last_update
+            self._refill()
             
-            # Add tokens based on elapsed time
-            self.tokens = min(
-                self.capacity,
-                self.tokens + elapsed * self.fill_rate
-            )
-            self.last_update = now
+            # Don't jump the queue ahead of blocked waiters
+            if self._waiters:
+                return False
             
             if self.tokens >= tokens:
                 self.tokens -= tokens
                 return True
             return False
     
-    def wait_for_token(self):
-        """Wait until a token is available"""
-        while not self.consume(1):
-            time.sleep(0.1)
+    def wait_for_token(self, timeout: Optional[float] = None, cancel: Optional[threading.Event] = None) -> bool:
+        """
+        Wait until a token is available, in arrival order
+        Returns False if the timeout expired or `cancel` was set first
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        
+        with self.condition:
+            ticket = next(self._tickets)
+            self._waiters.append(ticket)
+            try:
+                while True:
+                    if cancel is not None and cancel.is_set():
+                        return False
+                    self._refill()
+                    if self._waiters[0] == ticket and self.tokens >= 1:
+                        self.tokens -= 1
+                        return True
+                    
+                    # The head sleeps until the next token; others until woken
+                    wait = (1 - self.tokens) / self.fill_rate if self._waiters[0] == ticket else 1.0
+                    if deadline is not None:
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            return False
+                        wait = min(wait, remaining)
+                    if cancel is not None:
+                        wait = min(wait, CANCEL_POLL_SECONDS)
+                    self.condition.wait(max(wait, 0.001))
+            finally:
+                self._waiters.remove(ticket)
+                self.condition.notify_all()
+    
+    def lease(self, max_tokens: int = 1) -> Tuple[int, float]:
+        """
+        Take up to max_tokens without waiting
+        Returns (tokens granted, seconds until the next token if none were)
+        """
+        with self.lock:
+            self._refill()
+            granted = 0 if self._waiters else min(max_tokens, int(self.tokens))
+            self.tokens -= granted
+            retry_after = 0.0 if granted else max(1 - self.tokens, 0.0) / self.fill_rate
+            return granted, retry_after
+    
+    @property
+    def available(self) -> float:
+        """Tokens available right now"""
+        with self.lock:
+            self._refill()
+            return self.tokens
+    
+    @property
+    def waiting(self) -> int:
+        """Number of callers blocked in wait_for_token"""
+        return len(self._waiters)
 
 
 class RateLimiter:
@@ -55,6 +130,25 @@ class RateLimiter:
         """Register a new rate limiter"""
         cls._limiters[name] = TokenBucket(requests_per_minute)
     
+    @classmethod
+    def install(cls, name: str, limiter) -> Optional[TokenBucket]:
+        """
+        Replace a limiter with any object offering wait_for_token(timeout, cancel)
+        Returns the limiter it replaced
+        """
+        previous = cls._limiters.get(name)
+        cls._limiters[name] = limiter
+        return previous
+    
+    @classmethod
+    def limits(cls) -> Dict[str, int]:
+        """Requests per minute of each registered token bucket"""
+        return {
+            name: limiter.capacity
+            for name, limiter in cls._limiters.items()
+            if isinstance(limiter, TokenBucket)
+        }
+    
     @classmethod
     def get_limiter(cls, name: str) -> TokenBucket:
         """Get rate limiter by name"""
@@ -67,13 +161,24 @@ def rate_limit(limiter_name: str):
     """
     Decorator for rate-limited API calls
     Usage: @rate_limit('virustotal')
+    
+    Inside a cancel_scope, the wait ends with Cancelled (and no token spent)
+    once the scope's event is set.
     """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs):
             limiter = RateLimiter.get_limiter(limiter_name)
-            limiter.wait_for_token()
+            cancel = current_cancel()
+            started = time.perf_counter()
+            with span("limiter_wait", limiter=limiter_name):
+                granted = limiter.wait_for_token() if cancel is None else limiter.wait_for_token(cancel=cancel)
+            LIMITER_WAIT.labels(limiter_name).observe(time.perf_counter() - started)
+            if not granted:
+                raise Cancelled(f"Cancelled while waiting for a {limiter_name} rate-limit token")
             return func(*args, **kwargs)
+        # Lets callers (e.g. admission control) find the limiter an agent draws on
+        wrapper.limiter_name = limiter_name
         return wrapper
     return decorator
 
@@ -84,3 +189,22 @@ RateLimiter.register_limiter('shodan', requests_per_minute=1)  # Conservative
 RateLimiter.register_limiter('censys', requests_per_minute=2)  # Conservative
 RateLimiter.register_limiter('otx', requests_per_minute=10)  # No strict limit
 RateLimiter.register_limiter('abuseipdb', requests_per_minute=16)  # 1000/day ≈ 16/min
+
+
+# Limiter state is read when metrics are rendered, not pushed per call
+REGISTRY.gauge(
+    "threatfusion_rate_limiter_queue_depth",
+    "Callers blocked waiting for a rate-limiter token",
+    ("limiter",)
+).set_function(lambda: {
+    (name,): limiter.waiting
+    for name, limiter in list(RateLimiter._limiters.items()) if hasattr(limiter, "waiting")
+})
+REGISTRY.gauge(
+    "threatfusion_rate_limiter_tokens",
+    "Tokens currently available in each rate limiter (remaining local quota)",
+    ("limiter",)
+).set_function(lambda: {
+    (name,): limiter.available
+    for name, limiter in list(RateLimiter._limiters.items()) if isinstance(limiter, TokenBucket)
+})
@@ -0,0 +1,101 @@
+"""
+Connection Warm-up
+Pre-connect to provider hosts and keep their pooled connections alive
+
+The first lookup after a deploy or an idle spell otherwise pays a DNS
+lookup, a TCP connect and a TLS handshake to every provider before its
+first byte. At startup the warmer resolves each provider's BASE_URL host
+and opens a connection to it in the provider's shared pool (see
+ConnectionPools). Every `interval` seconds it sends a HEAD to each host
+over a pooled connection, which stops servers and middleboxes closing it
+as idle and refreshes the host's DNS entry once its TTL runs out.
+
+The first probe to a provider measures a cold connection and later ones a
+warm one. Both are exported as threatfusion_provider_probe_seconds.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+from src.clients.dns_cache import DNSCache
+from src.clients.http_client import HTTPClient
+from src.telemetry.metrics import PROVIDER_PROBE_SECONDS, PROVIDER_PROBES
+
+
+logger = logging.getLogger(__name__)
+
+
+def provider_origins(agents: List[Any]) -> Dict[str, str]:
+    """Provider name -> 'scheme://host[:port]/' of each agent's BASE_URL"""
+    origins = {}
+    for agent in agents:
+        base_url = getattr(agent, "BASE_URL", None)
+        client = getattr(agent, "client", None)
+        if base_url and isinstance(client, HTTPClient):
+            url = urlsplit(base_url)
+            origins[client.provider] = f"{url.scheme}://{url.netloc}/"
+    return origins
+
+
+class ConnectionWarmer:
+    """Background thread that pre-connects to provider hosts, then probes them every `interval` seconds"""
+
+    def __init__(self, origins: Dict[str, str], interval: float = 30.0, timeout: float = 5.0):
+        self.origins = origins
+        self.interval = interval
+        # No retries: a failed probe is simply tried again next interval
+        self.clients = {provider: HTTPClient(timeout=timeout, max_retries=0, provider=provider) for provider in origins}
+        self.probes: Dict[str, Dict[str, Any]] = {
+            provider: {"origin": origin, "first_seconds": None, "steady_seconds": None, "probes": 0, "errors": 0}
+            for provider, origin in origins.items()
+        }
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _probe(self, provider: str) -> Optional[float]:
+        origin = self.origins[provider]
+        state = self.probes[provider]
+        try:
+            # Refreshes the host's addresses if their TTL has run out
+            DNSCache.resolve(urlsplit(origin).hostname)
+            seconds = self.clients[provider].probe(origin)
+        except Exception as e:
+            state["errors"] += 1
+            PROVIDER_PROBES.labels(provider, "error").inc()
+            logger.debug("Probe to %s (%s) failed: %s", provider, origin, e)
+            return None
+
+        probe = "steady" if state["probes"] else "first"
+        state[f"{probe}_seconds"] = round(seconds, 4)
+        state["probes"] += 1
+        PROVIDER_PROBES.labels(provider, "ok").inc()
+        PROVIDER_PROBE_SECONDS.labels(provider, probe).set(seconds)
+        return seconds
+
+    def warm(self) -> Dict[str, Optional[float]]:
+        """Probe every provider at once; returns each probe's seconds, or None where it failed"""
+        if not self.origins:
+            return {}
+        with ThreadPoolExecutor(max_workers=len(self.origins), thread_name_prefix="warmup-probe") as pool:
+            return dict(zip(self.origins, pool.map(self._probe, self.origins)))
+
+    def _run(self):
+        self.warm()
+        while self.interval > 0 and not self._stop.wait(self.interval):
+            self.warm()
+
+    def start(self):
+        """Warm up in the background, then keep probing until stop()"""
+        self._thread = threading.Thread(target=self._run, name="connection-warmer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        for client in self.clients.values():
+            client.close()
+
+    def states(self) -> Dict[str, Dict[str, Any]]:
+        return {provider: dict(state) for provider, state in self.probes.items()}
@@ -31,6 +31,45 @@ class AppConfig:
     max_workers: int = 8
     default_timeout: int = 30
     log_level: str = "INFO"
+    scoring_rules_path: Optional[str] = None
+    archive_dir: Optional[str] = None
+    shodan_minify: bool = False
+    template_cache_dir: Optional[str] = None
+    pdf_cache_dir: Optional[str] = None
+    pdf_workers: int = 2
+    pdf_cache_size: int = 256
+    elasticsearch_url: Optional[str] = None
+    elasticsearch_index: str = "threatfusion"
+    elasticsearch_api_key: Optional[str] = None
+    splunk_hec_url: Optional[str] = None
+    splunk_hec_token: Optional[str] = None
+    splunk_hec_index: Optional[str] = None
+    sink_spill_dir: Optional[str] = None
+    jobs_db_path: str = "threatfusion_jobs.db"
+    job_workers: int = 2
+    job_retention_hours: int = 24
+    job_max_indicators: int = 10000
+    runs_dir: str = "threatfusion_runs"
+    watchlist_db_path: str = "threatfusion_watchlist.db"
+    watchlist_ttls: Optional[str] = None
+    watchlist_tick_seconds: int = 60
+    watchlist_rate_share: float = 0.8
+    http_cassette: Optional[str] = None
+    http_cassette_mode: str = "replay"
+    http_cassette_latency_scale: float = 1.0
+    breaker_window: int = 20
+    breaker_failure_rate: float = 0.5
+    breaker_slow_call_seconds: float = 10.0
+    breaker_open_seconds: float = 30.0
+    adaptive_timeouts: bool = True
+    adaptive_timeout_min: float = 1.0
+    adaptive_timeout_multiplier: float = 3.0
+    http_hedge: bool = False
+    api_max_inflight: int = 32
+    api_result_cache_size: int = 1024
+    provider_prewarm: bool = True
+    provider_keepalive_seconds: float = 30.0
+    dns_cache_ttl: float = 60.0
 
 
 class ConfigManager:
@@ -59,9 +98,82 @@ class ConfigManager:
             cache_ttl_hours=int(os.getenv('CACHE_TTL_HOURS', '24')),
             max_workers=int(os.getenv('MAX_WORKERS', '8')),
             default_timeout=int(os.getenv('DEFAULT_TIMEOUT', '30')),
-            log_level=os.getenv('LOG_LEVEL', 'INFO')
+            log_level=os.getenv('LOG_LEVEL', 'INFO'),
+            scoring_rules_path=os.getenv('SCORING_RULES_PATH') or None,
+            archive_dir=os.getenv('ARCHIVE_DIR') or None,
+            shodan_minify=os.getenv('SHODAN_MINIFY', 'false').lower() in ('1', 'true', 'yes'),
+            template_cache_dir=os.getenv('TEMPLATE_CACHE_DIR') or None,
+            pdf_cache_dir=os.getenv('PDF_CACHE_DIR') or None,
+            pdf_workers=int(os.getenv('PDF_WORKERS', '2')),
+            pdf_cache_size=int(os.getenv('PDF_CACHE_SIZE', '256')),
+            elasticsearch_url=os.getenv('ELASTICSEARCH_URL') or None,
+            elasticsearch_index=os.getenv('ELASTICSEARCH_INDEX', 'threatfusion'),
+            elasticsearch_api_key=os.getenv('ELASTICSEARCH_API_KEY') or None,
+            splunk_hec_url=os.getenv('SPLUNK_HEC_URL') or None,
+            splunk_hec_token=os.getenv('SPLUNK_HEC_TOKEN') or None,
+            splunk_hec_index=os.getenv('SPLUNK_HEC_INDEX') or None,
+            sink_spill_dir=os.getenv('SINK_SPILL_DIR') or None,
+            jobs_db_path=os.getenv('JOBS_DB_PATH', 'threatfusion_jobs.db'),
+            job_workers=int(os.getenv('JOB_WORKERS', '2')),
+            job_retention_hours=int(os.getenv('JOB_RETENTION_HOURS', '24')),
+            job_max_indicators=int(os.getenv('JOB_MAX_INDICATORS', '10000')),
+            runs_dir=os.getenv('RUNS_DIR', 'threatfusion_runs'),
+            watchlist_db_path=os.getenv('WATCHLIST_DB_PATH', 'threatfusion_watchlist.db'),
+            watchlist_ttls=os.getenv('WATCHLIST_TTLS') or None,
+            watchlist_tick_seconds=int(os.getenv('WATCHLIST_TICK_SECONDS', '60')),
+            watchlist_rate_share=float(os.getenv('WATCHLIST_RATE_SHARE', '0.8')),
+            http_cassette=os.getenv('HTTP_CASSETTE') or None,
+            http_cassette_mode=os.getenv('HTTP_CASSETTE_MODE', 'replay'),
+            http_cassette_latency_scale=float(os.getenv('HTTP_CASSETTE_LATENCY_SCALE', '1.0')),
+            breaker_window=int(os.getenv('BREAKER_WINDOW', '20')),
+            breaker_failure_rate=float(os.getenv('BREAKER_FAILURE_RATE', '0.5')),
+            breaker_slow_call_seconds=float(os.getenv('BREAKER_SLOW_CALL_SECONDS', '10')),
+            breaker_open_seconds=float(os.getenv('BREAKER_OPEN_SECONDS', '30')),
+            adaptive_timeouts=os.getenv('ADAPTIVE_TIMEOUTS', 'true').lower() in ('1', 'true', 'yes'),
+            adaptive_timeout_min=float(os.getenv('ADAPTIVE_TIMEOUT_MIN', '1')),
+            adaptive_timeout_multiplier=float(os.getenv('ADAPTIVE_TIMEOUT_MULTIPLIER', '3')),
+            http_hedge=os.getenv('HTTP_HEDGE', 'false').lower() in ('1', 'true', 'yes'),
+            api_max_inflight=int(os.getenv('API_MAX_INFLIGHT', '32')),
+            api_result_cache_size=int(os.getenv('API_RESULT_CACHE_SIZE', '1024')),
+            provider_prewarm=os.getenv('PROVIDER_PREWARM', 'true').lower() in ('1', 'true', 'yes'),
+            provider_keepalive_seconds=float(os.getenv('PROVIDER_KEEPALIVE_SECONDS', '30')),
+            dns_cache_ttl=float(os.getenv('DNS_CACHE_TTL', '60'))
         )
     
+    def use_placeholder_keys(self, value: str = "replay"):
+        """Fill unset provider keys, e.g. when replaying a cassette where keys are never sent"""
+        for name, key in vars(self.api_config).items():
+            if not key:
+                setattr(self.api_config, name, value)
+    
+    def breaker_settings(self) -> dict:
+        """CircuitBreaker options from BREAKER_* settings"""
+        app_config = self.app_config
+        return {
+            'window': app_config.breaker_window,
+            'min_calls': max(1, app_config.breaker_window // 2),
+            'failure_rate': app_config.breaker_failure_rate,
+            'slow_call_seconds': app_config.breaker_slow_call_seconds,
+            'open_seconds': app_config.breaker_open_seconds
+        }
+    
+    def adaptive_timeout_settings(self) -> dict:
+        """AdaptiveTimeout options from ADAPTIVE_TIMEOUT* and HTTP_HEDGE settings"""
+        app_config = self.app_config
+        return {
+            'adaptive': app_config.adaptive_timeouts,
+            'min_timeout': app_config.adaptive_timeout_min,
+            'multiplier': app_config.adaptive_timeout_multiplier,
+            'hedge_quantile': 0.95 if app_config.http_hedge else None
+        }
+    
+    def dns_cache_settings(self) -> dict:
+        """DNSCache options from DNS_CACHE_TTL (0 turns the cache off)"""
+        return {
+            'enabled': self.app_config.dns_cache_ttl > 0,
+            'default_ttl': self.app_config.dns_cache_ttl
+        }
+    
     def validate_api_keys(self) -> dict[str, bool]:
         """Validate which API keys are configured"""
         return {
@@ -0,0 +1,7 @@
+"""Distributed Execution Package Initialization"""
+from src.distributed.budget import RateBudget, LeasedBucket
+from src.distributed.coordinator import Coordinator
+from src.distributed.hashring import HashRing, shard_key
+from src.distributed.worker import Worker, run_local_workers
+
+__all__ = ['Coordinator', 'Worker', 'run_local_workers', 'HashRing', 'shard_key', 'RateBudget', 'LeasedBucket']
@@ -0,0 +1,122 @@
+"""
+Leased Rate Budgets
+Global per-provider rate limits shared by distributed workers
+
+The coordinator owns one token bucket per provider (RateBudget). Workers
+replace their local buckets with LeasedBuckets that lease tokens from the
+coordinator before each provider call, so N workers together never exceed
+the provider's limit.
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+from src.clients.rate_limiter import RateLimiter, TokenBucket
+
+
+# (provider, tokens wanted) -> (tokens granted, seconds until the next token)
+LeaseFunction = Callable[[str, int], Tuple[int, float]]
+
+
+class RateBudget:
+    """Coordinator-side token buckets, leased out to workers"""
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        limits = RateLimiter.limits() if limits is None else limits
+        self.buckets = {name: TokenBucket(rpm) for name, rpm in limits.items()}
+        self.leased: Dict[str, int] = {name: 0 for name in limits}
+
+    def lease(self, provider: str, tokens: int = 1) -> Tuple[int, float]:
+        """Grant up to `tokens` calls to a provider without waiting"""
+        bucket = self.buckets.get(provider)
+        if bucket is None:
+            return tokens, 0.0  # Not rate limited
+        granted, retry_after = bucket.lease(tokens)
+        self.leased[provider] += granted
+        return granted, retry_after
+
+
+class LeasedBucket:
+    """
+    Worker-side stand-in for a TokenBucket that leases tokens remotely
+
+    Tokens are leased `lease_size` at a time; any left unused after
+    `lease_ttl` seconds are dropped so a worker can't bank budget.
+    """
+
+    def __init__(self, provider: str, lease: LeaseFunction, lease_size: int = 1, lease_ttl: float = 1.0):
+        self.provider = provider
+        self._lease = lease
+        self.lease_size = lease_size
+        self.lease_ttl = lease_ttl
+        self.tokens = 0
+        self._leased_at = 0.0
+        self._waiting = 0
+        self.lock = threading.Lock()
+
+    def _take_local(self) -> bool:
+        if self.tokens and time.monotonic() - self._leased_at > self.lease_ttl:
+            self.tokens = 0
+        if self.tokens:
+            self.tokens -= 1
+            return True
+        return False
+
+    def _take(self) -> Tuple[bool, float]:
+        if self._take_local():
+            return True, 0.0
+        granted, retry_after = self._lease(self.provider, self.lease_size)
+        if granted:
+            self.tokens, self._leased_at = granted - 1, time.monotonic()
+            return True, 0.0
+        return False, retry_after
+
+    def consume(self, tokens: int = 1) -> bool:
+        with self.lock:
+            return self._take()[0]
+
+    def wait_for_token(self, timeout: Optional[float] = None, cancel: Optional[threading.Event] = None) -> bool:
+        """Lease a token from the coordinator, waiting as long as it says to (or until `cancel` is set)"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self.lock:
+            self._waiting += 1
+        try:
+            while True:
+                if cancel is not None and cancel.is_set():
+                    return False
+                with self.lock:  # One lease request per provider at a time
+                    ok, retry_after = self._take()
+                if ok:
+                    return True
+                if deadline is not None:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return False
+                    retry_after = min(retry_after, remaining)
+                if cancel is not None:
+                    cancel.wait(max(retry_after, 0.001))
+                else:
+                    time.sleep(max(retry_after, 0.001))
+        finally:
+            with self.lock:
+                self._waiting -= 1
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+
+def install_leased_limiters(lease: LeaseFunction, lease_size: int = 1) -> Dict[str, TokenBucket]:
+    """
+    Route every registered provider limiter through the coordinator
+
+    Returns the replaced local buckets, for restore_limiters().
+    """
+    return {
+        name: RateLimiter.install(name, LeasedBucket(name, lease, lease_size=lease_size))
+        for name in RateLimiter.limits()
+    }
+
+
+def restore_limiters(previous: Dict[str, TokenBucket]):
+    for name, bucket in previous.items():
+        RateLimiter.install(name, bucket)
@@ -0,0 +1,270 @@
+"""
+Batch Coordinator
+Shards a batch across workers and merges their results into one stream
+
+Indicators are hashed (by canonical form) into a fixed number of slots, and
+slots are assigned to workers on a consistent hash ring, so an indicator
+always goes to the same worker while membership is stable (keeping worker
+caches warm) and only the departed worker's slots move when one leaves.
+A worker whose slots run dry steals from the fullest slot rather than idle.
+
+Workers talk to the coordinator over JSON-over-HTTP:
+
+    POST /register    {"name"}                      -> {"worker_id", "timeout", ...}
+    POST /work        {"worker_id", "max"}          -> {"items": [[position, indicator]], "done"}
+    POST /results     {"worker_id", "results"}      -> {"accepted"}
+    POST /lease       {"worker_id", "provider", "tokens"} -> {"granted", "retry_after"}
+    POST /heartbeat   {"worker_id"}                 -> {}
+
+Work handed to a worker that stops heartbeating is put back in its slots.
+Results are accepted once per position, so late duplicates are ignored.
+"""
+import hmac
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Tuple
+from src.distributed.budget import RateBudget
+from src.distributed.hashring import HashRing, ring_hash, shard_key
+from src.models import first_fetched
+
+
+logger = logging.getLogger(__name__)
+
+NUM_SLOTS = 256
+
+TOKEN_HEADER = "X-ThreatFusion-Token"
+
+
+class Coordinator:
+    """Hands out shards of a batch, leases rate budget and collects results"""
+
+    def __init__(
+        self,
+        indicators: Iterable[str],
+        timeout: int = 30,
+        worker_timeout: float = 30.0,
+        limits: Optional[Dict[str, int]] = None,
+        token: Optional[str] = None,
+        replicas: int = 64
+    ):
+        self.timeout = timeout
+        self.worker_timeout = worker_timeout
+        self.token = token
+        self.budget = RateBudget(limits)
+        self.ring = HashRing(replicas=replicas)
+
+        self.slots: List[deque] = [deque() for _ in range(NUM_SLOTS)]
+        self.total = 0
+        for indicator in indicators:
+            indicator = indicator.strip()
+            if indicator and not indicator.startswith("#"):
+                self.slots[ring_hash(shard_key(indicator)) % NUM_SLOTS].append((self.total, indicator))
+                self.total += 1
+
+        self.workers: Dict[str, float] = {}  # worker id -> last seen (monotonic)
+        self.inflight: Dict[int, Tuple[str, str]] = {}  # position -> (worker id, indicator)
+        self.completed: set = set()
+        self.first_seen: Dict[str, datetime] = {}  # indicator -> earliest result fetch time
+        self.stats = {"workers": 0, "stolen": 0, "reassigned": 0, "duplicates": 0}
+        self._owners: List[Optional[str]] = [None] * NUM_SLOTS
+        self._results: "queue.Queue[Tuple[int, Dict[str, Any]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def done(self) -> bool:
+        return len(self.completed) >= self.total
+
+    # Membership
+
+    def _reassign_slots(self):
+        """Recompute slot owners after the ring changed (caller holds the lock)"""
+        self._owners = [self.ring.node_for(f"slot-{slot}") for slot in range(NUM_SLOTS)]
+
+    def register(self, name: str = "") -> str:
+        worker_id = f"{name or 'worker'}-{uuid.uuid4().hex[:8]}"
+        with self._lock:
+            self.workers[worker_id] = time.monotonic()
+            self.ring.add(worker_id)
+            self._reassign_slots()
+            self.stats["workers"] += 1
+        logger.info("Worker %s joined", worker_id)
+        return worker_id
+
+    def heartbeat(self, worker_id: str):
+        with self._lock:
+            if worker_id in self.workers:
+                self.workers[worker_id] = time.monotonic()
+
+    def _reap(self):
+        """Drop silent workers and requeue their work (caller holds the lock)"""
+        cutoff = time.monotonic() - self.worker_timeout
+        lost = [worker_id for worker_id, seen in self.workers.items() if seen < cutoff]
+        if not lost:
+            return
+
+        for worker_id in lost:
+            del self.workers[worker_id]
+            self.ring.remove(worker_id)
+            logger.warning("Worker %s timed out; requeueing its work", worker_id)
+        self._reassign_slots()
+
+        for position, (worker_id, indicator) in list(self.inflight.items()):
+            if worker_id in lost:
+                del self.inflight[position]
+                self.slots[ring_hash(shard_key(indicator)) % NUM_SLOTS].appendleft((position, indicator))
+                self.stats["reassigned"] += 1
+
+    # Work and results
+
+    def next_work(self, worker_id: str, max_items: int = 16) -> Tuple[List[Tuple[int, str]], bool]:
+        """Next items for a worker: its own slots first, then the fullest other slot"""
+        items: List[Tuple[int, str]] = []
+        with self._lock:
+            self._reap()
+            if worker_id not in self.workers:
+                # Reaped while busy (or coordinator restarted); rejoin under the same id
+                self.workers[worker_id] = time.monotonic()
+                self.ring.add(worker_id)
+                self._reassign_slots()
+            self.workers[worker_id] = time.monotonic()
+
+            for slot, owner in enumerate(self._owners):
+                if owner != worker_id:
+                    continue
+                pending = self.slots[slot]
+                while pending and len(items) < max_items:
+                    items.append(pending.popleft())
+                if len(items) >= max_items:
+                    break
+
+            if not items:
+                fullest = max(self.slots, key=len)
+                while fullest and len(items) < max_items:
+                    items.append(fullest.pop())
+                self.stats["stolen"] += len(items)
+
+            for position, indicator in items:
+                self.inflight[position] = (worker_id, indicator)
+            return items, self.done
+
+    def submit_results(self, worker_id: str, results: List[Dict[str, Any]]) -> int:
+        """Accept finished indicators; returns how many were new"""
+        accepted = 0
+        with self._lock:
+            if worker_id in self.workers:
+                self.workers[worker_id] = time.monotonic()
+            for result in results:
+                position = result["position"]
+                if position in self.completed:
+                    self.stats["duplicates"] += 1
+                    continue
+                self.completed.add(position)
+                self.inflight.pop(position, None)
+                entry = result["entry"]
+                fetched = first_fetched(entry.get("results") or {})
+                if fetched and "indicator" in entry:
+                    self.first_seen[entry["indicator"]] = fetched
+                self._results.put((position, entry))
+                accepted += 1
+        return accepted
+
+    def lease(self, provider: str, tokens: int = 1) -> Tuple[int, float]:
+        with self._lock:
+            return self.budget.lease(provider, tokens)
+
+    def iter_results(
+        self,
+        should_stop: Optional[Callable[[], bool]] = None,
+        poll_interval: float = 0.5
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Yield (position, entry) as results arrive, until the batch is done
+
+        `should_stop` is polled while waiting, e.g. to give up once every
+        local worker process has exited.
+        """
+        received = 0
+        while received < self.total:
+            try:
+                position, entry = self._results.get(timeout=poll_interval)
+            except queue.Empty:
+                with self._lock:
+                    self._reap()
+                if should_stop and should_stop():
+                    return
+                continue
+            received += 1
+            yield position, entry
+
+    # HTTP transport
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start answering workers in a background thread; returns the URL"""
+        coordinator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+            def do_POST(self):
+                if coordinator.token and not hmac.compare_digest(
+                    self.headers.get(TOKEN_HEADER, ""), coordinator.token
+                ):
+                    return self._reply(401, {"error": "bad token"})
+                try:
+                    body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                    reply = coordinator.handle(self.path, body)
+                except (KeyError, TypeError, ValueError) as e:
+                    return self._reply(400, {"error": str(e)})
+                if reply is None:
+                    return self._reply(404, {"error": "not found"})
+                self._reply(200, reply)
+
+            def _reply(self, status: int, payload: Dict[str, Any]):
+                data = json.dumps(payload, default=str).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="coordinator", daemon=True).start()
+        bound_host, bound_port = self._server.server_address[:2]
+        return f"http://{bound_host}:{bound_port}"
+
+    def handle(self, path: str, body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Dispatch one protocol request"""
+        if path == "/register":
+            return {
+                "worker_id": self.register(body.get("name", "")),
+                "timeout": self.timeout,
+                "heartbeat_interval": self.worker_timeout / 3
+            }
+        if path == "/work":
+            items, done = self.next_work(body["worker_id"], int(body.get("max", 16)))
+            return {"items": items, "done": done}
+        if path == "/results":
+            return {"accepted": self.submit_results(body["worker_id"], body["results"])}
+        if path == "/lease":
+            granted, retry_after = self.lease(body["provider"], int(body.get("tokens", 1)))
+            return {"granted": granted, "retry_after": retry_after}
+        if path == "/heartbeat":
+            self.heartbeat(body["worker_id"])
+            return {}
+        return None
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
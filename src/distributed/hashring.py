@@ -0,0 +1,66 @@
+"""
+Consistent Hash Ring
+Maps keys to nodes so that adding or removing a node moves few keys
+
+Each node is placed on the ring at `replicas` points; a key belongs to the
+first node point at or after its own hash. Removing one of N nodes only
+moves the keys it owned (about 1/N of them).
+"""
+import bisect
+import hashlib
+from typing import Dict, Iterable, List, Optional
+from src.validators import IndicatorValidator
+
+
+def ring_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def shard_key(indicator: str) -> str:
+    """Key an indicator shards by, so equivalent spellings land on the same worker"""
+    return IndicatorValidator.canonicalize(indicator)
+
+
+class HashRing:
+    """Consistent hash ring over named nodes"""
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 64):
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+        self._nodes: set = set()
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(self._nodes)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def add(self, node: str):
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        for i in range(self.replicas):
+            point = ring_hash(f"{node}#{i}")
+            self._owners[point] = node
+            bisect.insort(self._points, point)
+
+    def remove(self, node: str):
+        if node not in self._nodes:
+            return
+        self._nodes.discard(node)
+        for i in range(self.replicas):
+            point = ring_hash(f"{node}#{i}")
+            if self._owners.get(point) == node:
+                del self._owners[point]
+                self._points.remove(point)
+
+    def node_for(self, key: str) -> Optional[str]:
+        """Node owning a key, or None when the ring is empty"""
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, ring_hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
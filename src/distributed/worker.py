@@ -0,0 +1,136 @@
+"""
+Batch Worker
+Pulls shards from a coordinator, enriches them and posts the results back
+
+A worker is one process. It runs `concurrency` indicators at a time through
+its own orchestrator, leases provider rate budget from the coordinator, and
+heartbeats so the coordinator can requeue its work if it dies. Workers can
+run on the coordinator's host (spawned by run_local_workers) or on other
+hosts (`threatfusion worker --coordinator http://host:port`).
+"""
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import requests
+from src.distributed.budget import install_leased_limiters, restore_limiters
+from src.distributed.coordinator import TOKEN_HEADER
+from src.fusion.orchestrator import EnrichmentOrchestrator
+from src.jobs.worker import enrich_indicator
+
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """Client side of the coordinator protocol"""
+
+    def __init__(
+        self,
+        url: str,
+        agent_factory: Callable[[], List[Any]],
+        concurrency: int = 4,
+        max_agent_workers: int = 8,
+        token: Optional[str] = None,
+        use_leases: bool = True,
+        poll_interval: float = 0.2
+    ):
+        self.url = url.rstrip("/")
+        self.agent_factory = agent_factory
+        self.concurrency = concurrency
+        self.max_agent_workers = max_agent_workers
+        self.use_leases = use_leases
+        self.poll_interval = poll_interval
+        self.worker_id: Optional[str] = None
+        self.processed = 0
+        self.session = requests.Session()
+        if token:
+            self.session.headers[TOKEN_HEADER] = token
+        self._stop = threading.Event()
+
+    def _call(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.session.post(self.url + path, json=body, timeout=30)
+        response.raise_for_status()
+        return response.json()
+
+    def lease(self, provider: str, tokens: int) -> Tuple[int, float]:
+        reply = self._call("/lease", {"worker_id": self.worker_id, "provider": provider, "tokens": tokens})
+        return reply["granted"], reply["retry_after"]
+
+    def _heartbeat(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self._call("/heartbeat", {"worker_id": self.worker_id})
+            except requests.exceptions.RequestException as e:
+                logger.warning("Heartbeat failed: %s", e)
+
+    def run(self) -> int:
+        """Work until the coordinator reports the batch done; returns indicators processed"""
+        reply = self._call("/register", {"name": f"{socket.gethostname()}-{os.getpid()}"})
+        self.worker_id = reply["worker_id"]
+        timeout = reply["timeout"]
+
+        previous = install_leased_limiters(self.lease) if self.use_leases else {}
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(reply["heartbeat_interval"],), name="worker-heartbeat", daemon=True
+        )
+        heartbeat.start()
+        orchestrator = EnrichmentOrchestrator(self.agent_factory(), max_workers=self.max_agent_workers)
+
+        def enrich(item):
+            position, indicator = item
+            try:
+                entry, _, _ = enrich_indicator(orchestrator, indicator, timeout)
+            except Exception as e:
+                logger.exception("Enrichment of %s failed", indicator)
+                entry = {"indicator": indicator, "error": str(e)}
+            return {"position": position, "entry": entry}
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                while True:
+                    work = self._call("/work", {"worker_id": self.worker_id, "max": self.concurrency * 2})
+                    if not work["items"]:
+                        if work["done"]:
+                            break
+                        time.sleep(self.poll_interval)  # Others hold the remaining work
+                        continue
+                    results = list(pool.map(enrich, work["items"]))
+                    self._call("/results", {"worker_id": self.worker_id, "results": results})
+                    self.processed += len(results)
+        finally:
+            self._stop.set()
+            restore_limiters(previous)
+            self.session.close()
+        return self.processed
+
+
+def run_worker(url: str, agent_factory: Callable[[], List[Any]], concurrency: int = 4, token: Optional[str] = None) -> int:
+    """Process entry point for a local worker"""
+    return Worker(url, agent_factory, concurrency=concurrency, token=token).run()
+
+
+def run_local_workers(
+    url: str,
+    count: int,
+    agent_factory: Callable[[], List[Any]],
+    concurrency: int = 4,
+    token: Optional[str] = None
+) -> List[multiprocessing.Process]:
+    """Start `count` worker processes on this host; agent_factory must be picklable"""
+    context = multiprocessing.get_context("spawn")
+    processes = []
+    for i in range(count):
+        process = context.Process(
+            target=run_worker,
+            args=(url, agent_factory, concurrency, token),
+            name=f"threatfusion-worker-{i}",
+            daemon=True
+        )
+        process.start()
+        processes.append(process)
+    return processes
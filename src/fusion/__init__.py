@@ -1,5 +1,6 @@
 """Fusion Package Initialization"""
 from src.fusion.orchestrator import EnrichmentOrchestrator
 from src.fusion.scorer import RiskScorer
+from src.fusion.batch import BatchRiskScorer, ScoringFeatures
 
-__all__ = ['EnrichmentOrchestrator', 'RiskScorer']
+__all__ = ['EnrichmentOrchestrator', 'RiskScorer', 'BatchRiskScorer', 'ScoringFeatures']
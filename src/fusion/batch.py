@@ -0,0 +1,246 @@
+"""
+Batch Risk Scorer
+Vectorized risk scoring over columnar per-source features
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Sequence
+import numpy as np
+from src.models import RiskScore, RESULT_TYPES, SourceResult
+from src.fusion.rules import ScoringRules
+from src.fusion.scorer import RiskScorer
+
+
+def round_half_even(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    Round like the builtin round()
+
+    np.round scales before rounding, which can push values sitting just below
+    a .5 boundary onto it. Rows that land near a boundary are re-rounded with
+    the builtin so results match the scalar path exactly.
+    """
+    scaled = values * 10 ** ndigits
+    rounded = np.round(values, ndigits)
+    ambiguous = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for i in ambiguous:
+        rounded[i] = round(float(values[i]), ndigits)
+    return rounded
+
+
+@dataclass
+class ScoringFeatures:
+    """
+    Columnar features for a batch of indicators
+
+    ``columns`` holds one array per feature column (the ``column`` names in
+    the scoring rules, e.g. vt_detections, otx_pulse_count),
+    ``available`` holds one boolean mask per source marking rows where that
+    source returned a successful result with data. ``sources_total`` and
+    ``sources_ok`` drive the confidence calculation and default to the
+    number of available sources.
+    """
+    indicators: List[str]
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)
+    available: Dict[str, np.ndarray] = field(default_factory=dict)
+    sources_total: Optional[np.ndarray] = None
+    sources_ok: Optional[np.ndarray] = None
+
+    def __post_init__(self):
+        n = len(self.indicators)
+        self.columns = {name: np.asarray(values) for name, values in self.columns.items()}
+        self.available = {name: np.asarray(mask, dtype=bool) for name, mask in self.available.items()}
+
+        if self.sources_ok is None:
+            self.sources_ok = np.sum(list(self.available.values()), axis=0, dtype=np.int64)
+            if not self.available:
+                self.sources_ok = np.zeros(n, dtype=np.int64)
+        if self.sources_total is None:
+            self.sources_total = self.sources_ok
+
+        self.sources_ok = np.asarray(self.sources_ok, dtype=np.int64)
+        self.sources_total = np.asarray(self.sources_total, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.indicators)
+
+    def column(self, name: str, default: Any = 0) -> np.ndarray:
+        """Get a feature column, filled with default if the caller didn't supply it"""
+        if name not in self.columns:
+            return np.full(len(self), default)
+        return self.columns[name]
+
+    def source_available(self, source: str) -> np.ndarray:
+        """Get the availability mask for a source"""
+        if source not in self.available:
+            return np.zeros(len(self), dtype=bool)
+        return self.available[source]
+
+    @classmethod
+    def from_results(
+        cls,
+        indicators: Sequence[str],
+        results: Sequence[Dict[str, SourceResult]],
+        rules: Optional[ScoringRules] = None
+    ) -> 'ScoringFeatures':
+        """Build columnar features from orchestrator result dicts"""
+        rules = rules or RiskScorer.get_rules()
+        n = len(indicators)
+        rule_by_source = {rule.source: rule for rule in rules.sources}
+
+        columns = {
+            feature.column: np.full(n, feature.batch_default, dtype=feature.dtype)
+            for feature in rules.features.values()
+        }
+        available = {source: np.zeros(n, dtype=bool) for source in rule_by_source}
+        sources_total = np.zeros(n, dtype=np.int64)
+        sources_ok = np.zeros(n, dtype=np.int64)
+
+        for row, result in enumerate(results):
+            for source, entry in result.items():
+                if source == '_metadata' or not isinstance(entry, RESULT_TYPES):
+                    continue
+
+                sources_total[row] += 1
+                if entry.get('status') != 'success':
+                    continue
+                sources_ok[row] += 1
+
+                rule = rule_by_source.get(source)
+                if rule is None or 'data' not in entry:
+                    continue
+
+                available[source][row] = True
+                data = entry['data']
+                for feature in rule.features:
+                    columns[feature.column][row] = feature.extract(data)
+
+        return cls(
+            indicators=list(indicators),
+            columns=columns,
+            available=available,
+            sources_total=sources_total,
+            sources_ok=sources_ok
+        )
+
+
+@dataclass
+class BatchRiskScores:
+    """Vectorized scoring output; rows become RiskScore objects only on request"""
+    features: ScoringFeatures
+    rules: ScoringRules
+    raw_scores: np.ndarray
+    points: Dict[str, np.ndarray]
+    emitted: Dict[str, np.ndarray]
+    severity_codes: np.ndarray
+    confidence: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.raw_scores)
+
+    @property
+    def scores(self) -> np.ndarray:
+        """Final scores rounded to one decimal, as reported by RiskScore"""
+        return round_half_even(self.raw_scores, 1)
+
+    @property
+    def severities(self) -> np.ndarray:
+        """Severity label per row"""
+        labels = np.array([level[1] for level in self.rules.severity_levels])
+        return labels[self.severity_codes]
+
+    def to_risk_score(self, row: int) -> RiskScore:
+        """Materialize a single row as a RiskScore"""
+        components = []
+
+        for rule in self.rules.sources:
+            if not self.emitted[rule.source][row]:
+                continue
+
+            values = {
+                feature.name: self.features.column(feature.column, feature.batch_default)[row].item()
+                for feature in rule.features
+            }
+            components.append(rule.component(float(self.points[rule.source][row]), values))
+
+        _, severity, severity_emoji = self.rules.severity_levels[self.severity_codes[row]]
+        return RiskScore(
+            score=round(float(self.raw_scores[row]), 1),
+            max=self.rules.max_score,
+            severity=severity,
+            severity_emoji=severity_emoji,
+            components=components,
+            confidence=float(self.confidence[row]),
+            timestamp=datetime.utcnow()
+        )
+
+    def to_risk_scores(self, rows: Optional[Sequence[int]] = None) -> List[RiskScore]:
+        """Materialize the requested rows (all rows if None) as RiskScore objects"""
+        if rows is None:
+            rows = range(len(self))
+        return [self.to_risk_score(int(row)) for row in rows]
+
+
+class BatchRiskScorer:
+    """Scores many indicators at once with NumPy array operations"""
+
+    @staticmethod
+    def calculate_risk_batch(
+        features: ScoringFeatures,
+        rules: Optional[ScoringRules] = None
+    ) -> BatchRiskScores:
+        """
+        Calculate risk scores for a whole batch
+
+        Mirrors RiskScorer.calculate_risk: per-source points are summed in the
+        same order as the scalar path so the float results are identical.
+        """
+        rules = rules or RiskScorer.get_rules()
+        n = len(features)
+
+        columns = {
+            feature.column: features.column(feature.column, feature.batch_default)
+            for feature in rules.features.values()
+        }
+
+        score = np.zeros(n, dtype=np.float64)
+        points = {}
+        emitted = {}
+        for rule in rules.sources:
+            rule_points, emit = rule.evaluate_columns(columns, features.source_available(rule.source))
+            score = score + rule_points
+            points[rule.source] = rule_points
+            emitted[rule.source] = emit
+
+        raw_scores = np.minimum(score, rules.max_score)
+
+        # severity_levels is highest first; count the bands each score clears
+        bounds = np.array([level[0] for level in rules.severity_levels[:-1]])
+        severity_codes = np.zeros(n, dtype=np.int64)
+        for bound in bounds:
+            severity_codes += raw_scores < bound
+
+        return BatchRiskScores(
+            features=features,
+            rules=rules,
+            raw_scores=raw_scores,
+            points=points,
+            emitted=emitted,
+            severity_codes=severity_codes,
+            confidence=BatchRiskScorer.calculate_confidence_batch(
+                features.sources_ok, features.sources_total, rules
+            )
+        )
+
+    @staticmethod
+    def calculate_confidence_batch(
+        sources_ok: np.ndarray,
+        sources_total: np.ndarray,
+        rules: Optional[ScoringRules] = None
+    ) -> np.ndarray:
+        """Vectorized RiskScorer.calculate_confidence"""
+        rules = rules or RiskScorer.get_rules()
+        rate = sources_ok / np.maximum(sources_total, 1)
+        conditions = [rate >= min_rate for min_rate, _ in rules.confidence_levels]
+        choices = [confidence for _, confidence in rules.confidence_levels]
+        confidence = np.select(conditions, choices, default=rules.confidence_levels[-1][1])
+        return np.where(sources_total > 0, confidence, 0.0)
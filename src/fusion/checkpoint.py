@@ -0,0 +1,313 @@
+"""
+Batch Checkpoints
+Append-only journal that makes batch enrichment runs resumable
+
+A run directory (<runs_dir>/<run_id>/) holds:
+
+    run.json          run id and options
+    indicators.txt    the run's indicators, one per line; line number = position
+    journal.jsonl     one line per finished agent call, and one per finished
+                      indicator with its risk score and the offsets of the
+                      result lines it was scored on
+
+Resuming replays the journal: indicators whose sources all succeeded are
+skipped, and only failed or timed-out agent calls are made again. Lines are
+only ever appended and the latest line per (position, source) wins, so
+resuming the same run any number of times is idempotent.
+"""
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, Optional, Set, Tuple
+from src.fusion.orchestrator import EnrichmentOrchestrator
+from src.fusion.scorer import RiskScorer
+from src.models import RiskScore, EnrichmentRecord, FAILED_STATUSES, RESULT_TYPES, SourceResult, first_fetched
+from src.validators import IndicatorValidator
+
+
+RUN_FILE = "run.json"
+INDICATORS_FILE = "indicators.txt"
+JOURNAL_FILE = "journal.jsonl"
+
+
+def split_results(results: Dict[str, Any]) -> Tuple[Dict[str, Any], Set[str]]:
+    """Split per-source results into (successful results, failed source names)"""
+    ok, failed = {}, set()
+    for source, entry in results.items():
+        if source == '_metadata' or not isinstance(entry, RESULT_TYPES):
+            continue
+        if entry.get('status') in FAILED_STATUSES:
+            failed.add(source)
+        else:
+            ok[source] = entry
+    return ok, failed
+
+
+def enrich_with_retry(
+    orchestrator: EnrichmentOrchestrator,
+    indicator: str,
+    itype,
+    timeout: int,
+    previous: Optional[Dict[str, Any]] = None,
+    on_result=None
+) -> Dict[str, SourceResult]:
+    """
+    Enrich an indicator, reusing successful results from an earlier attempt
+
+    Only agents without a successful previous result are queried.
+    """
+    kept, _ = split_results(previous or {})
+    sources = [agent.name for agent in orchestrator.agents if agent.name not in kept]
+    if not sources:
+        return dict(kept)
+
+    results = orchestrator.enrich_parallel(indicator, itype, timeout=timeout, sources=sources, on_result=on_result)
+    if kept and "error" in results and not isinstance(results.get("error"), RESULT_TYPES):
+        results = {}  # No remaining agent applies; keep what we had
+    metadata = results.pop('_metadata', None)
+    merged = {**kept, **results}
+    if metadata:
+        metadata["reused_sources"] = len(kept)
+        merged['_metadata'] = metadata
+    return merged
+
+
+class RunJournal:
+    """Checkpoint journal for one batch run"""
+
+    def __init__(self, path: str, sync_interval: float = 1.0):
+        self.path = Path(path)
+        self.run_id = self.path.name
+        self.sync_interval = sync_interval
+        self.options: Dict[str, Any] = json.loads((self.path / RUN_FILE).read_text(encoding="utf-8"))["options"]
+        self._file = None
+        self._offset = 0
+        self._last_sync = time.monotonic()
+
+    @classmethod
+    def create(
+        cls,
+        runs_dir: str,
+        indicators: Iterable[str],
+        options: Optional[Dict[str, Any]] = None,
+        run_id: Optional[str] = None
+    ) -> 'RunJournal':
+        """Start a new run, copying its indicators into the run directory"""
+        run_id = run_id or uuid.uuid4().hex[:12]
+        path = Path(runs_dir) / run_id
+        path.mkdir(parents=True, exist_ok=False)
+
+        with open(path / INDICATORS_FILE, "w", encoding="utf-8") as f:
+            for indicator in indicators:
+                indicator = indicator.strip()
+                if indicator and not indicator.startswith("#"):
+                    f.write(indicator + "\n")
+
+        run = {"run_id": run_id, "created_at": time.time(), "options": options or {}}
+        (path / RUN_FILE).write_text(json.dumps(run), encoding="utf-8")
+        return cls(str(path))
+
+    @classmethod
+    def open(cls, runs_dir: str, run_id: str) -> 'RunJournal':
+        """Open an existing run to resume it"""
+        path = Path(runs_dir) / run_id
+        if not (path / RUN_FILE).exists():
+            raise ValueError(f"No checkpointed run '{run_id}' in {runs_dir}")
+        return cls(str(path))
+
+    def indicators(self) -> Iterator[Tuple[int, str]]:
+        with open(self.path / INDICATORS_FILE, encoding="utf-8") as f:
+            for position, line in enumerate(f):
+                yield position, line.rstrip("\n")
+
+    # Writing
+
+    def _write(self, entry: Dict[str, Any]) -> int:
+        """Append one line; returns its byte offset"""
+        if self._file is None:
+            self._file = open(self.path / JOURNAL_FILE, "ab")
+            self._offset = self._file.seek(0, os.SEEK_END)
+            if self._offset and not self._ends_with_newline():
+                self._file.write(b"\n")  # Seal a torn line left by a crash
+                self._offset += 1
+
+        line = json.dumps(entry, separators=(",", ":"), default=str).encode("utf-8") + b"\n"
+        offset = self._offset
+        self._file.write(line)
+        self._offset += len(line)
+        return offset
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path / JOURNAL_FILE, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def record_source(self, position: int, source: str, result: SourceResult) -> int:
+        """Journal one finished agent call; returns the line's offset"""
+        entry = result.to_dict() if isinstance(result, EnrichmentRecord) else result
+        return self._write({"p": position, "s": source, "r": entry})
+
+    def record_indicator(
+        self,
+        position: int,
+        indicator: str,
+        refs: Optional[Dict[str, int]] = None,
+        risk_score: Optional[RiskScore] = None,
+        failed: Iterable[str] = (),
+        error: Optional[str] = None
+    ):
+        """
+        Journal a finished indicator
+
+        `refs` maps each source to the offset of the journal line holding the
+        result it was scored on, so results are never written twice.
+        """
+        entry: Dict[str, Any] = {"p": position, "i": indicator, "done": True}
+        if error:
+            entry["error"] = error
+        else:
+            entry["refs"] = refs
+            entry["risk"] = risk_score.model_dump(mode='json')
+            if failed:
+                entry["failed"] = sorted(failed)
+        self._write(entry)
+        self.flush()
+
+    def flush(self):
+        """Hand buffered lines to the OS; fsync at most every sync_interval"""
+        if self._file is None:
+            return
+        self._file.flush()
+        now = time.monotonic()
+        if now - self._last_sync >= self.sync_interval:
+            os.fsync(self._file.fileno())
+            self._last_sync = now
+
+    def close(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    # Reading
+
+    def _scan(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        path = self.path / JOURNAL_FILE
+        if not path.exists():
+            return
+        with open(path, "rb") as f:
+            offset = 0
+            for line in f:
+                start, offset = offset, offset + len(line)
+                try:
+                    yield start, json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn line from a crash
+
+    def state(self) -> Tuple[Set[int], Dict[int, Dict[str, Tuple[int, Dict[str, Any]]]]]:
+        """
+        Replay the journal
+
+        Returns the positions that are complete, and for every other touched
+        position its successful source results as {source: (offset, result)}.
+        """
+        complete: Set[int] = set()
+        partial: Dict[int, Dict[str, Tuple[int, Dict[str, Any]]]] = {}
+
+        for offset, entry in self._scan():
+            position = entry["p"]
+            if entry.get("done"):
+                if entry.get("failed"):
+                    complete.discard(position)
+                else:
+                    complete.add(position)  # Invalid indicators are complete too; retrying won't help
+                    partial.pop(position, None)
+            elif entry["r"].get("status") not in FAILED_STATUSES:
+                partial.setdefault(position, {})[entry["s"]] = (offset, entry["r"])
+        return complete, partial
+
+    def first_seen(self) -> Dict[str, datetime]:
+        """When each indicator's earliest journaled result was fetched, across resumes"""
+        earliest: Dict[int, datetime] = {}
+        for _, entry in self._scan():
+            if entry.get("done"):
+                continue
+            fetched = first_fetched({entry["s"]: entry["r"]})
+            if fetched and (entry["p"] not in earliest or fetched < earliest[entry["p"]]):
+                earliest[entry["p"]] = fetched
+        return {indicator: earliest[position] for position, indicator in self.indicators() if position in earliest}
+
+    def entries(self) -> Iterator[Tuple[str, Dict[str, Any], RiskScore]]:
+        """Final (indicator, results, risk_score) per position, in position order"""
+        latest: Dict[int, int] = {}
+        for offset, entry in self._scan():
+            if entry.get("done") and "risk" in entry:
+                latest[entry["p"]] = offset
+
+        with open(self.path / JOURNAL_FILE, "rb") as f:
+            for position in sorted(latest):
+                f.seek(latest[position])
+                entry = json.loads(f.readline())
+                results = {}
+                for source, offset in entry["refs"].items():
+                    f.seek(offset)
+                    results[source] = json.loads(f.readline())["r"]
+                yield entry["i"], results, RiskScore(**entry["risk"])
+
+
+class BatchRun:
+    """Runs (or resumes) a checkpointed batch enrichment"""
+
+    def __init__(self, journal: RunJournal, orchestrator: EnrichmentOrchestrator, timeout: int = 30):
+        self.journal = journal
+        self.orchestrator = orchestrator
+        self.timeout = timeout
+        self.stats = {"skipped": 0, "enriched": 0, "resumed": 0, "invalid": 0}
+
+    def run(self, on_progress=None) -> Dict[str, int]:
+        """Enrich every indicator that isn't already complete in the journal"""
+        complete, partial = self.journal.state()
+
+        try:
+            for position, indicator in self.journal.indicators():
+                if position in complete:
+                    self.stats["skipped"] += 1
+                elif self._enrich(position, indicator, partial.pop(position, {})):
+                    self.stats["enriched"] += 1
+                if on_progress:
+                    on_progress(position, indicator)
+        finally:
+            self.journal.close()
+        return self.stats
+
+    def _enrich(self, position: int, indicator: str, previous: Dict[str, Tuple[int, Dict[str, Any]]]) -> bool:
+        try:
+            validated = IndicatorValidator.validate(indicator)
+        except ValueError as e:
+            self.journal.record_indicator(position, indicator, error=str(e))
+            self.stats["invalid"] += 1
+            return False
+
+        if previous:
+            self.stats["resumed"] += 1
+        refs = {source: offset for source, (offset, _) in previous.items()}
+
+        def journal_result(source: str, result: SourceResult):
+            refs[source] = self.journal.record_source(position, source, result)
+
+        results = enrich_with_retry(
+            self.orchestrator,
+            indicator,
+            validated.type,
+            self.timeout,
+            {source: result for source, (_, result) in previous.items()},
+            on_result=journal_result
+        )
+        risk_score = RiskScorer.calculate_risk(results)
+        _, failed = split_results(results)
+        self.journal.record_indicator(position, indicator, refs, risk_score, failed)
+        return True
@@ -2,11 +2,15 @@
 Enrichment Orchestrator
 Coordinates parallel execution of multiple agents
 """
+import contextvars
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
-from typing import List, Dict, Any
+from typing import Callable, Iterable, List, Dict, Any, Optional
 from src.agents.base import EnrichmentAgent
-from src.models import IndicatorType
+from src.models import IndicatorType, EnrichmentRecord, FAILED_STATUSES, SourceResult
+from src.telemetry.metrics import ENRICHMENT_LATENCY, INFLIGHT_AGENTS
+from src.telemetry.profiling import thread_profile
+from src.telemetry.spans import span, trace
 
 
 class EnrichmentOrchestrator:
@@ -20,8 +24,10 @@ class EnrichmentOrchestrator:
         self,
         indicator: str,
         itype: IndicatorType,
-        timeout: int = 30
-    ) -> Dict[str, Dict[str, Any]]:
+        timeout: int = 30,
+        sources: Optional[Iterable[str]] = None,
+        on_result: Optional[Callable[[str, SourceResult], None]] = None
+    ) -> Dict[str, SourceResult]:
         """
         Execute all applicable agents in parallel
         
@@ -29,10 +35,30 @@ class EnrichmentOrchestrator:
             indicator: The indicator to enrich
             itype: The indicator type
             timeout: Maximum total time for all agents
+            sources: Only query agents with these names (e.g. to retry failures)
+            on_result: Called with (source, result) as each agent finishes
         
         Returns:
-            Dictionary mapping agent names to their results
+            Dictionary mapping agent names to their results; '_metadata'
+            includes per-agent phase timings (limiter wait, connect, ...)
         """
+        with trace("agents", indicator=indicator) as root:
+            results = self._run_agents(indicator, itype, timeout, sources, on_result)
+        
+        metadata = results.get('_metadata')
+        if metadata is not None:
+            metadata['phases'] = root.phase_totals()
+        return results
+    
+    def _run_agents(
+        self,
+        indicator: str,
+        itype: IndicatorType,
+        timeout: int,
+        sources: Optional[Iterable[str]],
+        on_result: Optional[Callable[[str, SourceResult], None]]
+    ) -> Dict[str, SourceResult]:
+        """Run the applicable agents in parallel (see enrich_parallel)"""
         results = {}
         start_time = time.time()
         
@@ -41,66 +67,82 @@ class EnrichmentOrchestrator:
             agent for agent in self.agents
             if agent.is_supported(itype)
         ]
+        if sources is not None:
+            sources = set(sources)
+            applicable_agents = [agent for agent in applicable_agents if agent.name in sources]
         
         if not applicable_agents:
             return {
                 "error": f"No agents support indicator type: {itype.value}"
             }
         
-        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(applicable_agents))) as executor:
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(applicable_agents)))
+        timed_out = False
+        try:
             # Submit all agent queries
             future_to_agent = {
-                executor.submit(self._safe_enrich, agent, indicator, itype): agent
+                # Each agent runs in a copy of this context, so its spans nest under ours
+                executor.submit(contextvars.copy_context().run, self._safe_enrich, agent, indicator, itype): agent
                 for agent in applicable_agents
             }
             
             # Collect results as they complete
-            for future in as_completed(future_to_agent, timeout=timeout):
-                agent = future_to_agent[future]
-                
-                try:
-                    result = future.result(timeout=5)  # Per-agent timeout
-                    results[agent.name] = result
-                
-                except TimeoutError:
-                    results[agent.name] = {
-                        "status": "error",
-                        "error": f"Agent timeout (>5s)",
-                        "indicator": indicator,
-                        "source": agent.name
-                    }
-                
-                except Exception as e:
-                    results[agent.name] = {
-                        "status": "error",
-                        "error": str(e),
-                        "indicator": indicator,
-                        "source": agent.name
-                    }
+            try:
+                for future in as_completed(future_to_agent, timeout=timeout):
+                    agent = future_to_agent[future]
+                    
+                    try:
+                        # Already finished; the overall deadline bounds each agent
+                        results[agent.name] = future.result()
+                    
+                    except Exception as e:
+                        results[agent.name] = EnrichmentRecord(
+                            indicator, agent.name, status="error", error=str(e)
+                        )
+                    
+                    if on_result:
+                        on_result(agent.name, results[agent.name])
+            
+            except TimeoutError:
+                # Overall deadline passed; report stragglers instead of raising
+                timed_out = True
+                for future, agent in future_to_agent.items():
+                    if agent.name not in results:
+                        future.cancel()
+                        results[agent.name] = EnrichmentRecord(
+                            indicator, agent.name, status="error", error=f"Agent timeout (>{timeout}s)"
+                        )
+                        if on_result:
+                            on_result(agent.name, results[agent.name])
+        
+        finally:
+            # Don't wait past the deadline for stragglers (e.g. retrying 503s);
+            # their threads exit once the HTTP client's own timeouts expire
+            executor.shutdown(wait=not timed_out, cancel_futures=True)
         
         # Calculate total execution time
         execution_time = time.time() - start_time
+        ENRICHMENT_LATENCY.observe(execution_time)
         results['_metadata'] = {
             "execution_time": round(execution_time, 2),
             "agents_queried": len(applicable_agents),
-            "results_received": len([r for r in results.values() if isinstance(r, dict) and r.get('status') != 'error'])
+            "results_received": len([r for r in results.values() if r.status not in FAILED_STATUSES])
         }
         
         return results
     
-    def _safe_enrich(self, agent: EnrichmentAgent, indicator: str, itype: IndicatorType) -> Dict[str, Any]:
+    def _safe_enrich(self, agent: EnrichmentAgent, indicator: str, itype: IndicatorType) -> EnrichmentRecord:
         """
         Safely execute agent enrichment with exception handling
         """
+        INFLIGHT_AGENTS.inc()
         try:
-            return agent.enrich(indicator, itype)
+            with span(agent.name), thread_profile():
+                return agent.enrich(indicator, itype)
         except Exception as e:
-            return {
-                "status": "error",
-                "error": str(e),
-                "indicator": indicator,
-                "source": agent.name
-            }
+            return EnrichmentRecord(indicator, agent.name, status="error", error=str(e))
+        finally:
+            INFLIGHT_AGENTS.dec()
     
     def get_agent_stats(self) -> Dict[str, Dict[str, Any]]:
         """Get statistics for all agents"""
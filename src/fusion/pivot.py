@@ -0,0 +1,220 @@
+"""
+Pivot Expansion
+Expands an indicator breadth-first into the infrastructure the agents link it to
+
+Links come from what the agents already return, no extra endpoints:
+
+    VirusTotal   domain -> IPs it resolves to (A records)
+    Shodan       IP     -> hostnames seen on the host
+    Censys       domain -> other names on the same certificates
+
+Each node is enriched and scored once: a visited set (by canonical form)
+keeps overlapping branches from re-querying the same indicator, and a cache
+of per-node results can be carried between pivots. Only complete answers are
+cached: a node where any source errored or was unavailable is re-queried
+next time. The frontier is worked
+level by level, highest-risk parents first, until the depth is reached or
+the provider-call budget runs out; whatever is left stays in the graph as
+unexpanded nodes.
+"""
+import heapq
+import itertools
+import json
+import logging
+import xml.etree.ElementTree as ET
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from src.fusion.orchestrator import EnrichmentOrchestrator
+from src.fusion.scorer import RiskScorer
+from src.models import FAILED_STATUSES, IndicatorType, serialize_results
+from src.telemetry.metrics import record_cache
+from src.validators import IndicatorValidator
+
+
+logger = logging.getLogger(__name__)
+
+# Sources that yield links are queried first when the budget is short
+PIVOT_SOURCES = ("VirusTotal", "Shodan", "Censys")
+
+GRAPHML_NS = "http://graphml.graphdrawing.org/xmlns"
+
+NODE_ATTRS = (
+    ("type", "string"), ("depth", "int"), ("expanded", "boolean"),
+    ("risk_score", "double"), ("severity", "string"), ("sources", "string")
+)
+EDGE_ATTRS = (("relation", "string"), ("via", "string"))
+
+
+def related_indicators(source: str, itype: IndicatorType, data: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+    """Yield (related value, relation) pairs from one source's data"""
+    if source == "VirusTotal" and itype == IndicatorType.DOMAIN:
+        for ip in data.get('resolutions') or []:
+            yield ip, "resolves_to"
+    elif source == "Shodan" and itype in (IndicatorType.IP_V4, IndicatorType.IP_V6):
+        for hostname in data.get('hostnames') or []:
+            yield hostname, "hostname"
+    elif source == "Censys" and itype == IndicatorType.DOMAIN:
+        for certificate in data.get('certificates') or []:
+            for name in certificate.get('names') or []:
+                yield name[2:] if name.startswith("*.") else name, "cert_name"
+
+
+class PivotGraph:
+    """Nodes (indicators) and typed edges found while pivoting"""
+
+    def __init__(self):
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.edges: Dict[Tuple[str, str, str], str] = {}  # (from, to, relation) -> source
+
+    def add_node(self, indicator: str, itype: IndicatorType, depth: int) -> Dict[str, Any]:
+        node = self.nodes.get(indicator)
+        if node is None:
+            node = self.nodes[indicator] = {
+                "indicator": indicator, "type": itype.value, "depth": depth, "expanded": False,
+                "risk_score": None, "severity": None, "sources": []
+            }
+        return node
+
+    def add_edge(self, source: str, target: str, relation: str, via: str):
+        self.edges.setdefault((source, target, relation), via)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "nodes": list(self.nodes.values()),
+            "edges": [
+                {"source": source, "target": target, "relation": relation, "via": via}
+                for (source, target, relation), via in self.edges.items()
+            ]
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2, default=str)
+
+    def to_graphml(self) -> str:
+        """Directed GraphML, loadable in Gephi, yEd or networkx"""
+        root = ET.Element("graphml", xmlns=GRAPHML_NS)
+        for scope, attrs in (("node", NODE_ATTRS), ("edge", EDGE_ATTRS)):
+            for name, kind in attrs:
+                ET.SubElement(root, "key", {"id": name, "for": scope, "attr.name": name, "attr.type": kind})
+
+        graph = ET.SubElement(root, "graph", id="pivot", edgedefault="directed")
+        for indicator, node in self.nodes.items():
+            element = ET.SubElement(graph, "node", id=indicator)
+            for name, _ in NODE_ATTRS:
+                value = node[name]
+                if value is None:
+                    continue
+                if isinstance(value, bool):
+                    value = str(value).lower()
+                elif isinstance(value, list):
+                    value = ",".join(value)
+                ET.SubElement(element, "data", key=name).text = str(value)
+
+        for i, ((source, target, relation), via) in enumerate(self.edges.items()):
+            element = ET.SubElement(graph, "edge", id=f"e{i}", source=source, target=target)
+            ET.SubElement(element, "data", key="relation").text = relation
+            ET.SubElement(element, "data", key="via").text = via
+
+        ET.indent(root)
+        return '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(root, encoding="unicode") + "\n"
+
+
+class Pivoter:
+    """Budgeted breadth-first expansion from a seed indicator"""
+
+    def __init__(
+        self,
+        orchestrator: EnrichmentOrchestrator,
+        depth: int = 2,
+        budget: int = 50,
+        timeout: int = 30,
+        cache: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
+        self.orchestrator = orchestrator
+        self.depth = depth
+        self.budget = budget
+        self.timeout = timeout
+        self.cache = cache if cache is not None else {}
+        self.calls = 0
+        self.stats = {"expanded": 0, "cached": 0, "truncated": 0}
+
+    def _sources_for(self, itype: IndicatorType) -> List[str]:
+        names = [agent.name for agent in self.orchestrator.agents if agent.is_supported(itype)]
+        return sorted(names, key=lambda name: name not in PIVOT_SOURCES)
+
+    def _results(self, indicator: str, itype: IndicatorType) -> Optional[Dict[str, Any]]:
+        """Cached results, or enrich within the remaining budget (None when spent)"""
+        cached = self.cache.get(indicator)
+        record_cache("pivot", cached is not None)
+        if cached is not None:
+            self.stats["cached"] += 1
+            return cached
+
+        sources = self._sources_for(itype)
+        remaining = self.budget - self.calls
+        if remaining <= 0 or not sources:
+            return None
+        if len(sources) > remaining:
+            sources = sources[:remaining]
+            self.stats["truncated"] += 1
+
+        self.calls += len(sources)
+        results = serialize_results(self.orchestrator.enrich_parallel(
+            indicator, itype, timeout=self.timeout, sources=sources
+        ))
+        results.pop('_metadata', None)
+        failed = any(
+            isinstance(result, dict) and result.get('status') in FAILED_STATUSES
+            for result in results.values()
+        )
+        if not failed and len(sources) == len(self._sources_for(itype)):
+            self.cache[indicator] = results  # Partial or failed answers aren't reused
+        return results
+
+    def run(self, seed: str) -> PivotGraph:
+        """Expand from `seed`; raises ValueError if it isn't a valid indicator"""
+        validated = IndicatorValidator.validate(IndicatorValidator.canonicalize(seed))
+        graph = PivotGraph()
+        graph.add_node(validated.value, validated.type, 0)
+
+        # Level by level; within a level, children of riskier parents first
+        order = itertools.count()
+        frontier = [(0, 0.0, next(order), validated.value, validated.type)]
+        visited = {validated.value}
+
+        while frontier:
+            depth, _, _, indicator, itype = heapq.heappop(frontier)
+            results = self._results(indicator, itype)
+            if results is None:
+                continue  # Budget spent; leave it unexpanded
+
+            node = graph.nodes[indicator]
+            risk = RiskScorer.calculate_risk(results)
+            node.update(
+                expanded=True, risk_score=risk.score, severity=risk.severity,
+                sources=sorted(k for k, v in results.items() if isinstance(v, dict))
+            )
+            self.stats["expanded"] += 1
+            if depth >= self.depth:
+                continue
+
+            for source, result in results.items():
+                if not isinstance(result, dict) or result.get('status') != 'success':
+                    continue
+                for value, relation in related_indicators(source, itype, result.get('data') or {}):
+                    try:
+                        related = IndicatorValidator.validate(IndicatorValidator.canonicalize(value))
+                    except ValueError:
+                        continue
+                    if related.value == indicator:
+                        continue
+                    graph.add_node(related.value, related.type, depth + 1)
+                    graph.add_edge(indicator, related.value, relation, source)
+                    if related.value not in visited:
+                        visited.add(related.value)
+                        heapq.heappush(frontier, (depth + 1, -risk.score, next(order), related.value, related.type))
+
+        logger.info(
+            "Pivot from %s: %d nodes, %d edges, %d provider calls",
+            validated.value, len(graph.nodes), len(graph.edges), self.calls
+        )
+        return graph
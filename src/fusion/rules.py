@@ -0,0 +1,359 @@
+"""
+Scoring Rules
+Loads declarative scoring rules and compiles them into a fast evaluator
+"""
+import time
+import tomllib
+from string import Formatter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Callable
+import numpy as np
+
+
+DEFAULT_RULES_PATH = Path(__file__).with_name("scoring_rules.toml")
+
+RULE_KINDS = ("ratio", "scaled", "match")
+TRANSFORMS = (None, "count", "match_any")
+
+
+@dataclass(frozen=True)
+class Feature:
+    """A single value extracted from a source's result data"""
+    name: str
+    column: str
+    default: Any = 0
+    transform: Optional[str] = None
+    key: Optional[str] = None
+    values: frozenset = frozenset()
+
+    def __post_init__(self):
+        # Bind the extractor once so scoring doesn't re-dispatch on transform
+        name, key, values, default = self.name, self.key, self.values, self.default
+
+        if self.transform == "count":
+            def extract(data):
+                return len(data.get(name, ()))
+        elif self.transform == "match_any":
+            def extract(data):
+                return any(item.get(key) in values for item in data.get(name, ()))
+        else:
+            def extract(data):
+                return data.get(name, default)
+
+        object.__setattr__(self, "extract", extract)
+
+    @property
+    def batch_default(self) -> Any:
+        """Column value used when the source has no result"""
+        if self.transform == "match_any":
+            return False
+        if self.transform == "count":
+            return 0
+        return self.default
+
+    @property
+    def dtype(self) -> type:
+        """Column dtype for batch input"""
+        return bool if self.transform == "match_any" else np.int64
+
+
+@dataclass(frozen=True)
+class SourceRule:
+    """
+    Compiled scoring rule for one intelligence source
+
+    ``evaluate`` is the scalar fast path: it closes over the rule parameters
+    so scoring an indicator is a handful of arithmetic operations.
+    """
+    source: str
+    kind: str
+    max: float
+    details: str
+    features: Tuple[Feature, ...]
+    evaluate_values: Callable[[Dict[str, Any]], Optional[float]]
+    evaluate_columns: Callable[[Dict[str, np.ndarray], np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+    def extract(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract all features this rule reads"""
+        return {feature.name: feature.extract(data) for feature in self.features}
+
+    def evaluate(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Score one result's data, returning a risk component or None"""
+        values = self.extract(data)
+        points = self.evaluate_values(values)
+        if points is None:
+            return None
+        return self.component(points, values)
+
+    def component(self, points: float, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the risk component reported for this source"""
+        return {
+            "source": self.source,
+            "score": round(points, 2),
+            "max": self.max,
+            "details": self.details.format(**values)
+        }
+
+
+@dataclass(frozen=True)
+class ScoringRules:
+    """Compiled scoring rules: source rules, severity bands and confidence bands"""
+    sources: Tuple[SourceRule, ...]
+    severity_levels: Tuple[Tuple[float, str, str], ...]
+    confidence_levels: Tuple[Tuple[float, float], ...]
+    max_score: float = 10.0
+    path: Optional[str] = None
+
+    def severity_for(self, score: float) -> Tuple[str, str]:
+        """Map a final score to its (severity, emoji) band"""
+        for min_score, severity, emoji in self.severity_levels:
+            if score >= min_score:
+                return severity, emoji
+        return self.severity_levels[-1][1], self.severity_levels[-1][2]
+
+    def confidence_for(self, response_rate: float) -> float:
+        """Map a source response rate to a confidence value"""
+        for min_rate, confidence in self.confidence_levels:
+            if response_rate >= min_rate:
+                return confidence
+        return self.confidence_levels[-1][1]
+
+    @property
+    def features(self) -> Dict[str, Feature]:
+        """All features keyed by batch column name"""
+        return {
+            feature.column: feature
+            for rule in self.sources for feature in rule.features
+        }
+
+
+def _compile_ratio(spec: Dict[str, Any]):
+    numerator = spec["numerator"]
+    denominator = spec["denominator"]
+    weight = float(spec["weight"])
+    cap = float(spec["cap"]) if "cap" in spec else None
+
+    def evaluate_values(values):
+        total = values[denominator]
+        if not total > 0:
+            return None
+        points = values[numerator] / max(total, 1) * weight
+        return points if cap is None else min(points, cap)
+
+    return evaluate_values, (numerator, denominator, weight, cap)
+
+
+def _compile_scaled(spec: Dict[str, Any]):
+    feature = spec["feature"]
+    scale = float(spec["scale"])
+    if not scale > 0:
+        raise ValueError(f"scale must be positive, got {spec['scale']}")
+    weight = float(spec["weight"])
+    cap = float(spec["cap"]) if "cap" in spec else None
+    require_positive = bool(spec.get("require_positive", False))
+
+    def evaluate_values(values):
+        value = values[feature]
+        if require_positive and not value > 0:
+            return None
+        points = value / scale * weight
+        return points if cap is None else min(points, cap)
+
+    return evaluate_values, (feature, scale, weight, cap, require_positive)
+
+
+def _compile_match(spec: Dict[str, Any]):
+    feature = spec["feature"]
+    points = float(spec["points"])
+
+    def evaluate_values(values):
+        return points if values[feature] else None
+
+    return evaluate_values, (feature, points)
+
+
+def _compile_columnar(kind: str, params: tuple, by_name: Dict[str, Feature]):
+    """Build the vectorized counterpart of a compiled rule"""
+    def column(columns: Dict[str, np.ndarray], name: str) -> np.ndarray:
+        return columns[by_name[name].column]
+
+    if kind == "ratio":
+        numerator, denominator, weight, cap = params
+
+        def evaluate_columns(columns, available):
+            total = column(columns, denominator)
+            emit = available & (total > 0)
+            points = column(columns, numerator) / np.maximum(total, 1) * weight
+            if cap is not None:
+                points = np.minimum(points, cap)
+            return np.where(emit, points, 0.0), emit
+
+    elif kind == "scaled":
+        feature, scale, weight, cap, require_positive = params
+
+        def evaluate_columns(columns, available):
+            value = column(columns, feature)
+            emit = available & (value > 0) if require_positive else available
+            points = value / scale * weight
+            if cap is not None:
+                points = np.minimum(points, cap)
+            return np.where(emit, points, 0.0), emit
+
+    else:
+        feature, fixed_points = params
+
+        def evaluate_columns(columns, available):
+            emit = available & column(columns, feature).astype(bool)
+            return np.where(emit, fixed_points, 0.0), emit
+
+    return evaluate_columns
+
+
+_COMPILERS = {
+    "ratio": _compile_ratio,
+    "scaled": _compile_scaled,
+    "match": _compile_match,
+}
+
+
+def _compile_feature(spec: Dict[str, Any], source: str) -> Feature:
+    transform = spec.get("transform")
+    if transform not in TRANSFORMS:
+        raise ValueError(f"{source}: unknown feature transform '{transform}'")
+    if transform == "match_any" and ("key" not in spec or "values" not in spec):
+        raise ValueError(f"{source}: match_any feature '{spec.get('name')}' needs 'key' and 'values'")
+    if not spec.get("name"):
+        raise ValueError(f"{source}: feature is missing 'name'")
+
+    return Feature(
+        name=spec["name"],
+        column=spec.get("column", f"{source.lower()}_{spec['name']}"),
+        default=spec.get("default", 0),
+        transform=transform,
+        key=spec.get("key"),
+        values=frozenset(spec.get("values", []))
+    )
+
+
+def _compile_source(spec: Dict[str, Any]) -> SourceRule:
+    source = spec.get("source")
+    if not source:
+        raise ValueError("Scoring rule is missing 'source'")
+
+    kind = spec.get("kind")
+    if kind not in RULE_KINDS:
+        raise ValueError(f"{source}: unknown rule kind '{kind}' (expected one of {', '.join(RULE_KINDS)})")
+
+    features = tuple(_compile_feature(f, source) for f in spec.get("features", []))
+    by_name = {feature.name: feature for feature in features}
+
+    try:
+        evaluate_values, params = _COMPILERS[kind](spec)
+    except KeyError as e:
+        raise ValueError(f"{source}: {kind} rule is missing {e}") from None
+    except ValueError as e:
+        raise ValueError(f"{source}: {e}") from None
+
+    referenced = [p for p in params if isinstance(p, str)]
+    for name in referenced:
+        if name not in by_name:
+            raise ValueError(f"{source}: rule references undeclared feature '{name}'")
+
+    details = spec.get("details", "")
+    try:
+        placeholders = [field for _, field, _, _ in Formatter().parse(details) if field is not None]
+    except ValueError as e:
+        raise ValueError(f"{source}: invalid details template: {e}") from None
+    for field in placeholders:
+        # '{name}', '{name:.1f}' or '{name[0]}' all read feature 'name'
+        name = field.split(".")[0].split("[")[0]
+        if name not in by_name:
+            raise ValueError(f"{source}: details template references undeclared feature '{{{field}}}'")
+
+    rule_max = float(spec.get("max", spec.get("cap", spec.get("points", spec.get("weight", 0.0)))))
+
+    return SourceRule(
+        source=source,
+        kind=kind,
+        max=rule_max,
+        details=details,
+        features=features,
+        evaluate_values=evaluate_values,
+        evaluate_columns=_compile_columnar(kind, params, by_name)
+    )
+
+
+def compile_rules(spec: Dict[str, Any], path: Optional[str] = None) -> ScoringRules:
+    """Compile a parsed rules document into ScoringRules"""
+    sources = tuple(_compile_source(s) for s in spec.get("sources", []))
+
+    seen = set()
+    for rule in sources:
+        if rule.source in seen:
+            raise ValueError(f"Duplicate scoring rule for source '{rule.source}'")
+        seen.add(rule.source)
+
+    try:
+        severity_levels = tuple(sorted(
+            ((float(s["min_score"]), s["label"], s.get("emoji", "")) for s in spec.get("severity", [])),
+            key=lambda level: level[0],
+            reverse=True
+        ))
+    except KeyError as e:
+        raise ValueError(f"Severity band is missing {e}") from None
+    if not severity_levels:
+        raise ValueError("Scoring rules must define at least one severity band")
+
+    try:
+        confidence_levels = tuple(sorted(
+            ((float(c["min_response_rate"]), float(c["confidence"])) for c in spec.get("confidence", [])),
+            key=lambda level: level[0],
+            reverse=True
+        ))
+    except KeyError as e:
+        raise ValueError(f"Confidence band is missing {e}") from None
+    if not confidence_levels:
+        raise ValueError("Scoring rules must define at least one confidence band")
+
+    return ScoringRules(
+        sources=sources,
+        severity_levels=severity_levels,
+        confidence_levels=confidence_levels,
+        max_score=float(spec.get("max_score", 10.0)),
+        path=path
+    )
+
+
+def load_rules(path: Optional[str] = None) -> ScoringRules:
+    """Load and compile scoring rules from a TOML file (bundled defaults if None)"""
+    rules_path = Path(path) if path else DEFAULT_RULES_PATH
+    with open(rules_path, "rb") as f:
+        spec = tomllib.load(f)
+    return compile_rules(spec, path=str(rules_path))
+
+
+def benchmark_rules(
+    evaluate: Callable[[Dict[str, Dict[str, Any]]], Any],
+    samples: List[Dict[str, Dict[str, Any]]],
+    rounds: int = 5
+) -> Dict[str, float]:
+    """
+    Measure per-indicator evaluation cost of a scoring function
+
+    Returns the best and median nanoseconds per indicator across rounds.
+    """
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter_ns()
+        for results in samples:
+            evaluate(results)
+        timings.append((time.perf_counter_ns() - start) / max(len(samples), 1))
+
+    timings.sort()
+    return {
+        "indicators": len(samples),
+        "rounds": rounds,
+        "best_ns": round(timings[0], 1),
+        "median_ns": round(timings[len(timings) // 2], 1)
+    }
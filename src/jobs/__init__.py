@@ -0,0 +1,5 @@
+"""Jobs Package Initialization"""
+from src.jobs.store import Job, JobStore
+from src.jobs.worker import JobWorkerPool, enrich_indicator
+
+__all__ = ['Job', 'JobStore', 'JobWorkerPool', 'enrich_indicator']
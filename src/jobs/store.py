@@ -0,0 +1,284 @@
+"""
+Job Store
+Durable SQLite queue for asynchronous enrichment jobs
+
+Jobs move through:
+
+    queued -> running -> completed | failed | cancelled
+
+Each indicator's result is stored as its own row as soon as it finishes,
+so large jobs never rewrite one growing blob and partial results survive a
+crash. Jobs left 'running' by a dead process are re-queued on startup, and
+finished jobs can be resumed to retry the agent calls that failed.
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterator, List, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    request TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_results (
+    job_id TEXT NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    indicator TEXT NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (job_id, position)
+);
+"""
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+
+@dataclass
+class Job:
+    """One enrichment job"""
+    id: str
+    status: str
+    request: Dict[str, Any]
+    total: int
+    completed: int = 0
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    results: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def indicators(self) -> List[str]:
+        return self.request["indicators"]
+
+    def to_dict(self, include_results: bool = True) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": {"completed": self.completed, "total": self.total},
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if include_results:
+            data["results"] = self.results
+        return data
+
+
+class JobStore:
+    """SQLite-backed job queue, safe to share between threads"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in one immediate (write-locked) transaction"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Job:
+        return Job(
+            id=row["id"],
+            status=row["status"],
+            request=json.loads(row["request"]),
+            total=row["total"],
+            completed=row["completed"],
+            error=row["error"],
+            cancel_requested=bool(row["cancel_requested"]),
+            created_at=row["created_at"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"]
+        )
+
+    def submit(self, indicators: List[str], **options) -> Job:
+        """Queue a new job"""
+        job = Job(
+            id=uuid.uuid4().hex,
+            status=QUEUED,
+            request={"indicators": list(indicators), **options},
+            total=len(indicators),
+            created_at=time.time()
+        )
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, request, total, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job.id, job.status, json.dumps(job.request), job.total, job.created_at)
+            )
+        return job
+
+    def get(self, job_id: str, include_results: bool = True) -> Optional[Job]:
+        conn = self._connection()
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = self._row_to_job(row)
+        if include_results:
+            job.results = [
+                json.loads(r["result"]) for r in conn.execute(
+                    "SELECT result FROM job_results WHERE job_id = ? ORDER BY position", (job_id,)
+                )
+            ]
+        return job
+
+    def claim(self) -> Optional[Job]:
+        """Atomically take the oldest queued job and mark it running"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            started_at = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ? WHERE id = ?",
+                (RUNNING, started_at, row["id"])
+            )
+        job = self._row_to_job(row)
+        job.status, job.started_at = RUNNING, started_at
+        return job
+
+    def record_result(self, job_id: str, position: int, indicator: str, result: Dict[str, Any]):
+        """Store one indicator's result and advance progress"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO job_results (job_id, position, indicator, result) VALUES (?, ?, ?, ?)",
+                (job_id, position, indicator, json.dumps(result, default=str))
+            )
+            if cursor.rowcount:
+                conn.execute("UPDATE jobs SET completed = completed + 1 WHERE id = ?", (job_id,))
+
+    def replace_result(self, job_id: str, position: int, result: Dict[str, Any]):
+        """Overwrite a stored result after retrying its failed sources"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE job_results SET result = ? WHERE job_id = ? AND position = ?",
+                (json.dumps(result, default=str), job_id, position)
+            )
+
+    def iter_results(self, job_id: str) -> Iterator[tuple]:
+        """Stored (position, result) pairs in position order"""
+        rows = self._connection().execute(
+            "SELECT position, result FROM job_results WHERE job_id = ? ORDER BY position", (job_id,)
+        )
+        for row in rows:
+            yield row["position"], json.loads(row["result"])
+
+    def completed_positions(self, job_id: str) -> set:
+        """Positions that already have a stored result"""
+        rows = self._connection().execute("SELECT position FROM job_results WHERE job_id = ?", (job_id,))
+        return {row["position"] for row in rows}
+
+    def finish(self, job_id: str, status: str, error: Optional[str] = None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id)
+            )
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a job
+
+        Queued jobs are cancelled immediately; running jobs stop after the
+        indicator in progress. Finished jobs are left unchanged.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, time.time(), job_id, QUEUED)
+            )
+            conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?",
+                (job_id, RUNNING)
+            )
+        return self.get(job_id, include_results=False)
+
+    def resume(self, job_id: str) -> Optional[Job]:
+        """
+        Re-queue a finished job
+
+        The worker skips indicators whose sources all succeeded and retries
+        only the failed or timed-out agent calls. Queued and running jobs are
+        left unchanged, so resuming twice is harmless.
+        """
+        placeholders = ", ".join("?" for _ in FINISHED)
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE jobs SET status = ?, error = NULL, cancel_requested = 0, started_at = NULL, "
+                f"finished_at = NULL WHERE id = ? AND status IN ({placeholders})",
+                (QUEUED, job_id, *FINISHED)
+            )
+        return self.get(job_id, include_results=False)
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        row = self._connection().execute(
+            "SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def requeue_interrupted(self) -> int:
+        """Put jobs left running by a previous process back on the queue"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?", (QUEUED, RUNNING)
+            )
+        return cursor.rowcount
+
+    def purge(self, older_than_seconds: float) -> int:
+        """Delete finished jobs (and their results) past the retention period"""
+        cutoff = time.time() - older_than_seconds
+        placeholders = ", ".join("?" for _ in FINISHED)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({placeholders}) AND finished_at < ?",
+                (*FINISHED, cutoff)
+            )
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        rows = self._connection().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+        return {row["status"]: row["n"] for row in rows}
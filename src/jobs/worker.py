@@ -0,0 +1,184 @@
+"""
+Job Workers
+Thread pool that drains the job queue and runs enrichments
+
+Each worker runs one job at a time, enriching its indicators in order.
+Workers from different jobs meet at the shared per-provider token buckets,
+which serve waiters first-come first-served, so a large batch job and a
+single-indicator job interleave rather than one starving the other.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional
+from src.fusion.checkpoint import enrich_with_retry, split_results
+from src.fusion.orchestrator import EnrichmentOrchestrator
+from src.fusion.scorer import RiskScorer
+from src.jobs.store import JobStore, Job, COMPLETED, FAILED, CANCELLED
+from src.models import serialize_results
+from src.validators import IndicatorValidator
+
+
+logger = logging.getLogger(__name__)
+
+ResultCallback = Callable[[str, Dict[str, Any], Any], None]
+
+
+def enrich_indicator(
+    orchestrator: EnrichmentOrchestrator,
+    indicator: str,
+    timeout: int = 30,
+    previous: Optional[Dict[str, Any]] = None
+):
+    """
+    Validate, enrich and score one indicator
+
+    Successful sources in `previous` (results from an earlier attempt) are
+    reused rather than queried again. Returns (job result dict, raw results,
+    risk score); the last two are None when the indicator is invalid.
+    """
+    try:
+        validated = IndicatorValidator.validate(indicator)
+    except ValueError as e:
+        return {"indicator": indicator, "error": str(e)}, None, None
+
+    start_time = time.time()
+    results = enrich_with_retry(orchestrator, indicator, validated.type, timeout, previous)
+    execution_time = time.time() - start_time
+    risk_score = RiskScorer.calculate_risk(results)
+
+    entry = {
+        "indicator": indicator,
+        "indicator_type": validated.type.value,
+        "is_private": validated.is_private,
+        "risk_score": risk_score.model_dump(mode='json'),
+        "results": serialize_results(results),
+        "execution_time": round(execution_time, 2)
+    }
+    return entry, results, risk_score
+
+
+class JobWorkerPool:
+    """Background workers that claim and run queued jobs"""
+
+    def __init__(
+        self,
+        store: JobStore,
+        agent_factory: Callable[[], List[Any]],
+        workers: int = 2,
+        max_agent_workers: int = 8,
+        retention_seconds: float = 24 * 3600,
+        poll_interval: float = 1.0,
+        on_result: Optional[ResultCallback] = None
+    ):
+        self.store = store
+        self.agent_factory = agent_factory
+        self.workers = workers
+        self.max_agent_workers = max_agent_workers
+        self.retention_seconds = retention_seconds
+        self.poll_interval = poll_interval
+        self.on_result = on_result
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wake = threading.Condition()
+        self._last_purge = 0.0
+
+    def start(self):
+        """Recover interrupted jobs and start the workers"""
+        requeued = self.store.requeue_interrupted()
+        if requeued:
+            logger.info("Re-queued %d interrupted jobs", requeued)
+
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = 10.0):
+        """
+        Stop claiming new jobs and wait for workers to exit
+
+        A job interrupted here stays 'running' and is re-queued on the next
+        start, resuming after its last stored indicator.
+        """
+        self._stop.set()
+        self.wake()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self):
+        """Tell idle workers a job was submitted"""
+        with self._wake:
+            self._wake.notify_all()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._maybe_purge()
+            try:
+                job = self.store.claim()
+            except Exception:
+                logger.exception("Failed to claim a job")
+                job = None
+
+            if job is None:
+                with self._wake:
+                    self._wake.wait(self.poll_interval)
+                continue
+
+            self.run_job(job)
+
+    def _maybe_purge(self):
+        now = time.time()
+        if now - self._last_purge < 60:
+            return
+        self._last_purge = now
+        try:
+            purged = self.store.purge(self.retention_seconds)
+            if purged:
+                logger.info("Purged %d expired jobs", purged)
+        except Exception:
+            logger.exception("Job retention purge failed")
+
+    def _failed_results(self, job_id: str) -> Dict[int, Dict[str, Any]]:
+        """Stored results with failed or timed-out sources, by position"""
+        return {
+            position: entry["results"]
+            for position, entry in self.store.iter_results(job_id)
+            if "results" in entry and split_results(entry["results"])[1]
+        }
+
+    def run_job(self, job: Job):
+        """Run one claimed job to completion, cancellation or failure"""
+        try:
+            orchestrator = EnrichmentOrchestrator(self.agent_factory(), max_workers=self.max_agent_workers)
+            timeout = job.request.get("timeout", 30)
+            done = self.store.completed_positions(job.id)
+            retry = self._failed_results(job.id) if done else {}
+
+            for position, indicator in enumerate(job.indicators):
+                if position in done and position not in retry:
+                    continue  # Stored before a restart or resume
+                if self._stop.is_set():
+                    return  # Left running; re-queued on next start
+                if self.store.is_cancel_requested(job.id):
+                    self.store.finish(job.id, CANCELLED)
+                    return
+
+                if position in retry:
+                    entry, results, risk_score = enrich_indicator(orchestrator, indicator, timeout, retry[position])
+                    self.store.replace_result(job.id, position, entry)
+                else:
+                    entry, results, risk_score = enrich_indicator(orchestrator, indicator, timeout)
+                    self.store.record_result(job.id, position, indicator, entry)
+                if self.on_result and results is not None:
+                    try:
+                        self.on_result(indicator, results, risk_score)
+                    except Exception:
+                        logger.exception("Job result callback failed")
+
+            self.store.finish(job.id, COMPLETED)
+        except Exception as e:
+            logger.exception("Job %s failed", job.id)
+            self.store.finish(job.id, FAILED, error=str(e))
@@ -3,6 +3,7 @@ ThreatFusion CLI
 Main command-line interface for threat intelligence enrichment
 """
 import click
+import json
 import time
 from pathlib import Path
 from rich.console import Console
@@ -12,7 +13,7 @@ from rich.table import Table
 
 from src.config import config
 from src.validators import IndicatorValidator
-from src.models import IndicatorType
+from src.models import IndicatorType, RiskScore
 from src.agents.virustotal import VirusTotalAgent
 from src.agents.shodan import ShodanAgent
 from src.agents.censys import CensysAgent
@@ -20,7 +21,13 @@ from src.agents.otx import OTXAgent
 from src.agents.abuseipdb import AbuseIPDBAgent
 from src.fusion.orchestrator import EnrichmentOrchestrator
 from src.fusion.scorer import RiskScorer
+from src.storage.archive import ResponseArchive
+from src.clients.cassette import Cassette, RECORD, REPLAY, use_cassette
+from src.clients.adaptive_timeout import AdaptiveTimeouts
+from src.clients.circuit_breaker import CircuitBreakers
+from src.clients.dns_cache import DNSCache
 from src.reporting.generator import ReportGenerator
+from src.sinks import create_sinks
 
 console = Console()
 
@@ -34,7 +41,7 @@ def initialize_agents():
         agents.append(VirusTotalAgent(api_config.vt_api_key))
     
     if api_config.shodan_api_key:
-        agents.append(ShodanAgent(api_config.shodan_api_key))
+        agents.append(ShodanAgent(api_config.shodan_api_key, minify=config.app_config.shodan_minify))
     
     if api_config.censys_api_id and api_config.censys_api_secret:
         agents.append(CensysAgent(api_config.censys_api_id, api_config.censys_api_secret))
@@ -45,6 +52,12 @@ def initialize_agents():
     if api_config.abuseipdb_api_key:
         agents.append(AbuseIPDBAgent(api_config.abuseipdb_api_key))
     
+    # Keep raw provider responses for offline re-parsing and re-scoring
+    if config.app_config.archive_dir:
+        archive = ResponseArchive.open(config.app_config.archive_dir)
+        for agent in agents:
+            agent.archive = archive
+    
     if not agents:
         console.print("[red]❌ No API keys configured! Please set up .env file.[/red]")
         console.print("[yellow]Run: cp .env.example .env and add your API keys[/yellow]")
@@ -53,24 +66,123 @@ def initialize_agents():
     return agents
 
 
+def forward_to_sinks(entries) -> int:
+    """Send (indicator, results, risk_score) entries to the configured SIEM sinks"""
+    sinks = create_sinks()
+    if not sinks:
+        return 0
+    
+    count = 0
+    try:
+        for indicator, results, risk_score in entries:
+            for sink in sinks:
+                sink.send_result(indicator, results, risk_score)
+            count += 1
+    finally:
+        for sink in sinks:
+            sink.close()
+            stats = sink.stats
+            if stats["spilled"] or stats["failed"]:
+                console.print(
+                    f"[yellow]⚠️  {sink.name}: {stats['sent']} sent, {stats['spilled']} spilled, "
+                    f"{stats['failed']} failed[/yellow]"
+                )
+    return count
+
+
+def write_entries(entries, output: str, save: str, stem: str, title: str, first_seen=None):
+    """
+    Write (indicator, results, risk_score) entries as they arrive
+    
+    `first_seen` maps indicators to when they were first seen, for the
+    `created` time of STIX objects. Returns (filename, indicators written).
+    """
+    if output in ('parquet', 'arrow', 'csv'):
+        from src.reporting.columnar import open_writer
+        
+        filename = save or f"{stem}.{output}"
+        try:
+            with open_writer(filename, output) as writer:
+                return filename, writer.write_many(entries)
+        except RuntimeError as e:
+            console.print(f"[red]❌ {e}[/red]")
+            raise click.Abort()
+    
+    if output == 'stix':
+        from src.reporting.stix import StixBundleWriter
+        
+        filename = save or f"{stem}_bundle.json"
+        with open(filename, "w", encoding="utf-8") as f, StixBundleWriter(f, first_seen=first_seen) as writer:
+            return filename, writer.write_many(entries)
+    
+    rows = 0
+    
+    def counted():
+        nonlocal rows
+        for entry in entries:
+            rows += 1
+            yield entry
+    
+    if output == 'html':
+        filename = save or f"{stem}_report.html"
+        ReportGenerator.write_report(ReportGenerator.stream_batch_html(counted(), title=title), filename)
+        return filename, rows
+    
+    filename = save or f"{stem}.jsonl"
+    with open(filename, "w", encoding="utf-8") as f:
+        for indicator, results, risk_score in counted():
+            f.write(json.dumps({
+                "indicator": indicator,
+                "risk_score": risk_score.model_dump(mode='json'),
+                "results": results
+            }) + "\n")
+    return filename, rows
+
+
 @click.group()
 @click.version_option(version="0.1.0")
-def cli():
+@click.option('--record', 'record_dir', type=click.Path(file_okay=False), help='Record provider traffic to this cassette directory')
+@click.option('--replay', 'replay_dir', type=click.Path(exists=True, file_okay=False), help='Answer provider requests from this cassette, with no network access')
+@click.option('--latency-scale', type=float, help='Replayed latency multiplier (1 = as recorded, 0 = no delay)')
+def cli(record_dir: str, replay_dir: str, latency_scale: float):
     """
     ThreatFusion - Automated Threat Intelligence Aggregator
     
     Quickly enrich malware hashes, IPs, and domains with intelligence
     from multiple sources including VirusTotal, Shodan, Censys, OTX, and more.
     """
-    pass
+    if record_dir and replay_dir:
+        raise click.UsageError("--record and --replay are mutually exclusive")
+    
+    CircuitBreakers.configure(**config.breaker_settings())
+    AdaptiveTimeouts.configure(**config.adaptive_timeout_settings())
+    DNSCache.configure(**config.dns_cache_settings())
+    
+    app_config = config.app_config
+    path, mode = app_config.http_cassette, app_config.http_cassette_mode
+    if record_dir or replay_dir:
+        path, mode = (record_dir, RECORD) if record_dir else (replay_dir, REPLAY)
+    if path:
+        start_cassette(path, mode, app_config.http_cassette_latency_scale if latency_scale is None else latency_scale)
+
+
+def start_cassette(path: str, mode: str, latency_scale: float):
+    """Send all provider traffic through a cassette"""
+    use_cassette(Cassette.open(path, mode, latency_scale))
+    if mode == REPLAY:
+        # Keys are never sent on replay, but agents are only built for configured providers
+        config.use_placeholder_keys()
 
 
 @cli.command()
 @click.argument('indicator')
-@click.option('--output', '-o', type=click.Choice(['text', 'json', 'html']), default='text', help='Output format')
+@click.option('--output', '-o', type=click.Choice(['text', 'json', 'html', 'pdf']), default='text', help='Output format')
 @click.option('--save', '-s', type=click.Path(), help='Save report to file')
 @click.option('--timeout', '-t', type=int, default=30, help='Query timeout in seconds')
-def enrich(indicator: str, output: str, save: str, timeout: int):
+@click.option('--profile', is_flag=True, help='Print where the time went, per phase and agent')
+@click.option('--cprofile', 'cprofile_path', type=click.Path(dir_okay=False), help='Also save cProfile stats (all threads) to this file')
+@click.option('--flamegraph', 'flamegraph_path', type=click.Path(dir_okay=False), help='Also save phase timings as collapsed stacks for flamegraph.pl/speedscope')
+def enrich(indicator: str, output: str, save: str, timeout: int, profile: bool, cprofile_path: str, flamegraph_path: str):
     """
     Enrich a threat indicator with intelligence from multiple sources
     
@@ -81,11 +193,60 @@ def enrich(indicator: str, output: str, save: str, timeout: int):
       threatfusion enrich 8.8.8.8 --output json
       
       threatfusion enrich malware.com --save report.html
+      
+      threatfusion enrich malware.com --output pdf --save incident.pdf
+      
+      threatfusion enrich 8.8.8.8 --profile --flamegraph enrich.folded
     """
+    if not (profile or cprofile_path or flamegraph_path):
+        return run_enrich(indicator, output, save, timeout)
+    
+    from contextlib import nullcontext
+    from src.telemetry.profiling import profile_threads
+    from src.telemetry.spans import trace, collapsed_stacks
+    
+    with trace("enrich", indicator=indicator) as root:
+        with profile_threads() if cprofile_path else nullcontext() as profiles:
+            run_enrich(indicator, output, save, timeout)
+    
+    # Keep stdout clean for --output json
+    err_console = Console(stderr=True)
+    err_console.print(span_tree(root))
+    if cprofile_path:
+        profiles.dump(cprofile_path)
+        err_console.print(profiles.summary(limit=15), markup=False, highlight=False)
+        err_console.print(f"[green]✓ cProfile stats saved to: {cprofile_path}[/green]")
+    if flamegraph_path:
+        Path(flamegraph_path).write_text("\n".join(collapsed_stacks(root)) + "\n", encoding='utf-8')
+        err_console.print(f"[green]✓ Collapsed stacks saved to: {flamegraph_path}[/green]")
+
+
+def span_tree(root):
+    """Rich tree of a span and its phases, with share of the total"""
+    from rich.tree import Tree
+    
+    total = max(root.duration, 1e-9)
+    
+    def label(node):
+        detail = f" [dim]{node.attrs['host']}[/dim]" if 'host' in node.attrs else ""
+        return f"{node.name} [cyan]{node.duration * 1000:.1f} ms[/cyan] [dim]({node.duration / total:.0%})[/dim]{detail}"
+    
+    def add(tree, node):
+        for child in node.children:
+            add(tree.add(label(child)), child)
+        return tree
+    
+    return add(Tree(f"⏱️  {label(root)}"), root)
+
+
+def run_enrich(indicator: str, output: str, save: str, timeout: int):
+    """Body of the enrich command; phases are timed when a trace is active"""
+    from src.telemetry.spans import span
     
     # Validate indicator
     try:
-        validated = IndicatorValidator.validate(indicator)
+        with span("validate"):
+            validated = IndicatorValidator.validate(indicator)
     except ValueError as e:
         console.print(f"[red]❌ Invalid indicator: {e}[/red]")
         raise click.Abort()
@@ -129,35 +290,470 @@ def enrich(indicator: str, output: str, save: str, timeout: int):
         progress.update(task, completed=True)
     
     # Calculate risk score
-    risk_score = RiskScorer.calculate_risk(results)
+    with span("score"):
+        risk_score = RiskScorer.calculate_risk(results)
+    
+    with span("sinks"):
+        forward_to_sinks([(indicator, results, risk_score)])
     
     # Generate report based on format
     if output == 'text':
-        report = ReportGenerator.generate_text(indicator, results, risk_score, execution_time)
+        with span("render"):
+            report = ReportGenerator.generate_text(indicator, results, risk_score, execution_time)
         console.print(report)
     
     elif output == 'json':
-        report = ReportGenerator.generate_json(indicator, results, risk_score, execution_time)
+        with span("render"):
+            report = ReportGenerator.generate_json(indicator, results, risk_score, execution_time)
         console.print(report)
     
     elif output == 'html':
-        report = ReportGenerator.generate_html(indicator, results, risk_score, execution_time)
+        report = ReportGenerator.stream_html(indicator, results, risk_score, execution_time)
         
+        # The report renders as it is written
         if save:
-            Path(save).write_text(report, encoding='utf-8')
+            with span("render"):
+                ReportGenerator.write_report(report, save)
             console.print(f"\n[green]✓ Report saved to: {save}[/green]")
         else:
             # Auto-save HTML
             filename = f"threatfusion_report_{indicator.replace(':', '_').replace('/', '_')}.html"
-            Path(filename).write_text(report, encoding='utf-8')
+            with span("render"):
+                ReportGenerator.write_report(report, filename)
             console.print(f"\n[green]✓ HTML report saved to: {filename}[/green]")
     
+    elif output == 'pdf':
+        try:
+            with span("render"):
+                pdf = ReportGenerator.generate_pdf(indicator, results, risk_score)
+        except RuntimeError as e:
+            console.print(f"[red]❌ {e}[/red]")
+            raise click.Abort()
+        
+        filename = save or f"threatfusion_report_{indicator.replace(':', '_').replace('/', '_')}.pdf"
+        Path(filename).write_bytes(pdf)
+        console.print(f"\n[green]✓ PDF report saved to: {filename}[/green]")
+    
     # Save to file if specified
-    if save and output != 'html':
+    if save and output not in ('html', 'pdf'):
         Path(save).write_text(report, encoding='utf-8')
         console.print(f"\n[green]✓ Report saved to: {save}[/green]")
 
 
+@cli.command()
+@click.option('--from-archive', 'archive_dir', type=click.Path(exists=True, file_okay=False), required=True, help='Response archive directory')
+@click.option('--rules', type=click.Path(exists=True), help='Scoring rules file (defaults to active rules)')
+@click.option('--source', 'sources', multiple=True, help='Only use responses from this source (repeatable)')
+@click.option('--output', '-o', type=click.Choice(['table', 'json', 'html', 'parquet', 'arrow', 'csv', 'stix']), default='table', help='Output format')
+@click.option('--save', '-s', type=click.Path(), help='Save results to file')
+@click.option('--to-sinks', is_flag=True, help='Also send rescored results to the configured SIEM sinks')
+def rescore(archive_dir: str, rules: str, sources: tuple, output: str, save: str, to_sinks: bool):
+    """
+    Re-parse and re-score archived provider responses without network calls
+    
+    Examples:
+    
+      threatfusion rescore --from-archive ./archive
+      
+      threatfusion rescore --from-archive ./archive --rules tuned.toml --output json --save rescored.jsonl
+      
+      threatfusion rescore --from-archive ./archive --output html --save batch_report.html
+      
+      threatfusion rescore --from-archive ./archive --output parquet --save rescored.parquet
+      
+      threatfusion rescore --from-archive ./archive --output stix --save bundle.json
+    """
+    from src.fusion.rules import load_rules
+    from src.fusion.rescore import rescore_archive
+    
+    scoring_rules = load_rules(rules) if rules else RiskScorer.get_rules()
+    archive = ResponseArchive.open(archive_dir)
+    
+    start_time = time.time()
+    indicators, results, scored = rescore_archive(archive, scoring_rules, list(sources) or None)
+    execution_time = time.time() - start_time
+    
+    if to_sinks:
+        sent = forward_to_sinks(
+            (indicator, results[row], scored.to_risk_score(row))
+            for row, indicator in enumerate(indicators)
+        )
+        console.print(f"[green]✓ Sent {sent} indicators to SIEM sinks[/green]")
+    
+    if output == 'json':
+        lines = []
+        for row, risk_score in enumerate(scored.to_risk_scores()):
+            lines.append(json.dumps({
+                "indicator": indicators[row],
+                "risk_score": risk_score.model_dump(mode='json')
+            }))
+        report = "\n".join(lines)
+        
+        if save:
+            Path(save).write_text(report + "\n", encoding='utf-8')
+            console.print(f"[green]✓ Rescored {len(indicators)} indicators to: {save}[/green]")
+        else:
+            click.echo(report)
+        return
+    
+    # Rows are produced one at a time, so exports never hold the whole report in memory
+    entries = (
+        (indicator, results[row], scored.to_risk_score(row))
+        for row, indicator in enumerate(indicators)
+    )
+    
+    if output in ('parquet', 'arrow', 'csv'):
+        from src.reporting.columnar import open_writer
+        
+        filename = save or f"threatfusion_rescore.{output}"
+        try:
+            with open_writer(filename, output) as writer:
+                rows = writer.write_many(entries)
+        except RuntimeError as e:
+            console.print(f"[red]❌ {e}[/red]")
+            raise click.Abort()
+        console.print(f"[green]✓ Exported {rows} indicators to: {filename}[/green]")
+        return
+    
+    if output == 'stix':
+        from src.reporting.stix import StixBundleWriter
+        
+        filename = save or "threatfusion_bundle.json"
+        with open(filename, "w", encoding="utf-8") as f, StixBundleWriter(f, first_seen=archive.first_seen()) as writer:
+            rows = writer.write_many(entries)
+        console.print(f"[green]✓ Exported {rows} indicators ({writer.objects_written} STIX objects) to: {filename}[/green]")
+        return
+    
+    if output == 'html':
+        filename = save or "threatfusion_batch_report.html"
+        ReportGenerator.write_report(
+            ReportGenerator.stream_batch_html(entries, title=f"Rescored archive {archive_dir}"),
+            filename
+        )
+        console.print(f"[green]✓ Batch report for {len(indicators)} indicators saved to: {filename}[/green]")
+        return
+    
+    table = Table(title=f"\nRescored {len(indicators)} indicators in {execution_time:.2f}s")
+    table.add_column("Indicator", style="cyan")
+    table.add_column("Score", justify="right")
+    table.add_column("Severity", style="bold")
+    table.add_column("Confidence", justify="right")
+    
+    for row, indicator in enumerate(indicators):
+        table.add_row(
+            indicator,
+            f"{scored.scores[row]:.1f}",
+            str(scored.severities[row]),
+            f"{scored.confidence[row] * 100:.0f}%"
+        )
+    
+    console.print(table)
+
+
+@cli.command()
+@click.argument('indicators_file', type=click.Path(exists=True, dir_okay=False), required=False)
+@click.option('--resume', 'resume_id', help='Resume a checkpointed run by its run id')
+@click.option('--run-id', help='Name for a new run (defaults to a random id)')
+@click.option('--output', '-o', type=click.Choice(['json', 'html', 'parquet', 'arrow', 'csv', 'stix']), default='json', help='Output format')
+@click.option('--save', '-s', type=click.Path(), help='Save results to file')
+@click.option('--timeout', '-t', type=int, default=30, help='Query timeout in seconds')
+def batch(indicators_file: str, resume_id: str, run_id: str, output: str, save: str, timeout: int):
+    """
+    Enrich a file of indicators (one per line) with a resumable checkpoint
+    
+    Every finished agent call is journaled under RUNS_DIR. If a run is
+    interrupted, or some providers failed or timed out, --resume skips the
+    completed work and retries only the failed calls.
+    
+    Examples:
+    
+      threatfusion batch indicators.txt --output csv --save results.csv
+      
+      threatfusion batch --resume 3f9c2a71b0de
+    """
+    from src.fusion.checkpoint import RunJournal, BatchRun
+    
+    runs_dir = config.app_config.runs_dir
+    try:
+        if resume_id:
+            journal = RunJournal.open(runs_dir, resume_id)
+            options = journal.options
+            output, save, timeout = options["output"], options["save"], options["timeout"]
+        elif indicators_file:
+            with open(indicators_file, encoding="utf-8") as f:
+                journal = RunJournal.create(
+                    runs_dir, f, {"output": output, "save": save, "timeout": timeout}, run_id=run_id
+                )
+        else:
+            console.print("[red]❌ Give an indicators file or --resume <run-id>[/red]")
+            raise click.Abort()
+    except (ValueError, FileExistsError) as e:
+        console.print(f"[red]❌ {e}[/red]")
+        raise click.Abort()
+    
+    orchestrator = EnrichmentOrchestrator(initialize_agents(), max_workers=config.app_config.max_workers)
+    console.print(f"[bold blue]📋 Run {journal.run_id}[/bold blue] (resume with: threatfusion batch --resume {journal.run_id})")
+    
+    start_time = time.time()
+    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), console=console) as progress:
+        task = progress.add_task("Enriching...", total=None)
+        stats = BatchRun(journal, orchestrator, timeout=timeout).run(
+            on_progress=lambda position, indicator: progress.update(task, description=f"[{position + 1}] {indicator}")
+        )
+    execution_time = time.time() - start_time
+    
+    console.print(
+        f"[green]✓ Enriched {stats['enriched']} indicators in {execution_time:.2f}s[/green] "
+        f"({stats['skipped']} already complete, {stats['resumed']} retried, {stats['invalid']} invalid)"
+    )
+    
+    # Output is rebuilt from the journal, so a resumed run yields one complete result set
+    filename, rows = write_entries(
+        journal.entries(), output, save, f"threatfusion_{journal.run_id}", f"Batch run {journal.run_id}",
+        first_seen=journal.first_seen() if output == 'stix' else None
+    )
+    console.print(f"[green]✓ Wrote {rows} indicators to: {filename}[/green]")
+
+
+@cli.command()
+@click.argument('indicators_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--workers', '-w', type=int, default=2, help='Local worker processes to start (0 for remote workers only)')
+@click.option('--listen', default='127.0.0.1:0', help='Address remote workers connect to (host:port)')
+@click.option('--token', envvar='COORDINATOR_TOKEN', help='Shared secret workers must present')
+@click.option('--concurrency', type=int, default=4, help='Indicators in flight per local worker')
+@click.option('--output', '-o', type=click.Choice(['json', 'html', 'parquet', 'arrow', 'csv', 'stix']), default='json', help='Output format')
+@click.option('--save', '-s', type=click.Path(), help='Save results to file')
+@click.option('--timeout', '-t', type=int, default=30, help='Query timeout in seconds')
+def coordinator(indicators_file: str, workers: int, listen: str, token: str, concurrency: int, output: str, save: str, timeout: int):
+    """
+    Enrich a file of indicators across worker processes and hosts
+    
+    Indicators are sharded by consistent hash, every worker leases calls
+    from one global per-provider rate budget, and results are merged into a
+    single output as they arrive.
+    
+    Examples:
+    
+      threatfusion coordinator indicators.txt --workers 4 --output csv --save results.csv
+      
+      threatfusion coordinator indicators.txt --workers 0 --listen 0.0.0.0:7070 --token s3cret
+      
+      threatfusion worker --coordinator http://coordinator-host:7070 --token s3cret
+    """
+    from src.distributed import Coordinator, run_local_workers
+    
+    host, _, port = listen.rpartition(':')
+    with open(indicators_file, encoding="utf-8") as f:
+        coord = Coordinator(f, timeout=timeout, token=token)
+    url = coord.serve(host or '127.0.0.1', int(port or 0))
+    console.print(f"[bold blue]🛰️  Coordinating {coord.total} indicators at {url}[/bold blue]")
+    
+    processes = run_local_workers(url, workers, initialize_agents, concurrency=concurrency, token=token) if workers else []
+    # Local-only runs give up if every worker process died; remote runs wait for workers to (re)join
+    should_stop = (lambda: not any(p.is_alive() for p in processes)) if processes and host in ('', '127.0.0.1', 'localhost') else None
+    
+    start_time = time.time()
+    
+    def entries():
+        for _, entry in coord.iter_results(should_stop=should_stop):
+            if "risk_score" in entry:
+                yield entry["indicator"], entry["results"], RiskScore(**entry["risk_score"])
+    
+    try:
+        filename, rows = write_entries(
+            entries(), output, save, "threatfusion_distributed", "Distributed batch", first_seen=coord.first_seen
+        )
+    finally:
+        for process in processes:
+            process.join(5)
+        coord.close()
+    execution_time = time.time() - start_time
+    
+    console.print(
+        f"[green]✓ {len(coord.completed)}/{coord.total} indicators in {execution_time:.2f}s "
+        f"({coord.total / max(execution_time, 1e-9):.1f}/s) from {coord.stats['workers']} workers[/green]"
+    )
+    console.print(f"[green]✓ Wrote {rows} indicators to: {filename}[/green]")
+    if len(coord.completed) < coord.total:
+        console.print("[red]❌ Workers exited before the batch finished[/red]")
+        raise click.Abort()
+
+
+@cli.command()
+@click.option('--coordinator', 'url', required=True, help='Coordinator URL, e.g. http://10.0.0.5:7070')
+@click.option('--token', envvar='COORDINATOR_TOKEN', help='Shared secret the coordinator expects')
+@click.option('--concurrency', type=int, default=4, help='Indicators in flight')
+def worker(url: str, token: str, concurrency: int):
+    """Enrich indicators handed out by a coordinator until its batch is done"""
+    from src.distributed import Worker
+    
+    processed = Worker(url, initialize_agents, concurrency=concurrency, token=token).run()
+    console.print(f"[green]✓ Processed {processed} indicators[/green]")
+
+
+@cli.command()
+@click.argument('indicator')
+@click.option('--depth', '-d', type=int, default=2, help='Hops to expand from the indicator')
+@click.option('--budget', '-b', type=int, default=50, help='Maximum provider calls')
+@click.option('--output', '-o', type=click.Choice(['json', 'graphml']), default='json', help='Graph format')
+@click.option('--save', '-s', type=click.Path(), help='Save graph to file')
+@click.option('--cache', 'cache_file', type=click.Path(dir_okay=False), help='JSON file of results reused across pivots')
+@click.option('--timeout', '-t', type=int, default=30, help='Query timeout in seconds')
+def pivot(indicator: str, depth: int, budget: int, output: str, save: str, cache_file: str, timeout: int):
+    """
+    Expand an indicator into related infrastructure and save the graph
+    
+    Follows VirusTotal DNS resolutions, Shodan hostnames and Censys
+    certificate names breadth-first, riskiest nodes first, until the
+    depth or the provider-call budget is reached.
+    
+    Examples:
+    
+      threatfusion pivot malware.com --depth 2 --budget 40
+      
+      threatfusion pivot 203.0.113.7 --output graphml --save pivot.graphml
+    """
+    from src.fusion.pivot import Pivoter
+    
+    cache = {}
+    if cache_file and Path(cache_file).exists():
+        cache = json.loads(Path(cache_file).read_text(encoding='utf-8'))
+    
+    orchestrator = EnrichmentOrchestrator(initialize_agents(), max_workers=config.app_config.max_workers)
+    pivoter = Pivoter(orchestrator, depth=depth, budget=budget, timeout=timeout, cache=cache)
+    
+    with console.status(f"Pivoting from {indicator}..."):
+        try:
+            graph = pivoter.run(indicator)
+        except ValueError as e:
+            console.print(f"[red]❌ Invalid indicator: {e}[/red]")
+            raise click.Abort()
+    
+    if cache_file:
+        Path(cache_file).write_text(json.dumps(cache, default=str), encoding='utf-8')
+    
+    stem = indicator.replace(':', '_').replace('/', '_')
+    filename = save or f"threatfusion_pivot_{stem}.{output}"
+    Path(filename).write_text(graph.to_graphml() if output == 'graphml' else graph.to_json(), encoding='utf-8')
+    
+    unexpanded = sum(not node["expanded"] for node in graph.nodes.values())
+    console.print(
+        f"[green]✓ {len(graph.nodes)} nodes ({unexpanded} unexpanded), {len(graph.edges)} edges, "
+        f"{pivoter.calls}/{budget} provider calls, {pivoter.stats['cached']} cache hits → {filename}[/green]"
+    )
+
+
+@cli.group()
+def watch():
+    """
+    Continuously re-enrich a watchlist and report only what changed
+    
+    Examples:
+    
+      threatfusion watch add egress_ips.txt
+      
+      threatfusion watch run --save deltas.jsonl
+      
+      threatfusion watch status
+    """
+    pass
+
+
+def open_watchlist(agents=None):
+    from src.watchlist import WatchlistStore, WatchlistScheduler, parse_ttls
+    
+    app_config = config.app_config
+    return WatchlistScheduler(
+        WatchlistStore(app_config.watchlist_db_path),
+        EnrichmentOrchestrator(agents if agents is not None else initialize_agents(), max_workers=app_config.max_workers),
+        ttls=parse_ttls(app_config.watchlist_ttls),
+        tick_seconds=app_config.watchlist_tick_seconds,
+        rate_share=app_config.watchlist_rate_share
+    )
+
+
+@watch.command('add')
+@click.argument('indicators_file', type=click.Path(exists=True, dir_okay=False))
+def watch_add(indicators_file: str):
+    """Watch the indicators in a file (one per line)"""
+    scheduler = open_watchlist()
+    with open(indicators_file, encoding="utf-8") as f:
+        added = scheduler.add(f)
+    console.print(f"[green]✓ Watching {added} new indicators[/green]")
+
+
+@watch.command('remove')
+@click.argument('indicators', nargs=-1, required=True)
+def watch_remove(indicators: tuple):
+    """Stop watching indicators"""
+    from src.watchlist import WatchlistStore
+    
+    store = WatchlistStore(config.app_config.watchlist_db_path)
+    removed = sum(store.remove(IndicatorValidator.canonicalize(indicator)) for indicator in indicators)
+    console.print(f"[green]✓ Removed {removed} indicators[/green]")
+
+
+@watch.command('status')
+def watch_status():
+    """Show watched indicators and per-source progress"""
+    from src.watchlist import WatchlistStore
+    
+    counts = WatchlistStore(config.app_config.watchlist_db_path).counts()
+    table = Table(title=f"\nWatching {counts['indicators']} indicators")
+    table.add_column("Source", style="cyan")
+    table.add_column("Tracked", justify="right")
+    table.add_column("Due now", justify="right")
+    table.add_column("Changes seen", justify="right")
+    for source, row in counts["sources"].items():
+        table.add_row(source, str(row["tracked"]), str(row["due"] or 0), str(row["changes"] or 0))
+    console.print(table)
+
+
+@watch.command('run')
+@click.option('--once', is_flag=True, help='Run the checks due now and exit')
+@click.option('--save', '-s', type=click.Path(), help='Append deltas to this JSON lines file')
+@click.option('--to-sinks', is_flag=True, help='Also send deltas to the configured SIEM sinks')
+def watch_run(once: bool, save: str, to_sinks: bool):
+    """Re-check due sources every tick and emit deltas"""
+    import threading
+    
+    sinks = create_sinks() if to_sinks else []
+    out = open(save, "a", encoding="utf-8") if save else None
+    
+    def emit(delta):
+        line = json.dumps(delta, default=str)
+        if out:
+            out.write(line + "\n")
+            out.flush()
+        else:
+            click.echo(line)
+        for sink in sinks:
+            sink.send(delta)
+    
+    scheduler = open_watchlist()
+    scheduler.on_delta = emit
+    stop = threading.Event()
+    try:
+        if once:
+            scheduler.run_once()
+        else:
+            console.print(f"[bold blue]👁️  Watching (tick {scheduler.tick_seconds:.0f}s, Ctrl+C to stop)[/bold blue]")
+            scheduler.run_forever(stop)
+    except KeyboardInterrupt:
+        stop.set()
+    finally:
+        if out:
+            out.close()
+        for sink in sinks:
+            sink.close()
+    
+    stats = scheduler.stats
+    console.print(
+        f"[green]✓ {stats['checks']} checks: {stats['unchanged']} unchanged, {stats['changed']} changed, "
+        f"{stats['errors']} errors, {stats['deltas']} deltas[/green]"
+    )
+
+
 @cli.command()
 def config_check():
     """Check API configuration and show which services are available"""
@@ -194,6 +790,40 @@ def config_check():
         console.print("\n[yellow]⚠️  No API keys configured. Copy .env.example to .env and add your keys.[/yellow]")
 
 
+@cli.command()
+@click.option('--file', '-f', 'rules_file', type=click.Path(exists=True), help='Scoring rules file to check')
+def rules_check(rules_file: str):
+    """Validate a scoring rules file and show the compiled rules"""
+    from src.fusion.rules import load_rules
+    
+    try:
+        rules = load_rules(rules_file or config.app_config.scoring_rules_path)
+    except (ValueError, KeyError, OSError) as e:
+        console.print(f"[red]❌ Invalid scoring rules: {e}[/red]")
+        raise click.Abort()
+    
+    table = Table(title=f"\nScoring Rules ({rules.path})")
+    table.add_column("Source", style="cyan")
+    table.add_column("Kind")
+    table.add_column("Max", justify="right")
+    table.add_column("Features")
+    
+    for rule in rules.sources:
+        table.add_row(
+            rule.source,
+            rule.kind,
+            f"{rule.max:g}",
+            ", ".join(f"{f.name} → {f.column}" for f in rule.features)
+        )
+    
+    console.print(table)
+    
+    bands = ", ".join(f"{label} ≥ {min_score:g}" for min_score, label, _ in rules.severity_levels)
+    console.print(f"\n[bold]Severity:[/bold] {bands}")
+    console.print(f"[bold]Max score:[/bold] {rules.max_score:g}")
+    console.print("\n[green]✓ Rules compiled successfully[/green]")
+
+
 @cli.command()
 def version():
     """Show ThreatFusion version and system info"""
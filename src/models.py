@@ -2,9 +2,11 @@
 ThreatFusion Data Models
 Defines core data structures for indicators and enrichment results
 """
+import time
 from enum import Enum
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union
 from pydantic import BaseModel, Field
 
 
@@ -42,6 +44,98 @@ class EnrichmentResult(BaseModel):
         }
 
 
+@dataclass(slots=True)
+class EnrichmentRecord:
+    """
+    Compact result from a single enrichment agent
+    
+    Used on the hot path inside agents, the orchestrator and the scorer in
+    place of EnrichmentResult. The timestamp is a time.time() float and is
+    only formatted when the record is converted at the API/report boundary.
+    Supports read-only mapping access (record['status'], record.get('data'),
+    'data' in record) so code written against result dicts keeps working.
+    """
+    indicator: str
+    source: str
+    status: str = "success"
+    data: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+    
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+    
+    def __contains__(self, key: str) -> bool:
+        # Mirrors a dumped EnrichmentResult, which always has every field
+        return key in self.__slots__
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable dict"""
+        return {
+            "indicator": self.indicator,
+            "source": self.source,
+            "status": self.status,
+            "data": self.data,
+            "error": self.error,
+            "timestamp": datetime.utcfromtimestamp(self.timestamp).isoformat()
+        }
+    
+    def to_model(self) -> 'EnrichmentResult':
+        """Convert to the pydantic EnrichmentResult"""
+        return EnrichmentResult(
+            indicator=self.indicator,
+            source=self.source,
+            status=self.status,
+            data=self.data,
+            error=self.error,
+            timestamp=datetime.utcfromtimestamp(self.timestamp)
+        )
+
+
+# Per-source entries in orchestrator results may be records or plain dicts
+SourceResult = Union[EnrichmentRecord, Dict[str, Any]]
+RESULT_TYPES = (EnrichmentRecord, dict)
+
+# Returned without calling the provider while its circuit breaker is open
+SOURCE_UNAVAILABLE = "source_unavailable"
+# Statuses for which a source produced no answer (and a retry may)
+FAILED_STATUSES = ("error", SOURCE_UNAVAILABLE)
+
+
+def serialize_results(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert orchestrator results to plain JSON-serializable dicts"""
+    return {
+        source: result.to_dict() if isinstance(result, EnrichmentRecord) else result
+        for source, result in results.items()
+    }
+
+
+def first_fetched(results: Dict[str, Any]) -> Optional[datetime]:
+    """Earliest fetch time among per-source results, or None if none carries one"""
+    earliest = None
+    for source, result in results.items():
+        if isinstance(result, EnrichmentRecord):
+            fetched = datetime.utcfromtimestamp(result.timestamp)
+        elif source != '_metadata' and isinstance(result, dict) and result.get("timestamp"):
+            fetched = result["timestamp"]
+            if isinstance(fetched, str):
+                try:
+                    fetched = datetime.fromisoformat(fetched)
+                except ValueError:
+                    continue
+        else:
+            continue
+        if earliest is None or fetched < earliest:
+            earliest = fetched
+    return earliest
+
+
 class RiskScore(BaseModel):
     """Calculated risk score from multiple sources"""
     score: float = Field(..., ge=0.0, le=10.0)
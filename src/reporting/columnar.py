@@ -0,0 +1,242 @@
+"""
+Columnar Export
+Streams batch results to Parquet, Arrow IPC or CSV with a flat schema
+
+Rows are buffered up to `row_group_size` and then written as one row group
+(Parquet), record batch (Arrow) or block of lines (CSV), so memory is
+bounded by the row group size rather than the number of indicators.
+Parquet and Arrow need the optional pyarrow dependency.
+"""
+import csv
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from src.models import RiskScore, RESULT_TYPES
+from src.validators import IndicatorValidator
+
+
+# Flattened export schema: (column, kind)
+EXPORT_SCHEMA: List[Tuple[str, str]] = [
+    ("indicator", "string"),
+    ("type", "string"),
+    ("score", "float"),
+    ("severity", "string"),
+    ("confidence", "float"),
+    ("vt_detections", "int"),
+    ("vt_total", "int"),
+    ("otx_pulse_count", "int"),
+    ("shodan_vuln_count", "int"),
+    ("abuse_confidence_score", "int"),
+    ("censys_service_count", "int"),
+    ("sources_ok", "int"),
+    ("sources_total", "int"),
+    ("scored_at", "timestamp"),
+]
+
+EXPORT_COLUMNS = [name for name, _ in EXPORT_SCHEMA]
+
+# Per-source fields: (column, source, data key, count the value instead of copying it)
+SOURCE_FIELDS = [
+    ("vt_detections", "VirusTotal", "detections", False),
+    ("vt_total", "VirusTotal", "total", False),
+    ("otx_pulse_count", "OTX", "pulse_count", False),
+    ("shodan_vuln_count", "Shodan", "vulns", True),
+    ("abuse_confidence_score", "AbuseIPDB", "abuse_confidence_score", False),
+    ("censys_service_count", "Censys", "services", True),
+]
+
+FORMATS = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow", ".csv": "csv"}
+
+
+def flatten_result(
+    indicator: str,
+    results: Dict[str, Any],
+    risk_score: RiskScore,
+    indicator_type: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Flatten one indicator's results into an export row
+
+    Source fields are None when the source returned no data, so "not
+    queried" stays distinguishable from a real zero.
+    """
+    if indicator_type is None:
+        try:
+            indicator_type = IndicatorValidator.detect_type(indicator).value
+        except ValueError:
+            indicator_type = None
+
+    row = {
+        "indicator": indicator,
+        "type": indicator_type,
+        "score": risk_score.score,
+        "severity": risk_score.severity,
+        "confidence": risk_score.confidence,
+        "scored_at": risk_score.timestamp,
+    }
+
+    sources_ok = sources_total = 0
+    for source, entry in results.items():
+        if source == '_metadata' or not isinstance(entry, RESULT_TYPES):
+            continue
+        sources_total += 1
+        if entry.get('status') == 'success':
+            sources_ok += 1
+    row["sources_ok"] = sources_ok
+    row["sources_total"] = sources_total
+
+    for column, source, key, count in SOURCE_FIELDS:
+        entry = results.get(source)
+        value = None
+        if isinstance(entry, RESULT_TYPES) and entry.get('status') == 'success' and entry.get('data'):
+            value = entry['data'].get(key)
+            if count:
+                value = len(value) if value is not None else None
+        row[column] = value
+
+    return row
+
+
+class ColumnarWriter(ABC):
+    """Buffers export rows and flushes them a row group at a time"""
+
+    def __init__(self, path: str, row_group_size: int = 50_000):
+        self.path = Path(path)
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._columns: Dict[str, list] = {name: [] for name in EXPORT_COLUMNS}
+        self._buffered = 0
+
+    def write(self, row: Dict[str, Any]):
+        """Add one flattened row"""
+        for name in EXPORT_COLUMNS:
+            self._columns[name].append(row.get(name))
+        self._buffered += 1
+        if self._buffered >= self.row_group_size:
+            self.flush()
+
+    def write_result(
+        self,
+        indicator: str,
+        results: Dict[str, Any],
+        risk_score: RiskScore,
+        indicator_type: Optional[str] = None
+    ):
+        """Flatten and add one indicator's results"""
+        self.write(flatten_result(indicator, results, risk_score, indicator_type))
+
+    def write_many(self, entries: Iterable[Tuple[str, Dict[str, Any], RiskScore]]) -> int:
+        """Add (indicator, results, risk_score) entries as they arrive"""
+        for indicator, results, risk_score in entries:
+            self.write_result(indicator, results, risk_score)
+        return self.rows_written + self._buffered
+
+    def flush(self):
+        """Write buffered rows as one row group"""
+        if not self._buffered:
+            return
+        self._write_group(self._columns, self._buffered)
+        self.rows_written += self._buffered
+        self._columns = {name: [] for name in EXPORT_COLUMNS}
+        self._buffered = 0
+
+    def close(self):
+        self.flush()
+        self._close()
+
+    @abstractmethod
+    def _write_group(self, columns: Dict[str, list], rows: int):
+        """Write one row group of `rows` buffered rows"""
+        pass
+
+    def _close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CSVWriter(ColumnarWriter):
+    """Writes export rows as CSV with a header line"""
+
+    def __init__(self, path: str, row_group_size: int = 10_000):
+        super().__init__(path, row_group_size)
+        self._file = open(self.path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(EXPORT_COLUMNS)
+
+    def _write_group(self, columns: Dict[str, list], rows: int):
+        values = [columns[name] for name in EXPORT_COLUMNS]
+        scored_at = columns["scored_at"]
+        values[EXPORT_COLUMNS.index("scored_at")] = [
+            ts.isoformat() if isinstance(ts, datetime) else ts for ts in scored_at
+        ]
+        self._writer.writerows(zip(*values))
+
+    def _close(self):
+        self._file.close()
+
+
+def _arrow_schema():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise RuntimeError("Parquet and Arrow export require pyarrow: pip install pyarrow")
+
+    types = {
+        "string": pa.string(),
+        "float": pa.float64(),
+        "int": pa.int64(),
+        "timestamp": pa.timestamp("us"),
+    }
+    return pa, pa.schema([(name, types[kind]) for name, kind in EXPORT_SCHEMA])
+
+
+class ArrowWriter(ColumnarWriter):
+    """Writes export rows as an Arrow IPC file, one record batch per row group"""
+
+    def __init__(self, path: str, row_group_size: int = 50_000):
+        super().__init__(path, row_group_size)
+        self._pa, self.schema = _arrow_schema()
+        self._writer = self._open_writer()
+
+    def _open_writer(self):
+        return self._pa.ipc.new_file(str(self.path), self.schema)
+
+    def _write_group(self, columns: Dict[str, list], rows: int):
+        batch = self._pa.RecordBatch.from_pydict(columns, schema=self.schema)
+        self._writer.write_batch(batch)
+
+    def _close(self):
+        self._writer.close()
+
+
+class ParquetWriter(ArrowWriter):
+    """Writes export rows as Parquet, one row group per flush"""
+
+    def _open_writer(self):
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(str(self.path), self.schema, compression="zstd")
+
+    def _write_group(self, columns: Dict[str, list], rows: int):
+        batch = self._pa.RecordBatch.from_pydict(columns, schema=self.schema)
+        self._writer.write_batch(batch, row_group_size=rows)
+
+
+WRITERS = {"parquet": ParquetWriter, "arrow": ArrowWriter, "csv": CSVWriter}
+
+
+def open_writer(path: str, format: Optional[str] = None, row_group_size: Optional[int] = None) -> ColumnarWriter:
+    """Open a columnar writer, inferring the format from the file extension"""
+    format = format or FORMATS.get(Path(path).suffix.lower())
+    if format not in WRITERS:
+        raise ValueError(f"Unknown export format for {path}; use one of: {', '.join(WRITERS)}")
+
+    writer_cls = WRITERS[format]
+    if row_group_size:
+        return writer_cls(path, row_group_size=row_group_size)
+    return writer_cls(path)
@@ -2,16 +2,56 @@
 Report Generator
 Generates threat intelligence reports in multiple formats
 """
+import functools
+import hashlib
 import json
+import threading
 from datetime import datetime
-from typing import Dict, Any
-from jinja2 import Template
-from src.models import ThreatReport, RiskScore
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, select_autoescape
+from src.config import config
+from src.models import ThreatReport, RiskScore, FAILED_STATUSES, serialize_results
+
+
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+REPORT_TEMPLATE = "report.html.j2"
+BATCH_REPORT_TEMPLATE = "batch_report.html.j2"
 
 
 class ReportGenerator:
     """Generates threat intelligence reports in various formats"""
     
+    # Template environment, built once per process on first use
+    _environment: Optional[Environment] = None
+    _environment_lock = threading.Lock()
+    
+    @classmethod
+    def get_environment(cls) -> Environment:
+        """
+        Get the shared template environment
+        
+        Templates are compiled once per process and kept in the environment's
+        cache; the bytecode cache lets new processes skip compilation too.
+        """
+        if cls._environment is None:
+            with cls._environment_lock:
+                if cls._environment is None:
+                    cls._environment = Environment(
+                        loader=FileSystemLoader(TEMPLATE_DIR),
+                        bytecode_cache=FileSystemBytecodeCache(config.app_config.template_cache_dir),
+                        autoescape=select_autoescape(["html.j2"]),
+                        trim_blocks=True,
+                        lstrip_blocks=True,
+                        auto_reload=False
+                    )
+        return cls._environment
+    
+    @classmethod
+    def get_template(cls, name: str) -> Template:
+        """Get a compiled report template"""
+        return cls.get_environment().get_template(name)
+    
     @staticmethod
     def generate_text(
         indicator: str,
@@ -20,79 +60,98 @@ class ReportGenerator:
         execution_time: float
     ) -> str:
         """Generate formatted text report for terminal"""
-        lines = []
+        return "\n".join(ReportGenerator.iter_text_lines(indicator, results, risk_score, execution_time))
+    
+    @staticmethod
+    def stream_text(
+        indicator: str,
+        results: Dict[str, Any],
+        risk_score: RiskScore,
+        execution_time: float
+    ) -> Iterator[str]:
+        """Stream the text report in newline-terminated chunks"""
+        for line in ReportGenerator.iter_text_lines(indicator, results, risk_score, execution_time):
+            yield line + "\n"
+    
+    @staticmethod
+    def iter_text_lines(
+        indicator: str,
+        results: Dict[str, Any],
+        risk_score: RiskScore,
+        execution_time: float
+    ) -> Iterator[str]:
+        """Yield the text report one line at a time"""
+        results = serialize_results(results)
         
-        lines.append("=" * 80)
-        lines.append("THREATFUSION ENRICHMENT REPORT")
-        lines.append("=" * 80)
-        lines.append("")
-        lines.append(f"Indicator: {indicator}")
-        lines.append(f"Analysis Time: {execution_time:.2f}s")
-        lines.append(f"Timestamp: {datetime.utcnow().isoformat()}")
-        lines.append("")
+        yield "=" * 80
+        yield "THREATFUSION ENRICHMENT REPORT"
+        yield "=" * 80
+        yield ""
+        yield f"Indicator: {indicator}"
+        yield f"Analysis Time: {execution_time:.2f}s"
+        yield f"Timestamp: {datetime.utcnow().isoformat()}"
+        yield ""
         
         # Risk Score section
-        lines.append(f"RISK SCORE: {risk_score.severity_emoji} {risk_score.score}/{risk_score.max} ({risk_score.severity})")
-        lines.append(f"Confidence: {risk_score.confidence * 100:.0f}%")
-        lines.append("")
+        yield f"RISK SCORE: {risk_score.severity_emoji} {risk_score.score}/{risk_score.max} ({risk_score.severity})"
+        yield f"Confidence: {risk_score.confidence * 100:.0f}%"
+        yield ""
         
         # Score components
         if risk_score.components:
-            lines.append("RISK COMPONENTS:")
+            yield "RISK COMPONENTS:"
             for component in risk_score.components:
-                lines.append(f"  • {component['source']}: {component['score']:.1f}/{component['max']} - {component['details']}")
-            lines.append("")
+                yield f"  • {component['source']}: {component['score']:.1f}/{component['max']} - {component['details']}"
+            yield ""
         
         # Source results
-        lines.append("SOURCE RESULTS:")
-        lines.append("-" * 80)
+        yield "SOURCE RESULTS:"
+        yield "-" * 80
         
         for source, data in results.items():
             if source == '_metadata':
                 continue
             
-            lines.append(f"\n{source}:")
+            yield f"\n{source}:"
             
             if isinstance(data, dict):
-                if data.get('status') == 'error':
-                    lines.append(f"  ❌ Error: {data.get('error', 'Unknown error')}")
+                if data.get('status') in FAILED_STATUSES:
+                    yield f"  ❌ Error: {data.get('error', 'Unknown error')}"
                 elif data.get('status') == 'success' and 'data' in data:
                     result_data = data['data']
                     
                     # Format based on source
                     if source == "VirusTotal":
-                        lines.append(f"  Detection Ratio: {result_data.get('detection_ratio', 'N/A')}")
+                        yield f"  Detection Ratio: {result_data.get('detection_ratio', 'N/A')}"
                         if result_data.get('names'):
-                            lines.append(f"  Malware Names: {', '.join(result_data['names'][:3])}")
+                            yield f"  Malware Names: {', '.join(result_data['names'][:3])}"
                     
                     elif source == "Shodan":
-                        lines.append(f"  Country: {result_data.get('country', 'N/A')}")
-                        lines.append(f"  Organization: {result_data.get('org', 'N/A')}")
+                        yield f"  Country: {result_data.get('country', 'N/A')}"
+                        yield f"  Organization: {result_data.get('org', 'N/A')}"
                         if result_data.get('vulns'):
-                            lines.append(f"  Vulnerabilities: {len(result_data['vulns'])} found")
+                            yield f"  Vulnerabilities: {len(result_data['vulns'])} found"
                     
                     elif source == "OTX":
                         pulse_count = result_data.get('pulse_count', 0)
-                        lines.append(f"  Threat Pulses: {pulse_count}")
+                        yield f"  Threat Pulses: {pulse_count}"
                         if pulse_count > 0:
-                            lines.append(f"  Has Threat Intel: Yes")
+                            yield f"  Has Threat Intel: Yes"
                     
                     elif source == "AbuseIPDB":
                         abuse_score = result_data.get('abuse_confidence_score', 0)
-                        lines.append(f"  Abuse Score: {abuse_score}%")
-                        lines.append(f"  Country: {result_data.get('country_name', 'N/A')}")
-                        lines.append(f"  ISP: {result_data.get('isp', 'N/A')}")
+                        yield f"  Abuse Score: {abuse_score}%"
+                        yield f"  Country: {result_data.get('country_name', 'N/A')}"
+                        yield f"  ISP: {result_data.get('isp', 'N/A')}"
                     
                     elif source == "Censys":
                         services = result_data.get('services', [])
-                        lines.append(f"  Services Found: {len(services)}")
+                        yield f"  Services Found: {len(services)}"
                         location = result_data.get('location', {})
-                        lines.append(f"  Location: {location.get('city', 'N/A')}, {location.get('country', 'N/A')}")
+                        yield f"  Location: {location.get('city', 'N/A')}, {location.get('country', 'N/A')}"
         
-        lines.append("")
-        lines.append("=" * 80)
-        
-        return "\n".join(lines)
+        yield ""
+        yield "=" * 80
     
     @staticmethod
     def generate_json(
@@ -102,6 +161,7 @@ class ReportGenerator:
         execution_time: float
     ) -> str:
         """Generate JSON report"""
+        results = serialize_results(results)
         report = {
             "indicator": indicator,
             "timestamp": datetime.utcnow().isoformat(),
@@ -123,180 +183,115 @@ class ReportGenerator:
         indicator: str,
         results: Dict[str, Any],
         risk_score: RiskScore,
-        execution_time: float
+        execution_time: Optional[float] = None
     ) -> str:
-        """Generate HTML report"""
-        template_str = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>ThreatFusion Report - {{ indicator }}</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 20px;
-        }
-        .container {
-            max-width: 1200px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 12px;
-            box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-            overflow: hidden;
-        }
-        .header {
-            background: linear-gradient(135deg, #1e3c72 0%, #2a5298 100%);
-            color: white;
-            padding: 30px;
-        }
-        .header h1 { font-size: 2em; margin-bottom: 10px; }
-        .header p { opacity: 0.9; font-size: 1.1em; }
-        
-        .risk-section {
-            padding: 30px;
-            background: #f8f9fa;
-            border-bottom: 3px solid #dee2e6;
-        }
-        .risk-score {
-            display: flex;
-            align-items: center;
-            gap: 20px;
-            margin-bottom: 20px;
-        }
-        .risk-badge {
-            font-size: 4em;
-        }
-        .risk-details h2 { font-size: 1.5em; margin-bottom: 5px; }
-        .risk-critical { color: #dc3545; }
-        .risk-high { color: #fd7e14; }
-        .risk-medium { color: #ffc107; }
-        .risk-low { color: #28a745; }
+        """
+        Generate HTML report
         
-        .components {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 15px;
-            margin-top: 20px;
-        }
-        .component-card {
-            background: white;
-            padding: 15px;
-            border-radius: 8px;
-            border-left: 4px solid #007bff;
-        }
-        .component-card h4 { color: #007bff; margin-bottom: 8px; }
-        .component-card p { color: #6c757d; font-size: 0.9em; }
+        Without `execution_time` the generated time and timing line is left
+        out, so the output depends only on what content_hash() covers.
+        """
+        return "".join(ReportGenerator.stream_html(indicator, results, risk_score, execution_time))
+    
+    @staticmethod
+    def stream_html(
+        indicator: str,
+        results: Dict[str, Any],
+        risk_score: RiskScore,
+        execution_time: Optional[float] = None
+    ) -> Iterator[str]:
+        """Stream the HTML report chunk by chunk"""
+        template = ReportGenerator.get_template(REPORT_TEMPLATE)
+        timed = execution_time is not None
+        return template.generate(
+            indicator=indicator,
+            timestamp=datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC") if timed else None,
+            execution_time=round(execution_time, 2) if timed else None,
+            risk_score=risk_score,
+            sources=serialize_results(results)
+        )
+    
+    @staticmethod
+    def stream_batch_html(
+        entries: Iterable[Tuple[str, Dict[str, Any], RiskScore]],
+        title: str = "Batch enrichment"
+    ) -> Iterator[str]:
+        """
+        Stream a multi-indicator HTML report
         
-        .sources {
-            padding: 30px;
-        }
-        .source-card {
-            background: #f8f9fa;
-            border-radius: 8px;
-            padding: 20px;
-            margin-bottom: 20px;
-            border-left: 4px solid #28a745;
-        }
-        .source-card.error { border-left-color: #dc3545; }
-        .source-card h3 { margin-bottom: 15px; color: #2c3e50; }
+        `entries` yields (indicator, results, risk_score) and is consumed
+        lazily while rendering, so passing a generator keeps memory flat no
+        matter how many indicators the report covers.
+        """
+        rows = (
+            {"indicator": indicator, "sources": serialize_results(results), "risk_score": risk_score}
+            for indicator, results, risk_score in entries
+        )
+        template = ReportGenerator.get_template(BATCH_REPORT_TEMPLATE)
+        return template.generate(
+            title=title,
+            timestamp=datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC"),
+            entries=rows
+        )
+    
+    @staticmethod
+    def content_hash(
+        indicator: str,
+        results: Dict[str, Any],
+        risk_score: RiskScore,
+        template: str = REPORT_TEMPLATE
+    ) -> str:
+        """
+        Hash what an untimed report shows, ignoring fetch and score timestamps
         
-        .data-table {
-            width: 100%;
-            border-collapse: collapse;
+        Used as the PDF cache key: re-exporting an indicator whose findings
+        haven't changed reuses the existing PDF. PDFs are rendered without
+        the generated time and timing line, which the key doesn't cover.
+        Template edits change the key.
+        """
+        sources = {
+            source: {key: value for key, value in result.items() if key != 'timestamp'}
+            for source, result in serialize_results(results).items()
+            if source != '_metadata' and isinstance(result, dict)
         }
-        .data-table td {
-            padding: 8px;
-            border-bottom: 1px solid #dee2e6;
-        }
-        .data-table td:first-child {
-            font-weight: 600;
-            color: #495057;
-            width: 200px;
-        }
-        
-        .footer {
-            padding: 20px 30px;
-            background: #2c3e50;
-            color: white;
-            text-align: center;
+        payload = {
+            "template": ReportGenerator.template_version(template),
+            "indicator": indicator,
+            "sources": sources,
+            "risk_score": risk_score.model_dump(mode='json', exclude={'timestamp'})
         }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🚨 ThreatFusion Threat Intelligence Report</h1>
-            <p>Indicator: <strong>{{ indicator }}</strong></p>
-            <p>Generated: {{ timestamp }} | Analysis Time: {{ execution_time }}s</p>
-        </div>
-        
-        <div class="risk-section">
-            <div class="risk-score">
-                <div class="risk-badge">{{ risk_score.severity_emoji }}</div>
-                <div class="risk-details">
-                    <h2 class="risk-{{ risk_score.severity.lower() }}">
-                        Risk Score: {{ risk_score.score }}/{{ risk_score.max }}
-                    </h2>
-                    <p style="font-size: 1.2em;"><strong>{{ risk_score.severity }}</strong> | Confidence: {{ (risk_score.confidence * 100)|int }}%</p>
-                </div>
-            </div>
-            
-            {% if risk_score.components %}
-            <div class="components">
-                {% for component in risk_score.components %}
-                <div class="component-card">
-                    <h4>{{ component.source }}</h4>
-                    <p><strong>{{ component.score }}/{{ component.max }}</strong> - {{ component.details }}</p>
-                </div>
-                {% endfor %}
-            </div>
-            {% endif %}
-        </div>
-        
-        <div class="sources">
-            <h2 style="margin-bottom: 20px; color: #2c3e50;">Intelligence Sources</h2>
-            
-            {% for source, data in sources.items() %}
-            {% if source != '_metadata' %}
-            <div class="source-card {% if data.status == 'error' %}error{% endif %}">
-                <h3>{{ source }}</h3>
-                
-                {% if data.status == 'error' %}
-                    <p style="color: #dc3545;">❌ Error: {{ data.error }}</p>
-                {% elif data.status == 'success' and data.data %}
-                    <table class="data-table">
-                        {% for key, value in data.data.items() %}
-                        <tr>
-                            <td>{{ key|title }}</td>
-                            <td>{{ value }}</td>
-                        </tr>
-                        {% endfor %}
-                    </table>
-                {% endif %}
-            </div>
-            {% endif %}
-            {% endfor %}
-        </div>
-        
-        <div class="footer">
-            <p>ThreatFusion v0.1.0 | Automated Threat Intelligence Aggregator</p>
-            <p style="opacity: 0.7; margin-top: 5px;">⚠️ This is an automated analysis. Manual verification recommended for critical decisions.</p>
-        </div>
-    </div>
-</body>
-</html>
-"""
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def template_version(name: str) -> str:
+        """Short hash of a template's source and its includes"""
+        digest = hashlib.sha256(name.encode("utf-8"))
+        for path in sorted(TEMPLATE_DIR.glob("*.j2")):
+            digest.update(path.read_bytes())
+        return digest.hexdigest()[:16]
+    
+    @staticmethod
+    def generate_pdf(
+        indicator: str,
+        results: Dict[str, Any],
+        risk_score: RiskScore
+    ) -> bytes:
+        """Generate PDF report (rendered in a worker process, cached by content hash)"""
+        from src.reporting.pdf import PDFRenderer
         
-        template = Template(template_str)
-        return template.render(
-            indicator=indicator,
-            timestamp=datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC"),
-            execution_time=round(execution_time, 2),
-            risk_score=risk_score,
-            sources=results
+        key = ReportGenerator.content_hash(indicator, results, risk_score)
+        return PDFRenderer.get_shared().render(
+            key,
+            lambda: ReportGenerator.generate_html(indicator, results, risk_score)
         )
+    
+    @staticmethod
+    def write_report(chunks: Iterable[str], path: str, buffer_size: int = 64 * 1024) -> Path:
+        """Write a streamed report to a file without building it in memory"""
+        path = Path(path)
+        with open(path, "w", encoding="utf-8", buffering=buffer_size) as f:
+            for chunk in chunks:
+                f.write(chunk)
+        return path
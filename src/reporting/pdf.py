@@ -0,0 +1,167 @@
+"""
+PDF Renderer
+Renders HTML reports to PDF in a process pool with a content-addressed cache
+
+Layout is CPU-bound and holds the GIL, so weasyprint runs in worker
+processes. Each PDF is stored as <content hash>.pdf, so exporting an
+unchanged report again returns the cached file without rendering. Hits
+refresh a file's mtime and the least recently used files beyond
+`max_entries` are deleted as new ones are stored.
+"""
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union
+from src.config import config
+from src.telemetry.metrics import record_cache
+from src.telemetry.spans import span
+
+
+HTMLSource = Union[str, Callable[[], str]]
+
+
+def _warm_worker():
+    """Import weasyprint once per worker so the first render doesn't pay for it"""
+    try:
+        import weasyprint  # noqa: F401
+    except (ImportError, OSError):
+        pass  # Reported on the first render instead
+
+
+def html_to_pdf(html: str) -> bytes:
+    """Render an HTML document to PDF bytes (runs inside a worker process)"""
+    try:
+        from weasyprint import HTML
+    except (ImportError, OSError) as e:
+        # OSError: weasyprint is installed but pango/cairo system libraries are missing
+        raise RuntimeError(f"PDF rendering unavailable, weasyprint could not be loaded: {e}")
+
+    return HTML(string=html).write_pdf()
+
+
+class PDFRenderer:
+    """Renders reports to PDF in worker processes, caching by content hash"""
+
+    _shared: Optional['PDFRenderer'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, cache_dir: Optional[str] = None, max_workers: int = 2, max_entries: int = 256):
+        self.cache_dir = Path(cache_dir or os.path.join(tempfile.gettempdir(), "threatfusion-pdf"))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers
+        self.max_entries = max_entries
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+
+    @classmethod
+    def get_shared(cls) -> 'PDFRenderer':
+        """Get the process-wide renderer configured from the environment"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(
+                    config.app_config.pdf_cache_dir,
+                    config.app_config.pdf_workers,
+                    config.app_config.pdf_cache_size
+                )
+            return cls._shared
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Spawned workers don't inherit the parent's threads or open sockets
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_worker
+                )
+            return self.executor
+
+    def cache_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pdf"
+
+    def cached(self, key: str) -> Optional[bytes]:
+        """Return a cached PDF, or None"""
+        path = self.cache_path(key)
+        try:
+            pdf = path.read_bytes()
+            os.utime(path)  # Most recently used
+            return pdf
+        except FileNotFoundError:
+            return None
+
+    def _store(self, key: str, pdf: bytes):
+        # Write then rename, so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf)
+        os.replace(tmp_path, self.cache_path(key))
+        self._evict()
+
+    def _evict(self):
+        """Delete the least recently used PDFs beyond max_entries"""
+        entries = []
+        for path in self.cache_dir.glob("*.pdf"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                pass  # Evicted by another thread or process
+        entries.sort(reverse=True)
+        for _, path in entries[self.max_entries:]:
+            path.unlink(missing_ok=True)
+
+    def submit(self, key: str, html: HTMLSource) -> Future:
+        """
+        Start rendering a report, or join a render already in flight
+
+        `html` may be a callable so a cache hit skips building the HTML too.
+        """
+        result: Future = Future()
+        with span("cache"):
+            pdf = self.cached(key)
+        record_cache("pdf", pdf is not None)
+        if pdf is not None:
+            result.set_result(pdf)
+            return result
+
+        with self.lock:
+            if key in self._inflight:
+                return self._inflight[key]
+            self._inflight[key] = result
+
+        def finish(render: Future):
+            try:
+                pdf = render.result()
+                self._store(key, pdf)
+                result.set_result(pdf)
+            except BaseException as e:
+                result.set_exception(e)
+            finally:
+                with self.lock:
+                    self._inflight.pop(key, None)
+
+        try:
+            document = html() if callable(html) else html
+            self._get_executor().submit(html_to_pdf, document).add_done_callback(finish)
+        except BaseException as e:
+            with self.lock:
+                self._inflight.pop(key, None)
+            result.set_exception(e)
+        return result
+
+    def render(self, key: str, html: HTMLSource, timeout: Optional[float] = None) -> bytes:
+        """Render (or fetch from cache) a PDF, blocking until it is ready"""
+        return self.submit(key, html).result(timeout=timeout)
+
+    async def render_async(self, key: str, html: HTMLSource) -> bytes:
+        """Render (or fetch from cache) a PDF without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(key, html))
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
@@ -0,0 +1,255 @@
+"""
+STIX 2.1 Export
+Streams enrichment results as a STIX 2.1 bundle with deterministic IDs
+
+Each indicator becomes:
+
+    <observable>    ipv4-addr / ipv6-addr / domain-name / url / email-addr / file
+    indicator       STIX pattern for the observable, scored by ThreatFusion
+    observed-data   sighting of the observable, referencing it
+    note            one per source with findings, referencing both of the above
+
+Observable IDs follow the STIX 2.1 UUIDv5 rules, and the other IDs are
+UUIDv5 over the indicator (and source) alone, so re-exporting an indicator
+yields new versions of the same objects with only `modified` advancing.
+`created` is the indicator's first-seen time where the caller knows it
+(the archive, a batch journal, the coordinator), and otherwise the fixed
+UNKNOWN_CREATED, so it never changes between versions of one ID. The
+bundle is written object by object, so memory does not grow with the
+number of indicators.
+"""
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Any, IO, Iterable, Mapping, Optional, Tuple
+from src.models import IndicatorType, RiskScore, RESULT_TYPES, serialize_results
+from src.validators import IndicatorValidator
+
+
+# Namespace defined by the STIX 2.1 spec for cyber-observable IDs
+STIX_SCO_NAMESPACE = uuid.UUID("00abedb4-aa42-466c-9c01-fed23315a9b7")
+
+# Namespace for ThreatFusion-generated domain objects
+THREATFUSION_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://github.com/lordprime/threatfusion")
+
+SPEC_VERSION = "2.1"
+
+# `created` for objects whose first-seen time is unknown; constant so every version agrees
+UNKNOWN_CREATED = "2024-01-01T00:00:00.000Z"
+
+IDENTITY = {
+    "type": "identity",
+    "spec_version": SPEC_VERSION,
+    "id": f"identity--{uuid.uuid5(THREATFUSION_NAMESPACE, 'identity')}",
+    "created": UNKNOWN_CREATED,
+    "modified": UNKNOWN_CREATED,
+    "name": "ThreatFusion",
+    "identity_class": "system",
+}
+
+# Indicator type -> (observable type, pattern path, hash algorithm)
+OBSERVABLES = {
+    IndicatorType.IP_V4: ("ipv4-addr", "value", None),
+    IndicatorType.IP_V6: ("ipv6-addr", "value", None),
+    IndicatorType.DOMAIN: ("domain-name", "value", None),
+    IndicatorType.URL: ("url", "value", None),
+    IndicatorType.EMAIL: ("email-addr", "value", None),
+    IndicatorType.HASH_MD5: ("file", "hashes.MD5", "MD5"),
+    IndicatorType.HASH_SHA1: ("file", "hashes.'SHA-1'", "SHA-1"),
+    IndicatorType.HASH_SHA256: ("file", "hashes.'SHA-256'", "SHA-256"),
+}
+
+MALICIOUS_SEVERITIES = {"CRITICAL", "HIGH"}
+
+
+def stix_timestamp(value: Optional[datetime] = None) -> str:
+    """Format a (naive UTC) datetime as a STIX timestamp with millisecond precision"""
+    value = value or datetime.utcnow()
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%dT%H:%M:%S.") + f"{value.microsecond // 1000:03d}Z"
+
+
+def _canonical(value: Dict[str, Any]) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _sdo_id(object_type: str, *parts: str) -> str:
+    return f"{object_type}--{uuid.uuid5(THREATFUSION_NAMESPACE, '|'.join((object_type,) + parts))}"
+
+
+def _escape_pattern(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("'", "\\'")
+
+
+def build_observable(indicator: str, indicator_type: IndicatorType) -> Tuple[Dict[str, Any], str]:
+    """Build the cyber-observable for an indicator and its STIX pattern"""
+    sco_type, path, algorithm = OBSERVABLES[indicator_type]
+
+    if algorithm:
+        contributing = {"hashes": {algorithm: indicator.lower()}}
+        value = indicator.lower()
+    else:
+        contributing = {"value": indicator}
+        value = indicator
+
+    observable = {
+        "type": sco_type,
+        "spec_version": SPEC_VERSION,
+        "id": f"{sco_type}--{uuid.uuid5(STIX_SCO_NAMESPACE, _canonical(contributing))}",
+        **contributing,
+    }
+    pattern = f"[{sco_type}:{path} = '{_escape_pattern(value)}']"
+    return observable, pattern
+
+
+def build_objects(
+    indicator: str,
+    results: Dict[str, Any],
+    risk_score: RiskScore,
+    indicator_type: Optional[IndicatorType] = None,
+    first_seen: Optional[datetime] = None
+) -> Iterable[Dict[str, Any]]:
+    """
+    Yield the STIX objects for one enriched indicator
+
+    `first_seen` is when the indicator was first seen; objects keep it as
+    `created` across re-exports, and `modified` is the score time.
+    """
+    indicator_type = indicator_type or IndicatorValidator.detect_type(indicator)
+    observable, pattern = build_observable(indicator, indicator_type)
+    timestamp = stix_timestamp(risk_score.timestamp)
+    created = stix_timestamp(first_seen) if first_seen else UNKNOWN_CREATED
+    # A version can't predate its object; fixed-width timestamps compare as strings
+    timestamp = max(timestamp, created)
+    created_by = IDENTITY["id"]
+
+    indicator_id = _sdo_id("indicator", indicator)
+    observed_id = _sdo_id("observed-data", indicator)
+    components = {component["source"]: component for component in risk_score.components}
+
+    yield observable
+
+    yield {
+        "type": "indicator",
+        "spec_version": SPEC_VERSION,
+        "id": indicator_id,
+        "created_by_ref": created_by,
+        "created": created,
+        "modified": timestamp,
+        "name": indicator,
+        "description": f"ThreatFusion risk {risk_score.score}/{risk_score.max} ({risk_score.severity})",
+        "indicator_types": [
+            "malicious-activity" if risk_score.severity in MALICIOUS_SEVERITIES else "anomalous-activity"
+        ],
+        "pattern": pattern,
+        "pattern_type": "stix",
+        "valid_from": timestamp,
+        "confidence": int(round(risk_score.confidence * 100)),
+        "x_threatfusion_score": risk_score.score,
+        "x_threatfusion_severity": risk_score.severity,
+    }
+
+    yield {
+        "type": "observed-data",
+        "spec_version": SPEC_VERSION,
+        "id": observed_id,
+        "created_by_ref": created_by,
+        "created": created,
+        "modified": timestamp,
+        "first_observed": created if first_seen else timestamp,
+        "last_observed": timestamp,
+        "number_observed": 1,
+        "object_refs": [observable["id"]],
+    }
+
+    for source, entry in serialize_results(results).items():
+        if source == '_metadata' or not isinstance(entry, RESULT_TYPES):
+            continue
+        if entry.get('status') != 'success' or not entry.get('data'):
+            continue
+
+        component = components.get(source)
+        abstract = f"{source}: {component['details']}" if component else f"{source} findings"
+        yield {
+            "type": "note",
+            "spec_version": SPEC_VERSION,
+            "id": _sdo_id("note", indicator, source),
+            "created_by_ref": created_by,
+            "created": created,
+            "modified": timestamp,
+            "abstract": abstract,
+            "content": json.dumps(entry['data'], sort_keys=True, default=str),
+            "authors": [source],
+            "object_refs": [indicator_id, observed_id],
+        }
+
+
+class StixBundleWriter:
+    """
+    Writes a STIX 2.1 bundle to a text stream one object at a time
+
+    `first_seen` maps indicators to when they were first seen, and is read
+    as each result is written, so it may fill in while the bundle streams.
+    """
+
+    def __init__(
+        self,
+        stream: IO[str],
+        bundle_id: Optional[str] = None,
+        first_seen: Optional[Mapping[str, datetime]] = None
+    ):
+        self.stream = stream
+        self.bundle_id = bundle_id or f"bundle--{uuid.uuid4()}"
+        self.first_seen = first_seen or {}
+        self.objects_written = 0
+        self._open = False
+
+    def _begin(self):
+        self.stream.write(f'{{"type": "bundle", "id": "{self.bundle_id}", "objects": [\n')
+        self._open = True
+        self.write_object(IDENTITY)
+
+    def write_object(self, stix_object: Dict[str, Any]):
+        if not self._open:
+            self._begin()
+        if self.objects_written:
+            self.stream.write(",\n")
+        self.stream.write(json.dumps(stix_object, ensure_ascii=False))
+        self.objects_written += 1
+
+    def write_result(
+        self,
+        indicator: str,
+        results: Dict[str, Any],
+        risk_score: RiskScore,
+        indicator_type: Optional[IndicatorType] = None,
+        first_seen: Optional[datetime] = None
+    ):
+        """Write the objects for one enriched indicator"""
+        first_seen = first_seen or self.first_seen.get(indicator)
+        for stix_object in build_objects(indicator, results, risk_score, indicator_type, first_seen):
+            self.write_object(stix_object)
+
+    def write_many(self, entries: Iterable[Tuple[str, Dict[str, Any], RiskScore]]) -> int:
+        """Write (indicator, results, risk_score) entries as they arrive; returns indicators written"""
+        count = 0
+        for indicator, results, risk_score in entries:
+            try:
+                self.write_result(indicator, results, risk_score)
+            except ValueError:
+                continue  # Not a STIX-mappable indicator
+            count += 1
+        return count
+
+    def close(self):
+        """Finish the bundle (an empty bundle still carries the identity)"""
+        if not self._open:
+            self._begin()
+        self.stream.write("\n]}\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,33 @@
+"""Output Sinks Package Initialization"""
+from typing import List
+from src.config import config
+from src.sinks.base import BatchingSink, SinkError
+from src.sinks.elasticsearch import ElasticsearchSink
+from src.sinks.splunk import SplunkHECSink
+
+
+def create_sinks() -> List[BatchingSink]:
+    """Create the sinks configured in the environment"""
+    app_config = config.app_config
+    sinks: List[BatchingSink] = []
+
+    if app_config.elasticsearch_url:
+        sinks.append(ElasticsearchSink(
+            app_config.elasticsearch_url,
+            index=app_config.elasticsearch_index,
+            api_key=app_config.elasticsearch_api_key,
+            spill_dir=app_config.sink_spill_dir
+        ))
+
+    if app_config.splunk_hec_url and app_config.splunk_hec_token:
+        sinks.append(SplunkHECSink(
+            app_config.splunk_hec_url,
+            app_config.splunk_hec_token,
+            index=app_config.splunk_hec_index,
+            spill_dir=app_config.sink_spill_dir
+        ))
+
+    return sinks
+
+
+__all__ = ['BatchingSink', 'SinkError', 'ElasticsearchSink', 'SplunkHECSink', 'create_sinks']
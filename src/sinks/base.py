@@ -0,0 +1,342 @@
+"""
+Batching Output Sink
+Sends scored results to bulk HTTP APIs in size- and time-bounded micro-batches
+
+Documents are queued by the producer and sent by one background thread:
+
+    send()      blocks when the queue is full (backpressure on the producer),
+                and raises SinkError if the sender thread has died
+    batching    a batch is sent at max_batch_docs, max_batch_bytes or
+                flush_interval seconds, whichever comes first
+    transport   one keep-alive session, gzip request bodies
+    retry       connection errors, 429 and 5xx are retried with exponential
+                backoff (honouring Retry-After)
+    spill       batches that still fail are written to spill_dir and
+                re-sent before new data once the endpoint recovers
+"""
+import gzip
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from src.models import RiskScore
+from src.reporting.columnar import flatten_result
+
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+SPILL_SUFFIX = ".ndjson.gz"
+
+# How often a producer blocked on a full queue checks the sender is still alive
+PUT_POLL_SECONDS = 0.25
+
+
+class SinkError(Exception):
+    """Raised when a batch can't be delivered"""
+
+    def __init__(self, message: str, retryable: bool = True, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class BatchingSink(ABC):
+    """Base class for bulk HTTP sinks; subclasses encode batches and read responses"""
+
+    name = "sink"
+    content_type = "application/json"
+
+    def __init__(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        max_batch_docs: int = 500,
+        max_batch_bytes: int = 5 * 1024 * 1024,
+        flush_interval: float = 2.0,
+        max_queue: int = 10_000,
+        max_retries: int = 5,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30.0,
+        timeout: float = 10.0,
+        compress: bool = True,
+        spill_dir: Optional[str] = None
+    ):
+        self.url = url
+        self.max_batch_docs = max_batch_docs
+        self.max_batch_bytes = max_batch_bytes
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.compress = compress
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        if self.spill_dir:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": self.content_type})
+        if compress:
+            self.session.headers["Content-Encoding"] = "gzip"
+        if headers:
+            self.session.headers.update(headers)
+
+        self.stats = {"sent": 0, "batches": 0, "retries": 0, "spilled": 0, "replayed": 0, "failed": 0}
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-sink", daemon=True)
+        self._thread.start()
+
+    # Subclass hooks
+
+    @abstractmethod
+    def encode(self, document: Dict[str, Any]) -> bytes:
+        """Encode one document as it appears in the request body"""
+
+    def check_response(self, response: requests.Response, lines: List[bytes]) -> Tuple[List[bytes], int]:
+        """
+        Inspect a 2xx response for per-document failures
+
+        Returns (documents to retry, number of documents permanently
+        rejected). The default treats any 2xx as full success.
+        """
+        return [], 0
+
+    # Producer API
+
+    def send(self, document: Dict[str, Any], block: bool = True, timeout: Optional[float] = None):
+        """
+        Queue one document
+
+        Blocks while the queue is full, so a slow SIEM slows the producer down
+        instead of growing memory. Raises queue.Full if block is False (or the
+        timeout expires) and the queue is still full, and SinkError if the
+        sender thread has died.
+        """
+        if self._closed:
+            raise RuntimeError(f"{self.name} sink is closed")
+        self._put(self.encode(document), block=block, timeout=timeout)
+
+    def _put(self, item: Optional[bytes], block: bool = True, timeout: Optional[float] = None):
+        """Queue an item, waking periodically so a dead sender doesn't strand the producer"""
+        self._check_sender()
+        if not block:
+            self._queue.put(item, block=False)
+            return
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = PUT_POLL_SECONDS if deadline is None else min(PUT_POLL_SECONDS, deadline - time.monotonic())
+            try:
+                self._queue.put(item, timeout=max(0.0, wait))
+                return
+            except queue.Full:
+                self._check_sender()
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise
+
+    def _check_sender(self):
+        if self._error is not None:
+            raise SinkError(f"{self.name} sink sender failed: {self._error}", retryable=False) from self._error
+
+    def send_result(
+        self,
+        indicator: str,
+        results: Dict[str, Any],
+        risk_score: RiskScore,
+        block: bool = True,
+        timeout: Optional[float] = None
+    ):
+        """Queue one enriched indicator as a flat document"""
+        self.send(self.build_document(indicator, results, risk_score), block=block, timeout=timeout)
+
+    @staticmethod
+    def build_document(indicator: str, results: Dict[str, Any], risk_score: RiskScore) -> Dict[str, Any]:
+        """Flatten a scored result into a SIEM document"""
+        document = flatten_result(indicator, results, risk_score)
+        document["scored_at"] = risk_score.timestamp.isoformat() + "Z"
+        document["components"] = risk_score.components
+        return document
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far has been sent or spilled"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            self._check_sender()
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: Optional[float] = 30.0):
+        """Send what is queued and stop the background thread"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._put(None, timeout=timeout)
+        except (SinkError, queue.Full):
+            pass  # Nothing left to stop, or it is stuck; the thread is a daemon
+        else:
+            self._thread.join(timeout)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # Background sender
+
+    def _run(self):
+        try:
+            self._send_batches()
+        except BaseException as e:
+            self._error = e
+            logger.exception("%s sink sender failed", self.name)
+
+    def _send_batches(self):
+        self._replay_spill()
+        stopping = False
+
+        while not stopping:
+            batch: List[bytes] = []
+            size = 0
+            deadline = None
+
+            while len(batch) < self.max_batch_docs and size < self.max_batch_bytes:
+                wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=wait)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(item)
+                size += len(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch:
+                try:
+                    self._deliver(batch)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+
+    def _deliver(self, lines: List[bytes]):
+        """Send a batch, retrying failed documents, and spill whatever is left"""
+        self.stats["batches"] += 1
+        pending = lines
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                pending = self._post(pending)
+            except SinkError as e:
+                if not e.retryable:
+                    logger.error("%s sink dropped %d documents: %s", self.name, len(pending), e)
+                    self.stats["failed"] += len(pending)
+                    return
+                retry_after = e.retry_after
+            else:
+                if not pending:
+                    if self.spill_dir:
+                        self._replay_spill()
+                    return
+                retry_after = None
+
+            if attempt == self.max_retries:
+                break
+            self.stats["retries"] += 1
+            delay = retry_after if retry_after is not None else self.backoff_factor * (2 ** attempt)
+            time.sleep(min(delay, self.max_backoff))
+
+        self._spill(pending)
+
+    def _post(self, lines: List[bytes]) -> List[bytes]:
+        """POST one batch; returns documents that need a retry"""
+        body = b"".join(lines)
+        if self.compress:
+            body = gzip.compress(body, compresslevel=5)
+
+        try:
+            response = self.session.post(self.url, data=body, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            raise SinkError(f"{self.name} request failed: {e}")
+
+        if response.status_code in RETRYABLE_STATUS:
+            retry_after = response.headers.get("Retry-After")
+            raise SinkError(
+                f"{self.name} returned HTTP {response.status_code}",
+                retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None
+            )
+        if response.status_code >= 400:
+            raise SinkError(f"{self.name} returned HTTP {response.status_code}: {response.text[:200]}", retryable=False)
+
+        retry, rejected = self.check_response(response, lines)
+        self.stats["sent"] += len(lines) - len(retry) - rejected
+        self.stats["failed"] += rejected
+        return retry
+
+    # Spill to disk
+
+    def _spill(self, lines: List[bytes]):
+        if not self.spill_dir:
+            logger.error("%s sink dropped %d documents after %d retries", self.name, len(lines), self.max_retries)
+            self.stats["failed"] += len(lines)
+            return
+
+        path = self.spill_dir / f"{self.name}-{time.time_ns()}-{uuid.uuid4().hex[:8]}{SPILL_SUFFIX}"
+        tmp_path = path.with_suffix(".tmp")
+        with gzip.open(tmp_path, "wb") as f:
+            for line in lines:
+                f.write(len(line).to_bytes(4, "big") + line)
+        tmp_path.replace(path)
+        self.stats["spilled"] += len(lines)
+        logger.warning("%s sink spilled %d documents to %s", self.name, len(lines), path)
+
+    def spilled_files(self) -> List[Path]:
+        if not self.spill_dir:
+            return []
+        return sorted(self.spill_dir.glob(f"{self.name}-*{SPILL_SUFFIX}"))
+
+    def _replay_spill(self):
+        """Re-send spilled batches, oldest first; stops at the first failure"""
+        for path in self.spilled_files():
+            lines = []
+            with gzip.open(path, "rb") as f:
+                while True:
+                    header = f.read(4)
+                    if len(header) < 4:
+                        break
+                    lines.append(f.read(int.from_bytes(header, "big")))
+
+            try:
+                retry = self._post(lines)
+            except SinkError:
+                return
+            if retry:
+                return  # Endpoint is still rejecting documents; keep the file
+
+            path.unlink()
+            self.stats["replayed"] += len(lines)
+
+
+def encode_json_line(document: Dict[str, Any]) -> bytes:
+    return json.dumps(document, separators=(",", ":"), default=str).encode("utf-8") + b"\n"
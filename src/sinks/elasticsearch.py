@@ -0,0 +1,46 @@
+"""
+Elasticsearch Sink
+Indexes scored results through the Elasticsearch _bulk API
+"""
+import hashlib
+import json
+from typing import Dict, Any, List, Optional, Tuple
+import requests
+from src.sinks.base import BatchingSink, RETRYABLE_STATUS, encode_json_line
+
+
+class ElasticsearchSink(BatchingSink):
+    """Sends documents to Elasticsearch in _bulk requests"""
+
+    name = "elasticsearch"
+    content_type = "application/x-ndjson"
+
+    def __init__(self, url: str, index: str = "threatfusion", api_key: Optional[str] = None, **kwargs):
+        headers = {"Authorization": f"ApiKey {api_key}"} if api_key else None
+        super().__init__(url.rstrip("/") + "/_bulk", headers=headers, **kwargs)
+        self.index = index
+
+    def encode(self, document: Dict[str, Any]) -> bytes:
+        # A deterministic _id makes retried documents overwrite instead of duplicating
+        doc_id = hashlib.sha1(f"{document.get('indicator')}|{document.get('scored_at')}".encode("utf-8")).hexdigest()
+        action = {"index": {"_index": self.index, "_id": doc_id}}
+        return encode_json_line(action) + encode_json_line(document)
+
+    def check_response(self, response: requests.Response, lines: List[bytes]) -> Tuple[List[bytes], int]:
+        """Retry only the items Elasticsearch rejected with a retryable status"""
+        try:
+            body = response.json()
+        except json.JSONDecodeError:
+            return [], 0
+        if not body.get("errors"):
+            return [], 0
+
+        retry = []
+        rejected = 0
+        for line, item in zip(lines, body.get("items", [])):
+            status = next(iter(item.values()), {}).get("status", 200)
+            if status in RETRYABLE_STATUS:
+                retry.append(line)
+            elif status >= 300:
+                rejected += 1  # Mapping or validation error; resending won't help
+        return retry, rejected
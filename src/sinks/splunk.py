@@ -0,0 +1,51 @@
+"""
+Splunk HEC Sink
+Sends scored results to a Splunk HTTP Event Collector
+"""
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+from src.sinks.base import BatchingSink, encode_json_line
+
+
+class SplunkHECSink(BatchingSink):
+    """Sends documents as batched HEC events (concatenated JSON objects)"""
+
+    name = "splunk"
+
+    def __init__(
+        self,
+        url: str,
+        token: str,
+        index: Optional[str] = None,
+        sourcetype: str = "threatfusion:enrichment",
+        **kwargs
+    ):
+        super().__init__(
+            url.rstrip("/") + "/services/collector/event",
+            headers={"Authorization": f"Splunk {token}"},
+            **kwargs
+        )
+        self.index = index
+        self.sourcetype = sourcetype
+
+    def encode(self, document: Dict[str, Any]) -> bytes:
+        event = {
+            "time": self._event_time(document),
+            "source": "threatfusion",
+            "sourcetype": self.sourcetype,
+            "event": document
+        }
+        if self.index:
+            event["index"] = self.index
+        return encode_json_line(event)
+
+    @staticmethod
+    def _event_time(document: Dict[str, Any]) -> float:
+        scored_at = document.get("scored_at")
+        if isinstance(scored_at, str):
+            try:
+                parsed = datetime.fromisoformat(scored_at.rstrip("Z"))
+                return round(parsed.replace(tzinfo=timezone.utc).timestamp(), 3)
+            except ValueError:
+                pass
+        return round(datetime.now(timezone.utc).timestamp(), 3)
@@ -0,0 +1,4 @@
+"""Storage Package Initialization"""
+from src.storage.archive import ResponseArchive, ArchiveRecord
+
+__all__ = ['ResponseArchive', 'ArchiveRecord']
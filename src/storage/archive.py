@@ -0,0 +1,218 @@
+"""
+Response Archive
+Append-only, compressed archive of raw provider responses
+
+Layout of an archive directory:
+
+    segment-000001.gz   concatenated gzip members, one per response body
+    segment-000002.gz   (a new segment starts once max_segment_bytes is reached)
+    index.jsonl         one JSON line per response: source, kind, indicator,
+                        segment, offset, length, status_code, fetched_at
+
+Each body is its own gzip member, so any record can be read back with a
+single seek and decompress, and a whole segment can be streamed in order.
+"""
+import gzip
+import json
+import os
+import threading
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Iterator, Iterable, Dict, Any, Tuple
+
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".gz"
+INDEX_FILE = "index.jsonl"
+
+
+@dataclass
+class ArchiveRecord:
+    """Index entry for one archived provider response"""
+    source: str
+    kind: str
+    indicator: str
+    segment: int
+    offset: int
+    length: int
+    status_code: int = 200
+    fetched_at: Optional[str] = None
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "source": self.source,
+            "kind": self.kind,
+            "indicator": self.indicator,
+            "segment": self.segment,
+            "offset": self.offset,
+            "length": self.length,
+            "status_code": self.status_code,
+            "fetched_at": self.fetched_at
+        })
+
+
+class ResponseArchive:
+    """Append-only archive of raw provider response bodies"""
+
+    _instances: Dict[str, 'ResponseArchive'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str, max_segment_bytes: int = 64 * 1024 * 1024, compresslevel: int = 6):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
+        self.compresslevel = compresslevel
+        self.lock = threading.Lock()
+        self._segment = self._last_segment()
+
+    @classmethod
+    def open(cls, path: str) -> 'ResponseArchive':
+        """
+        Get the shared archive for a directory
+
+        Appends are serialized per instance, so every writer in the process
+        must go through the same instance.
+        """
+        key = str(Path(path).resolve())
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(path)
+            return cls._instances[key]
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.path / f"{SEGMENT_PREFIX}{segment:06d}{SEGMENT_SUFFIX}"
+
+    def _last_segment(self) -> int:
+        segments = [
+            int(p.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            for p in self.path.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")
+        ]
+        return max(segments, default=1)
+
+    def append(
+        self,
+        source: str,
+        kind: str,
+        indicator: str,
+        body: bytes,
+        status_code: int = 200
+    ) -> ArchiveRecord:
+        """
+        Archive one raw response body
+
+        The body is written to the segment before its index line, so the index
+        never points at a partially written record.
+        """
+        member = gzip.compress(body, compresslevel=self.compresslevel)
+
+        with self.lock:
+            segment_path = self._segment_path(self._segment)
+            if segment_path.exists() and segment_path.stat().st_size >= self.max_segment_bytes:
+                self._segment += 1
+                segment_path = self._segment_path(self._segment)
+
+            with open(segment_path, "ab") as f:
+                offset = f.tell()
+                f.write(member)
+
+            record = ArchiveRecord(
+                source=source,
+                kind=kind,
+                indicator=indicator,
+                segment=self._segment,
+                offset=offset,
+                length=len(member),
+                status_code=status_code,
+                fetched_at=datetime.utcnow().isoformat()
+            )
+
+            with open(self.path / INDEX_FILE, "a", encoding="utf-8") as f:
+                f.write(record.to_json() + "\n")
+
+        return record
+
+    def records(self, source: Optional[str] = None) -> Iterator[ArchiveRecord]:
+        """Iterate index entries in append order"""
+        index_path = self.path / INDEX_FILE
+        if not index_path.exists():
+            return
+
+        with open(index_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn final line from an interrupted write
+                if source and entry["source"] != source:
+                    continue
+                yield ArchiveRecord(**entry)
+
+    def read(self, record: ArchiveRecord) -> bytes:
+        """Read one archived body"""
+        with open(self._segment_path(record.segment), "rb") as f:
+            f.seek(record.offset)
+            return zlib.decompress(f.read(record.length), wbits=31)
+
+    def read_json(self, record: ArchiveRecord) -> Any:
+        """Read one archived body and decode it as JSON"""
+        return json.loads(self.read(record))
+
+    def scan(self, source: Optional[str] = None) -> Iterator[Tuple[ArchiveRecord, bytes]]:
+        """Stream every record with its body, in append order"""
+        return self.read_many(self.records(source))
+
+    def read_many(self, records: Iterable[ArchiveRecord]) -> Iterator[Tuple[ArchiveRecord, bytes]]:
+        """
+        Read bodies for many records
+
+        Keeps one segment open at a time; pass records sorted by
+        (segment, offset) to read at sequential disk speed.
+        """
+        segment, handle = None, None
+        try:
+            for record in records:
+                if record.segment != segment:
+                    if handle:
+                        handle.close()
+                    segment = record.segment
+                    handle = open(self._segment_path(segment), "rb")
+                handle.seek(record.offset)
+                yield record, zlib.decompress(handle.read(record.length), wbits=31)
+        finally:
+            if handle:
+                handle.close()
+
+    def latest(self) -> Dict[Tuple[str, str, str], ArchiveRecord]:
+        """Most recent record per (indicator, source, kind)"""
+        latest = {}
+        for record in self.records():
+            latest[(record.indicator, record.source, record.kind)] = record
+        return latest
+
+    def first_seen(self) -> Dict[str, datetime]:
+        """When each indicator's earliest archived response was fetched"""
+        first: Dict[str, datetime] = {}
+        for record in self.records():
+            if not record.fetched_at:
+                continue
+            fetched_at = datetime.fromisoformat(record.fetched_at)
+            if record.indicator not in first or fetched_at < first[record.indicator]:
+                first[record.indicator] = fetched_at
+        return first
+
+    def stats(self) -> Dict[str, Any]:
+        """Archive size and record counts"""
+        records = 0
+        sources: Dict[str, int] = {}
+        for record in self.records():
+            records += 1
+            sources[record.source] = sources.get(record.source, 0) + 1
+
+        segment_bytes = sum(
+            os.path.getsize(p) for p in self.path.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")
+        )
+        return {"records": records, "sources": sources, "bytes": segment_bytes}
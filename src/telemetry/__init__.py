@@ -0,0 +1,10 @@
+"""Telemetry Package Initialization"""
+from src.telemetry.metrics import (
+    REGISTRY, CONTENT_TYPE, MetricsRegistry, Counter, Gauge, Histogram, record_cache
+)
+from src.telemetry.spans import Span, span, trace, current_span, collapsed_stacks
+
+__all__ = [
+    'REGISTRY', 'CONTENT_TYPE', 'MetricsRegistry', 'Counter', 'Gauge', 'Histogram', 'record_cache',
+    'Span', 'span', 'trace', 'current_span', 'collapsed_stacks'
+]
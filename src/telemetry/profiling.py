@@ -0,0 +1,83 @@
+"""
+Thread-Aware cProfile
+Profiles the calling thread and the agent threads it fans out to
+
+cProfile only sees the thread that enabled it, and agents run in pool
+threads. While a ThreadProfiles collection is active, the orchestrator
+profiles each agent call in its own thread (thread_profile) and the stats
+are merged with the caller's when the collection ends.
+"""
+import cProfile
+import io
+import pstats
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+_active: ContextVar[Optional["ThreadProfiles"]] = ContextVar("threatfusion_profiles", default=None)
+
+
+class ThreadProfiles:
+    """cProfile results gathered from several threads"""
+
+    def __init__(self):
+        self.profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def add(self, profile: cProfile.Profile):
+        with self._lock:
+            self.profiles.append(profile)
+
+    def stats(self) -> Optional[pstats.Stats]:
+        with self._lock:
+            profiles = list(self.profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0], stream=io.StringIO())
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+    def dump(self, path: str):
+        stats = self.stats()
+        if stats is not None:
+            stats.dump_stats(path)
+
+    def summary(self, limit: int = 20, sort: str = "cumulative") -> str:
+        stats = self.stats()
+        if stats is None:
+            return ""
+        stream = io.StringIO()
+        stats.stream = stream
+        stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+
+@contextmanager
+def thread_profile() -> Iterator[None]:
+    """Profile this block in the current thread if a collection is active"""
+    profiles = _active.get()
+    if profiles is None:
+        yield
+        return
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profiles.add(profile)
+
+
+@contextmanager
+def profile_threads() -> Iterator[ThreadProfiles]:
+    """Profile the block, including agent calls made from it in other threads"""
+    profiles = ThreadProfiles()
+    token = _active.set(profiles)
+    try:
+        with thread_profile():
+            yield profiles
+    finally:
+        _active.reset(token)
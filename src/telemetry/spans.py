@@ -0,0 +1,128 @@
+"""
+Phase Spans
+Records where the time of one enrichment went, as a tree of timed spans
+
+    enrich
+      validate
+      agents
+        VirusTotal
+          limiter_wait
+          first_byte        request sent until response headers (server latency)
+            connect         DNS, TCP and TLS, only when a new connection is opened
+          body              response body read
+          parse             JSON decode
+        Shodan ...
+      score
+      render
+
+The active span lives in a context variable. A span opened with no trace
+active does nothing, so library code can mark its phases unconditionally.
+Agent threads run in a copy of the submitting context, so their spans
+attach under the orchestrator's span.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_current: ContextVar[Optional["Span"]] = ContextVar("threatfusion_span", default=None)
+
+
+class Span:
+    """One timed phase and the phases inside it"""
+
+    __slots__ = ("name", "attrs", "start", "end", "children")
+
+    def __init__(self, name: str, attrs: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.children: List["Span"] = []
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    @property
+    def self_time(self) -> float:
+        """Time not covered by children (children may overlap when run in parallel)"""
+        return max(0.0, self.duration - sum(child.duration for child in self.children))
+
+    def to_dict(self) -> Dict[str, Any]:
+        node: Dict[str, Any] = {"name": self.name, "ms": round(self.duration * 1000, 3)}
+        if self.attrs:
+            node["attrs"] = self.attrs
+        if self.children:
+            node["children"] = [child.to_dict() for child in self.children]
+        return node
+
+    def walk(self, path: Tuple[str, ...] = ()) -> Iterator[Tuple[Tuple[str, ...], "Span"]]:
+        """Yield (stack of names down to the span, span), depth first"""
+        path = path + (self.name,)
+        yield path, self
+        for child in list(self.children):
+            yield from child.walk(path)
+
+    def phase_totals(self) -> Dict[str, Dict[str, float]]:
+        """Seconds per phase name under each direct child, e.g. per agent"""
+        totals: Dict[str, Dict[str, float]] = {}
+        for child in list(self.children):
+            phases: Dict[str, float] = {}
+            for _, descendant in child.walk():
+                if descendant is not child:
+                    phases[descendant.name] = phases.get(descendant.name, 0.0) + descendant.duration
+            phases["total"] = child.duration
+            totals[child.name] = {name: round(seconds, 4) for name, seconds in phases.items()}
+        return totals
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Optional[Span]]:
+    """Time a phase under the active span; no-op (yields None) when nothing is traced"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(name, attrs)
+    parent.children.append(child)
+    token = _current.set(child)
+    try:
+        yield child
+    finally:
+        child.end = time.perf_counter()
+        _current.reset(token)
+
+
+@contextmanager
+def trace(name: str, **attrs) -> Iterator[Span]:
+    """Start recording: a root span, or a child of the active one if there is one"""
+    parent = _current.get()
+    root = Span(name, attrs)
+    if parent is not None:
+        parent.children.append(root)
+    token = _current.set(root)
+    try:
+        yield root
+    finally:
+        root.end = time.perf_counter()
+        _current.reset(token)
+
+
+def collapsed_stacks(root: Span) -> List[str]:
+    """
+    Self time per stack in the collapsed format flamegraph.pl and speedscope read
+
+    One line per span, "enrich;agents;Shodan;first_byte 81234", in microseconds.
+    """
+    lines = []
+    for path, node in root.walk():
+        micros = int(node.self_time * 1e6)
+        if micros:
+            lines.append(f"{';'.join(name.replace(';', ':').replace(' ', '_') for name in path)} {micros}")
+    return lines
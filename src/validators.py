@@ -61,6 +61,40 @@ class IndicatorValidator:
         except ValueError:
             return False
     
+    @classmethod
+    def canonicalize(cls, indicator: str) -> str:
+        """
+        Canonical form of an indicator, so equivalent spellings compare equal
+        
+        Hashes, domains and emails are lower-cased, IPs are compressed, and
+        URLs get a lower-cased scheme and host. Only fully-qualified domains
+        lose their trailing dot. Unrecognised values are only stripped and
+        lower-cased.
+        """
+        indicator = indicator.strip()
+        try:
+            itype = cls.detect_type(indicator)
+        except ValueError:
+            itype = None
+        
+        # A fully-qualified domain ("example.com.") names the same host
+        if itype is None and indicator.endswith("."):
+            try:
+                if cls.detect_type(indicator[:-1]) == IndicatorType.DOMAIN:
+                    indicator, itype = indicator[:-1], IndicatorType.DOMAIN
+            except ValueError:
+                pass
+        if itype is None:
+            return indicator.lower()
+        
+        if itype in (IndicatorType.IP_V4, IndicatorType.IP_V6):
+            return str(ipaddress.ip_address(indicator))
+        if itype == IndicatorType.URL:
+            scheme, _, rest = indicator.partition("://")
+            host, sep, path = rest.partition("/")
+            return f"{scheme.lower()}://{host.lower()}{sep}{path}"
+        return indicator.lower()
+    
     @classmethod
     def validate(cls, indicator: str) -> Indicator:
         """Validate and return Indicator object"""
@@ -0,0 +1,5 @@
+"""Watchlist Package Initialization"""
+from src.watchlist.scheduler import WatchlistScheduler, parse_ttls, parse_duration
+from src.watchlist.store import WatchlistStore, SourceState
+
+__all__ = ['WatchlistScheduler', 'WatchlistStore', 'SourceState', 'parse_ttls', 'parse_duration']
@@ -0,0 +1,252 @@
+"""
+Watchlist Scheduler
+Re-enriches watched indicators per source and emits only what changed
+
+Each source is re-checked on its own interval, starting from its TTL
+(AbuseIPDB reports churn within hours, Censys certificates rarely do) and
+adapting to what is observed: an answer that changed halves the interval,
+an unchanged one stretches it, within [TTL / 4, TTL * 4].
+
+Every tick takes at most `rate_share` of each provider's per-minute limit,
+most overdue first, so a 20k-indicator list is worked through steadily
+across the rate window instead of in one nightly burst. Re-scheduled checks
+get a little jitter so they stay spread out.
+
+A re-check whose fingerprint matches the stored one stops there: no
+rescoring, no delta, nothing sent downstream.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Optional
+from src.clients.rate_limiter import RateLimiter
+from src.fusion.orchestrator import EnrichmentOrchestrator
+from src.fusion.scorer import RiskScorer
+from src.models import EnrichmentRecord, FAILED_STATUSES, RESULT_TYPES
+from src.validators import IndicatorValidator
+from src.watchlist.store import WatchlistStore
+
+
+logger = logging.getLogger(__name__)
+
+# Baseline re-check interval per source, in seconds
+DEFAULT_TTLS = {
+    "AbuseIPDB": 6 * 3600,
+    "OTX": 12 * 3600,
+    "VirusTotal": 24 * 3600,
+    "Shodan": 24 * 3600,
+    "Censys": 72 * 3600,
+}
+DEFAULT_TTL = 24 * 3600
+
+ERROR_RETRY = 15 * 60
+JITTER = 0.1
+
+DeltaCallback = Callable[[Dict[str, Any]], None]
+
+_DURATION = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*$")
+_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(value: str) -> float:
+    """Parse '90', '30m', '6h' or '3d' into seconds"""
+    match = _DURATION.match(value)
+    if not match:
+        raise ValueError(f"Invalid duration: {value!r}")
+    return float(match.group(1)) * _UNITS[match.group(2)]
+
+
+def parse_ttls(spec: Optional[str]) -> Dict[str, float]:
+    """Parse 'AbuseIPDB=6h,Censys=3d' into per-source TTLs over the defaults"""
+    ttls = dict(DEFAULT_TTLS)
+    for part in (spec or "").split(","):
+        if part.strip():
+            source, _, duration = part.partition("=")
+            ttls[source.strip()] = parse_duration(duration)
+    return ttls
+
+
+def fingerprint(result: Dict[str, Any]) -> str:
+    """64-bit hash of a source's answer, ignoring when it was fetched"""
+    payload = json.dumps(result.get('data'), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _jitter(indicator: str, source: str, checked_at: float) -> float:
+    """Deterministic factor in [1 - JITTER, 1 + JITTER]"""
+    digest = hashlib.blake2b(f"{indicator}|{source}|{int(checked_at)}".encode(), digest_size=2).digest()
+    return 1 - JITTER + 2 * JITTER * int.from_bytes(digest, "big") / 0xFFFF
+
+
+class WatchlistScheduler:
+    """Runs due re-checks within each provider's rate budget"""
+
+    def __init__(
+        self,
+        store: WatchlistStore,
+        orchestrator: EnrichmentOrchestrator,
+        ttls: Optional[Dict[str, float]] = None,
+        tick_seconds: float = 60.0,
+        rate_share: float = 0.8,
+        concurrency: int = 4,
+        timeout: int = 30,
+        on_delta: Optional[DeltaCallback] = None
+    ):
+        self.store = store
+        self.orchestrator = orchestrator
+        self.ttls = ttls or dict(DEFAULT_TTLS)
+        self.tick_seconds = tick_seconds
+        self.rate_share = rate_share
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.on_delta = on_delta
+        self.stats = {"checks": 0, "unchanged": 0, "changed": 0, "errors": 0, "deltas": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def ttl(self, source: str) -> float:
+        return self.ttls.get(source, DEFAULT_TTL)
+
+    def add(self, indicators, now: Optional[float] = None) -> int:
+        """Watch indicators (canonicalized); returns how many were new"""
+        added = 0
+        for indicator in indicators:
+            indicator = indicator.strip()
+            if not indicator or indicator.startswith("#"):
+                continue
+            try:
+                validated = IndicatorValidator.validate(IndicatorValidator.canonicalize(indicator))
+            except ValueError:
+                logger.warning("Skipping invalid indicator %r", indicator)
+                continue
+            sources = {
+                agent.name: self.ttl(agent.name)
+                for agent in self.orchestrator.agents if agent.is_supported(validated.type)
+            }
+            added += self.store.add(validated.value, validated.type.value, sources, now=now)
+        return added
+
+    def budget(self, source: str) -> int:
+        """Checks of `source` allowed per tick"""
+        rpm = RateLimiter.limits().get(source.lower())
+        if rpm is None:
+            return 1000
+        return max(1, int(rpm * self.rate_share * self.tick_seconds / 60))
+
+    def run_once(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Run one tick of due checks; returns the deltas emitted"""
+        now = time.time() if now is None else now
+        due: Dict[str, List[str]] = defaultdict(list)
+        for agent in self.orchestrator.agents:
+            for indicator in self.store.due(agent.name, now, self.budget(agent.name)):
+                due[indicator].append(agent.name)
+
+        if not due:
+            return []
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            deltas = [
+                delta for delta in pool.map(lambda item: self.check(item[0], item[1], now), due.items())
+                if delta
+            ]
+        return deltas
+
+    def run_forever(self, stop=None):
+        """Tick until `stop` (a threading.Event) is set"""
+        while stop is None or not stop.is_set():
+            started = time.time()
+            try:
+                self.run_once(started)
+            except Exception:
+                logger.exception("Watchlist tick failed")
+            wait = max(0.0, self.tick_seconds - (time.time() - started))
+            if stop is None:
+                time.sleep(wait)
+            else:
+                stop.wait(wait)
+
+    def check(self, indicator: str, sources: List[str], now: float) -> Optional[Dict[str, Any]]:
+        """Re-check some sources of one indicator; returns a delta if anything changed"""
+        item = self.store.item(indicator)
+        if item is None:
+            return None  # Removed since it was picked
+        states = self.store.sources(indicator)
+        itype = IndicatorValidator.detect_type(indicator)
+        results = self.orchestrator.enrich_parallel(indicator, itype, timeout=self.timeout, sources=sources)
+
+        changed: Dict[str, Dict[str, Any]] = {}
+        updated = []
+        for source in sources:
+            state, result = states[source], results.get(source)
+            if isinstance(result, EnrichmentRecord):
+                result = result.to_dict()
+            updated.append(state)
+            self._count("checks")
+            state.checked_at = now
+
+            if not isinstance(result, RESULT_TYPES) or result.get('status') in FAILED_STATUSES:
+                # Keep the last good answer; try again soon
+                self._count("errors")
+                state.next_due = now + min(state.interval, ERROR_RETRY)
+                continue
+
+            new_fingerprint = fingerprint(result)
+            ttl = self.ttl(source)
+            if new_fingerprint == state.fingerprint and result.get('status') == state.status:
+                self._count("unchanged")
+                state.interval = min(state.interval * 1.5, ttl * 4)
+            else:
+                self._count("changed")
+                features = RiskScorer.extract_features(source, result)
+                changed[source] = {
+                    "status": result.get('status'),
+                    "fields": _field_changes(state.features or {}, features or {}),
+                    "first_check": state.fingerprint is None,
+                }
+                state.interval = max(state.interval / 2, ttl / 4) if state.fingerprint else state.interval
+                state.fingerprint, state.status, state.features = new_fingerprint, result.get('status'), features
+                state.changes += 1
+            state.next_due = now + state.interval * _jitter(indicator, source, now)
+
+        if not changed:
+            self.store.update(updated)
+            return None
+
+        # Something changed: rescore from the stored features of every source
+        risk_score = RiskScorer.score_features(
+            {source: state.features for source, state in states.items()},
+            {source: state.status for source, state in states.items() if state.status}
+        )
+        self.store.update(updated, risk_score.score, risk_score.severity)
+
+        delta = {
+            "indicator": indicator,
+            "type": item["type"],
+            "checked_at": now,
+            "score": {"old": item["score"], "new": risk_score.score},
+            "severity": {"old": item["severity"], "new": risk_score.severity},
+            "sources": changed,
+        }
+        self._count("deltas")
+        if self.on_delta:
+            try:
+                self.on_delta(delta)
+            except Exception:
+                logger.exception("Watchlist delta callback failed")
+        return delta
+
+
+def _field_changes(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    return {
+        name: {"old": old.get(name), "new": new.get(name)}
+        for name in sorted(set(old) | set(new))
+        if old.get(name) != new.get(name)
+    }
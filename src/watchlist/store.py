@@ -0,0 +1,187 @@
+"""
+Watchlist Store
+SQLite state for continuously re-enriched indicators
+
+Per watched indicator and source only a compact summary is kept:
+
+    fingerprint   64-bit hash of the source's last successful answer
+    features      the few values the scoring rules read from it
+    interval      current re-check interval (adapts to volatility)
+    next_due      when the source is next re-checked
+
+so 20k indicators x 5 sources stay a few MB, and a re-check that returns
+the same answer is detected without storing or comparing whole results.
+"""
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS watch_items (
+    indicator TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    score REAL,
+    severity TEXT,
+    added_at REAL NOT NULL,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS watch_sources (
+    indicator TEXT NOT NULL REFERENCES watch_items (indicator) ON DELETE CASCADE,
+    source TEXT NOT NULL,
+    status TEXT,
+    fingerprint TEXT,
+    features TEXT,
+    interval REAL NOT NULL,
+    checked_at REAL,
+    next_due REAL NOT NULL,
+    changes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (indicator, source)
+);
+CREATE INDEX IF NOT EXISTS watch_sources_due ON watch_sources (source, next_due);
+"""
+
+
+@dataclass
+class SourceState:
+    """Last known state of one source for one watched indicator"""
+    indicator: str
+    source: str
+    status: Optional[str]
+    fingerprint: Optional[str]
+    features: Optional[Dict[str, Any]]
+    interval: float
+    checked_at: Optional[float]
+    next_due: float
+    changes: int = 0
+
+
+class WatchlistStore:
+    """SQLite-backed watchlist, safe to share between threads"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in one immediate (write-locked) transaction"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _row_to_state(row: sqlite3.Row) -> SourceState:
+        return SourceState(
+            indicator=row["indicator"],
+            source=row["source"],
+            status=row["status"],
+            fingerprint=row["fingerprint"],
+            features=json.loads(row["features"]) if row["features"] else None,
+            interval=row["interval"],
+            checked_at=row["checked_at"],
+            next_due=row["next_due"],
+            changes=row["changes"]
+        )
+
+    def add(self, indicator: str, itype: str, sources: Dict[str, float], now: Optional[float] = None) -> bool:
+        """
+        Watch an indicator; `sources` maps each source to its initial interval
+
+        New sources are due immediately. Returns False if already watched.
+        """
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO watch_items (indicator, type, added_at) VALUES (?, ?, ?)",
+                (indicator, itype, now)
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO watch_sources (indicator, source, interval, next_due) VALUES (?, ?, ?, ?)",
+                [(indicator, source, interval, now) for source, interval in sources.items()]
+            )
+        return bool(cursor.rowcount)
+
+    def remove(self, indicator: str) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM watch_items WHERE indicator = ?", (indicator,))
+        return bool(cursor.rowcount)
+
+    def due(self, source: str, now: float, limit: int) -> List[str]:
+        """Indicators whose check of `source` is due, most overdue first"""
+        rows = self._connection().execute(
+            "SELECT indicator FROM watch_sources WHERE source = ? AND next_due <= ? ORDER BY next_due LIMIT ?",
+            (source, now, limit)
+        )
+        return [row["indicator"] for row in rows]
+
+    def item(self, indicator: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT * FROM watch_items WHERE indicator = ?", (indicator,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def sources(self, indicator: str) -> Dict[str, SourceState]:
+        rows = self._connection().execute(
+            "SELECT * FROM watch_sources WHERE indicator = ?", (indicator,)
+        )
+        return {row["source"]: self._row_to_state(row) for row in rows}
+
+    def update(self, states: Iterable[SourceState], score: Optional[float] = None, severity: Optional[str] = None):
+        """Save re-checked sources, and the indicator's new score if it was rescored"""
+        states = list(states)
+        if not states:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE watch_sources SET status = ?, fingerprint = ?, features = ?, interval = ?, "
+                "checked_at = ?, next_due = ?, changes = ? WHERE indicator = ? AND source = ?",
+                [
+                    (
+                        s.status, s.fingerprint, json.dumps(s.features) if s.features is not None else None,
+                        s.interval, s.checked_at, s.next_due, s.changes, s.indicator, s.source
+                    )
+                    for s in states
+                ]
+            )
+            if score is not None:
+                conn.execute(
+                    "UPDATE watch_items SET score = ?, severity = ?, updated_at = ? WHERE indicator = ?",
+                    (score, severity, time.time(), states[0].indicator)
+                )
+
+    def next_due(self) -> Optional[float]:
+        row = self._connection().execute("SELECT MIN(next_due) AS due FROM watch_sources").fetchone()
+        return row["due"]
+
+    def counts(self) -> Dict[str, Any]:
+        """Watched indicators, and per source: tracked, due now and changes seen"""
+        conn = self._connection()
+        now = time.time()
+        total = conn.execute("SELECT COUNT(*) AS n FROM watch_items").fetchone()["n"]
+        rows = conn.execute(
+            "SELECT source, COUNT(*) AS tracked, SUM(next_due <= ?) AS due, SUM(changes) AS changes "
+            "FROM watch_sources GROUP BY source ORDER BY source", (now,)
+        )
+        return {"indicators": total, "sources": {row["source"]: dict(row) for row in rows}}
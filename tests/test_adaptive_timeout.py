@@ -0,0 +1,225 @@
+"""
+Tests for Adaptive Provider Timeouts
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.clients.adaptive_timeout import AdaptiveTimeout, AdaptiveTimeouts, LatencySketch
+from src.clients.http_client import HTTPClient
+from src.telemetry.metrics import PROVIDER_HEDGES, REGISTRY
+
+
+@pytest.fixture(autouse=True)
+def fresh_trackers():
+    yield
+    AdaptiveTimeouts.configure()
+
+
+@pytest.fixture
+def stalling_server():
+    """Answers at once, except that requests listed in `stall` (by number) wait `stall_seconds`"""
+    state = {"count": 0, "stall": set(), "stall_seconds": 1.0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, so connections are reused
+
+        def do_GET(self):
+            with lock:
+                state["count"] += 1
+                number = state["count"]
+            if number in state["stall"]:
+                time.sleep(state["stall_seconds"])
+            body = json.dumps({"n": number}).encode()
+            try:
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except ConnectionError:
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}/", state
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestLatencySketch:
+    """Test streaming quantile accuracy and decay"""
+
+    def test_quantiles_within_relative_accuracy(self):
+        """Test p50/p95/p99 of a long-tailed sample are within 3% of exact"""
+        rng = random.Random(7)
+        values = [rng.lognormvariate(-3, 1) for _ in range(1500)]
+        sketch = LatencySketch(relative_accuracy=0.02)
+        for value in values:
+            sketch.add(value)
+        values.sort()
+        for q in (0.5, 0.95, 0.99):
+            exact = values[int(q * len(values)) - 1]
+            assert sketch.quantile(q) == pytest.approx(exact, rel=0.03)
+
+    def test_recent_latency_outweighs_old(self):
+        """Test halving old counts lets a lasting slowdown dominate the median"""
+        sketch = LatencySketch(max_count=100)
+        for _ in range(100):
+            sketch.add(0.01)
+        for _ in range(200):
+            sketch.add(1.0)
+        assert sketch.count <= 100
+        assert sketch.quantile(0.5) == pytest.approx(1.0, rel=0.03)
+
+    def test_empty(self):
+        """Test an empty sketch has no quantiles"""
+        assert LatencySketch().quantile(0.5) is None
+
+
+class TestAdaptiveTimeout:
+    """Test timeouts derived from quantiles stay within bounds"""
+
+    def test_configured_timeout_until_warm(self):
+        """Test the configured timeout applies until min_samples are seen"""
+        tracker = AdaptiveTimeout("Test", min_samples=5)
+        for _ in range(4):
+            tracker.observe_first_byte(0.1)
+        assert tracker.timeouts(30) == (30, 30)
+        tracker.observe_first_byte(0.1)
+        assert tracker.timeouts(30)[1] == 1.0  # 3 x p99 is under the floor
+        assert tracker.hedge_after() is None
+
+    def test_bounds(self):
+        """Test read timeouts follow p99 between the floor and the configured timeout"""
+        tracker = AdaptiveTimeout("Test", min_samples=5, multiplier=3, min_timeout=1)
+        for _ in range(10):
+            tracker.observe_first_byte(2.0)
+        assert tracker.timeouts(30)[1] == pytest.approx(6.0, rel=0.02)
+        assert tracker.timeouts(5)[1] == 5
+        # Connect timeout learns separately
+        assert tracker.timeouts(30)[0] == 30
+
+    def test_timeouts_recover_from_slowdown(self):
+        """Test recording timed-out attempts at their timeout raises the next timeout"""
+        tracker = AdaptiveTimeout("Test", min_samples=5, min_timeout=0.1)
+        for _ in range(20):
+            tracker.observe_first_byte(0.05)
+        timeout = tracker.timeouts(30)[1]
+        for _ in range(20):
+            tracker.observe_first_byte(timeout)
+        assert tracker.timeouts(30)[1] > 2 * timeout
+
+    def test_disabled(self):
+        """Test adaptive=False keeps the configured timeout"""
+        tracker = AdaptiveTimeout("Test", min_samples=1, adaptive=False, hedge_quantile=0.95)
+        tracker.observe_first_byte(0.01)
+        assert tracker.timeouts(30) == (30, 30)
+        assert tracker.hedge_after() is None
+
+    def test_median_read_while_recording(self):
+        """Test the median can be read while other threads record and decay the sketch"""
+        tracker = AdaptiveTimeout("Test")
+        assert tracker.median_first_byte() is None
+        tracker.observe_first_byte(0.1)
+        stop = threading.Event()
+
+        def record(seed):
+            rng = random.Random(seed)
+            while not stop.is_set():
+                tracker.observe_first_byte(rng.lognormvariate(-2, 1.5))
+
+        writers = [threading.Thread(target=record, args=(seed,)) for seed in range(4)]
+        for writer in writers:
+            writer.start()
+        try:
+            for _ in range(2000):
+                assert tracker.median_first_byte() > 0
+        finally:
+            stop.set()
+            for writer in writers:
+                writer.join()
+
+
+class TestHTTPClientTimeouts:
+    """Test HTTPClient learns per-provider timeouts and hedges slow GETs"""
+
+    def test_client_learns_read_and_connect_latency(self, stalling_server):
+        """Test requests feed the sketches and tighten the timeouts used"""
+        url, _ = stalling_server
+        AdaptiveTimeouts.configure(min_samples=5, min_timeout=0.5)
+        client = HTTPClient(timeout=30, provider="AdaptiveTest")
+        for _ in range(5):
+            client.get_json(url)
+        client.close()
+        client = HTTPClient(timeout=30, provider="AdaptiveTest", shared_pools=False)
+        for _ in range(5):
+            client.get_json(url)  # Own pool, so a new connection
+        client.close()
+
+        tracker = AdaptiveTimeouts.get("AdaptiveTest")
+        assert tracker.first_byte.count == 10
+        assert tracker.connect.count == 2
+        assert tracker.current == (30, 0.5)
+        assert 'threatfusion_provider_timeout_seconds{provider="AdaptiveTest",kind="read"} 0.5' in REGISTRY.render()
+
+    def test_stall_fails_at_learned_timeout(self, stalling_server):
+        """Test a stalled request times out at the learned timeout, not the configured one"""
+        url, state = stalling_server
+        AdaptiveTimeouts.configure(min_samples=5, min_timeout=0.3)
+        client = HTTPClient(timeout=30, max_retries=0, provider="AdaptiveStall")
+        for _ in range(5):
+            client.get_json(url)
+        state["stall"] = {6}
+        started = time.perf_counter()
+        with pytest.raises(Exception, match="timed out"):
+            client.get_json(url)
+        assert time.perf_counter() - started < 0.6
+        client.close()
+
+    def test_hedge_answers_stalled_request(self, stalling_server):
+        """Test a GET unanswered past p95 is resent and the faster copy wins"""
+        url, state = stalling_server
+        AdaptiveTimeouts.configure(min_samples=5, min_timeout=5, hedge_quantile=0.95)
+        client = HTTPClient(timeout=10, provider="HedgeTest")
+        for _ in range(5):
+            client.get_json(url)
+        state["stall"] = {6}
+        started = time.perf_counter()
+        assert client.get_json(url) == {"n": 7}
+        assert time.perf_counter() - started < 0.5
+        assert PROVIDER_HEDGES.value("HedgeTest", "hedge") == 1
+        # Warm requests that answer in time are not hedged
+        assert client.get_json(url) == {"n": 8}
+        assert PROVIDER_HEDGES.value("HedgeTest", "hedge") == 1
+        client.close()
+
+    def test_original_request_sent_on_callers_thread(self, stalling_server, monkeypatch):
+        """Test only the hedge copy uses the hedge pool and the abandoned original isn't retried"""
+        url, state = stalling_server
+        AdaptiveTimeouts.configure(min_samples=5, min_timeout=5, hedge_quantile=0.95)
+        client = HTTPClient(timeout=10, provider="HedgeThreads")
+        for _ in range(5):
+            client.get_json(url)
+
+        senders = []
+        send = HTTPClient._send
+
+        def recording_send(self, *args, **kwargs):
+            senders.append(threading.current_thread().name)
+            return send(self, *args, **kwargs)
+
+        monkeypatch.setattr(HTTPClient, "_send", recording_send)
+        state["stall"] = {6}
+        assert client.get_json(url) == {"n": 7}
+        time.sleep(1.2)  # Let the stalled original give up
+        assert senders[0] == threading.current_thread().name
+        assert senders[1].startswith("http-hedge")
+        assert state["count"] == 7
+        client.close()
@@ -0,0 +1,252 @@
+"""
+Tests for API Admission Control and Cancellation
+"""
+import json
+import socket
+import threading
+import time
+import httpx
+import pytest
+from api import main as api
+from api.admission import AdmissionController, Rejected
+from benchmarks.bench_suite import APIServer
+from benchmarks.mock_providers import Latency, MockConfig, MockProviderServer, mock_agents, unlimit_providers
+from src.agents.shodan import ShodanAgent
+from src.clients.cancellation import Cancelled, cancel_scope
+from src.clients.circuit_breaker import CircuitBreakers
+from src.clients.http_client import HTTPClient
+from src.clients.rate_limiter import RateLimiter, TokenBucket, rate_limit
+from src.config import config
+from src.telemetry.metrics import API_ADMISSION
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def drained_bucket(per_minute: int) -> TokenBucket:
+    bucket = TokenBucket(per_minute)
+    bucket.tokens = 0
+    return bucket
+
+
+class BlockingLimiter:
+    """Limiter with no local state that never grants a token; records how its wait ended"""
+
+    waiting = 0
+    available = 0
+
+    def __init__(self):
+        self.ended = threading.Event()
+        self.cancelled = False
+
+    def wait_for_token(self, timeout=None, cancel=None):
+        self.cancelled = cancel is not None and cancel.wait(10)
+        self.ended.set()
+        return False
+
+
+@pytest.fixture
+def limiters():
+    """Unlimited providers; tests install slow buckets for the ones they exercise"""
+    previous = unlimit_providers()
+    yield
+    for name, limiter in previous.items():
+        RateLimiter.install(name, limiter)
+
+
+@pytest.fixture
+def mock_url():
+    server = MockProviderServer(MockConfig(latency=Latency(100, 0)))
+    yield server.start()
+    server.stop()
+
+
+@pytest.fixture
+def api_server(mock_url, limiters, tmp_path, monkeypatch):
+    monkeypatch.setattr(api, "initialize_agents", api.initialize_agents)
+    monkeypatch.setattr(config.app_config, "jobs_db_path", config.app_config.jobs_db_path)
+    with APIServer(mock_url, str(tmp_path)) as server:
+        yield server
+
+
+class TestAdmissionController:
+    """Test queue-wait estimates and rejections"""
+
+    def test_rejects_when_rate_limit_wait_passes_deadline(self, limiters):
+        """Test 429 with a Retry-After of the time until the deadline could be met"""
+        RateLimiter.install("shodan", drained_bucket(6))  # One token every 10 s
+        controller = AdmissionController()
+        agents = [ShodanAgent("key")]
+        assert controller.estimate(agents)[0] == pytest.approx(10, abs=0.1)
+
+        with pytest.raises(Rejected) as rejected:
+            controller.admit(agents, deadline=4)
+        assert rejected.value.status_code == 429
+        assert rejected.value.retry_after == 6
+        controller.admit(agents, deadline=11)
+
+    def test_admitted_requests_queue_behind_each_other(self, limiters):
+        """Test each admitted request pushes the next one's estimate back one token"""
+        RateLimiter.install("shodan", drained_bucket(6))
+        controller = AdmissionController()
+        agents = [ShodanAgent("key")]
+        first = controller.admit(agents, deadline=25)
+        controller.admit(agents, deadline=25)
+        with pytest.raises(Rejected) as rejected:
+            controller.admit(agents, deadline=25)
+        assert rejected.value.retry_after == 5
+
+        first.release()
+        first.release()  # Idempotent
+        assert controller.inflight == 1
+        controller.admit(agents, deadline=25)
+
+    def test_unlimited_and_unknown_limiters_never_wait(self, limiters):
+        """Test providers without local limiter state add no wait"""
+        controller = AdmissionController()
+        assert controller.estimate(mock_agents("http://127.0.0.1:9"))[0] == 0
+
+    def test_busy_when_inflight_limit_reached(self, limiters):
+        """Test 503 with a Retry-After of the earliest in-flight deadline"""
+        clock = FakeClock()
+        controller = AdmissionController(max_inflight=2, clock=clock)
+        controller.admit([], deadline=30)
+        clock.now = 10
+        controller.admit([], deadline=30)
+        clock.now = 12.5
+        with pytest.raises(Rejected) as rejected:
+            controller.admit([], deadline=30)
+        assert rejected.value.status_code == 503
+        assert rejected.value.retry_after == 18
+
+
+class TestCancellation:
+    """Test cancelled work gives up its rate-limiter wait without spending tokens"""
+
+    def test_bucket_wait_ends_on_cancel(self):
+        """Test a waiting caller returns False soon after its event is set"""
+        bucket = drained_bucket(6)
+        cancel = threading.Event()
+        threading.Timer(0.1, cancel.set).start()
+        started = time.perf_counter()
+        assert not bucket.wait_for_token(cancel=cancel)
+        assert time.perf_counter() - started < 0.4
+        assert bucket.waiting == 0
+
+    def test_rate_limited_call_raises_cancelled(self, limiters):
+        """Test the decorated call is never made once its scope is cancelled"""
+        RateLimiter.install("shodan", drained_bucket(6))
+        calls = []
+
+        @rate_limit("shodan")
+        def call():
+            calls.append(1)
+
+        cancel = threading.Event()
+        cancel.set()
+        with cancel_scope(cancel), pytest.raises(Cancelled):
+            call()
+        assert calls == []
+        assert call.limiter_name == "shodan"
+
+    def test_http_client_sends_nothing_once_cancelled(self, mock_url):
+        """Test a cancelled scope's requests never reach the provider or its breaker"""
+        server_url = mock_url + "/abuseipdb/api/v2/check?ipAddress=192.0.2.1"
+        client = HTTPClient(timeout=5, provider="CancelTest")
+        cancel = threading.Event()
+        cancel.set()
+        with cancel_scope(cancel), pytest.raises(Cancelled):
+            client.get_json(server_url)
+        assert CircuitBreakers.get("CancelTest").snapshot()["calls"] == 0
+        client.close()
+
+    def test_retry_backoff_ends_on_cancel(self):
+        """Test a request backing off before a retry gives up when its scope is cancelled"""
+        server = MockProviderServer(MockConfig(latency=Latency(0, 0), error_rate=1.0))
+        url = server.start() + "/abuseipdb/api/v2/check?ipAddress=192.0.2.1"
+        client = HTTPClient(timeout=5, backoff_factor=5, provider="CancelRetry")
+        cancel = threading.Event()
+        threading.Timer(0.2, cancel.set).start()
+        started = time.perf_counter()
+        try:
+            with cancel_scope(cancel), pytest.raises(Cancelled):
+                client.get(url)
+        finally:
+            client.close()
+            server.stop()
+        assert time.perf_counter() - started < 1
+        assert server.requests == 2  # The first retry is immediate; the second backs off
+
+
+def post_and_disconnect(url: str, body: dict, wait: float):
+    """POST to the API, then close the connection without reading the answer"""
+    host, port = url.removeprefix("http://").split(":")
+    payload = json.dumps(body).encode()
+    with socket.create_connection((host, int(port))) as sock:
+        sock.sendall(
+            b"POST /api/enrich HTTP/1.1\r\nHost: test\r\nContent-Type: application/json\r\n"
+            + f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+        )
+        time.sleep(wait)
+
+
+class TestAPIAdmission:
+    """Test admission control and cancellation through the running API"""
+
+    def test_enrichments_run_concurrently(self, api_server):
+        """Test concurrent requests are not serialized on the event loop"""
+        with httpx.Client(base_url=api_server.url, timeout=30) as client:
+            client.post("/api/enrich", json={"indicator": "198.51.100.1"})
+            started = time.perf_counter()
+            threads = [
+                threading.Thread(target=client.post, args=("/api/enrich",), kwargs={"json": {"indicator": f"198.51.100.{i}"}})
+                for i in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        # Each enrichment waits 100 ms on the providers; serialized, 8 would take 800 ms+
+        assert time.perf_counter() - started < 0.4
+
+    def test_rejected_with_retry_after(self, api_server):
+        """Test a request whose rate-limit wait exceeds its timeout gets 429 and Retry-After"""
+        RateLimiter.install("shodan", drained_bucket(6))
+        with httpx.Client(base_url=api_server.url, timeout=30) as client:
+            response = client.post("/api/enrich", json={"indicator": "198.51.100.1", "timeout": 5})
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "5"
+        assert "rate limits" in response.json()["detail"]
+
+    def test_client_disconnect_cancels_queued_calls(self, api_server):
+        """Test a disconnected client's rate-limited calls are dropped without reaching the provider"""
+        shodan = drained_bucket(6)
+        RateLimiter.install("shodan", shodan)
+        cancelled = API_ADMISSION.value("cancelled")
+
+        post_and_disconnect(api_server.url, {"indicator": "198.51.100.1", "timeout": 30}, wait=0.5)
+        assert shodan.waiting == 1
+
+        deadline = time.monotonic() + 2
+        while api.admission_control.inflight and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert api.admission_control.inflight == 0
+        assert shodan.waiting == 0
+        assert shodan.available < 1  # No token was taken for the abandoned call
+        assert API_ADMISSION.value("cancelled") == cancelled + 1
+
+    def test_deadline_cancels_stragglers(self, api_server):
+        """Test calls still queued when the enrichment deadline passes are cancelled"""
+        shodan = BlockingLimiter()
+        RateLimiter.install("shodan", shodan)
+        with httpx.Client(base_url=api_server.url, timeout=30) as client:
+            response = client.post("/api/enrich", json={"indicator": "198.51.100.1", "timeout": 1})
+        assert response.status_code == 200
+        assert "timeout" in response.json()["results"]["Shodan"]["error"]
+        assert shodan.ended.wait(2)
+        assert shodan.cancelled
@@ -0,0 +1,83 @@
+"""
+Tests for Response Archive
+"""
+import json
+from src.storage.archive import ResponseArchive
+from src.fusion.rescore import iter_archived_results, rescore_archive
+
+
+SHODAN_HOST = {
+    "country_name": "United States",
+    "org": "Example Org",
+    "ports": [22, 443],
+    "vulns": {"CVE-2021-1": {}, "CVE-2021-2": {}, "CVE-2021-3": {}},
+    "data": [{"port": 22, "transport": "tcp", "data": "SSH-2.0-OpenSSH" * 50}],
+}
+
+VT_IP = {"data": {"attributes": {"last_analysis_stats": {"malicious": 35, "harmless": 35}}}}
+
+
+class TestResponseArchive:
+    """Test append-only archive storage"""
+
+    def test_append_and_read(self, tmp_path):
+        """Test archived bodies round-trip through the index"""
+        archive = ResponseArchive(str(tmp_path))
+        body = json.dumps(SHODAN_HOST).encode()
+        record = archive.append("Shodan", "host", "1.2.3.4", body)
+
+        assert archive.read(record) == body
+        assert [r.indicator for r in archive.records()] == ["1.2.3.4"]
+
+    def test_segment_rollover(self, tmp_path):
+        """Test a new segment starts once the current one is full"""
+        archive = ResponseArchive(str(tmp_path), max_segment_bytes=64)
+        for i in range(5):
+            archive.append("OTX", "IPv4", f"10.0.0.{i}", b'{"pulse_info": {"count": %d}}' % i)
+
+        records = list(archive.records())
+        assert len({r.segment for r in records}) > 1
+        assert [json.loads(body)["pulse_info"]["count"] for _, body in archive.scan()] == [0, 1, 2, 3, 4]
+
+    def test_reopen_appends_to_existing(self, tmp_path):
+        """Test reopening an archive keeps existing records"""
+        ResponseArchive(str(tmp_path)).append("OTX", "IPv4", "1.1.1.1", b"{}")
+        ResponseArchive(str(tmp_path)).append("OTX", "IPv4", "2.2.2.2", b"{}")
+        assert len(list(ResponseArchive(str(tmp_path)).records())) == 2
+
+
+class TestRescore:
+    """Test offline re-parsing and re-scoring"""
+
+    def test_rescore_from_archive(self, tmp_path):
+        """Test archived payloads are re-parsed by agent extractors and scored"""
+        archive = ResponseArchive(str(tmp_path))
+        archive.append("Shodan", "host", "1.2.3.4", json.dumps(SHODAN_HOST).encode())
+        archive.append("VirusTotal", "ip", "1.2.3.4", json.dumps(VT_IP).encode())
+
+        (indicator, results), = list(iter_archived_results(archive))
+        assert indicator == "1.2.3.4"
+        assert results["Shodan"]["data"]["vulns"] == ["CVE-2021-1", "CVE-2021-2", "CVE-2021-3"]
+        assert len(results["Shodan"]["data"]["services"][0]["banner"]) == 200
+
+        indicators, _, scored = rescore_archive(archive)
+        assert indicators == ["1.2.3.4"]
+        assert scored.scores[0] == 4.5  # 2.5 VirusTotal + 2.0 Shodan
+
+    def test_latest_response_wins(self, tmp_path):
+        """Test only the most recent response per source is rescored"""
+        archive = ResponseArchive(str(tmp_path))
+        archive.append("AbuseIPDB", "check", "5.6.7.8", b'{"data": {"abuseConfidenceScore": 10}}')
+        archive.append("AbuseIPDB", "check", "5.6.7.8", b'{"data": {"abuseConfidenceScore": 90}}')
+
+        _, results, scored = rescore_archive(archive)
+        assert results[0]["AbuseIPDB"]["data"]["abuse_confidence_score"] == 90
+        assert scored.scores[0] == 0.9
+
+    def test_first_seen_is_earliest_fetch(self, tmp_path):
+        """Test first_seen keeps each indicator's earliest fetch time"""
+        archive = ResponseArchive(str(tmp_path))
+        archive.append("AbuseIPDB", "check", "5.6.7.8", b'{}')
+        first = archive.first_seen()["5.6.7.8"]
+        archive.append("Shodan", "host", "5.6.7.8", b'{}')
+        assert archive.first_seen() == {"5.6.7.8": first}
@@ -0,0 +1,194 @@
+"""
+Tests for HTTP Cassette Record/Replay
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from click.testing import CliRunner
+from benchmarks.mock_providers import Latency, MockConfig, MockProviderServer, mock_agents, unlimit_providers
+from src import main
+from src.clients.cassette import Cassette, RECORD, REPLAY, use_cassette
+from src.clients.http_client import HTTPClient
+from src.clients.rate_limiter import RateLimiter
+from src.config import APIConfig, config
+from src.fusion.orchestrator import EnrichmentOrchestrator
+from src.models import IndicatorType
+
+
+@pytest.fixture(autouse=True)
+def no_active_cassette():
+    yield
+    use_cassette(None)
+
+
+@pytest.fixture
+def unlimited():
+    previous = unlimit_providers()
+    yield
+    for name, limiter in previous.items():
+        RateLimiter.install(name, limiter)
+
+
+@pytest.fixture
+def counting_server():
+    """Answers every request with how many it has served"""
+    served = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            served.append(self.path)
+            body = json.dumps({"count": len(served)}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}", served
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def enrich_all(url):
+    orchestrator = EnrichmentOrchestrator(mock_agents(url))
+    return {
+        indicator: orchestrator.enrich_parallel(indicator, itype)
+        for indicator, itype in [("203.0.113.7", IndicatorType.IP_V4), ("evil.example", IndicatorType.DOMAIN)]
+    }
+
+
+def data_by_source(runs):
+    return {
+        (indicator, name): (record.status, record.data)
+        for indicator, results in runs.items()
+        for name, record in results.items() if name != "_metadata"
+    }
+
+
+class TestCassette:
+    """Test recording provider traffic and replaying it offline"""
+
+    def test_replay_matches_recording_without_network(self, tmp_path, unlimited):
+        """Test replayed enrichments equal the recorded ones after the server is gone"""
+        server = MockProviderServer(MockConfig(latency=Latency(0)))
+        url = server.start()
+
+        use_cassette(Cassette(str(tmp_path), RECORD))
+        recorded = enrich_all(url)
+        requests_served = server.requests
+        server.stop()
+
+        use_cassette(Cassette(str(tmp_path), REPLAY, latency_scale=0))
+        replayed = enrich_all(url)
+
+        assert data_by_source(replayed) == data_by_source(recorded)
+        assert all(status == "success" for status, _ in data_by_source(replayed).values())
+        assert len(list(Cassette(str(tmp_path)).interactions())) == requests_served
+
+    def test_credentials_not_stored(self, tmp_path, unlimited):
+        """Test query-string keys are neither stored nor part of the match key"""
+        server = MockProviderServer(MockConfig(latency=Latency(0)))
+        url = server.start()
+        use_cassette(Cassette(str(tmp_path), RECORD))
+        EnrichmentOrchestrator(mock_agents(url)).enrich_parallel("203.0.113.7", IndicatorType.IP_V4)
+        server.stop()
+
+        index = (tmp_path / "index.jsonl").read_text()
+        assert "/shodan/shodan/host/203.0.113.7" in index
+        assert "bench" not in index  # The agents' API keys
+
+    def test_latency_scale(self, tmp_path, counting_server):
+        """Test replay reproduces the recorded latency, scaled"""
+        url, _ = counting_server
+        recording = Cassette(str(tmp_path), RECORD)
+        HTTPClient(timeout=5, cassette=recording).get_json(f"{url}/slow")
+        # Pretend the provider took 200 ms
+        index = tmp_path / "index.jsonl"
+        entry = json.loads(index.read_text())
+        entry["latency"] = 0.2
+        index.write_text(json.dumps(entry) + "\n")
+
+        for scale, low, high in [(1.0, 0.19, 0.5), (0.25, 0.045, 0.15), (0, 0, 0.04)]:
+            client = HTTPClient(timeout=5, cassette=Cassette(str(tmp_path), REPLAY, latency_scale=scale))
+            started = time.perf_counter()
+            assert client.get_json(f"{url}/slow") == {"count": 1}
+            assert low <= time.perf_counter() - started < high
+
+    def test_scaled_latency_beyond_timeout(self, tmp_path, counting_server):
+        """Test a replayed response slower than the client timeout times out"""
+        url, _ = counting_server
+        HTTPClient(timeout=5, cassette=Cassette(str(tmp_path), RECORD)).get(f"{url}/a")
+        index = tmp_path / "index.jsonl"
+        index.write_text(index.read_text().replace('"latency": ', '"latency": 10'))
+
+        client = HTTPClient(timeout=0.05, cassette=Cassette(str(tmp_path), REPLAY))
+        with pytest.raises(Exception, match="timeout"):
+            client.get(f"{url}/a")
+
+    def test_repeats_replay_in_order(self, tmp_path, counting_server):
+        """Test a request recorded twice replays both answers, then cycles"""
+        url, served = counting_server
+        recording = HTTPClient(timeout=5, cassette=Cassette(str(tmp_path), RECORD))
+        assert [recording.get_json(f"{url}/x")["count"] for _ in range(2)] == [1, 2]
+
+        replay = HTTPClient(timeout=5, cassette=Cassette(str(tmp_path), REPLAY, latency_scale=0))
+        assert [replay.get_json(f"{url}/x")["count"] for _ in range(3)] == [1, 2, 1]
+        assert len(served) == 2
+
+    def test_miss_fails_without_network(self, tmp_path, counting_server):
+        """Test an unrecorded request fails instead of reaching the server"""
+        url, served = counting_server
+        HTTPClient(timeout=5, cassette=Cassette(str(tmp_path), RECORD)).get(f"{url}/recorded")
+        cassette = Cassette(str(tmp_path), REPLAY)
+
+        with pytest.raises(Exception, match="No recorded response"):
+            HTTPClient(timeout=5, cassette=cassette).get(f"{url}/other")
+        assert served == ["/recorded"]
+        assert cassette.stats["missed"] == 1
+
+    def test_recorded_error_status_replays(self, tmp_path, counting_server):
+        """Test error responses are replayed, not turned into misses"""
+        url, _ = counting_server
+        HTTPClient(timeout=5, cassette=Cassette(str(tmp_path), RECORD)).get(f"{url}/ok")
+        index = tmp_path / "index.jsonl"
+        index.write_text(index.read_text().replace('"status_code": 200', '"status_code": 404'))
+
+        with pytest.raises(Exception, match="404"):
+            HTTPClient(timeout=5, cassette=Cassette(str(tmp_path), REPLAY, latency_scale=0)).get(f"{url}/ok")
+
+
+class TestReplayCommand:
+    """Test `threatfusion --replay DIR ...`"""
+
+    def test_enrich_offline_without_keys(self, tmp_path, monkeypatch, unlimited):
+        """Test a replayed enrich needs no API keys and no network"""
+        monkeypatch.setattr(config, "api_config", APIConfig())
+        monkeypatch.setattr(main, "forward_to_sinks", lambda entries: 0)
+        cassette = Cassette(str(tmp_path), RECORD)
+        request = requests.Request("GET", "https://otx.alienvault.com/api/v1/indicators/IPv4/8.8.8.8/general").prepare()
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({"pulse_info": {"count": 2, "pulses": []}, "validation": []}).encode()
+        cassette.record(request, "OTX", response, 0.001)
+
+        result = CliRunner().invoke(main.cli, ["--replay", str(tmp_path), "enrich", "8.8.8.8", "--output", "json"])
+
+        assert result.exit_code == 0, result.output
+        assert "Initialized 5 agents" in result.output
+        assert '"pulse_count": 2' in result.output
+
+    def test_record_and_replay_exclusive(self, tmp_path):
+        """Test --record and --replay cannot be combined"""
+        result = CliRunner().invoke(main.cli, ["--record", str(tmp_path), "--replay", str(tmp_path), "version"])
+        assert result.exit_code != 0
+        assert "mutually exclusive" in result.output
@@ -0,0 +1,121 @@
+"""
+Tests for Checkpointed Batch Runs
+"""
+import json
+from datetime import datetime
+from src.fusion.checkpoint import RunJournal, BatchRun, JOURNAL_FILE
+from src.fusion.orchestrator import EnrichmentOrchestrator
+from tests.test_jobs import FakeAgent, FlakyAgent
+
+
+class CountingAgent(FakeAgent):
+    """FakeAgent that counts its calls"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def enrich(self, indicator, itype):
+        self.calls += 1
+        return super().enrich(indicator, itype)
+
+
+def start_run(tmp_path, indicators, run_id="run1"):
+    return RunJournal.create(str(tmp_path), indicators, {"timeout": 5}, run_id=run_id)
+
+
+class TestRunJournal:
+    """Test the checkpoint journal"""
+
+    def test_records_and_replays(self, tmp_path):
+        """Test finished indicators are journaled and read back in input order"""
+        journal = start_run(tmp_path, ["8.8.8.8\n", "# comment\n", "not valid!\n", "1.1.1.1\n"])
+        stats = BatchRun(journal, EnrichmentOrchestrator([FakeAgent()])).run()
+
+        assert stats == {"skipped": 0, "enriched": 2, "resumed": 0, "invalid": 1}
+        entries = list(RunJournal.open(str(tmp_path), "run1").entries())
+        assert [indicator for indicator, _, _ in entries] == ["8.8.8.8", "1.1.1.1"]
+        assert entries[0][1]["OTX"]["data"]["pulse_count"] == 3
+        assert entries[0][2].components[0]["source"] == "OTX"
+
+    def test_torn_line_ignored(self, tmp_path):
+        """Test a partial line left by a crash doesn't break resuming"""
+        journal = start_run(tmp_path, ["8.8.8.8"])
+        BatchRun(journal, EnrichmentOrchestrator([FakeAgent()])).run()
+        with open(journal.path / JOURNAL_FILE, "a", encoding="utf-8") as f:
+            f.write('{"p": 0, "s": "OT')
+
+        done, partial = RunJournal.open(str(tmp_path), "run1").state()
+        assert done == {0}
+        assert partial == {}
+
+    def test_first_seen_survives_resume(self, tmp_path):
+        """Test first-seen times come from the earliest journaled fetch"""
+        journal = start_run(tmp_path, ["8.8.8.8", "1.1.1.1"])
+        journal._write({"p": 0, "s": "OTX", "r": {
+            "indicator": "8.8.8.8", "source": "OTX", "status": "error", "timestamp": "2024-05-01T00:00:00"
+        }})
+        journal.close()
+        BatchRun(RunJournal.open(str(tmp_path), "run1"), EnrichmentOrchestrator([FakeAgent()])).run()
+
+        first_seen = RunJournal.open(str(tmp_path), "run1").first_seen()
+        assert first_seen["8.8.8.8"] == datetime(2024, 5, 1)
+        assert first_seen["1.1.1.1"] > datetime(2024, 5, 1)
+
+    def test_unknown_run(self, tmp_path):
+        """Test opening a run that doesn't exist is rejected"""
+        try:
+            RunJournal.open(str(tmp_path), "missing")
+        except ValueError as e:
+            assert "missing" in str(e)
+        else:
+            assert False, "expected ValueError"
+
+
+class TestResume:
+    """Test resuming checkpointed runs"""
+
+    def test_resume_retries_only_failures(self, tmp_path):
+        """Test resume skips complete indicators and re-queries only failed sources"""
+        stable, flaky = CountingAgent(), FlakyAgent(failures=1)
+        orchestrator = EnrichmentOrchestrator([stable, flaky])
+        BatchRun(start_run(tmp_path, ["8.8.8.8", "1.1.1.1"]), orchestrator).run()
+        assert (stable.calls, flaky.calls) == (2, 2)
+
+        stats = BatchRun(RunJournal.open(str(tmp_path), "run1"), orchestrator).run()
+
+        assert stats["skipped"] == 1
+        assert stats["resumed"] == 1
+        assert (stable.calls, flaky.calls) == (2, 3)
+        results = {indicator: r for indicator, r, _ in RunJournal.open(str(tmp_path), "run1").entries()}
+        assert results["8.8.8.8"]["Shodan"]["status"] == "success"
+        assert results["8.8.8.8"]["OTX"]["status"] == "success"
+
+    def test_resume_is_idempotent(self, tmp_path):
+        """Test resuming a complete run makes no agent calls"""
+        agent = CountingAgent()
+        orchestrator = EnrichmentOrchestrator([agent])
+        BatchRun(start_run(tmp_path, ["8.8.8.8", "1.1.1.1"]), orchestrator).run()
+
+        for _ in range(2):
+            stats = BatchRun(RunJournal.open(str(tmp_path), "run1"), orchestrator).run()
+            assert stats["skipped"] == 2
+        assert agent.calls == 2
+        assert len(list(RunJournal.open(str(tmp_path), "run1").entries())) == 2
+
+    def test_resume_after_crash(self, tmp_path):
+        """Test sources journaled before a crash are reused for an unfinished indicator"""
+        journal = start_run(tmp_path, ["8.8.8.8"])
+        journal._write({"p": 0, "s": "OTX", "r": {
+            "indicator": "8.8.8.8", "source": "OTX", "status": "success", "data": {"pulse_count": 7}
+        }})
+        journal.close()
+
+        otx, shodan = CountingAgent(), FlakyAgent(failures=0)
+        stats = BatchRun(RunJournal.open(str(tmp_path), "run1"), EnrichmentOrchestrator([otx, shodan])).run()
+
+        assert stats["resumed"] == 1
+        assert (otx.calls, shodan.calls) == (0, 1)
+        _, results, _ = next(RunJournal.open(str(tmp_path), "run1").entries())
+        assert results["OTX"]["data"]["pulse_count"] == 7
+        assert json.loads(json.dumps(results["Shodan"]))["data"]["ports"] == [443]
@@ -0,0 +1,177 @@
+"""
+Tests for Provider Circuit Breakers
+"""
+import asyncio
+import time
+import pytest
+from benchmarks.faults import Fault, Scenario
+from benchmarks.mock_providers import Latency, MockConfig, MockProviderServer, mock_agents, unlimit_providers
+from src.clients.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakers
+from src.clients.http_client import HTTPClient
+from src.clients.rate_limiter import RateLimiter
+from src.models import SOURCE_UNAVAILABLE, IndicatorType
+from src.telemetry.metrics import BREAKER_REJECTED, REGISTRY
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("Test", window=4, min_calls=4, failure_rate=0.5, slow_call_seconds=1.0, open_seconds=10, clock=clock)
+
+
+@pytest.fixture
+def outage():
+    """Real agents against a mock server where every Shodan request answers 503"""
+    previous = unlimit_providers()
+    server = MockProviderServer(MockConfig(latency=Latency(1, 0), scenario=Scenario("outage", [Fault("status", "Shodan")])))
+    url = server.start()
+    agents = mock_agents(url)
+    for agent in agents:
+        agent.client = HTTPClient(timeout=5, provider=agent.name, backoff_factor=0)
+    yield server, {agent.name: agent for agent in agents}
+    server.stop()
+    for name, limiter in previous.items():
+        RateLimiter.install(name, limiter)
+    CircuitBreakers.configure()
+
+
+class TestCircuitBreaker:
+    """Test state transitions driven by failure rate and latency"""
+
+    def test_opens_on_failure_rate(self, breaker):
+        """Test the breaker opens once half the window has failed, not before min_calls"""
+        for failed in (True, True, False):
+            breaker.record(failed, 0.1)
+        assert breaker.state == CLOSED
+        breaker.record(False, 0.1)
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+
+    def test_opens_on_slow_calls(self, breaker):
+        """Test successful but slow calls open the breaker"""
+        for _ in range(4):
+            breaker.record(False, 2.0)
+        assert breaker.state == OPEN
+
+    def test_rate_is_over_the_window(self, breaker):
+        """Test only the last `window` calls count towards the failure rate"""
+        for failed in (True, False, False, False, False, True):
+            breaker.record(failed, 0.1)
+        assert breaker.state == CLOSED
+        # 3 of 7 calls failed, but 2 of the last 4
+        breaker.record(True, 0.1)
+        assert breaker.state == OPEN
+
+    def test_single_probe_when_half_open(self, breaker, clock):
+        """Test one probe goes through after open_seconds and its outcome decides the state"""
+        for _ in range(4):
+            breaker.record(True, 0.1)
+        clock.now = 9.9
+        assert not breaker.allow()
+        assert breaker.retry_in() == pytest.approx(0.1)
+
+        clock.now = 10
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow()
+
+        breaker.record(True, 0.1)
+        assert breaker.state == OPEN
+        clock.now = 20
+        assert breaker.allow()
+        breaker.record(False, 0.1)
+        assert breaker.state == CLOSED
+        assert breaker.allow() and breaker.allow()
+
+    def test_lost_probe_is_replaced(self, breaker, clock):
+        """Test a probe that never reports back does not keep the breaker half-open forever"""
+        for _ in range(4):
+            breaker.record(True, 0.1)
+        clock.now = 10
+        assert breaker.allow()
+        clock.now = 15
+        assert not breaker.allow()
+        clock.now = 20
+        assert breaker.allow()
+
+    def test_calls_finishing_while_open_are_ignored(self, breaker, clock):
+        """Test outcomes of calls started before the breaker opened change nothing"""
+        for _ in range(4):
+            breaker.record(True, 0.1)
+        breaker.record(False, 0.1)
+        assert breaker.state == OPEN
+        assert breaker.snapshot()["calls"] == 0
+
+
+class TestAgentsWithBreakers:
+    """Test agents fail fast behind an open breaker and recover through a probe"""
+
+    def test_open_breaker_answers_without_provider(self, outage):
+        """Test an open breaker returns source_unavailable in microseconds without a request"""
+        server, agents = outage
+        CircuitBreakers.configure(window=3, min_calls=3, open_seconds=60)
+        shodan = agents["Shodan"]
+        for _ in range(3):
+            assert shodan.enrich("198.51.100.1", IndicatorType.IP_V4).status == "error"
+        requests_sent = server.requests
+        rejected = BREAKER_REJECTED.value("Shodan")
+
+        started = time.perf_counter()
+        result = shodan.enrich("198.51.100.1", IndicatorType.IP_V4)
+        elapsed = time.perf_counter() - started
+        assert result.status == SOURCE_UNAVAILABLE
+        assert "circuit open" in result.error
+        assert elapsed < 0.005
+        assert server.requests == requests_sent
+        assert BREAKER_REJECTED.value("Shodan") == rejected + 1
+
+        # Other providers are unaffected
+        assert agents["AbuseIPDB"].enrich("198.51.100.1", IndicatorType.IP_V4).status == "success"
+
+    def test_probe_closes_recovered_provider(self, outage):
+        """Test a half-open breaker sends one probe and closes when the provider answers"""
+        server, agents = outage
+        CircuitBreakers.configure(window=3, min_calls=3, open_seconds=0.05)
+        shodan = agents["Shodan"]
+        for _ in range(3):
+            shodan.enrich("198.51.100.1", IndicatorType.IP_V4)
+        assert CircuitBreakers.get("Shodan").state == OPEN
+
+        server.config.scenario = None
+        time.sleep(0.06)
+        assert shodan.enrich("198.51.100.1", IndicatorType.IP_V4).status == "success"
+        assert CircuitBreakers.get("Shodan").state == CLOSED
+
+    def test_state_in_metrics_and_api_config(self, outage):
+        """Test breaker state is exported as a gauge and listed by /api/config"""
+        from api.main import get_config
+
+        _, agents = outage
+        CircuitBreakers.configure(window=3, min_calls=3, open_seconds=60)
+        for _ in range(3):
+            agents["Shodan"].enrich("198.51.100.1", IndicatorType.IP_V4)
+        agents["OTX"].enrich("198.51.100.1", IndicatorType.IP_V4)
+
+        text = REGISTRY.render()
+        assert 'threatfusion_circuit_breaker_state{provider="Shodan"} 2' in text
+        assert 'threatfusion_circuit_breaker_state{provider="OTX"} 0' in text
+        assert 'threatfusion_circuit_breaker_transitions_total{provider="Shodan",state="open"}' in text
+
+        breakers = asyncio.run(get_config())["circuit_breakers"]
+        assert breakers["Shodan"]["state"] == OPEN
+        assert breakers["Shodan"]["retry_in"] > 0
+        assert breakers["OTX"] == {
+            "state": CLOSED, "calls": 1, "failure_rate": 0.0, "slow_rate": 0.0, "rejected": 0, "retry_in": 0.0
+        }
@@ -0,0 +1,123 @@
+"""
+Tests for Distributed Batch Execution
+"""
+import threading
+import time
+import pytest
+import requests
+from src.distributed import Coordinator, Worker, HashRing, RateBudget, LeasedBucket
+from tests.test_jobs import FakeAgent
+
+
+def run_workers(url, count, **kwargs):
+    workers = [Worker(url, lambda: [FakeAgent()], use_leases=False, poll_interval=0.02, **kwargs) for _ in range(count)]
+    threads = [threading.Thread(target=worker.run) for worker in workers]
+    for thread in threads:
+        thread.start()
+    return workers, threads
+
+
+class TestHashRing:
+    """Test consistent hashing"""
+
+    def test_removing_node_moves_only_its_keys(self):
+        """Test only the removed node's keys change owner"""
+        ring = HashRing(["a", "b", "c", "d"])
+        keys = [f"10.0.{i >> 8}.{i & 255}" for i in range(2000)]
+        before = {key: ring.node_for(key) for key in keys}
+
+        ring.remove("c")
+        moved = [key for key in keys if ring.node_for(key) != before[key]]
+
+        assert moved and all(before[key] == "c" for key in moved)
+        assert 0.1 < len(moved) / len(keys) < 0.4
+
+    def test_empty_ring(self):
+        """Test an empty ring owns nothing"""
+        assert HashRing().node_for("8.8.8.8") is None
+
+
+class TestRateBudget:
+    """Test global rate budgets leased to workers"""
+
+    def test_lease_never_exceeds_budget(self):
+        """Test leases across workers add up to at most the bucket's capacity"""
+        budget = RateBudget({"otx": 10})
+        granted = sum(budget.lease("otx", 3)[0] for _ in range(10))
+        assert granted == 10
+
+        assert budget.lease("otx", 1)[1] > 0  # Tells the worker when to retry
+        assert budget.lease("unlimited", 5) == (5, 0.0)
+
+    def test_leased_bucket_waits_for_budget(self):
+        """Test a leased bucket retries after the coordinator's retry_after"""
+        answers = iter([(0, 0.01), (0, 0.01), (1, 0.0)])
+        bucket = LeasedBucket("otx", lambda provider, tokens: next(answers))
+
+        assert bucket.wait_for_token(timeout=1.0)
+        assert bucket.waiting == 0
+
+
+class TestCoordinator:
+    """Test sharding, merging and failure handling"""
+
+    def test_merges_results_from_workers(self):
+        """Test every indicator comes back exactly once across several workers"""
+        indicators = [f"10.1.{i >> 8}.{i & 255}" for i in range(60)] + ["not valid!"]
+        coordinator = Coordinator(indicators, limits={})
+        url = coordinator.serve()
+        try:
+            workers, threads = run_workers(url, 3)
+            results = dict(coordinator.iter_results())
+            for thread in threads:
+                thread.join(5)
+        finally:
+            coordinator.close()
+
+        assert sorted(results) == list(range(61))
+        assert results[60]["error"]
+        assert results[0]["results"]["OTX"]["data"]["pulse_count"] == 3
+        assert set(coordinator.first_seen) == set(indicators[:60])
+        assert sum(worker.processed for worker in workers) == 61
+        assert coordinator.stats["workers"] == 3
+
+    def test_same_indicator_same_worker(self):
+        """Test equivalent spellings of an indicator shard to the same worker"""
+        coordinator = Coordinator(["2001:db8::1", "2001:0DB8:0:0::1", "Example.com", "example.COM"], limits={})
+        first = coordinator.register("a")
+        coordinator.register("b")
+
+        items, _ = coordinator.next_work(first, max_items=10)
+        positions = {position for position, _ in items}
+        assert {0, 1} <= positions or not {0, 1} & positions
+        assert {2, 3} <= positions or not {2, 3} & positions
+
+    def test_silent_worker_work_is_requeued(self):
+        """Test work held by a worker that stops heartbeating goes to another"""
+        coordinator = Coordinator(["8.8.8.8", "1.1.1.1"], worker_timeout=0.05, limits={})
+        dead = coordinator.register("dead")
+        items, _ = coordinator.next_work(dead, max_items=10)
+        assert len(items) == 2
+
+        time.sleep(0.1)
+        alive = coordinator.register("alive")
+        items, _ = coordinator.next_work(alive, max_items=10)
+
+        assert sorted(position for position, _ in items) == [0, 1]
+        assert coordinator.stats["reassigned"] == 2
+
+        # A late duplicate from the dead worker is ignored
+        entry = {"indicator": "8.8.8.8"}
+        assert coordinator.submit_results(alive, [{"position": 0, "entry": entry}]) == 1
+        assert coordinator.submit_results(dead, [{"position": 0, "entry": entry}]) == 0
+
+    def test_token_required(self):
+        """Test workers without the shared token are turned away"""
+        coordinator = Coordinator(["8.8.8.8"], token="s3cret", limits={})
+        url = coordinator.serve()
+        try:
+            with pytest.raises(requests.exceptions.HTTPError):
+                Worker(url, lambda: [FakeAgent()], use_leases=False).run()
+            assert Worker(url, lambda: [FakeAgent()], token="s3cret", use_leases=False).run() == 1
+        finally:
+            coordinator.close()
@@ -0,0 +1,88 @@
+"""
+Tests for Columnar Export
+"""
+import csv
+import pytest
+from src.models import EnrichmentRecord
+from src.fusion.scorer import RiskScorer
+from src.reporting.columnar import EXPORT_COLUMNS, ColumnarWriter, flatten_result, open_writer
+
+
+def make_entry(i: int):
+    indicator = f"10.0.{i // 256}.{i % 256}"
+    results = {
+        "VirusTotal": EnrichmentRecord(indicator, "VirusTotal", data={"detections": i % 70, "total": 70}),
+        "OTX": EnrichmentRecord(indicator, "OTX", data={"pulse_count": i % 9}),
+        "Shodan": EnrichmentRecord(indicator, "Shodan", status="error", error="timeout"),
+    }
+    return indicator, results, RiskScorer.calculate_risk(results)
+
+
+class TestFlatten:
+    """Test flattening results into export rows"""
+
+    def test_flatten_result(self):
+        """Test source fields are copied and missing sources are null"""
+        row = flatten_result(*make_entry(5))
+
+        assert row["type"] == "ip_v4"
+        assert row["vt_detections"] == 5
+        assert row["otx_pulse_count"] == 5
+        assert row["shodan_vuln_count"] is None
+        assert row["abuse_confidence_score"] is None
+        assert (row["sources_ok"], row["sources_total"]) == (2, 3)
+
+
+class TestColumnarWriters:
+    """Test streaming writers"""
+
+    def test_csv_export(self, tmp_path):
+        """Test CSV export writes a header and one line per indicator"""
+        path = tmp_path / "out.csv"
+        with open_writer(str(path), row_group_size=7) as writer:
+            rows = writer.write_many(make_entry(i) for i in range(20))
+
+        with open(path, newline="", encoding="utf-8") as f:
+            lines = list(csv.DictReader(f))
+        assert rows == 20
+        assert list(lines[0]) == EXPORT_COLUMNS
+        assert lines[3]["vt_detections"] == "3"
+        assert lines[3]["abuse_confidence_score"] == ""
+
+    def test_parquet_row_groups(self, tmp_path):
+        """Test Parquet export writes one row group per flush"""
+        pq = pytest.importorskip("pyarrow.parquet")
+        path = tmp_path / "out.parquet"
+        with open_writer(str(path), row_group_size=8) as writer:
+            writer.write_many(make_entry(i) for i in range(20))
+
+        parquet = pq.ParquetFile(path)
+        assert parquet.metadata.num_row_groups == 3
+        table = parquet.read()
+        assert table.num_rows == 20
+        assert table.column("vt_detections").to_pylist()[:3] == [0, 1, 2]
+        assert table.column("shodan_vuln_count").null_count == 20
+
+    def test_arrow_export(self, tmp_path):
+        """Test Arrow IPC export reads back with the flat schema"""
+        pa = pytest.importorskip("pyarrow")
+        path = tmp_path / "out.arrow"
+        with open_writer(str(path), row_group_size=10) as writer:
+            writer.write_many(make_entry(i) for i in range(15))
+
+        reader = pa.ipc.open_file(str(path))
+        assert reader.num_record_batches == 2
+        assert reader.read_all().schema.names == EXPORT_COLUMNS
+
+    def test_incomplete_writer_rejected(self, tmp_path):
+        """Test a writer subclass without _write_group can't be instantiated"""
+        class Incomplete(ColumnarWriter):
+            pass
+
+        with pytest.raises(TypeError):
+            Incomplete(str(tmp_path / "out"))
+
+    def test_unknown_format(self, tmp_path):
+        """Test an unknown extension is rejected"""
+        with pytest.raises(ValueError):
+            open_writer(str(tmp_path / "out.xlsx"))
@@ -0,0 +1,110 @@
+"""
+Tests for Behaviour Under Injected Provider Faults
+
+Each scenario runs 12 IP enrichments, 4 at a time, against the mock
+providers with second-scale timeouts: a 2 s enrichment deadline, a 1 s HTTP
+client timeout and a 1 s retry wait budget. Circuit breakers are kept
+closed except where a test is about them, so retry behaviour is seen in full.
+"""
+import pytest
+from benchmarks.bench_faults import run_scenario
+from benchmarks.faults import Fault, Scenario
+from benchmarks.mock_providers import unlimit_providers
+from src.clients.circuit_breaker import CircuitBreakers
+from src.clients.rate_limiter import RateLimiter
+
+INDICATORS = 12
+CONCURRENCY = 4
+AGENTS = 5
+TIMEOUT = 2.0
+CLIENT_TIMEOUT = 1.0
+# Needs more calls than a provider gets in one run, so never opens
+NO_BREAKERS = {"min_calls": INDICATORS + 1}
+
+
+@pytest.fixture(autouse=True)
+def unlimited():
+    previous = unlimit_providers()
+    yield
+    for name, limiter in previous.items():
+        RateLimiter.install(name, limiter)
+    CircuitBreakers.configure()
+
+
+def run(*faults: Fault, breakers: dict = NO_BREAKERS) -> dict:
+    return run_scenario(
+        Scenario("test", list(faults)),
+        indicators=INDICATORS,
+        concurrency=CONCURRENCY,
+        timeout=TIMEOUT,
+        client_timeout=CLIENT_TIMEOUT,
+        max_retry_wait=1.0,
+        backoff_factor=0.1,
+        drain_limit=30,
+        breakers=breakers
+    )
+
+
+class TestFaultScenarios:
+    """Test throughput, tail latency and thread limits under injected faults"""
+
+    def test_baseline(self):
+        """Test the unfaulted run the other limits are relative to"""
+        result = run()
+        assert result["errors"] == {}
+        assert result["latency_s"]["p99"] < 0.5
+        assert result["peak_agent_threads"] <= CONCURRENCY * AGENTS
+
+    def test_provider_outage_is_retried_then_isolated(self):
+        """Test a provider answering 503 fails alone after its retries"""
+        result = run(Fault("status", "Shodan", status=503))
+        assert result["errors"] == {"Shodan": INDICATORS}
+        # Three retries per Shodan call
+        assert result["provider_requests"] == INDICATORS * (AGENTS + 3)
+        assert result["latency_s"]["p99"] < TIMEOUT
+
+    def test_long_retry_after_fails_fast(self):
+        """Test a 429 asking for more than the retry budget is not slept on"""
+        result = run(Fault("status", "VirusTotal", status=429, retry_after=30))
+        assert result["errors"] == {"VirusTotal": INDICATORS}
+        assert result["provider_requests"] == INDICATORS * AGENTS
+        assert result["latency_s"]["p99"] < 0.5
+
+    def test_short_5xx_burst_absorbed_by_retries(self):
+        """Test a burst shorter than the retry backoff causes no failed sources"""
+        result = run(Fault("status", status=502, start=0, end=0.15))
+        assert result["errors"] == {}
+        assert result["provider_requests"] > INDICATORS * AGENTS
+
+    def test_latency_spikes_bounded_by_deadline(self):
+        """Test stalled providers cost at most the deadline, and their threads drain"""
+        result = run(Fault("latency", rate=0.2, delay_ms=3000))
+        assert result["latency_s"]["max"] < TIMEOUT + 0.3
+        assert result["throughput_per_s"] > CONCURRENCY / (TIMEOUT + 0.3)
+        # Abandoned agents run out their own retries: 4 attempts of at most 1 s
+        assert result["straggler_drain_s"] < 4 * CLIENT_TIMEOUT + 1
+        assert result["peak_agent_threads"] <= 2 * CONCURRENCY * AGENTS
+
+    def test_connection_resets_retried(self):
+        """Test reset connections are retried, so few lookups fail"""
+        result = run(Fault("reset", "Censys", rate=0.3))
+        assert result["errors"].get("Censys", 0) <= 2
+        assert set(result["errors"]) <= {"Censys"}
+        assert result["latency_s"]["p99"] < TIMEOUT
+
+    def test_slow_body_cut_off_at_client_timeout(self):
+        """Test a body trickling in for 5 s fails at the client timeout without holding threads"""
+        result = run(Fault("slow_body", "OTX", body_seconds=5))
+        assert result["errors"] == {"OTX": INDICATORS}
+        assert result["latency_s"]["max"] < CLIENT_TIMEOUT + 0.7
+        assert result["straggler_drain_s"] < 0.5
+
+    def test_provider_outage_trips_breaker(self):
+        """Test an open breaker stops calls to a failing provider and answers source_unavailable"""
+        result = run(Fault("status", "Shodan", status=503), breakers={"window": 4, "min_calls": 4, "open_seconds": 60})
+        # Calls already started when the breaker opened still fail normally
+        assert result["errors"]["Shodan"] < 2 * CONCURRENCY
+        assert result["errors"]["Shodan"] + result["unavailable"]["Shodan"] == INDICATORS
+        assert set(result["errors"]) == set(result["unavailable"]) == {"Shodan"}
+        # Four requests per failing call, none for calls the breaker rejected
+        assert result["provider_requests"] == INDICATORS * (AGENTS - 1) + 4 * result["errors"]["Shodan"]
@@ -0,0 +1,209 @@
+"""
+Tests for Asynchronous Jobs
+"""
+import threading
+import time
+from src.agents.base import EnrichmentAgent
+from src.clients.rate_limiter import TokenBucket
+from src.jobs import JobStore, JobWorkerPool
+from src.jobs.store import QUEUED, RUNNING, COMPLETED, CANCELLED
+
+
+class FakeAgent(EnrichmentAgent):
+    """Agent that answers instantly (or after a delay) without network calls"""
+
+    SOURCE = "OTX"
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__("key", "OTX")
+        self.delay = delay
+
+    def enrich(self, indicator, itype):
+        time.sleep(self.delay)
+        return self.create_result(indicator, {"pulse_count": 3})
+
+
+class FlakyAgent(EnrichmentAgent):
+    """Agent that fails its first calls, then succeeds"""
+
+    def __init__(self, failures: int = 1):
+        super().__init__("key", "Shodan")
+        self.failures = failures
+        self.calls = 0
+
+    def enrich(self, indicator, itype):
+        self.calls += 1
+        if self.calls <= self.failures:
+            return self.create_result(indicator, {}, status="error", error="HTTP 503")
+        return self.create_result(indicator, {"ports": [443]})
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestJobStore:
+    """Test the durable job queue"""
+
+    def test_claim_oldest_first(self, tmp_path):
+        """Test jobs are claimed in submission order, once each"""
+        store = JobStore(str(tmp_path / "jobs.db"))
+        first = store.submit(["1.1.1.1"])
+        second = store.submit(["2.2.2.2"])
+
+        assert store.claim().id == first.id
+        assert store.claim().id == second.id
+        assert store.claim() is None
+
+    def test_cancel_queued(self, tmp_path):
+        """Test cancelling a queued job takes effect immediately"""
+        store = JobStore(str(tmp_path / "jobs.db"))
+        job = store.submit(["1.1.1.1"])
+
+        assert store.cancel(job.id).status == CANCELLED
+        assert store.claim() is None
+
+    def test_restart_requeues_running(self, tmp_path):
+        """Test jobs left running by a dead process survive a restart"""
+        path = str(tmp_path / "jobs.db")
+        store = JobStore(path)
+        job = store.submit(["1.1.1.1", "2.2.2.2"])
+        store.claim()
+        store.record_result(job.id, 0, "1.1.1.1", {"indicator": "1.1.1.1"})
+
+        reopened = JobStore(path)
+        assert reopened.requeue_interrupted() == 1
+        assert reopened.get(job.id).status == QUEUED
+        assert reopened.completed_positions(job.id) == {0}
+
+    def test_purge_finished(self, tmp_path):
+        """Test retention deletes finished jobs and their results only"""
+        store = JobStore(str(tmp_path / "jobs.db"))
+        done = store.submit(["1.1.1.1"])
+        pending = store.submit(["2.2.2.2"])
+        store.record_result(done.id, 0, "1.1.1.1", {})
+        store.finish(done.id, COMPLETED)
+
+        assert store.purge(older_than_seconds=-1) == 1
+        assert store.get(done.id) is None
+        assert store.get(pending.id).status == QUEUED
+
+
+class TestJobWorkerPool:
+    """Test job execution"""
+
+    def test_runs_job(self, tmp_path):
+        """Test a submitted job is enriched, scored and stored"""
+        store = JobStore(str(tmp_path / "jobs.db"))
+        pool = JobWorkerPool(store, lambda: [FakeAgent()], workers=1, poll_interval=0.05)
+        pool.start()
+        try:
+            job = store.submit(["8.8.8.8", "not valid!"])
+            pool.wake()
+            assert wait_for(lambda: store.get(job.id).status == COMPLETED)
+        finally:
+            pool.stop()
+
+        results = store.get(job.id).results
+        assert results[0]["risk_score"]["components"][0]["source"] == "OTX"
+        assert results[0]["results"]["OTX"]["data"]["pulse_count"] == 3
+        assert "error" in results[1]
+
+    def test_cancel_running(self, tmp_path):
+        """Test a running job stops after the indicator in progress"""
+        store = JobStore(str(tmp_path / "jobs.db"))
+        pool = JobWorkerPool(store, lambda: [FakeAgent(delay=0.05)], workers=1, poll_interval=0.05)
+        job = store.submit([f"10.0.0.{i}" for i in range(50)])
+        pool.start()
+        try:
+            assert wait_for(lambda: store.get(job.id, include_results=False).status == RUNNING)
+            store.cancel(job.id)
+            assert wait_for(lambda: store.get(job.id, include_results=False).status == CANCELLED)
+        finally:
+            pool.stop()
+
+        assert store.get(job.id).completed < 50
+
+    def test_resume_after_restart(self, tmp_path):
+        """Test a re-queued job skips indicators stored before the restart"""
+        store = JobStore(str(tmp_path / "jobs.db"))
+        job = store.submit(["1.1.1.1", "2.2.2.2"])
+        store.claim()
+        store.record_result(job.id, 0, "1.1.1.1", {"indicator": "1.1.1.1", "stored": "before"})
+
+        pool = JobWorkerPool(store, lambda: [FakeAgent()], workers=1, poll_interval=0.05)
+        pool.start()
+        try:
+            assert wait_for(lambda: store.get(job.id).status == COMPLETED)
+        finally:
+            pool.stop()
+
+        results = store.get(job.id).results
+        assert results[0]["stored"] == "before"
+        assert results[1]["indicator"] == "2.2.2.2"
+
+
+    def test_resume_retries_failed_sources(self, tmp_path):
+        """Test resuming a finished job re-queries only the sources that failed"""
+        store = JobStore(str(tmp_path / "jobs.db"))
+        flaky = FlakyAgent(failures=1)
+        pool = JobWorkerPool(store, lambda: [FakeAgent(), flaky], workers=1, poll_interval=0.05)
+        pool.start()
+        try:
+            job = store.submit(["8.8.8.8"])
+            pool.wake()
+            assert wait_for(lambda: store.get(job.id).status == COMPLETED)
+            assert store.get(job.id).results[0]["results"]["Shodan"]["status"] == "error"
+
+            store.resume(job.id)
+            pool.wake()
+            assert wait_for(lambda: store.get(job.id).status == COMPLETED)
+        finally:
+            pool.stop()
+
+        job = store.get(job.id)
+        assert job.completed == 1
+        assert job.results[0]["results"]["Shodan"]["status"] == "success"
+        assert flaky.calls == 2
+
+class TestFairRateLimiting:
+    """Test shared token buckets serve waiters in arrival order"""
+
+    def test_fifo_waiters(self):
+        """Test blocked callers get tokens first-come first-served"""
+        bucket = TokenBucket(1200)
+        bucket.tokens = 0
+        order = []
+
+        def wait(i):
+            bucket.wait_for_token()
+            order.append(i)
+
+        threads = []
+        for i in range(5):
+            thread = threading.Thread(target=wait, args=(i,))
+            thread.start()
+            threads.append(thread)
+            assert wait_for(lambda: bucket.waiting == i + 1 or len(order) > i)
+        for thread in threads:
+            thread.join()
+
+        assert order == [0, 1, 2, 3, 4]
+        assert bucket.waiting == 0
+
+    def test_consume_does_not_jump_queue(self):
+        """Test non-blocking consume fails while others are waiting"""
+        bucket = TokenBucket(60)
+        bucket.tokens = 0
+        thread = threading.Thread(target=bucket.wait_for_token, args=(2.0,))
+        thread.start()
+        assert wait_for(lambda: bucket.waiting == 1)
+
+        bucket.tokens = 1
+        assert not bucket.consume()
+        thread.join()
@@ -0,0 +1,92 @@
+"""
+Tests for Streaming JSON Field Selection
+"""
+import json
+import pytest
+from src.clients.json_stream import ArrayOf, KEYS, StreamingJSONSelector, select_fields
+from src.agents.shodan import ShodanAgent
+from src.agents.censys import CensysAgent
+
+
+def _chunks(document, size):
+    body = json.dumps(document).encode()
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+SHODAN_HOST = {
+    "ip_str": "1.2.3.4",
+    "hostnames": ["host.example.com"],
+    "country_name": "Türkiye",
+    "org": "Example",
+    "asn": "AS1234",
+    "ports": list(range(30)),
+    "vulns": {f"CVE-2023-{i}": {"summary": "x" * 500, "cvss": 9.8} for i in range(15)},
+    "data": [
+        {"port": p, "transport": "tcp", "product": "nginx", "version": "1.2",
+         "data": "HTTP/1.1 200 OK\r\n" * 100, "http": {"html": "<p>" * 1000}}
+        for p in range(30)
+    ],
+    "last_update": "2024-01-01T00:00:00",
+}
+
+
+class TestSelectFields:
+    """Test incremental field selection"""
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+    def test_shodan_selection_matches_full_parse(self, chunk_size):
+        """Test the agent parser sees the same fields from a streamed selection"""
+        selected = select_fields(_chunks(SHODAN_HOST, chunk_size), ShodanAgent.FIELDS["host"])
+        assert ShodanAgent._parse_host(selected) == ShodanAgent._parse_host(SHODAN_HOST)
+        assert "ip_str" not in selected
+        assert "http" not in selected["data"][0]
+        assert len(selected["data"]) == 10
+
+    def test_censys_certificates(self):
+        """Test nested object and array specs"""
+        document = {"result": {"total": 2, "hits": [
+            {"fingerprint_sha256": "ab", "raw": "x" * 1000,
+             "parsed": {"issuer": {"common_name": ["CA"], "country": ["US"]},
+                        "names": [f"n{i}.example.com" for i in range(20)]}}
+        ]}}
+        selected = select_fields(_chunks(document, 16), CensysAgent.FIELDS["certificates"])
+        assert CensysAgent._parse_certificates(selected) == CensysAgent._parse_certificates(document)
+        assert "raw" not in selected["result"]["hits"][0]
+
+    def test_keys_and_numbers(self):
+        """Test KEYS drops values and numbers split across chunks decode fully"""
+        document = {"a": {"x": [1, 2], "y": None}, "n": 1234567890, "e": {}}
+        selected = select_fields(_chunks(document, 3), {"a": KEYS, "n": True, "e": KEYS})
+        assert selected == {"a": {"x": None, "y": None}, "n": 1234567890, "e": {}}
+
+    def test_array_limit(self):
+        """Test arrays keep only the first elements"""
+        assert select_fields(_chunks(list(range(100)), 5), ArrayOf(True, limit=3)) == [0, 1, 2]
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 7])
+    def test_skipped_strings_with_escapes(self, chunk_size):
+        """Test skipped strings end at the right quote across chunk boundaries"""
+        document = {"skip": ['a\\"b', "\\", {"k": 'q"\u00e9'}], "x": "\\", "keep": 'v"'}
+        assert select_fields(_chunks(document, chunk_size), {"keep": True}) == {"keep": 'v"'}
+
+    def test_skipped_values_are_not_buffered(self):
+        """Test a large unselected value never has to fit in the buffer"""
+        document = {"raw": "x" * 1_000_000, "blob": [{"html": "<p>" * 100_000}], "keep": 1}
+        peak = 0
+
+        def chunks():
+            nonlocal peak
+            for chunk in _chunks(document, 4096):
+                peak = max(peak, len(selector.buf))
+                yield chunk
+
+        selector = StreamingJSONSelector(chunks(), min_read=4096)
+        assert selector.select({"keep": True}) == {"keep": 1}
+        assert peak < 16 * 1024
+
+    def test_invalid_json(self):
+        """Test malformed input raises"""
+        with pytest.raises(ValueError):
+            select_fields([b'{"a": [1, 2'], {"a": True})
+        with pytest.raises(ValueError):
+            select_fields([b'{"a": "unterminated'], {"b": True})
@@ -0,0 +1,148 @@
+"""
+Tests for the Metrics Registry
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.agents.base import EnrichmentAgent
+from src.clients.http_client import HTTPClient
+from src.fusion.orchestrator import EnrichmentOrchestrator
+from src.models import IndicatorType
+from src.telemetry.metrics import (
+    Metric, MetricsRegistry, PROVIDER_LATENCY, PROVIDER_QUOTA, PROVIDER_RESPONSES, AGENT_RESULTS, REGISTRY
+)
+
+
+class TestMetricsRegistry:
+    """Test metric types and the text exposition format"""
+
+    def test_counter_and_gauge_render(self):
+        """Test labelled counters and gauges render as Prometheus samples"""
+        registry = MetricsRegistry()
+        requests = registry.counter("demo_requests_total", "Requests", ("provider",))
+        requests.labels("OTX").inc()
+        requests.labels(provider="OTX").inc(2)
+        registry.gauge("demo_inflight", "In flight").set(3)
+
+        text = registry.render()
+        assert "# TYPE demo_requests_total counter" in text
+        assert 'demo_requests_total{provider="OTX"} 3.0' in text
+        assert "demo_inflight 3.0" in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram buckets, sum and count"""
+        registry = MetricsRegistry()
+        latency = registry.histogram("demo_seconds", "Latency", ("provider",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            latency.labels("Shodan").observe(value)
+
+        text = registry.render()
+        assert 'demo_seconds_bucket{provider="Shodan",le="0.1"} 1' in text
+        assert 'demo_seconds_bucket{provider="Shodan",le="1.0"} 3' in text
+        assert 'demo_seconds_bucket{provider="Shodan",le="+Inf"} 4' in text
+        assert 'demo_seconds_count{provider="Shodan"} 4' in text
+        assert 'demo_seconds_sum{provider="Shodan"} 4.25' in text
+
+    def test_gauge_function_and_escaping(self):
+        """Test callback gauges are read at render time and label values escaped"""
+        registry = MetricsRegistry()
+        depth = {"a\"b": 2}
+        registry.gauge("demo_depth", "Depth", ("queue",)).set_function(
+            lambda: {(name,): value for name, value in depth.items()}
+        )
+        depth["a\"b"] = 5
+        assert 'demo_depth{queue="a\\"b"} 5.0' in registry.render()
+
+    def test_reregistering_must_match(self):
+        """Test the same name returns the same metric, and conflicting types are rejected"""
+        registry = MetricsRegistry()
+        counter = registry.counter("demo_total", "Demo", ("x",))
+        assert registry.counter("demo_total", "Demo", ("x",)) is counter
+        with pytest.raises(ValueError):
+            registry.gauge("demo_total", "Demo", ("x",))
+
+    def test_metric_types_must_implement_series(self):
+        """Test a metric type without _new_child() and samples() can't be created"""
+        class Incomplete(Metric):
+            kind = "untyped"
+
+        with pytest.raises(TypeError):
+            Incomplete("demo_incomplete", "Incomplete")
+
+    def test_concurrent_recording_is_exact(self):
+        """Test counters and histograms lose no updates across threads"""
+        registry = MetricsRegistry()
+        counter = registry.counter("demo_total", "Demo", ("provider",))
+        histogram = registry.histogram("demo_seconds", "Demo")
+
+        def record():
+            for _ in range(10000):
+                counter.labels("VirusTotal").inc()
+                histogram.observe(0.01)
+
+        threads = [threading.Thread(target=record) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert counter.value("VirusTotal") == 80000
+        assert "demo_seconds_count 80000" in registry.render()
+
+
+class TestInstrumentation:
+    """Test hot paths record into the shared registry"""
+
+    def test_http_client_records_status_class_and_quota(self):
+        """Test provider latency, status classes and quota headers are recorded"""
+        statuses = [200, 404]
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status = statuses.pop(0)
+                body = json.dumps({"ok": status == 200}).encode()
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("X-RateLimit-Remaining", "41")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        client = HTTPClient(timeout=5, max_retries=0, provider="MetricsTest")
+        try:
+            url = f"http://127.0.0.1:{httpd.server_port}/"
+            assert client.get_json(url) == {"ok": True}
+            with pytest.raises(Exception):
+                client.get_json(url)
+        finally:
+            client.close()
+            httpd.shutdown()
+            httpd.server_close()
+
+        assert PROVIDER_RESPONSES.value("MetricsTest", "2xx") == 1
+        assert PROVIDER_RESPONSES.value("MetricsTest", "4xx") == 1
+        assert PROVIDER_QUOTA.value("MetricsTest") == 41
+        counts, _ = PROVIDER_LATENCY.labels("MetricsTest").snapshot()
+        assert sum(counts) == 2
+
+    def test_agent_results_and_gauges_render(self):
+        """Test agent results are counted and limiter gauges appear in the output"""
+
+        class EchoAgent(EnrichmentAgent):
+            def enrich(self, indicator, itype):
+                return self.create_result(indicator, {"pulse_count": 1})
+
+        agent = EchoAgent("key", "MetricsEcho")
+        EnrichmentOrchestrator([agent]).enrich_parallel("8.8.8.8", IndicatorType.IP_V4)
+
+        assert AGENT_RESULTS.value("MetricsEcho", "success") == 1
+        assert agent.get_stats()["total_requests"] == 1
+        text = REGISTRY.render()
+        assert 'threatfusion_rate_limiter_queue_depth{limiter="shodan"} 0' in text
+        assert "threatfusion_enrichment_seconds_count" in text
+        assert "threatfusion_orchestrator_inflight_agents 0.0" in text
@@ -0,0 +1,126 @@
+"""
+Tests for Pivot Expansion
+"""
+import xml.etree.ElementTree as ET
+from src.agents.base import EnrichmentAgent
+from src.agents.virustotal import VirusTotalAgent
+from src.fusion.orchestrator import EnrichmentOrchestrator
+from src.fusion.pivot import Pivoter, GRAPHML_NS
+from src.models import IndicatorType
+
+
+class MappedAgent(EnrichmentAgent):
+    """Agent answering from a fixed indicator -> data map"""
+
+    def __init__(self, name: str, answers: dict, supported=()):
+        super().__init__("key", name)
+        self.answers = answers
+        self.supported_types = list(supported)
+        self.queried = []
+
+    def enrich(self, indicator, itype):
+        self.queried.append(indicator)
+        return self.create_result(indicator, self.answers.get(indicator, {}))
+
+
+def make_agents():
+    vt = MappedAgent("VirusTotal", {
+        "evil.example": {"detections": 40, "total": 70, "resolutions": ["203.0.113.7"]},
+        "cdn.example": {"detections": 0, "total": 70, "resolutions": ["203.0.113.7"]},
+        "mail.example": {"detections": 0, "total": 70, "resolutions": ["198.51.100.2"]},
+    }, supported=[IndicatorType.DOMAIN, IndicatorType.IP_V4])
+    shodan = MappedAgent("Shodan", {
+        "203.0.113.7": {"hostnames": ["evil.example", "CDN.example."], "vulns": []},
+    }, supported=[IndicatorType.IP_V4])
+    censys = MappedAgent("Censys", {
+        "evil.example": {"certificates": [{"names": ["*.evil.example", "mail.example", "not a name"]}]},
+    }, supported=[IndicatorType.DOMAIN])
+    return vt, shodan, censys
+
+
+class TestPivoter:
+    """Test budgeted breadth-first expansion"""
+
+    def test_expands_links_and_skips_visited(self):
+        """Test links from every source are followed and each node is queried once"""
+        vt, shodan, censys = make_agents()
+        graph = Pivoter(EnrichmentOrchestrator([vt, shodan, censys]), depth=3, budget=100).run("Evil.Example")
+
+        assert set(graph.nodes) == {"evil.example", "203.0.113.7", "cdn.example", "mail.example", "198.51.100.2"}
+        assert ("evil.example", "203.0.113.7", "resolves_to") in graph.edges
+        assert ("203.0.113.7", "cdn.example", "hostname") in graph.edges
+        assert ("203.0.113.7", "evil.example", "hostname") in graph.edges  # Back edge, not re-queried
+        assert ("evil.example", "mail.example", "cert_name") in graph.edges
+        assert vt.queried.count("evil.example") == 1
+        assert graph.nodes["evil.example"]["risk_score"] > graph.nodes["cdn.example"]["risk_score"]
+
+    def test_depth_limits_expansion(self):
+        """Test nodes beyond the depth are not discovered"""
+        vt, shodan, censys = make_agents()
+        graph = Pivoter(EnrichmentOrchestrator([vt, shodan, censys]), depth=1, budget=100).run("evil.example")
+
+        assert set(graph.nodes) == {"evil.example", "203.0.113.7", "mail.example"}
+        assert all(node["expanded"] for node in graph.nodes.values())
+        assert shodan.queried == ["203.0.113.7"]
+
+    def test_budget_stops_expansion(self):
+        """Test the call budget is never exceeded and leftovers stay unexpanded"""
+        vt, shodan, censys = make_agents()
+        pivoter = Pivoter(EnrichmentOrchestrator([vt, shodan, censys]), depth=3, budget=3)
+        graph = pivoter.run("evil.example")
+
+        assert pivoter.calls == 3
+        assert len(vt.queried) + len(shodan.queried) + len(censys.queried) == 3
+        assert graph.nodes["evil.example"]["expanded"]
+        assert not graph.nodes["mail.example"]["expanded"]
+
+    def test_cache_is_reused(self):
+        """Test a shared cache answers nodes without provider calls"""
+        vt, shodan, censys = make_agents()
+        cache = {}
+        orchestrator = EnrichmentOrchestrator([vt, shodan, censys])
+        Pivoter(orchestrator, depth=2, budget=100, cache=cache).run("evil.example")
+        calls = len(vt.queried) + len(shodan.queried) + len(censys.queried)
+
+        pivoter = Pivoter(orchestrator, depth=2, budget=100, cache=cache)
+        pivoter.run("203.0.113.7")
+        assert pivoter.stats["cached"] >= 3
+        assert len(vt.queried) + len(shodan.queried) + len(censys.queried) - calls == pivoter.calls
+
+    def test_failures_not_cached(self):
+        """Test a node where a source failed is re-queried by the next pivot"""
+        vt, shodan, censys = make_agents()
+        shodan.enrich = lambda indicator, itype: shodan.create_result(indicator, {}, status="error", error="HTTP 503")
+        cache = {}
+        orchestrator = EnrichmentOrchestrator([vt, shodan, censys])
+        Pivoter(orchestrator, depth=1, budget=100, cache=cache).run("evil.example")
+
+        assert "evil.example" in cache
+        assert "203.0.113.7" not in cache
+
+    def test_graphml_output(self):
+        """Test GraphML output parses and carries node and edge attributes"""
+        vt, shodan, censys = make_agents()
+        graph = Pivoter(EnrichmentOrchestrator([vt, shodan, censys]), depth=1).run("evil.example")
+
+        root = ET.fromstring(graph.to_graphml())
+        ns = {"g": GRAPHML_NS}
+        assert len(root.findall(".//g:node", ns)) == len(graph.nodes)
+        relations = {data.text for data in root.findall(".//g:edge/g:data[@key='relation']", ns)}
+        assert relations == {"resolves_to", "cert_name"}
+
+
+class TestVirusTotalResolutions:
+    """Test DNS resolutions are kept from VirusTotal domain reports"""
+
+    def test_parse_domain_resolutions(self):
+        """Test A records become resolutions, deduplicated"""
+        data = {"data": {"attributes": {
+            "last_analysis_stats": {"malicious": 1},
+            "last_dns_records": [
+                {"type": "A", "value": "203.0.113.7"},
+                {"type": "MX", "value": "mail.example"},
+                {"type": "A", "value": "203.0.113.7"},
+            ]
+        }}}
+        assert VirusTotalAgent._parse_domain(data)["resolutions"] == ["203.0.113.7"]
@@ -0,0 +1,155 @@
+"""
+Tests for Report Generator
+"""
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.models import EnrichmentRecord
+from src.fusion.scorer import RiskScorer
+from src.reporting.generator import ReportGenerator, REPORT_TEMPLATE
+from src.reporting.pdf import PDFRenderer
+
+
+def make_entry(indicator: str, pulses: int = 3):
+    results = {
+        "OTX": EnrichmentRecord(indicator, "OTX", data={"pulse_count": pulses, "note": "<script>"}),
+        "Shodan": EnrichmentRecord(indicator, "Shodan", status="error", error="timeout"),
+    }
+    return indicator, results, RiskScorer.calculate_risk(results)
+
+
+class TestReportGenerator:
+    """Test template compilation and streamed rendering"""
+
+    def test_template_compiled_once(self):
+        """Test repeated renders reuse the same compiled template"""
+        assert ReportGenerator.get_template(REPORT_TEMPLATE) is ReportGenerator.get_template(REPORT_TEMPLATE)
+
+    def test_stream_matches_generate(self):
+        """Test the streamed HTML report is the generated report in chunks"""
+        indicator, results, risk_score = make_entry("1.2.3.4")
+        chunks = list(ReportGenerator.stream_html(indicator, results, risk_score, 1.0))
+        html = ReportGenerator.generate_html(indicator, results, risk_score, 1.0)
+
+        assert len(chunks) > 1
+        generated = re.compile(r"Generated: [^|]*\|")
+        assert generated.sub("", "".join(chunks)) == generated.sub("", html)
+        assert "&lt;script&gt;" in html
+
+    def test_stream_text_matches_generate(self):
+        """Test the streamed text report matches the generated one"""
+        indicator, results, risk_score = make_entry("1.2.3.4")
+        streamed = "".join(ReportGenerator.stream_text(indicator, results, risk_score, 1.0))
+        generated = ReportGenerator.generate_text(indicator, results, risk_score, 1.0)
+
+        # Timestamps may differ by a second between renders
+        assert streamed.splitlines()[:6] == generated.splitlines()[:6]
+        assert streamed.endswith("=" * 80 + "\n")
+
+    def test_batch_report_consumes_entries_lazily(self, tmp_path):
+        """Test the batch report pulls entries while rendering, not up front"""
+        consumed = []
+
+        def entries():
+            for i in range(500):
+                consumed.append(i)
+                yield make_entry(f"10.0.{i // 256}.{i % 256}", pulses=i % 12)
+
+        stream = ReportGenerator.stream_batch_html(entries())
+        for chunk in stream:
+            if "10.0.0.0" in chunk:
+                break
+        assert len(consumed) < 5
+
+        path = ReportGenerator.write_report(stream, tmp_path / "batch.html")
+        html = path.read_text(encoding="utf-8")
+        assert "10.0.1.243" in html
+        assert "Summary: 500 indicators" in html
+        assert html.rstrip().endswith("</html>")
+
+
+def weasyprint_available() -> bool:
+    try:
+        import weasyprint  # noqa: F401
+    except (ImportError, OSError):
+        return False
+    return True
+
+
+class TestPDFRenderer:
+    """Test PDF rendering and the content-hash cache"""
+
+    def test_content_hash_ignores_timestamps(self):
+        """Test re-enriching with identical findings gives the same cache key"""
+        first = make_entry("1.2.3.4")
+        second = make_entry("1.2.3.4")
+        changed = make_entry("1.2.3.4", pulses=30)
+
+        assert ReportGenerator.content_hash(*first) == ReportGenerator.content_hash(*second)
+        assert ReportGenerator.content_hash(*first) != ReportGenerator.content_hash(*changed)
+
+    def test_untimed_report_matches_content_hash(self):
+        """Test the PDF's HTML leaves out what the cache key ignores"""
+        first, second = make_entry("1.2.3.4"), make_entry("1.2.3.4")
+
+        untimed = ReportGenerator.generate_html(*first)
+        assert "Generated:" not in untimed
+        assert untimed == ReportGenerator.generate_html(*second)
+        assert "Analysis Time: 1.5s" in ReportGenerator.generate_html(*first, 1.5)
+
+    def test_cache_hit_skips_rendering(self, tmp_path):
+        """Test a cached PDF is returned without building HTML or starting workers"""
+        renderer = PDFRenderer(str(tmp_path))
+        renderer.cache_path("abc").write_bytes(b"%PDF-cached")
+
+        def html():
+            raise AssertionError("HTML should not be built on a cache hit")
+
+        assert renderer.render("abc", html) == b"%PDF-cached"
+        assert renderer.executor is None
+
+    def test_cache_evicts_least_recently_used(self, tmp_path):
+        """Test the cache keeps max_entries PDFs, dropping the least recently read"""
+        renderer = PDFRenderer(str(tmp_path), max_entries=2)
+        renderer._store("a", b"%PDF-a")
+        renderer._store("b", b"%PDF-b")
+        os.utime(renderer.cache_path("a"), (1, 1))
+        os.utime(renderer.cache_path("b"), (2, 2))
+        renderer.cached("a")  # Read again, so "b" is now the oldest
+        renderer._store("c", b"%PDF-c")
+
+        assert renderer.cached("b") is None
+        assert renderer.cached("a") == b"%PDF-a"
+        assert renderer.cached("c") == b"%PDF-c"
+
+    def test_executor_created_once(self, tmp_path):
+        """Test concurrent first renders share one worker pool"""
+        renderer = PDFRenderer(str(tmp_path), max_workers=1)
+        barrier = threading.Barrier(8)
+
+        def get():
+            barrier.wait()
+            return renderer._get_executor()
+
+        try:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                executors = set(map(id, pool.map(lambda _: get(), range(8))))
+        finally:
+            renderer.shutdown()
+        assert len(executors) == 1
+
+    @pytest.mark.skipif(not weasyprint_available(), reason="weasyprint or its system libraries are not installed")
+    def test_render_and_cache(self, tmp_path):
+        """Test a report renders to PDF in a worker and is then served from cache"""
+        renderer = PDFRenderer(str(tmp_path), max_workers=1)
+        indicator, results, risk_score = make_entry("1.2.3.4")
+        key = ReportGenerator.content_hash(indicator, results, risk_score)
+        try:
+            pdf = renderer.render(key, ReportGenerator.generate_html(indicator, results, risk_score, 1.0))
+        finally:
+            renderer.shutdown()
+
+        assert pdf.startswith(b"%PDF")
+        assert renderer.cached(key) == pdf
@@ -0,0 +1,178 @@
+"""
+Tests for the Cacheable Enrichment Endpoint
+"""
+import gzip
+import httpx
+import pytest
+from api import main as api
+from api.result_cache import COMPRESS_MIN_BYTES, ResultCache, accepts_gzip
+from benchmarks.bench_suite import APIServer
+from benchmarks.mock_providers import Latency, MockConfig, MockProviderServer, unlimit_providers
+from src.clients.rate_limiter import RateLimiter
+from src.config import config
+from src.models import SOURCE_UNAVAILABLE
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def mock_server():
+    server = MockProviderServer(MockConfig(latency=Latency(5, 0)))
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def api_server(mock_server, tmp_path, monkeypatch):
+    previous = unlimit_providers()
+    monkeypatch.setattr(api, "initialize_agents", api.initialize_agents)
+    monkeypatch.setattr(config.app_config, "jobs_db_path", config.app_config.jobs_db_path)
+    api.result_cache.clear()
+    with APIServer(mock_server.url, str(tmp_path)) as server:
+        yield server
+    api.result_cache.clear()
+    for name, limiter in previous.items():
+        RateLimiter.install(name, limiter)
+
+
+class TestResultCache:
+    """Test entry validators, expiry and eviction"""
+
+    def test_entry_expires_after_ttl(self):
+        """Test entries are served until their TTL, then dropped"""
+        clock = FakeClock()
+        cache = ResultCache(ttl=60, clock=clock)
+        cache.put("1.2.3.4", cache.build(b"{}"))
+        clock.now = 59
+        assert cache.get("1.2.3.4") is not None
+        clock.now = 60
+        assert cache.get("1.2.3.4") is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_evicted(self):
+        """Test the cache holds at most max_entries, dropping the least recently read"""
+        cache = ResultCache(ttl=60, max_entries=2)
+        for key in ("a", "b"):
+            cache.put(key, cache.build(key.encode()))
+        cache.get("a")
+        cache.put("c", cache.build(b"c"))
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+
+    def test_etag_is_strong_and_content_derived(self):
+        """Test equal bodies share an ETag and different bodies don't"""
+        cache = ResultCache(ttl=60)
+        etag = cache.build(b'{"a": 1}').etag
+        assert etag.startswith('"') and not etag.startswith("W/")
+        assert cache.build(b'{"a": 1}').etag == etag
+        assert cache.build(b'{"a": 2}').etag != etag
+
+    def test_if_none_match(self):
+        """Test weak comparison against either encoding's tag, lists and '*'"""
+        entry = ResultCache(ttl=60).build(b"{}")
+        gzip_tag = entry.etag[:-1] + '-gzip"'
+        assert entry.matches(entry.etag)
+        assert entry.matches(f"W/{gzip_tag}")
+        assert entry.matches(f'"other", {entry.etag}')
+        assert entry.matches("*")
+        assert not entry.matches('"other"')
+        assert not entry.matches(None)
+
+    def test_large_bodies_compressed_once(self):
+        """Test only bodies over the threshold get a gzip encoding"""
+        cache = ResultCache(ttl=60)
+        assert cache.build(b"x" * (COMPRESS_MIN_BYTES - 1)).gzip_body is None
+        body = b"x" * COMPRESS_MIN_BYTES
+        assert gzip.decompress(cache.build(body).gzip_body) == body
+
+    def test_accept_encoding_qvalues(self):
+        """Test gzip is chosen by token and q-value, not by substring"""
+        assert accepts_gzip("gzip, deflate, br")
+        assert accepts_gzip("br;q=1.0, GZIP;q=0.8")
+        assert accepts_gzip("*")
+        assert not accepts_gzip("gzip;q=0")
+        assert not accepts_gzip("x-gzipped, identity")
+        assert not accepts_gzip("*;q=0.5, gzip;q=0")
+        assert not accepts_gzip("gzip;q=0.5, identity")
+        assert not accepts_gzip(None)
+
+    def test_max_age_counts_down(self):
+        """Test Cache-Control reflects the time left on the entry"""
+        clock = FakeClock()
+        cache = ResultCache(ttl=600, clock=clock)
+        entry = cache.build(b"{}")
+        clock.now = 100
+        response = cache.respond(entry, {})
+        assert response.headers["Cache-Control"] == "public, max-age=500"
+        assert response.headers["Vary"] == "Accept-Encoding"
+
+
+class TestResultTTL:
+    """Test a result's freshness follows its sources"""
+
+    def test_shortest_source_ttl(self, monkeypatch):
+        """Test the TTL is the shortest of the answering sources' re-check intervals"""
+        monkeypatch.setattr(config.app_config, "watchlist_ttls", "OTX=2h")
+        results = {"OTX": {"status": "success"}, "Censys": {"status": "not_found"}}
+        assert api.result_ttl(results) == 2 * 3600
+        assert api.result_ttl({"Censys": {"status": "success"}}) == min(72 * 3600, api.result_cache.ttl)
+
+    def test_failed_sources_not_cached(self):
+        """Test any failed or unavailable source makes the result uncacheable"""
+        assert api.result_ttl({"OTX": {"status": "success"}, "Shodan": {"status": "error"}}) == 0
+        assert api.result_ttl({"Shodan": {"status": SOURCE_UNAVAILABLE}}) == 0
+
+    def test_metadata_and_errors_skipped(self):
+        """Test _metadata is ignored and an error-only result is not cached"""
+        results = {"OTX": {"status": "success"}, "_metadata": {"execution_time": 0.1}}
+        assert api.result_ttl(results) == api.result_ttl({"OTX": {"status": "success"}}) > 0
+        assert api.result_ttl({"error": "No agents support indicator type: email"}) == 0
+
+
+class TestEnrichmentEndpoint:
+    """Test GET /api/enrich/{indicator} through the running API"""
+
+    def test_conditional_get_does_no_work(self, api_server, mock_server):
+        """Test a repeat poll is served from cache and If-None-Match gets an empty 304"""
+        with httpx.Client(base_url=api_server.url, timeout=30) as client:
+            first = client.get("/api/enrich/198.51.100.7")
+            assert first.status_code == 200
+            assert first.json()["indicator"] == "198.51.100.7"
+            assert first.headers["Cache-Control"].startswith("public, max-age=")
+            calls = mock_server.requests
+
+            again = client.get("/api/enrich/198.51.100.7")
+            assert again.content == first.content
+            assert again.headers["ETag"] == first.headers["ETag"]
+            assert not first.headers["ETag"].startswith("W/")
+
+            revalidated = client.get("/api/enrich/198.51.100.7", headers={"If-None-Match": first.headers["ETag"]})
+            assert revalidated.status_code == 304
+            assert revalidated.content == b""
+            assert revalidated.headers["ETag"] == first.headers["ETag"]
+        assert mock_server.requests == calls
+
+    def test_large_response_gzipped(self, api_server):
+        """Test clients that accept gzip get the pre-compressed body under its own tag"""
+        with httpx.Client(base_url=api_server.url, timeout=30) as client:
+            plain = client.get("/api/enrich/198.51.100.8", headers={"Accept-Encoding": "identity"})
+            assert len(plain.content) >= COMPRESS_MIN_BYTES
+            compressed = client.get("/api/enrich/198.51.100.8", headers={"Accept-Encoding": "gzip"})
+        assert compressed.headers["Content-Encoding"] == "gzip"
+        assert compressed.content == plain.content  # httpx decodes it
+        assert compressed.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+        assert not compressed.headers["ETag"].startswith("W/")
+
+    def test_invalid_indicator(self, api_server):
+        """Test an unrecognised indicator is a 400 and nothing is cached"""
+        with httpx.Client(base_url=api_server.url, timeout=30) as client:
+            response = client.get("/api/enrich/not an indicator")
+        assert response.status_code == 400
+        assert len(api.result_cache) == 0
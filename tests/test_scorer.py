@@ -0,0 +1,248 @@
+"""
+Tests for Risk Scorer
+"""
+import random
+import pytest
+from src.fusion.scorer import RiskScorer
+from src.fusion.batch import BatchRiskScorer, ScoringFeatures
+from src.fusion.rules import load_rules, compile_rules
+from src.config import config
+
+
+def _success(source, data):
+    return {"indicator": "x", "source": source, "status": "success", "data": data}
+
+
+def _error(source):
+    return {"indicator": "x", "source": source, "status": "error", "error": "boom"}
+
+
+def _random_results(rng):
+    """Build a random orchestrator result dict"""
+    results = {}
+    builders = {
+        "VirusTotal": lambda: {"detections": rng.randint(0, 70), "total": rng.choice([0, 70, 90])},
+        "OTX": lambda: {"pulse_count": rng.randint(0, 30)},
+        "Shodan": lambda: {"vulns": [f"CVE-{i}" for i in range(rng.randint(0, 6))]},
+        "AbuseIPDB": lambda: {"abuse_confidence_score": rng.randint(0, 100)},
+        "Censys": lambda: {"services": [{"port": rng.choice([22, 80, 443, 3389])} for _ in range(rng.randint(0, 3))]},
+    }
+    for source, build in builders.items():
+        roll = rng.random()
+        if roll < 0.6:
+            results[source] = _success(source, build())
+        elif roll < 0.8:
+            results[source] = _error(source)
+    results['_metadata'] = {"execution_time": 0.1}
+    return results
+
+
+class TestRiskScorer:
+    """Test scalar risk scoring"""
+
+    def test_clean_indicator_is_low(self):
+        """Test indicator with no findings scores LOW"""
+        results = {"VirusTotal": _success("VirusTotal", {"detections": 0, "total": 70})}
+        risk = RiskScorer.calculate_risk(results)
+        assert risk.score == 0.0
+        assert risk.severity == "LOW"
+        assert risk.confidence == 0.9
+
+    def test_malicious_indicator_is_critical(self):
+        """Test indicator flagged everywhere scores CRITICAL"""
+        results = {
+            "VirusTotal": _success("VirusTotal", {"detections": 70, "total": 70}),
+            "OTX": _success("OTX", {"pulse_count": 20}),
+            "Shodan": _success("Shodan", {"vulns": ["a", "b", "c"]}),
+            "AbuseIPDB": _success("AbuseIPDB", {"abuse_confidence_score": 100}),
+        }
+        risk = RiskScorer.calculate_risk(results)
+        assert risk.score == 10.0
+        assert risk.severity == "CRITICAL"
+        assert len(risk.components) == 4
+
+    def test_errors_lower_confidence(self):
+        """Test failed sources reduce confidence"""
+        results = {
+            "VirusTotal": _success("VirusTotal", {"detections": 0, "total": 70}),
+            "OTX": _error("OTX"),
+            "Shodan": _error("Shodan"),
+            "AbuseIPDB": _error("AbuseIPDB"),
+        }
+        assert RiskScorer.calculate_risk(results).confidence == 0.5
+
+
+    def test_score_features_matches_calculate_risk(self):
+        """Test scoring stored per-source features equals scoring whole results"""
+        rng = random.Random(11)
+        for _ in range(200):
+            results = _random_results(rng)
+            sources = {k: v for k, v in results.items() if k != '_metadata'}
+            features = {source: RiskScorer.extract_features(source, r) for source, r in sources.items()}
+            statuses = {source: r["status"] for source, r in sources.items()}
+
+            expected = RiskScorer.calculate_risk(results)
+            actual = RiskScorer.score_features(features, statuses)
+            assert (actual.score, actual.severity, actual.confidence) == (expected.score, expected.severity, expected.confidence)
+            assert actual.components == expected.components
+
+class TestBatchRiskScorer:
+    """Test vectorized batch scoring matches the scalar path"""
+
+    def test_batch_matches_scalar(self):
+        """Test every row of a random batch matches calculate_risk"""
+        rng = random.Random(1234)
+        batch = [_random_results(rng) for _ in range(500)]
+        indicators = [f"ind-{i}" for i in range(len(batch))]
+
+        features = ScoringFeatures.from_results(indicators, batch)
+        scored = BatchRiskScorer.calculate_risk_batch(features)
+        materialized = scored.to_risk_scores()
+
+        for row, results in enumerate(batch):
+            expected = RiskScorer.calculate_risk(results)
+            actual = materialized[row]
+            assert actual.score == expected.score
+            assert actual.severity == expected.severity
+            assert actual.severity_emoji == expected.severity_emoji
+            assert actual.confidence == expected.confidence
+            assert actual.components == expected.components
+            assert scored.severities[row] == expected.severity
+            assert scored.scores[row] == pytest.approx(expected.score)
+
+    def test_columnar_input(self):
+        """Test scoring directly from feature columns"""
+        features = ScoringFeatures(
+            indicators=["a", "b"],
+            columns={"vt_detections": [35, 0], "vt_total": [70, 70], "otx_pulse_count": [10, 0]},
+            available={"VirusTotal": [True, True], "OTX": [True, False]},
+        )
+        scored = BatchRiskScorer.calculate_risk_batch(features)
+        assert list(scored.scores) == [4.5, 0.0]
+        assert list(scored.severities) == ["MEDIUM", "LOW"]
+
+    def test_materializes_only_requested_rows(self):
+        """Test only the requested rows become RiskScore objects"""
+        features = ScoringFeatures(
+            indicators=["a", "b", "c"],
+            columns={"abuse_confidence_score": [10, 90, 50]},
+            available={"AbuseIPDB": [True, True, True]},
+        )
+        scored = BatchRiskScorer.calculate_risk_batch(features)
+        risks = scored.to_risk_scores([1])
+        assert len(risks) == 1
+        assert risks[0].score == 0.9
+
+
+class TestScoringRules:
+    """Test declarative scoring rules"""
+
+    def test_default_rules_compile(self):
+        """Test bundled rules cover every scored source"""
+        rules = load_rules()
+        assert [r.source for r in rules.sources] == ["VirusTotal", "OTX", "Shodan", "AbuseIPDB", "Censys"]
+        assert rules.max_score == 10.0
+
+    def test_custom_weight(self):
+        """Test a tuned weight changes both scalar and batch scores"""
+        rules = compile_rules({
+            "sources": [{
+                "source": "OTX", "kind": "scaled", "feature": "pulse_count",
+                "scale": 10.0, "weight": 8.0, "cap": 8.0,
+                "details": "{pulse_count} pulses",
+                "features": [{"name": "pulse_count", "column": "otx_pulse_count"}],
+            }],
+            "severity": [{"min_score": 8.0, "label": "CRITICAL"}, {"min_score": 0.0, "label": "LOW"}],
+            "confidence": [{"min_response_rate": 0.0, "confidence": 0.5}],
+        })
+        results = {"OTX": _success("OTX", {"pulse_count": 10})}
+
+        risk = RiskScorer.calculate_risk(results, rules)
+        assert risk.score == 8.0
+        assert risk.severity == "CRITICAL"
+        assert risk.components[0]["details"] == "10 pulses"
+
+        features = ScoringFeatures.from_results(["a"], [results], rules)
+        assert BatchRiskScorer.calculate_risk_batch(features, rules).to_risk_scores()[0].score == 8.0
+
+    def test_invalid_rule_kind(self):
+        """Test unknown rule kinds are rejected at compile time"""
+        with pytest.raises(ValueError):
+            compile_rules({
+                "sources": [{"source": "OTX", "kind": "exponential"}],
+                "severity": [{"min_score": 0.0, "label": "LOW"}],
+                "confidence": [{"min_response_rate": 0.0, "confidence": 0.5}],
+            })
+
+    def test_undeclared_feature(self):
+        """Test rules must declare the features they read"""
+        with pytest.raises(ValueError):
+            compile_rules({
+                "sources": [{"source": "OTX", "kind": "scaled", "feature": "pulse_count", "scale": 10, "weight": 2}],
+                "severity": [{"min_score": 0.0, "label": "LOW"}],
+                "confidence": [{"min_response_rate": 0.0, "confidence": 0.5}],
+            })
+
+    def test_non_positive_scale(self):
+        """Test a zero scale is rejected at compile time, not on every score"""
+        with pytest.raises(ValueError, match="OTX: scale must be positive"):
+            compile_rules({
+                "sources": [{
+                    "source": "OTX", "kind": "scaled", "feature": "pulse_count", "scale": 0, "weight": 2,
+                    "features": [{"name": "pulse_count"}],
+                }],
+                "severity": [{"min_score": 0.0, "label": "LOW"}],
+                "confidence": [{"min_response_rate": 0.0, "confidence": 0.5}],
+            })
+
+    def test_unknown_details_placeholder(self):
+        """Test details templates may only name declared features"""
+        with pytest.raises(ValueError, match="OTX: details template references undeclared feature '{pulses}'"):
+            compile_rules({
+                "sources": [{
+                    "source": "OTX", "kind": "scaled", "feature": "pulse_count", "scale": 10, "weight": 2,
+                    "details": "{pulses} pulses", "features": [{"name": "pulse_count"}],
+                }],
+                "severity": [{"min_score": 0.0, "label": "LOW"}],
+                "confidence": [{"min_response_rate": 0.0, "confidence": 0.5}],
+            })
+
+    def test_missing_keys_are_value_errors(self):
+        """Test a feature without a name or a band without its threshold fails as ValueError"""
+        with pytest.raises(ValueError, match="missing 'name'"):
+            compile_rules({
+                "sources": [{"source": "OTX", "kind": "match", "feature": "x", "points": 1, "features": [{}]}],
+                "severity": [{"min_score": 0.0, "label": "LOW"}],
+                "confidence": [{"min_response_rate": 0.0, "confidence": 0.5}],
+            })
+        with pytest.raises(ValueError, match="Severity band is missing 'min_score'"):
+            compile_rules({
+                "severity": [{"label": "LOW"}],
+                "confidence": [{"min_response_rate": 0.0, "confidence": 0.5}],
+            })
+
+    def test_rules_load_on_first_use(self, tmp_path, monkeypatch):
+        """Test a bad rules file fails the first score rather than the import"""
+        bad = tmp_path / "rules.toml"
+        bad.write_text('[[severity]]\nlabel = "LOW"\n')
+        monkeypatch.setattr(config.app_config, "scoring_rules_path", str(bad))
+        monkeypatch.setattr(RiskScorer, "_rules", None)
+        with pytest.raises(ValueError):
+            RiskScorer.get_rules()
+
+    def test_hot_swap(self, tmp_path):
+        """Test reloading rules swaps the active rule set"""
+        original = RiskScorer.get_rules()
+        custom = tmp_path / "rules.toml"
+        custom.write_text(
+            open(original.path, encoding="utf-8").read().replace("weight = 5.0", "weight = 10.0", 1),
+            encoding="utf-8"
+        )
+        results = {"VirusTotal": _success("VirusTotal", {"detections": 35, "total": 70})}
+
+        try:
+            assert RiskScorer.calculate_risk(results).score == 2.5
+            RiskScorer.load_rules(str(custom))
+            assert RiskScorer.calculate_risk(results).score == 5.0
+        finally:
+            RiskScorer.set_rules(original)
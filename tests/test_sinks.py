@@ -0,0 +1,204 @@
+"""
+Tests for SIEM Output Sinks
+"""
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.models import EnrichmentRecord
+from src.fusion.scorer import RiskScorer
+from src.sinks import BatchingSink, ElasticsearchSink, SinkError, SplunkHECSink
+
+
+class StandInServer:
+    """Local stand-in for a bulk endpoint; replies with scripted status codes"""
+
+    def __init__(self, statuses=None, bulk_errors=None):
+        self.requests = []
+        self.statuses = list(statuses or [])
+        self.bulk_errors = bulk_errors
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if self.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                server.requests.append((self.path, dict(self.headers), body))
+
+                status = server.statuses.pop(0) if server.statuses else 200
+                payload = {"errors": False, "items": []}
+                if status == 200 and server.bulk_errors:
+                    payload = server.bulk_errors.pop(0)
+                reply = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(reply)))
+                if status == 429:
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(reply)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def documents(self):
+        """Decoded documents from every request, in order"""
+        return [json.loads(line) for _, _, body in self.requests for line in body.splitlines()]
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def make_server():
+    servers = []
+
+    def factory(**kwargs):
+        server = StandInServer(**kwargs)
+        servers.append(server)
+        return server
+
+    yield factory
+    for server in servers:
+        server.stop()
+
+
+def make_result(i: int):
+    indicator = f"10.0.0.{i}"
+    results = {"OTX": EnrichmentRecord(indicator, "OTX", data={"pulse_count": i})}
+    return indicator, results, RiskScorer.calculate_risk(results)
+
+
+class TestElasticsearchSink:
+    """Test Elasticsearch _bulk batching"""
+
+    def test_batches_by_size(self, make_server):
+        """Test documents are sent gzip'd in batches of max_batch_docs"""
+        server = make_server()
+        with ElasticsearchSink(server.url, index="tf", max_batch_docs=4, flush_interval=5) as sink:
+            for i in range(10):
+                sink.send_result(*make_result(i))
+
+        assert [path for path, _, _ in server.requests] == ["/_bulk"] * 3
+        assert server.requests[0][1]["Content-Type"] == "application/x-ndjson"
+        documents = server.documents()
+        assert documents[0] == {"index": {"_index": "tf", "_id": documents[0]["index"]["_id"]}}
+        assert [d["indicator"] for d in documents[1::2]] == [f"10.0.0.{i}" for i in range(10)]
+        assert sink.stats["sent"] == 10
+
+    def test_flushes_on_interval(self, make_server):
+        """Test a partial batch is sent once flush_interval elapses"""
+        server = make_server()
+        sink = ElasticsearchSink(server.url, max_batch_docs=100, flush_interval=0.05)
+        try:
+            sink.send_result(*make_result(1))
+            assert sink.flush(timeout=5)
+            assert len(server.requests) == 1
+        finally:
+            sink.close()
+
+    def test_retries_rejected_items(self, make_server):
+        """Test only items rejected with a retryable status are resent"""
+        errors = {"errors": True, "items": [
+            {"index": {"status": 201}},
+            {"index": {"status": 429}},
+            {"index": {"status": 400}},
+        ]}
+        server = make_server(statuses=[503], bulk_errors=[errors])
+        with ElasticsearchSink(server.url, max_batch_docs=3, backoff_factor=0.01) as sink:
+            for i in range(3):
+                sink.send_result(*make_result(i))
+
+        assert len(server.requests) == 3  # 503, partial failure, retry of one item
+        assert len(server.requests[2][2].splitlines()) == 2
+        assert sink.stats == {**sink.stats, "sent": 2, "failed": 1, "retries": 2}
+
+    def test_spill_and_replay(self, make_server, tmp_path):
+        """Test batches are spilled when the endpoint is down and replayed later"""
+        down = make_server(statuses=[503] * 10)
+        with ElasticsearchSink(down.url, max_retries=1, backoff_factor=0.01, spill_dir=str(tmp_path)) as sink:
+            for i in range(3):
+                sink.send_result(*make_result(i))
+        assert sink.stats["spilled"] == 3
+        assert len(sink.spilled_files()) == 1
+
+        up = make_server()
+        with ElasticsearchSink(up.url, spill_dir=str(tmp_path)) as sink:
+            assert sink.flush(timeout=5)
+        assert sink.stats["replayed"] == 3
+        assert sink.spilled_files() == []
+        assert len(up.documents()) == 6
+
+
+class BrokenSink(ElasticsearchSink):
+    """Sink whose sender thread dies on the first response"""
+
+    def check_response(self, response, lines):
+        raise RuntimeError("bad response handler")
+
+
+class TestBatchingSink:
+    """Test the base class contract and sender failures"""
+
+    def test_encode_required(self):
+        """Test a sink without encode() can't be created"""
+        class Incomplete(BatchingSink):
+            pass
+
+        with pytest.raises(TypeError):
+            Incomplete("http://127.0.0.1:9")
+
+    def test_dead_sender_unblocks_producer(self, make_server):
+        """Test a producer blocked on a full queue gets SinkError once the sender dies"""
+        server = make_server()
+        sink = BrokenSink(server.url, max_batch_docs=1, max_queue=1)
+        try:
+            with pytest.raises(SinkError, match="bad response handler"):
+                for i in range(5):
+                    sink.send_result(*make_result(i), timeout=5)
+            with pytest.raises(SinkError):
+                sink.flush(timeout=5)
+        finally:
+            sink.close(timeout=1)
+
+    def test_api_drops_results_for_dead_sink(self, make_server, monkeypatch):
+        """Test a sink whose sender died doesn't fail API enrichments"""
+        from api import main as api
+
+        server = make_server()
+        sink = BrokenSink(server.url, max_batch_docs=1)
+        monkeypatch.setattr(api, "_sinks", [sink])
+        try:
+            sink.send_result(*make_result(0))
+            sink._thread.join(5)
+            for i in range(3):
+                api.forward_to_sinks(*make_result(i))
+        finally:
+            sink.close(timeout=1)
+
+
+class TestSplunkHECSink:
+    """Test Splunk HEC batching"""
+
+    def test_hec_events(self, make_server):
+        """Test events carry the HEC envelope and token"""
+        server = make_server()
+        with SplunkHECSink(server.url, "secret-token", index="threat") as sink:
+            sink.send_result(*make_result(7))
+
+        path, headers, _ = server.requests[0]
+        event, = server.documents()
+        assert path == "/services/collector/event"
+        assert headers["Authorization"] == "Splunk secret-token"
+        assert event["index"] == "threat"
+        assert event["event"]["otx_pulse_count"] == 7
+        assert isinstance(event["time"], float)
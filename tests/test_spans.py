@@ -0,0 +1,126 @@
+"""
+Tests for Phase Spans and Profiling
+"""
+import json
+import pstats
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from click.testing import CliRunner
+from src import main
+from src.agents.base import EnrichmentAgent
+from src.clients.http_client import HTTPClient
+from src.clients.rate_limiter import RateLimiter, rate_limit
+from src.fusion.orchestrator import EnrichmentOrchestrator
+from src.models import IndicatorType
+from src.telemetry.spans import span, trace, collapsed_stacks, current_span
+
+RateLimiter.register_limiter('spantest', requests_per_minute=6000)
+
+
+@pytest.fixture
+def json_server():
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = json.dumps({"pulse_count": 3}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class HTTPAgent(EnrichmentAgent):
+    """Agent making a real (local) HTTP request behind a rate limiter"""
+
+    def __init__(self, url: str, name: str = "OTX"):
+        super().__init__("key", name)
+        self.url = url
+        self.client = HTTPClient(timeout=5, provider=name)
+
+    @rate_limit('spantest')
+    def enrich(self, indicator, itype):
+        return self.create_result(indicator, self.fetch_json("general", indicator, f"{self.url}/{indicator}"))
+
+
+def names(node):
+    return {path[-1] for path, _ in node.walk()}
+
+
+class TestSpans:
+    """Test the span tree recorded per enrichment"""
+
+    def test_span_without_trace_is_noop(self):
+        """Test spans outside a trace record nothing"""
+        with span("validate") as recorded:
+            assert recorded is None
+        assert current_span() is None
+
+    def test_agent_phases_nest_under_agent(self, json_server):
+        """Test limiter wait, connect, first byte, body and parse are recorded per agent in pool threads"""
+        orchestrator = EnrichmentOrchestrator([HTTPAgent(json_server, "OTX"), HTTPAgent(json_server, "AbuseIPDB")])
+        with trace("enrich") as root:
+            results = orchestrator.enrich_parallel("8.8.8.8", IndicatorType.IP_V4)
+
+        assert results["OTX"].status == "success"
+        (agents,) = root.children
+        assert agents.name == "agents"
+        assert {child.name for child in agents.children} == {"OTX", "AbuseIPDB"}
+        otx = next(child for child in agents.children if child.name == "OTX")
+        assert {"limiter_wait", "first_byte", "connect", "body", "parse"} <= names(otx)
+
+        phases = results["_metadata"]["phases"]["OTX"]
+        assert phases["total"] >= phases["first_byte"] >= phases["connect"]
+
+    def test_phases_recorded_without_outer_trace(self, json_server):
+        """Test every enrichment reports per-agent phase timings in its metadata"""
+        results = EnrichmentOrchestrator([HTTPAgent(json_server)]).enrich_parallel("8.8.8.8", IndicatorType.IP_V4)
+        assert "first_byte" in results["_metadata"]["phases"]["OTX"]
+
+    def test_collapsed_stacks(self):
+        """Test collapsed stacks carry full paths and self time in microseconds"""
+        with trace("enrich") as root:
+            with span("agents"):
+                with span("Shodan"):
+                    with span("first byte"):
+                        time.sleep(0.002)
+        lines = collapsed_stacks(root)
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+        (leaf,) = [line for line in lines if line.startswith("enrich;agents;Shodan;first_byte ")]
+        assert int(leaf.rsplit(" ", 1)[1]) >= 2000
+
+
+class TestProfileCommand:
+    """Test `threatfusion enrich --profile`"""
+
+    def test_profile_outputs(self, json_server, tmp_path, monkeypatch):
+        """Test the span tree, cProfile stats and collapsed stacks are produced"""
+        monkeypatch.setattr(main, "initialize_agents", lambda: [HTTPAgent(json_server)])
+        monkeypatch.setattr(main, "forward_to_sinks", lambda entries: 0)
+        stats_path, folded_path = tmp_path / "enrich.prof", tmp_path / "enrich.folded"
+
+        result = CliRunner().invoke(main.cli, [
+            "enrich", "8.8.8.8", "--output", "json",
+            "--profile", "--cprofile", str(stats_path), "--flamegraph", str(folded_path)
+        ])
+
+        assert result.exit_code == 0, result.output
+        assert "first_byte" in result.output
+        # Agent calls ran in pool threads and are merged into the stats
+        stats = pstats.Stats(str(stats_path))
+        assert any(function == "fetch_json" for _, _, function in stats.stats)
+        folded = folded_path.read_text().splitlines()
+        assert any(line.startswith("enrich;agents;OTX;first_byte") for line in folded)
+        assert any(line.startswith("enrich;score ") for line in folded)
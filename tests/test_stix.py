@@ -0,0 +1,95 @@
+"""
+Tests for STIX 2.1 Export
+"""
+import io
+import json
+from datetime import datetime, timedelta
+from src.models import EnrichmentRecord
+from src.fusion.scorer import RiskScorer
+from src.reporting.stix import StixBundleWriter, UNKNOWN_CREATED, build_objects
+
+
+def make_entry(indicator: str):
+    results = {
+        "VirusTotal": EnrichmentRecord(indicator, "VirusTotal", data={"detections": 40, "total": 70}),
+        "OTX": EnrichmentRecord(indicator, "OTX", data={"pulse_count": 0}),
+        "Shodan": EnrichmentRecord(indicator, "Shodan", status="error", error="timeout"),
+    }
+    return indicator, results, RiskScorer.calculate_risk(results)
+
+
+class TestStixExport:
+    """Test STIX object mapping and bundle streaming"""
+
+    def test_objects_for_ip(self):
+        """Test an IP maps to an observable, indicator, observed-data and notes"""
+        objects = list(build_objects(*make_entry("1.2.3.4")))
+        types = [o["type"] for o in objects]
+
+        assert types == ["ipv4-addr", "indicator", "observed-data", "note", "note"]
+        assert objects[1]["pattern"] == "[ipv4-addr:value = '1.2.3.4']"
+        assert objects[2]["object_refs"] == [objects[0]["id"]]
+        assert objects[3]["object_refs"] == [objects[1]["id"], objects[2]["id"]]
+
+    def test_deterministic_ids(self):
+        """Test re-exporting an indicator yields the same IDs"""
+        first_seen = datetime(2024, 5, 1)
+        first = [o["id"] for o in build_objects(*make_entry("evil.example.com"), first_seen=first_seen)]
+        second = [o["id"] for o in build_objects(*make_entry("evil.example.com"), first_seen=first_seen)]
+        assert first == second
+
+    def test_reexport_advances_only_modified(self):
+        """Test a later export of the same objects keeps created and moves modified"""
+        first_seen = datetime(2024, 5, 1)
+        indicator, results, risk_score = make_entry("1.2.3.4")
+        first = list(build_objects(indicator, results, risk_score, first_seen=first_seen))
+        risk_score.timestamp += timedelta(days=1)
+        later = list(build_objects(indicator, results, risk_score, first_seen=first_seen))
+
+        for before, after in zip(first[1:], later[1:]):
+            assert after["id"] == before["id"]
+            assert after["created"] == before["created"] == "2024-05-01T00:00:00.000Z"
+            assert after["modified"] > before["modified"]
+
+    def test_unknown_first_seen_keeps_ids(self):
+        """Test without a first-seen time, re-exports keep the IDs and a fixed created"""
+        indicator, results, risk_score = make_entry("1.2.3.4")
+        first = list(build_objects(indicator, results, risk_score))
+        risk_score.timestamp += timedelta(days=1)
+        later = list(build_objects(indicator, results, risk_score))
+
+        assert [o["id"] for o in later] == [o["id"] for o in first]
+        for before, after in zip(first[1:], later[1:]):
+            assert after["created"] == before["created"] == UNKNOWN_CREATED
+            assert after["modified"] > before["modified"]
+
+    def test_ids_ignore_first_seen(self):
+        """Test IDs depend on the indicator and source only"""
+        known = [o["id"] for o in build_objects(*make_entry("1.2.3.4"), first_seen=datetime(2024, 5, 1))]
+        unknown = [o["id"] for o in build_objects(*make_entry("1.2.3.4"))]
+        assert known == unknown
+
+    def test_spec_observable_id(self):
+        """Test observable IDs follow the STIX 2.1 UUIDv5 derivation"""
+        observable = next(iter(build_objects(*make_entry("198.51.100.3"))))
+        # Reference value computed with the stix2 library
+        assert observable["id"] == "ipv4-addr--28bb3599-77cd-5a82-a950-b5bc3caf07c4"
+
+    def test_hash_pattern(self):
+        """Test file hashes use quoted hash algorithm names in patterns"""
+        sha256 = "a" * 64
+        objects = list(build_objects(*make_entry(sha256)))
+        assert objects[0]["hashes"] == {"SHA-256": sha256}
+        assert objects[1]["pattern"] == f"[file:hashes.'SHA-256' = '{sha256}']"
+
+    def test_bundle_stream(self):
+        """Test the streamed bundle is valid JSON and skips unmappable indicators"""
+        stream = io.StringIO()
+        with StixBundleWriter(stream) as writer:
+            count = writer.write_many(make_entry(i) for i in ["1.2.3.4", "not an indicator!", "5.6.7.8"])
+
+        bundle = json.loads(stream.getvalue())
+        assert count == 2
+        assert bundle["type"] == "bundle"
+        assert bundle["objects"][0]["type"] == "identity"
+        assert len(bundle["objects"]) == 1 + 2 * 5
@@ -97,3 +97,23 @@ class TestEdgeCases:
         ipv6 = "2001:0db8:85a3:0000:0000:8a2e:0370:7334"
         indicator = IndicatorValidator.validate(ipv6)
         assert indicator.type == IndicatorType.IP_V6
+
+
+class TestCanonicalize:
+    """Test canonical indicator forms"""
+    
+    def test_equivalent_spellings(self):
+        """Test equivalent spellings share one canonical form"""
+        assert IndicatorValidator.canonicalize("2001:0DB8:0000::0001") == "2001:db8::1"
+        assert IndicatorValidator.canonicalize(" Example.COM. ") == "example.com"
+        assert IndicatorValidator.canonicalize("D131DD02C5E6EEC4693D61A8D9CA3759") == "d131dd02c5e6eec4693d61a8d9ca3759"
+    
+    def test_trailing_dot_only_stripped_from_domains(self):
+        """Test only a domain's trailing dot is dropped"""
+        assert IndicatorValidator.canonicalize("http://a.example/x.") == "http://a.example/x."
+        assert IndicatorValidator.canonicalize("1.2.3.4.") == "1.2.3.4."
+        assert IndicatorValidator.canonicalize("User@Example.com.") == "user@example.com."
+    
+    def test_url_path_case_kept(self):
+        """Test URL scheme and host are lower-cased but the path is not"""
+        assert IndicatorValidator.canonicalize("HTTPS://Evil.Example.com/Payload.EXE") == "https://evil.example.com/Payload.EXE"
@@ -0,0 +1,163 @@
+"""
+Tests for Shared Connection Pools, the DNS Cache and Connection Warm-up
+"""
+import socket
+import time
+import pytest
+from benchmarks.mock_providers import Latency, MockConfig, MockProviderServer, mock_agents, unlimit_providers
+from src.clients.adaptive_timeout import AdaptiveTimeouts
+from src.clients.dns_cache import DNSCache
+from src.clients.http_client import ConnectionPools, HTTPClient
+from src.clients.rate_limiter import RateLimiter
+from src.clients.warmup import ConnectionWarmer, provider_origins
+from src.models import IndicatorType
+from src.telemetry import REGISTRY
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingLookup:
+    def __init__(self, addresses=("127.0.0.1",), ttl: float = 30.0):
+        self.addresses = list(addresses)
+        self.ttl = ttl
+        self.calls = []
+
+    def __call__(self, host: str):
+        self.calls.append(host)
+        return self.addresses, self.ttl
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    yield
+    DNSCache.configure()
+    ConnectionPools.clear()
+    AdaptiveTimeouts.configure()
+
+
+@pytest.fixture
+def mock_url():
+    previous = unlimit_providers()
+    server = MockProviderServer(MockConfig(latency=Latency(0, 0), idle_timeout=0.5))
+    yield server.start()
+    server.stop()
+    for name, limiter in previous.items():
+        RateLimiter.install(name, limiter)
+
+
+def connects(provider: str) -> float:
+    return AdaptiveTimeouts.get(provider).connect.count
+
+
+class TestDNSCache:
+    """Test addresses are reused for their TTL"""
+
+    def test_cached_until_ttl(self):
+        """Test one lookup per TTL, then a refresh"""
+        clock, lookup = FakeClock(), CountingLookup(ttl=30)
+        DNSCache.configure(lookup=lookup, clock=clock)
+        assert DNSCache.resolve("api.example") == ["127.0.0.1"]
+        clock.now = 29
+        DNSCache.resolve("api.example")
+        assert lookup.calls == ["api.example"]
+        clock.now = 30
+        DNSCache.resolve("api.example")
+        assert len(lookup.calls) == 2
+        assert DNSCache.states()["api.example"]["expires_in"] == 30
+
+    def test_ip_literals_not_looked_up(self):
+        """Test IP addresses are returned without a lookup"""
+        lookup = CountingLookup()
+        DNSCache.configure(lookup=lookup)
+        assert DNSCache.resolve("::1") == ["::1"]
+        assert lookup.calls == []
+
+    def test_failures_not_cached(self):
+        """Test a failed lookup raises gaierror and is retried next time"""
+        lookup = CountingLookup(addresses=())
+        DNSCache.configure(lookup=lookup)
+        for _ in range(2):
+            with pytest.raises(socket.gaierror):
+                DNSCache.resolve("missing.example")
+        assert len(lookup.calls) == 2
+
+    def test_new_connections_use_cache(self, mock_url):
+        """Test connections to a host name resolve it once per TTL"""
+        lookup = CountingLookup()
+        DNSCache.configure(lookup=lookup)
+        url = mock_url.replace("127.0.0.1", "provider.invalid") + "/abuseipdb/api/v2/check?ipAddress=192.0.2.1"
+        for _ in range(3):
+            client = HTTPClient(timeout=5, provider="DNSTest", shared_pools=False)
+            assert client.get_json(url)["data"]["ipAddress"] == "192.0.2.1"
+            client.close()
+        assert connects("DNSTest") == 3
+        assert lookup.calls == ["provider.invalid"]
+
+
+class TestConnectionPools:
+    """Test clients of one provider share connections"""
+
+    def test_clients_reuse_connection(self, mock_url):
+        """Test a new client of the same provider reuses an earlier client's connection"""
+        url = mock_url + "/abuseipdb/api/v2/check?ipAddress=192.0.2.1"
+        for _ in range(3):
+            client = HTTPClient(timeout=5, provider="PoolTest")
+            client.get_json(url)
+            client.close()  # Leaves the shared pool open
+        assert connects("PoolTest") == 1
+
+    def test_providers_pooled_separately(self, mock_url):
+        """Test each provider has its own pool"""
+        url = mock_url + "/abuseipdb/api/v2/check?ipAddress=192.0.2.1"
+        HTTPClient(timeout=5, provider="PoolA").get_json(url)
+        HTTPClient(timeout=5, provider="PoolB").get_json(url)
+        assert ConnectionPools.get("PoolA") is not ConnectionPools.get("PoolB")
+        assert connects("PoolA") == connects("PoolB") == 1
+
+
+class TestConnectionWarmer:
+    """Test pre-connecting and keep-alive probes"""
+
+    def test_origins_from_agents(self):
+        """Test each provider is warmed at the scheme and host of its BASE_URL"""
+        origins = provider_origins(mock_agents("http://127.0.0.1:8080"))
+        assert origins["Shodan"] == "http://127.0.0.1:8080/"
+        assert len(origins) == 5
+
+    def test_warm_start_needs_no_new_connections(self, mock_url):
+        """Test lookups after warm() reuse the warmer's connections"""
+        warmer = ConnectionWarmer(provider_origins(mock_agents(mock_url)), interval=0)
+        assert all(seconds is not None for seconds in warmer.warm().values())
+        assert connects("Shodan") == 1
+
+        agent = next(agent for agent in mock_agents(mock_url) if agent.name == "Shodan")
+        agent.enrich("192.0.2.1", IndicatorType.IP_V4)
+        assert connects("Shodan") == 1
+        assert warmer.states()["Shodan"]["first_seconds"] is not None
+        assert 'threatfusion_provider_probe_seconds{provider="Shodan",probe="first"}' in REGISTRY.render()
+
+    def test_keepalive_outlasts_idle_timeout(self, mock_url):
+        """Test probes more frequent than the server's idle timeout keep the connection open"""
+        warmer = ConnectionWarmer({"Shodan": mock_url + "/"}, interval=0.2)
+        warmer.start()
+        time.sleep(1.2)  # Over twice the mock's 0.5 s idle timeout
+        warmer.stop()
+        state = warmer.states()["Shodan"]
+        assert state["probes"] >= 4
+        assert state["steady_seconds"] is not None
+        assert connects("Shodan") == 1
+
+    def test_unreachable_host_counts_errors(self):
+        """Test a failed probe is counted and retried next time"""
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        warmer = ConnectionWarmer({"Shodan": f"http://127.0.0.1:{port}/"}, interval=0, timeout=1)
+        assert warmer.warm() == {"Shodan": None}
+        assert warmer.states()["Shodan"]["errors"] == 1
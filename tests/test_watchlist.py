@@ -0,0 +1,126 @@
+"""
+Tests for Watchlist Re-enrichment
+"""
+from src.agents.base import EnrichmentAgent
+from src.fusion.orchestrator import EnrichmentOrchestrator
+from src.watchlist import WatchlistStore, WatchlistScheduler, parse_ttls
+
+HOUR = 3600.0
+
+
+class ScriptedAgent(EnrichmentAgent):
+    """Agent whose answer the test controls"""
+
+    def __init__(self, name: str, data: dict):
+        super().__init__("key", name)
+        self.data = data
+        self.fail = False
+        self.calls = 0
+
+    def enrich(self, indicator, itype):
+        self.calls += 1
+        if self.fail:
+            return self.create_result(indicator, {}, status="error", error="HTTP 503")
+        return self.create_result(indicator, dict(self.data))
+
+
+def make_scheduler(tmp_path, *agents, **kwargs):
+    store = WatchlistStore(str(tmp_path / "watch.db"))
+    deltas = []
+    scheduler = WatchlistScheduler(
+        store, EnrichmentOrchestrator(list(agents)), on_delta=deltas.append, **kwargs
+    )
+    return scheduler, deltas
+
+
+class TestWatchlistScheduler:
+    """Test per-source scheduling and change detection"""
+
+    def test_unchanged_answer_emits_nothing(self, tmp_path):
+        """Test a re-check with the same answer skips rescoring and stretches the interval"""
+        otx = ScriptedAgent("OTX", {"pulse_count": 4})
+        scheduler, deltas = make_scheduler(tmp_path, otx)
+        scheduler.add(["8.8.8.8"], now=0)
+
+        scheduler.run_once(now=0)
+        assert len(deltas) == 1  # First look establishes the baseline
+        assert deltas[0]["sources"]["OTX"]["first_check"]
+
+        state = scheduler.store.sources("8.8.8.8")["OTX"]
+        scheduler.run_once(now=state.next_due)
+        assert len(deltas) == 1
+        assert scheduler.stats["unchanged"] == 1
+        assert scheduler.store.sources("8.8.8.8")["OTX"].interval == 12 * HOUR * 1.5
+
+    def test_changed_field_emits_delta(self, tmp_path):
+        """Test a changed answer emits field and score deltas and shortens the interval"""
+        otx = ScriptedAgent("OTX", {"pulse_count": 0})
+        abuse = ScriptedAgent("AbuseIPDB", {"abuse_confidence_score": 0})
+        scheduler, deltas = make_scheduler(tmp_path, otx, abuse)
+        scheduler.add(["203.0.113.7"], now=0)
+        scheduler.run_once(now=0)
+
+        otx.data = {"pulse_count": 25}
+        scheduler.run_once(now=13 * HOUR)
+
+        delta = deltas[-1]
+        assert list(delta["sources"]) == ["OTX"]
+        assert delta["sources"]["OTX"]["fields"] == {"pulse_count": {"old": 0, "new": 25}}
+        assert delta["score"]["new"] > delta["score"]["old"]
+        assert scheduler.store.item("203.0.113.7")["score"] == delta["score"]["new"]
+        assert scheduler.store.sources("203.0.113.7")["OTX"].interval == 6 * HOUR
+        assert abuse.calls == 2  # AbuseIPDB (6h TTL) was due again too, and unchanged
+
+    def test_sources_scheduled_independently(self, tmp_path):
+        """Test each source is re-checked on its own TTL"""
+        otx = ScriptedAgent("OTX", {"pulse_count": 1})
+        censys = ScriptedAgent("Censys", {"services": []})
+        scheduler, _ = make_scheduler(tmp_path, otx, censys)
+        scheduler.add(["8.8.8.8"], now=0)
+        scheduler.run_once(now=0)
+
+        scheduler.run_once(now=14 * HOUR)
+        assert (otx.calls, censys.calls) == (2, 1)
+
+    def test_error_keeps_last_answer(self, tmp_path):
+        """Test a failed re-check keeps the stored answer and retries soon"""
+        otx = ScriptedAgent("OTX", {"pulse_count": 4})
+        scheduler, deltas = make_scheduler(tmp_path, otx)
+        scheduler.add(["8.8.8.8"], now=0)
+        scheduler.run_once(now=0)
+        fingerprint = scheduler.store.sources("8.8.8.8")["OTX"].fingerprint
+
+        otx.fail = True
+        scheduler.run_once(now=13 * HOUR)
+        state = scheduler.store.sources("8.8.8.8")["OTX"]
+        assert state.fingerprint == fingerprint
+        assert state.next_due == 13 * HOUR + 15 * 60
+        assert len(deltas) == 1
+
+    def test_rate_budget_spreads_checks(self, tmp_path):
+        """Test one tick checks at most the source's share of its rate limit"""
+        otx = ScriptedAgent("OTX", {"pulse_count": 1})  # OTX: 10 requests/minute
+        scheduler, _ = make_scheduler(tmp_path, otx, tick_seconds=60, rate_share=0.8)
+        scheduler.add([f"198.51.100.{i}" for i in range(20)], now=0)
+
+        scheduler.run_once(now=0)
+        assert otx.calls == 8
+        scheduler.run_once(now=60)
+        assert otx.calls == 16
+
+    def test_equivalent_spellings_watched_once(self, tmp_path):
+        """Test indicators are stored in canonical form"""
+        scheduler, _ = make_scheduler(tmp_path, ScriptedAgent("OTX", {}))
+        assert scheduler.add(["Example.COM", "example.com.", "not valid!"]) == 1
+        assert scheduler.store.item("example.com") is not None
+
+
+class TestParseTTLs:
+    """Test TTL configuration"""
+
+    def test_overrides_defaults(self):
+        """Test configured TTLs override the per-source defaults"""
+        ttls = parse_ttls("AbuseIPDB=30m, Censys=2d")
+        assert ttls["AbuseIPDB"] == 1800
+        assert ttls["Censys"] == 2 * 86400
+        assert ttls["VirusTotal"] == 24 * HOUR